@@ -13,15 +13,22 @@ Workflow Stages:
     5. Export Generation - Create review-ready CSV outputs
 
 Features:
+    - In-process runner (get_runner) for the web UI and scheduler: warm DB
+      connection, parsed-ledger and price caches, one run at a time
+    - Per-year report cache: years whose trades, config and upstream lots and
+      carryover are unchanged keep their reports (src/core/report_cache.py)
     - Cascade mode for multi-year processing
     - Configurable year range processing
     - Automatic backup before processing
     - Comprehensive error logging
     - Progress tracking and status updates
+    - Optional per-stage profiling (src/utils/profiling.py)
 
 Usage:
     python auto_runner.py
     python auto_runner.py --cascade
+    python auto_runner.py --force   (recompute every year, ignoring the report cache)
+    python auto_runner.py --profile (per-stage CPU/memory profiles in outputs/logs/profiles)
     python auto_runner.py --years 2023,2024,2025
 
 Author: Crypto Transaction Tracker Team
@@ -31,6 +38,8 @@ Last Modified: December 2025
 
 import sys
 import json
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -44,6 +53,11 @@ try:
 except ImportError:
     # Fallback for direct execution
     import Crypto_Transaction_Engine as txn_app
+from src.core.jobs import JobCancelled, JobProgress, reporter_from_env
+from src.core.change_tracking import config_fingerprint, ensure_ledger_years, first_changed_year, ledger_fingerprints
+from src.core.report_cache import ReportCache, file_digest
+from src.utils.profiling import RunProfiler
+from src.utils.progress import JsonlProgressLog, ProgressHook
 
 # LOG_DIR will be set at runtime to allow safe imports by Test Suite
 LOG_DIR = None
@@ -72,9 +86,53 @@ def log(message, level="info"):
         ts_prefix = datetime.now().strftime("[%H:%M:%S] ")
         print(f"{ts_prefix}{message}")
 
-def run_automation():
+def _stage(reporter, percent, message):
+    """Record a stage change on the background job that started this run, if any."""
+    if reporter:
+        reporter.stage(percent, message)
+
+def _progress_hook(reporter):
+    """
+    Progress hook for this run: events go to outputs/logs/progress.jsonl and,
+    when started by the web UI, onto the job row (JobProgress is returned so
+    per-year engine spans can be added once the years are known).
+    """
+    progress_log = JsonlProgressLog(txn_app.OUTPUT_DIR / "logs" / "progress.jsonl")
+    task_id = reporter.job_id if reporter else f"autorunner_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    hook = ProgressHook(progress_log, task_id=task_id, propagate=(JobCancelled,))
+    job_progress = None
+    if reporter:
+        job_progress = hook.subscribe(JobProgress(reporter, {
+            'csv_rows': (0, 25), 'api_sync': (25, 30), 'manual_review': (90, 100),
+        }))
+    return hook, job_progress, progress_log
+
+def _engine_span(job_progress, year, start, end):
+    if job_progress is not None:
+        job_progress.spans[('engine', year)] = (start, end)
+
+def run_automation(cascade=None, reporter=None, db=None, ingest=None, force=None, profile=None):
+    """
+    Run the full pipeline once and return a summary of the years processed.
+
+    cascade, force and profile default to the --cascade / --force / --profile
+    flags and reporter to the job passed in the environment by the web UI.
+    With profile set each stage is profiled into outputs/logs/profiles. Years whose report
+    cache entry is still fresh (see src/core/report_cache.py) are skipped
+    unless force is set. A caller-owned db (and an Ingestor built on it) is
+    reused and left open; otherwise a DatabaseManager is opened and closed here.
+    """
     # Check for cascade mode
-    CASCADE_MODE = "--cascade" in sys.argv
+    CASCADE_MODE = "--cascade" in sys.argv if cascade is None else bool(cascade)
+    FORCE = "--force" in sys.argv if force is None else bool(force)
+    PROFILE = "--profile" in sys.argv if profile is None else bool(profile)
+    # Set when started by the web UI's job queue; progress goes to the job row
+    if reporter is None:
+        reporter = reporter_from_env()
+    progress, job_progress, progress_log = _progress_hook(reporter)
+    profiler = RunProfiler('autorunner', txn_app.OUTPUT_DIR / "logs" / "profiles", enabled=PROFILE)
+    if PROFILE:
+        progress.subscribe(profiler)
     
     # SAFETY: Ensure folders exist before starting (Safe because called at runtime, not import)
     txn_app.initialize_folders()
@@ -83,26 +141,70 @@ def run_automation():
     log(f"   CRYPTO TRANSACTION TRACKER AUTO-PILOT: STARTED {'(CASCADE MODE)' if CASCADE_MODE else ''}")
     log("=========================================")
 
-    db = None
+    owns_db = db is None
+    years_run, years_skipped = [], []
     try:
         # 1. INITIALIZE DATABASE
-        db = txn_app.DatabaseManager()
-        ingest = txn_app.Ingestor(db)
+        if owns_db:
+            db = txn_app.DatabaseManager()
+        if ingest is None:
+            ingest = txn_app.Ingestor(db)
+        ingest.progress = progress
         
         # 2. SYNC DATA
         log(">>> STEP 1: SYNCING DATA SOURCES")
-        ingest.run_csv_scan()
-        ingest.run_api_sync()
+        _stage(reporter, 0, 'Syncing data sources...')
+        with profiler.stage('csv_scan', rows_from='csv_rows'):
+            ingest.run_csv_scan()
+        _stage(reporter, 25, 'Syncing exchange APIs...')
+        with profiler.stage('api_sync'):
+            ingest.run_api_sync()
         log("   -> Sync process completed.")
         
         # 2B. STAKING REWARDS (StakeActivityCSV Integration)
         log(">>> STEP 1B: PROCESSING STAKING REWARDS (StakeActivity CSV)")
-        stake_mgr = txn_app.StakeActivityCSVManager(db)
-        stake_mgr.run()
+        _stage(reporter, 30, 'Processing staking rewards...')
+        with profiler.stage('staking'):
+            stake_mgr = txn_app.StakeActivityCSVManager(db)
+            stake_mgr.run()
         log("   -> Staking rewards processed.")
+
+        # 2C. REPORT CACHE (which years' reports are still current)
+        if FORCE:
+            ensure_ledger_years(db.conn, rebuild=True)  # re-derive the per-year aggregate from the trades
+        fingerprints = ledger_fingerprints(db.conn)
+        config_digest = config_fingerprint(txn_app.CONFIG_FILE)
+        wash_sale = bool(txn_app.GLOBAL_CONFIG.get('compliance', {}).get('wash_sale_rule', False))
+        cache = ReportCache.load(txn_app.OUTPUT_DIR, fingerprints,
+                                 [config_digest, file_digest(txn_app.BASE_DIR / 'INVENTORY_INIT_2025.json')],
+                                 wash_sale=wash_sale)
+        if FORCE:
+            log(">>> REPORT CACHE: Bypassed (--force); recomputing every year")
+
+        def needs_run(year):
+            if FORCE:
+                cache.misses += 1
+                return True
+            if cache.check(year):
+                log(f"   [SKIP] Year {year} reports are up to date.")
+                years_skipped.append(year)
+                return False
+            return True
+
+        def run_year(year):
+            engine = txn_app.TransactionEngine(db, year)
+            engine.progress = progress
+            with profiler.stage(f'engine_{year}', rows_from='engine'):
+                engine.run()
+            with profiler.stage(f'export_{year}'):
+                engine.export()
+            cache.record(year, engine)
+            years_run.append(year)
+            return engine
         
         # 3. CHECK FOR MISSING PRICES
-        zeros = db.get_zeros()
+        with profiler.stage('price_check'):
+            zeros = db.get_zeros()
         if not zeros.empty:
             log(f">>> STEP 2: DETECTED {len(zeros)} MISSING PRICES", level="warning")
             log(f"   [ACTION REQUIRED] Run Interactive_Review_Fixer.py to resolve missing price issues.", level="warning")
@@ -152,11 +254,13 @@ def run_automation():
             
             # Run sequentially for each year
             engine_curr = None
-            for year in range(start_year, current_year + 1):
+            year_count = current_year - start_year + 1
+            for i, year in enumerate(range(start_year, current_year + 1)):
                 log(f">>> PROCESSING YEAR {year}...")
-                engine = txn_app.TransactionEngine(db, year)
-                engine.run()
-                engine.export()
+                if not needs_run(year):
+                    continue
+                _engine_span(job_progress, year, 35 + 55 * i / year_count, 35 + 55 * (i + 1) / year_count)
+                engine = run_year(year)
                 log(f"   [SUCCESS] Completed {year}")
                 if year == current_year:
                     engine_curr = engine
@@ -175,43 +279,206 @@ def run_automation():
             
             if snapshot_file.exists():
                 log(f"   [SKIP] Year {prev_year} is already finalized.")
-            else:
+            elif needs_run(prev_year):
                 log(f"   [ACTION] Year {prev_year} not finalized. Running Report...")
-                engine_prev = txn_app.TransactionEngine(db, prev_year)
-                engine_prev.run()
-                engine_prev.export()
+                _engine_span(job_progress, prev_year, 35, 60)
+                run_year(prev_year)
                 log(f"   [SUCCESS] Finalized {prev_year} and created Snapshot.")
 
             # 6. RUN CURRENT YEAR (The "Live Tracker")
             log(f">>> STEP 4: UPDATING LIVE TRACKER FOR CURRENT YEAR ({current_year})")
-            engine_curr = txn_app.TransactionEngine(db, current_year)
-            engine_curr.run()
-            engine_curr.export()
-            log(f"   [SUCCESS] Updated 'Draft' reports for {current_year}.")
+            engine_curr = None
+            if needs_run(current_year):
+                _engine_span(job_progress, current_year, 60, 90)
+                engine_curr = run_year(current_year)
+                log(f"   [SUCCESS] Updated 'Draft' reports for {current_year}.")
         
         # 7. RUN MANUAL REVIEW ASSISTANT
         log(f">>> STEP 5: RUNNING MANUAL REVIEW ASSISTANT")
-        log("   Scanning for potential audit risks...")
-        try:
-            engine_curr.run_manual_review(db)
-        except Exception as e:
-            log(f"   [SKIP] Review assistant not available: {e}", level="warning")
+        if engine_curr is None:
+            log(f"   [SKIP] Reports for {current_year} unchanged; previous review still applies.")
+        else:
+            log("   Scanning for potential audit risks...")
+            _stage(reporter, 90, 'Running manual review assistant...')
+            try:
+                with profiler.stage('manual_review'):
+                    engine_curr.run_manual_review(db)
+            except Exception as e:
+                log(f"   [SKIP] Review assistant not available: {e}", level="warning")
 
-        # Mark run as complete
+        log(f">>> REPORT CACHE: {cache.summary()}")
+
+        # Mark run as complete and remember what it covered
         txn_app.mark_run_complete(success=True)
+        txn_app.update_status('ledger_fingerprints', fingerprints)
+        txn_app.update_status('config_fingerprint', config_digest)
         
         log("=========================================")
         log("   AUTO-PILOT: COMPLETED SUCCESSFULLY")
         log("=========================================\n") 
+        return {'cascade': CASCADE_MODE, 'years': years_run, 'skipped': years_skipped,
+                'cache': cache.stats()}
 
+    except JobCancelled:
+        log("[CANCELLED] Automation stopped at the user's request", level="warning")
+        raise
     except Exception as e:
         txn_app.mark_run_complete(success=False)
         log(f"[CRITICAL ERROR] Automation Failed: {e}")
         raise e
     finally:
-        if db:
+        progress_log.close()
+        try:
+            profiler.finish()
+        except OSError as e:
+            log(f"[PROFILE] Could not write profile summary: {e}", level="warning")
+        if db and owns_db:
             db.close()
 
+class RunInProgress(RuntimeError):
+    """Raised when a run is requested while another one is still going."""
+
+def _file_identity(path):
+    try:
+        st = Path(path).stat()
+        return (st.st_dev, st.st_ino)
+    except OSError:
+        return None
+
+def _config_stamp():
+    try:
+        return txn_app.CONFIG_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+
+class AutoRunner:
+    """
+    Long-lived in-process runner for processes that run calculations
+    repeatedly (web UI jobs, the scheduler).
+
+    Between runs it keeps the DatabaseManager open (with its parsed-ledger
+    cache) and the Ingestor with its PriceFetcher cache and ML service, so a
+    run only pays for what changed. Both are rebuilt when the database file
+    is replaced; config.json is re-read when it changes. A lock keeps runs
+    from overlapping.
+
+    has_pending_changes() is the cheap pre-launch check for change-driven
+    schedules. It reads the ledger through its own read-only connection
+    under a separate check lock, so reading the fingerprints never holds the run
+    lock; while that connection's data_version is unchanged since the last
+    clean check it answers without reading any trades.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.db = None
+        self.ingest = None
+        self._db_identity = None
+        self._config_stamp = None
+        self.runs = 0
+        self.last_result = None
+        self._check_lock = threading.Lock()
+        self._check_conn = None
+        self._check_identity = None
+        self._clean_token = None
+
+    @property
+    def running(self):
+        return self._lock.locked()
+
+    def _warm(self):
+        stamp = _config_stamp()
+        if stamp != self._config_stamp:
+            txn_app.reload_config()
+            self._config_stamp = stamp
+            self.ingest = None  # ML settings are read when the Ingestor is built
+        path = Path(txn_app.DB_FILE)
+        if (self.db is None or self.db.conn is None or self.db.db_file != path
+                or self._db_identity != _file_identity(path)):
+            self.close()
+            self.db = txn_app.DatabaseManager()
+            self._db_identity = _file_identity(path)
+        if self.ingest is None:
+            self.ingest = txn_app.Ingestor(self.db)
+        return self.db, self.ingest
+
+    def has_pending_changes(self):
+        """True if a run could change any report: new input files, edited
+        config.json, or trades that differ from the last successful run."""
+        if any(Path(txn_app.INPUT_DIR).glob('*.csv')):
+            return True
+        status = txn_app.get_status()
+        if status.get('config_fingerprint') != config_fingerprint(txn_app.CONFIG_FILE):
+            return True
+        recorded = status.get('ledger_fingerprints')
+        if recorded is None:
+            return True
+        with self._check_lock:
+            try:
+                conn = self._check_connection()
+                token = (conn.execute("PRAGMA data_version").fetchone()[0], json.dumps(recorded, sort_keys=True))
+                if self._clean_token is not None and token == self._clean_token:
+                    return False
+                if first_changed_year(recorded, ledger_fingerprints(conn)) is not None:
+                    return True
+            except sqlite3.Error:
+                return True
+            self._clean_token = token
+            return False
+
+    def _check_connection(self):
+        """Read-only connection for has_pending_changes(), reopened when the
+        database file is replaced. Caller holds self._check_lock."""
+        path = Path(txn_app.DB_FILE).resolve()
+        identity = _file_identity(path)
+        if identity is None:
+            raise sqlite3.OperationalError(f"no database at {path}")
+        if self._check_conn is None or self._check_identity != (path, identity):
+            if self._check_conn is not None:
+                self._check_conn.close()
+            self._check_conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            self._check_identity = (path, identity)
+            self._clean_token = None
+        return self._check_conn
+
+    def run(self, cascade=False, reporter=None, wait=False, force=False, profile=False):
+        """
+        Run the pipeline in this process. Raises RunInProgress if another run
+        holds the lock (or waits for it with wait=True).
+        """
+        if not self._lock.acquire(blocking=wait):
+            raise RunInProgress("A Transaction calculation is already running")
+        previous_context = txn_app.RUN_CONTEXT
+        try:
+            txn_app.set_run_context('autorunner')
+            db, ingest = self._warm()
+            self.last_result = run_automation(cascade=cascade, reporter=reporter, db=db, ingest=ingest,
+                                              force=force, profile=profile)
+            self.runs += 1
+            return self.last_result
+        finally:
+            if previous_context != 'autorunner':
+                txn_app.set_run_context(previous_context)
+            self._lock.release()
+
+    def close(self):
+        if self.ingest is not None:
+            self.ingest.flush_logs()
+        if self.db is not None:
+            self.db.close()
+        self.db = self.ingest = self._db_identity = None
+
+_runner = None
+_runner_lock = threading.Lock()
+
+def get_runner():
+    """Process-wide AutoRunner shared by the web UI and the scheduler."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = AutoRunner()
+        return _runner
+
 if __name__ == "__main__":
     try:
         run_automation()
@@ -54,7 +54,11 @@ from src.utils.constants import (
     WALLETS_ENCRYPTED_FILE,
     API_KEYS_FILE,
     WALLETS_FILE,
+    INTEGRITY_FULL_CHECK_HOURS,
 )
+from src.core import columnar, integrity, report_catalog, trade_queries
+from src.core.backup import build_backup_zip, build_trades_export_zip, decrypt_file, encrypt_file
+from src.core.snapshots import snapshot_store_for
 from src.core.encryption import (
     load_api_keys_file,
     save_api_keys_file,
@@ -62,8 +66,13 @@ from src.core.encryption import (
     save_wallets_file,
     DatabaseEncryption,
 )
-from src.web.scheduler import ScheduleManager
-from src.web import server as web_server
+from src.utils.lazy import lazy_module
+
+# The web server module pulls in Flask, the transaction engine and the ML
+# stack and initializes the database at import; only commands that need it
+# pay for that on first attribute access.
+web_server = lazy_module('src.web.server')
+txn_app = lazy_module('src.core.engine')
 
 # Check ToS acceptance
 from src.utils.tos_checker import check_and_prompt_tos
@@ -121,10 +130,16 @@ def _save_json(path: Path, data: Dict[str, Any]):
 def _mark_data_changed_safely():
     """Notify the engine that on-disk data changed, ignoring soft failures."""
     try:
-        web_server.txn_app.mark_data_changed()
+        txn_app.mark_data_changed()
     except Exception:
         pass
 
+
+def _db_connection():
+    """Connection to the trades database that does not import the web server."""
+    return trade_queries.connect(DB_FILE)
+
+
 def print_header(text):
     """Print formatted header"""
     print(f"\n{Colors.BOLD}{Colors.BLUE}{'=' * 70}{Colors.ENDC}")
@@ -186,6 +201,11 @@ def cmd_run(args):
     else:
         current_year = datetime.now().year
         print_info(f"Running for current year: {current_year}")
+    if getattr(args, 'force', False):
+        script_args.append('--force')
+    if getattr(args, 'profile', False):
+        print_info("Profiling each stage (outputs/logs/profiles)")
+        script_args.append('--profile')
     
     return run_python_script('auto_runner.py', *script_args)
 
@@ -196,8 +216,12 @@ def cmd_review(args):
     # Get year
     year = args.year if args.year else str(datetime.now().year)
     print_info(f"Reviewing activity year: {year}")
+    script_args = [year]
+    if getattr(args, 'profile', False):
+        print_info("Profiling the review session (outputs/logs/profiles)")
+        script_args.append('--profile')
     
-    return run_python_script('review_fixer.py', year)
+    return run_python_script('review_fixer.py', *script_args)
 
 def cmd_web(args):
     """Start web UI"""
@@ -297,6 +321,31 @@ def cmd_export(args):
         print(f"  • {report.name}")
     
     print_info(f"Reports location: {output_dir}")
+    if args.format == 'parquet':
+        return _export_parquet(output_dir, reports, args.output)
+    return True
+
+
+def _export_parquet(output_dir: Path, reports, output=None):
+    """Write Parquet copies of the year's reports and a trades snapshot."""
+    import pandas as pd
+    try:
+        written = []
+        for report in reports:
+            written.append(columnar.write_parquet(pd.read_csv(report), columnar.parquet_path(report)))
+        report_catalog.record(output_dir, written, source='cli')
+        dest = Path(output or output_dir.parent / 'exports' / f"trades_{datetime.now().strftime('%Y%m%d_%H%M%S')}.parquet")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        conn = web_server.get_db_connection()
+        try:
+            rows = columnar.write_trades_parquet(conn, dest)
+        finally:
+            conn.close()
+    except columnar.ColumnarUnavailable as e:
+        print_error(str(e))
+        return False
+    print_success(f"Wrote {len(written)} Parquet report(s) to {output_dir}")
+    print_success(f"Trades snapshot ({rows} rows) written to {dest}")
     return True
 
 
@@ -313,18 +362,20 @@ def cmd_tx_list(args):
     if args.source:
         filters['source'] = args.source
 
-    result = web_server.get_transactions(
-        page=args.page,
-        per_page=args.per_page,
-        search=args.search,
-        filters=filters or None,
-    )
+    if not Path(DB_FILE).exists():
+        result = {'transactions': [], 'total': 0, 'page': args.page, 'per_page': args.per_page, 'total_pages': 0}
+    else:
+        conn = _db_connection()
+        try:
+            result = trade_queries.list_trades(conn, args.page, args.per_page, args.search, filters or None)
+        finally:
+            conn.close()
     _pretty_json(result)
     return True
 
 
 def cmd_tx_add(args):
-    conn = web_server.get_db_connection()
+    conn = _db_connection()
     tx_id = str(uuid.uuid4())
     try:
         conn.execute(
@@ -357,7 +408,7 @@ def cmd_tx_add(args):
 
 
 def cmd_tx_update(args):
-    conn = web_server.get_db_connection()
+    conn = _db_connection()
     updates = {}
     for field in ['date', 'source', 'destination', 'action', 'coin', 'amount', 'price_usd', 'fee', 'fee_coin']:
         value = getattr(args, field, None)
@@ -384,7 +435,7 @@ def cmd_tx_update(args):
 
 
 def cmd_tx_delete(args):
-    conn = web_server.get_db_connection()
+    conn = _db_connection()
     try:
         conn.execute("DELETE FROM trades WHERE id = ?", (args.id,))
         conn.commit()
@@ -410,6 +461,23 @@ def cmd_tx_upload(args):
     return True
 
 
+def cmd_tx_import_parquet(args):
+    path = _require_file(Path(args.file), "Parquet file")
+    if not path:
+        return False
+    conn = _db_connection()
+    try:
+        inserted = columnar.import_trades_parquet(conn, path)
+    except (columnar.ColumnarUnavailable, ValueError) as e:
+        print_error(str(e))
+        return False
+    finally:
+        conn.close()
+    _mark_data_changed_safely()
+    print_success(f"Imported {inserted} trades from {path.name}")
+    return True
+
+
 def cmd_tx_template(args):
     headers = ['date','type','received_coin','received_amount','sent_coin','sent_amount','price_usd','fee','fee_coin','destination','source']
     sample_rows = [
@@ -435,73 +503,35 @@ def cmd_tx_reprocess(args):
             print_error('ML fallback is not enabled. Enable it in settings first.')
             return False
 
-        conn = web_server.get_db_connection()
-        cursor = conn.execute("SELECT * FROM trades ORDER BY date ASC")
-        transactions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        from src.ml_service import MLService
+        from src.ml_reprocess import reprocess_transactions
 
-        if not transactions:
-            print_info('No transactions to reprocess')
-            return True
+        conn = _db_connection()
+        try:
+            if not conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]:
+                print_info('No transactions to reprocess')
+                return True
 
-        from src.ml_service import MLService
-        from src.rules_model_bridge import classify_rules_ml
-
-        ml_service = MLService(mode=ml_config.get('model_name', 'shim'))
-        batch_size = max(1, ml_config.get('batch_size', args.batch_size or 10))
-        processed_count = 0
-        updated_count = 0
-
-        log_dir = OUTPUT_DIR / 'logs'
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / 'model_suggestions.log'
-
-        for batch_start in range(0, len(transactions), batch_size):
-            batch = transactions[batch_start: batch_start + batch_size]
-            for tx in batch:
-                try:
-                    row = {
-                        'description': f"{tx.get('action', '')} {tx.get('coin', '')}",
-                        'amount': tx.get('amount', 0),
-                        'price_usd': tx.get('price_usd', 0),
-                        'coin': tx.get('coin', ''),
-                        'action': tx.get('action', ''),
-                        'source': tx.get('source', ''),
-                        'date': tx.get('date', ''),
-                    }
-                    result = classify_rules_ml(row, ml_service)
-                    processed_count += 1
-                    if result.get('source') == 'ml' and result.get('label'):
-                        current_action = tx.get('action', '')
-                        new_action = result['label']
-                        if current_action != new_action:
-                            conn_u = web_server.get_db_connection()
-                            conn_u.execute("UPDATE trades SET action = ? WHERE id = ?", (new_action, tx['id']))
-                            conn_u.commit()
-                            conn_u.close()
-                            updated_count += 1
-                        with open(log_file, 'a') as f:
-                            f.write(json.dumps({
-                                'timestamp': datetime.now().isoformat(),
-                                'transaction_id': tx['id'],
-                                'date': tx.get('date', ''),
-                                'coin': tx.get('coin', ''),
-                                'original_action': current_action,
-                                'suggested_action': result.get('label'),
-                                'confidence': result.get('confidence', 0),
-                                'explanation': result.get('explanation', ''),
-                            }) + '\n')
-                except Exception as tx_error:
-                    print_error(f"Error processing transaction {tx.get('id')}: {tx_error}")
-
-        if ml_config.get('auto_shutdown_after_batch', True):
+            ml_service = MLService(mode=ml_config.get('model_name', 'shim'))
+            batch_size = max(1, ml_config.get('batch_size', args.batch_size or 10))
+            log_file = OUTPUT_DIR / 'logs' / 'model_suggestions.log'
             try:
-                ml_service.shutdown()
-            except Exception:
-                pass
+                stats = reprocess_transactions(
+                    conn, ml_service, batch_size, log_file,
+                    lambda processed, total: print_info(f"Reprocessed {processed}/{total}"),
+                    confidence_threshold=float(ml_config.get('confidence_threshold', 0.85))
+                )
+            finally:
+                if ml_config.get('auto_shutdown_after_batch', True):
+                    try:
+                        ml_service.shutdown()
+                    except Exception:
+                        pass
+        finally:
+            conn.close()
 
         _mark_data_changed_safely()
-        print_success(f"Reprocessing complete. Analyzed {processed_count}, updated {updated_count}.")
+        print_success(f"Reprocessing complete. Analyzed {stats['processed']}, updated {stats['updated']}.")
         return True
     except Exception as e:
         print_error(f"Reprocess failed: {e}")
@@ -736,73 +766,49 @@ def cmd_api_keys_test(args):
 # BACKUP & RESTORE
 # ==================================
 
-def _build_full_backup_bytes() -> bytes:
-    memory_file = io.BytesIO()
-    with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-        conn = web_server.get_db_connection()
-        try:
-            cursor = conn.execute("SELECT * FROM trades")
-            rows = cursor.fetchall()
-            if cursor.description:
-                column_names = [description[0] for description in cursor.description]
-                csv_buffer = io.StringIO()
-                writer = csv.writer(csv_buffer)
-                writer.writerow(column_names)
-                writer.writerows(rows)
-                zf.writestr('trades_export.csv', csv_buffer.getvalue())
-            else:
-                zf.writestr('trades_export.csv', 'No data found')
-        finally:
-            conn.close()
-    memory_file.seek(0)
-    return memory_file.getvalue()
+def _build_full_backup(dest: Path) -> Path:
+    """Write the trades CSV export zip to dest without buffering it in memory."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    conn = web_server.get_db_connection()
+    try:
+        return build_trades_export_zip(conn, dest)
+    finally:
+        conn.close()
 
 
 def cmd_backup_full(args):
-    data = _build_full_backup_bytes()
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     dest = Path(args.output or f'crypto_transaction_db_export_{timestamp}.zip')
-    _write_bytes_to_path(data, dest)
+    _build_full_backup(dest)
     print_success(f"Full backup written to {dest}")
     return True
 
 
-def _build_zip_backup_bytes(db_key: Optional[bytes] = None) -> Tuple[bytes, str]:
-    raw_zip = io.BytesIO()
-    with zipfile.ZipFile(raw_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
-        manifest = {'created': datetime.now().isoformat(), 'version': '1.0', 'includes': []}
-
-        def add_file(path: Path, arcname: str):
-            if path.exists():
-                zf.write(str(path), arcname)
-                manifest['includes'].append(arcname)
-
-        add_file(DB_FILE, 'crypto_master.db')
-        add_file(BASE_DIR / '.db_key', '.db_key')
-        add_file(BASE_DIR / '.db_salt', '.db_salt')
-        add_file(CONFIG_FILE, 'config.json')
-        add_file(API_KEYS_ENCRYPTED_FILE, 'api_keys_encrypted.json')
-        if 'api_keys_encrypted.json' not in manifest['includes']:
-            add_file(API_KEYS_FILE, 'api_keys.json')
-        add_file(WALLETS_ENCRYPTED_FILE, 'wallets_encrypted.json')
-        if 'wallets_encrypted.json' not in manifest['includes']:
-            add_file(WALLETS_FILE, 'wallets.json')
-        add_file(BASE_DIR / 'keys' / 'web_users.json', 'web_users.json')
-        zf.writestr('manifest.json', json.dumps(manifest, indent=2))
-
-    raw_zip.seek(0)
-    if db_key:
-        cipher = web_server.Fernet(db_key)
-        return cipher.encrypt(raw_zip.getvalue()), 'enc'
-    return raw_zip.getvalue(), 'zip'
+def _build_zip_backup(dest: Path, db_key: Optional[bytes] = None) -> Path:
+    """Write a zip backup to dest, sealed chunk by chunk when a DB key is loaded."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    file_groups = [
+        [(BASE_DIR / '.db_key', '.db_key')],
+        [(BASE_DIR / '.db_salt', '.db_salt')],
+        [(CONFIG_FILE, 'config.json')],
+        [(API_KEYS_ENCRYPTED_FILE, 'api_keys_encrypted.json'), (API_KEYS_FILE, 'api_keys.json')],
+        [(WALLETS_ENCRYPTED_FILE, 'wallets_encrypted.json'), (WALLETS_FILE, 'wallets.json')],
+        [(BASE_DIR / 'keys' / 'web_users.json', 'web_users.json')],
+    ]
+    with tempfile.TemporaryDirectory(dir=dest.parent) as tmp:
+        zip_path = build_backup_zip(Path(tmp) / 'backup.zip', DB_FILE, file_groups)
+        if db_key:
+            encrypt_file(zip_path, dest, web_server.Fernet(db_key))
+        else:
+            shutil.move(str(zip_path), str(dest))
+    return dest
 
 
 def cmd_backup_zip(args):
     db_key = web_server.app.config.get('DB_ENCRYPTION_KEY')
-    data, ext = _build_zip_backup_bytes(db_key)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    dest = Path(args.output or f'backup_{timestamp}.zip{".enc" if ext == "enc" else ""}')
-    _write_bytes_to_path(data, dest)
+    dest = Path(args.output or f'backup_{timestamp}.zip{".enc" if db_key else ""}')
+    _build_zip_backup(dest, db_key)
     print_success(f"Backup written to {dest}")
     return True
 
@@ -812,9 +818,16 @@ def cmd_restore_backup(args):
     if not backup_path:
         return False
 
-    data = backup_path.read_bytes()
     filename = backup_path.name.lower()
+    workdir = Path(tempfile.mkdtemp(prefix='restore_', dir=backup_path.parent))
+    try:
+        return _restore_backup_file(args, backup_path, filename, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
 
+def _restore_backup_file(args, backup_path: Path, filename: str, workdir: Path) -> bool:
+    zip_path = backup_path
     if filename.endswith('.enc'):
         password = args.password or getpass('Backup password: ')
         if not password:
@@ -830,15 +843,13 @@ def cmd_restore_backup(args):
             else:
                 print_error('Key files not found to decrypt backup')
                 return False
-            cipher = web_server.Fernet(db_key_bytes)
-            data = cipher.decrypt(data)
+            zip_path = decrypt_file(backup_path, workdir / 'backup.zip', web_server.Fernet(db_key_bytes))
         except Exception as e:
             print_error(f"Failed to decrypt backup: {e}")
             return False
 
-    tmp_mem = io.BytesIO(data)
     try:
-        with zipfile.ZipFile(tmp_mem, 'r') as zf:
+        with zipfile.ZipFile(zip_path, 'r') as zf:
             members = zf.namelist()
 
             def restore_member(name: str, target: Path):
@@ -879,7 +890,7 @@ def cmd_restore_backup(args):
                         except Exception:
                             pass
                     try:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmpdb:
+                        with tempfile.NamedTemporaryFile(delete=False, suffix='.db', dir=workdir) as tmpdb:
                             with zf.open('crypto_master.db') as src:
                                 shutil.copyfileobj(src, tmpdb)
                             tmpdb_path = Path(tmpdb.name)
@@ -933,6 +944,53 @@ def cmd_restore_backup(args):
         return False
 
 
+def cmd_backup_snapshot(args):
+    db_file = _require_file(Path(DB_FILE), "Database")
+    if not db_file:
+        return False
+    manifest = snapshot_store_for(db_file).create_snapshot(db_file, label=args.label)
+    print_success(
+        f"Snapshot {manifest['id']} created ({manifest['new_chunks']} new of {len(manifest['chunks'])} chunks, "
+        f"{manifest['bytes_written']} bytes written)"
+    )
+    return True
+
+
+def cmd_backup_snapshots(args):
+    store = snapshot_store_for(DB_FILE)
+    snapshots = [
+        {k: m[k] for k in ('id', 'label', 'created', 'size', 'new_chunks', 'bytes_written')}
+        for m in store.list_snapshots(args.label)
+    ]
+    _pretty_json({'snapshots': snapshots, 'store': store.stats()})
+    return True
+
+
+def cmd_backup_restore_snapshot(args):
+    store = snapshot_store_for(DB_FILE)
+    try:
+        if args.id:
+            snapshot = store.get_snapshot(args.id)
+        else:
+            # Naive --at values are local time
+            at = datetime.fromisoformat(args.at) if args.at else datetime.now()
+            snapshot = store.find_snapshot(at.astimezone())
+    except (FileNotFoundError, ValueError) as e:
+        print_error(str(e))
+        return False
+    if not snapshot:
+        print_error("No snapshot found for the requested point in time")
+        return False
+
+    # Keep the current state restorable in case the wrong point in time was picked
+    if Path(DB_FILE).exists():
+        store.create_snapshot(DB_FILE, label='pre_restore')
+    store.restore(snapshot, DB_FILE)
+    print_success(f"Database restored to snapshot {snapshot['id']} ({snapshot['created']})")
+    _mark_data_changed_safely()
+    return True
+
+
 # ==================================
 # LOGS
 # ==================================
@@ -1032,10 +1090,11 @@ def cmd_diagnostics(args):
 def cmd_diagnostics_schema(args):
     try:
         conn = web_server.get_db_connection()
-        res = conn.execute('PRAGMA integrity_check').fetchone()
-        conn.close()
-        status = (res and res[0]) or 'unknown'
-        ok = isinstance(status, str) and status.lower() == 'ok'
+        try:
+            status = integrity.run_check(web_server.DB_FILE, 'full', conn=conn)
+        finally:
+            conn.close()
+        ok = status.lower() == 'ok'
         _pretty_json({'status': status, 'ok': ok})
         return ok
     except Exception as e:
@@ -1080,13 +1139,8 @@ def cmd_system_health(args):
             health_status['checks'].append({'name': 'Database Connection', 'status': 'ERROR', 'message': f'Database error: {e}'})
 
         try:
-            conn = web_server.get_db_connection()
-            integrity_check = conn.execute('PRAGMA integrity_check').fetchone()
-            conn.close()
-            if integrity_check and integrity_check[0] == 'ok':
-                health_status['checks'].append({'name': 'Database Integrity', 'status': 'OK', 'message': 'Database integrity verified'})
-            else:
-                health_status['checks'].append({'name': 'Database Integrity', 'status': 'WARNING', 'message': f'Integrity check result: {integrity_check[0] if integrity_check else "Unknown"}'})
+            db_health = integrity.health(web_server.DB_FILE, INTEGRITY_FULL_CHECK_HOURS * 2)
+            health_status['checks'].append({'name': 'Database Integrity', 'status': 'OK' if db_health['ok'] else 'WARNING', 'message': db_health['message']})
         except Exception as e:
             health_status['checks'].append({'name': 'Database Integrity', 'status': 'ERROR', 'message': f'Integrity check failed: {e}'})
 
@@ -1146,6 +1200,12 @@ def cmd_status(args):
 # SCHEDULER
 # ==================================
 
+def ScheduleManager(*args, **kwargs):
+    """Build a scheduler; APScheduler is only imported by the schedule commands."""
+    from src.web.scheduler import ScheduleManager as _ScheduleManager
+    return _ScheduleManager(*args, **kwargs)
+
+
 def _get_scheduler():
     auto_runner_path = BASE_DIR / 'Auto_Runner.py'
     return ScheduleManager(BASE_DIR, auto_runner_path)
@@ -1347,12 +1407,18 @@ For more information, see README.md or visit the web UI.
     parser_run = subparsers.add_parser('run', help='Process transactions')
     parser_run.add_argument('--cascade', action='store_true', 
                           help='Process all years (cascade mode)')
+    parser_run.add_argument('--force', action='store_true',
+                          help='Recompute years whose reports are already up to date')
+    parser_run.add_argument('--profile', action='store_true',
+                          help='Write per-stage CPU/memory profiles to outputs/logs/profiles')
     parser_run.set_defaults(func=cmd_run)
     
     # Review command
     parser_review = subparsers.add_parser('review', help='Run manual review assistant')
     parser_review.add_argument('year', nargs='?', 
                              help='Year to review (default: current year)')
+    parser_review.add_argument('--profile', action='store_true',
+                             help='Write CPU/memory profiles of the review to outputs/logs/profiles')
     parser_review.set_defaults(func=cmd_review)
     
     # Web command
@@ -1371,6 +1437,9 @@ For more information, see README.md or visit the web UI.
     # Export command
     parser_export = subparsers.add_parser('export', help='List/export generated reports')
     parser_export.add_argument('--year', help='Year (default: current year)')
+    parser_export.add_argument('--format', choices=columnar.FORMATS, default='csv',
+                               help='parquet: also write Parquet copies of the reports and a trades snapshot (requires pyarrow)')
+    parser_export.add_argument('--output', help='Trades snapshot path for --format parquet (default: outputs/exports/trades_<timestamp>.parquet)')
     parser_export.set_defaults(func=cmd_export)
 
     # Transactions
@@ -1420,6 +1489,10 @@ For more information, see README.md or visit the web UI.
     tx_upload.add_argument('file', help='Path to CSV file')
     tx_upload.set_defaults(func=cmd_tx_upload)
 
+    tx_import_parquet = tx_sub.add_parser('import-parquet', help='Bulk-load a Parquet trades dump (requires pyarrow)')
+    tx_import_parquet.add_argument('file', help='Path to .parquet file (e.g. from export --format parquet)')
+    tx_import_parquet.set_defaults(func=cmd_tx_import_parquet)
+
     tx_template = tx_sub.add_parser('template', help='Generate a CSV template for manual imports')
     tx_template.add_argument('--output', help='Destination path for template CSV')
     tx_template.set_defaults(func=cmd_tx_template)
@@ -1499,6 +1572,17 @@ For more information, see README.md or visit the web UI.
     b_restore.add_argument('--mode', choices=['merge', 'replace'], default='merge', help='Merge or replace database when restoring')
     b_restore.add_argument('--password', help='Password for encrypted backups')
     b_restore.set_defaults(func=cmd_restore_backup)
+    b_snap = backup_sub.add_parser('snapshot', help='Create an incremental database snapshot')
+    b_snap.add_argument('--label', default='manual', help='Snapshot label (retention is applied per label)')
+    b_snap.set_defaults(func=cmd_backup_snapshot)
+    b_snaps = backup_sub.add_parser('snapshots', help='List database snapshots')
+    b_snaps.add_argument('--label', help='Only list snapshots with this label')
+    b_snaps.set_defaults(func=cmd_backup_snapshots)
+    b_restore_snap = backup_sub.add_parser('restore-snapshot', help='Restore the database to a snapshot')
+    b_restore_snap_target = b_restore_snap.add_mutually_exclusive_group()
+    b_restore_snap_target.add_argument('--id', help='Snapshot id')
+    b_restore_snap_target.add_argument('--at', help='Point in time (ISO 8601, local time); newest snapshot at or before it is used')
+    b_restore_snap.set_defaults(func=cmd_backup_restore_snapshot)
 
     # Logs
     parser_logs = subparsers.add_parser('logs', help='Inspect and download logs')
@@ -0,0 +1,325 @@
+"""End-to-end performance benchmark on synthetic ledgers.
+
+Generates a seeded ledger (scripts/benchmark_ledger.py) in a throwaway
+workspace and times each stage of the pipeline on it:
+
+    ingest               Ingestor.run_csv_scan over one CSV per source
+    engine.<METHOD>      TransactionEngine.run per accounting method (FIFO, HIFO)
+    export.<METHOD>      TransactionEngine.export
+    review               TransactionReviewer.run_review
+    detectors.anomaly    AnomalyDetector.scan_frame
+    detectors.fraud      FraudDetector wash sale / pump & dump / volume checks
+    detectors.patterns   PatternLearner.learn_patterns + detect_anomalies
+    web.<endpoint>       key API endpoints through the Flask test client
+
+Engine, reviewer, detector and web stages run on a database bulk-loaded with
+the ledger (real source names); ingest uses its own database, since CSV
+imports label every trade MANUAL.
+
+Results are written as JSON (outputs/benchmarks/bench_<rows>_<timestamp>.json)
+with seconds, rows/second and peak RSS per stage. peak_rss_mb is the process
+high-water mark when the stage finished, rss_growth_mb how much that stage
+raised it. With a baseline (--save-baseline records one) every stage is
+compared against it and the run exits with status 1 when a stage is slower,
+or the overall peak RSS higher, by more than --threshold.
+
+Usage:
+    python scripts/benchmark.py --size 10k --save-baseline
+    python scripts/benchmark.py --size 10k                  # compare to baseline
+    python scripts/benchmark.py --size 1m --stages engine,review --methods FIFO
+    python scripts/benchmark.py --size 10m --stages engine,detectors --threshold 0.5
+
+Ingest parses rows one by one, so the 1m/10m sizes take a long time with it
+included; use --stages to leave it out.
+"""
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+import benchmark_ledger as ledger  # noqa: E402
+
+STAGES = ('ingest', 'engine', 'review', 'detectors', 'web')
+METHODS = ('FIFO', 'HIFO')
+DEFAULT_THRESHOLD = 0.25      # Fail when a stage is >25% slower than the baseline
+MIN_REGRESSION_SECONDS = 0.05  # Ignore slowdowns smaller than this (timer noise)
+RESULTS_DIR = Path(PROJECT_ROOT) / 'outputs' / 'benchmarks'
+WEB_REQUESTS = [
+    ('web.stats', 'GET', '/api/stats', None),
+    ('web.transactions', 'GET', '/api/transactions?page=1&per_page=100', None),
+    ('web.reports', 'GET', '/api/reports', None),
+    ('web.search', 'POST', '/api/advanced/search', {'query': 'largest BTC sells'}),
+    ('web.bulk_anomaly', 'GET', '/api/advanced/bulk-anomaly-report', None),
+    ('web.bulk_anomaly_ndjson', 'GET', '/api/advanced/bulk-anomaly-report?format=ndjson', None),
+]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where resource is unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Benchmark:
+    def __init__(self, rows, seed=42, coins=8, sources=6, wash_density=0.05, stages=STAGES,
+                 methods=METHODS, workdir=None, verbose=False):
+        self.rows = rows
+        self.verbose = verbose
+        self.params = {'rows': rows, 'seed': seed, 'coins': coins, 'sources': sources,
+                       'wash_density': wash_density}
+        self.stages = tuple(stages)
+        self.methods = tuple(m.upper() for m in methods)
+        self.workdir = Path(workdir or tempfile.mkdtemp(prefix='crypto_bench_'))
+        self.results = {'meta': dict(self.params, python=platform.python_version(),
+                                     platform=platform.platform(),
+                                     timestamp=datetime.now().isoformat()),
+                        'stages': {}}
+
+    def ledger(self):
+        return ledger.iter_ledger(**self.params)
+
+    def measure(self, name, fn, rows=None):
+        """Run fn() as stage `name` and record its timing; returns fn's result."""
+        before = peak_rss_mb()
+        with ExitStack() as stack:
+            if not self.verbose:  # the reviewer prints its whole report
+                stack.enter_context(redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+            start = time.perf_counter()
+            value = fn()
+            seconds = time.perf_counter() - start
+        after = peak_rss_mb()
+        self.results['stages'][name] = {
+            'seconds': round(seconds, 4),
+            'rows': rows,
+            'rows_per_second': round(rows / seconds, 1) if rows and seconds else None,
+            'peak_rss_mb': after,
+            'rss_growth_mb': round(after - before, 1) if after is not None else None,
+        }
+        print(f"  {name:<28} {seconds:>9.3f}s" + (f"  peak RSS {after} MB" if after is not None else ''))
+        return value
+
+    @contextmanager
+    def workspace(self):
+        """Point the engine's paths at the workspace for the duration of the run."""
+        import src.core.engine as engine
+        paths = {
+            'BASE_DIR': self.workdir, 'INPUT_DIR': self.workdir / 'inputs',
+            'ARCHIVE_DIR': self.workdir / 'processed_archive', 'OUTPUT_DIR': self.workdir / 'outputs',
+            'LOG_DIR': self.workdir / 'outputs' / 'logs', 'DB_FILE': self.workdir / 'bench.db',
+            'KEYS_FILE': self.workdir / 'api_keys.json', 'WALLETS_FILE': self.workdir / 'wallets.json',
+            'CONFIG_FILE': self.workdir / 'config.json', 'STATUS_FILE': self.workdir / 'status.json',
+        }
+        engine_logger = logging.getLogger("Crypto_Transaction_Engine")
+        level = engine_logger.level
+        with ExitStack() as stack:
+            for name, path in paths.items():
+                stack.enter_context(mock.patch.object(engine, name, path))
+            stack.enter_context(mock.patch.dict(engine.GLOBAL_CONFIG['accounting']))
+            if not self.verbose:
+                engine_logger.setLevel(logging.ERROR)
+            try:
+                engine.initialize_folders()
+                yield engine
+            finally:
+                engine_logger.setLevel(level)
+
+    def run(self):
+        print(f"Benchmark: {self.rows:,} rows, workspace {self.workdir}")
+        with self.workspace() as engine:
+            db = engine.DatabaseManager(engine.DB_FILE)
+            try:
+                self.measure('setup.load_db', lambda: ledger.load_trades(db.conn, self.ledger()), self.rows)
+                year = int(db.conn.execute("SELECT substr(MAX(date), 1, 4) FROM trades").fetchone()[0])
+                if 'ingest' in self.stages:
+                    self.run_ingest(engine)
+                engines = {}
+                if 'engine' in self.stages or 'review' in self.stages:
+                    for method in self.methods:
+                        engines[method] = self.run_engine(engine, db, year, method)
+                if 'review' in self.stages:
+                    from src.core.reviewer import TransactionReviewer
+                    reviewer = TransactionReviewer(db, year, engines[self.methods[0]])
+                    self.measure('review', reviewer.run_review, self.rows)
+            finally:
+                db.close()
+            if 'detectors' in self.stages:
+                self.run_detectors(engine)
+            if 'web' in self.stages:
+                self.run_web(engine)
+        self.results['peak_rss_mb'] = peak_rss_mb()
+        return self.results
+
+    def run_ingest(self, engine):
+        paths = ledger.write_ingest_csvs(self.ledger(), engine.INPUT_DIR)
+        db = engine.DatabaseManager(self.workdir / 'ingest.db')
+        try:
+            ingestor = engine.Ingestor(db)
+            self.measure('ingest', ingestor.run_csv_scan, self.rows)
+        finally:
+            db.close()
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def run_engine(self, engine, db, year, method):
+        engine.GLOBAL_CONFIG['accounting']['method'] = method
+        transaction_engine = engine.TransactionEngine(db, year)
+        self.measure(f'engine.{method}', transaction_engine.run, self.rows)
+        self.measure(f'export.{method}', transaction_engine.export)
+        return transaction_engine
+
+    def run_detectors(self, engine):
+        import sqlite3
+        from src.anomaly_detector import AnomalyDetector
+        from src.advanced_ml_features import FraudDetector, PatternLearner
+
+        conn = sqlite3.connect(str(engine.DB_FILE))
+        conn.row_factory = sqlite3.Row
+        transactions = [dict(r) for r in conn.execute("SELECT * FROM trades ORDER BY date ASC")]
+        conn.close()
+
+        fraud = FraudDetector()
+        learner = PatternLearner()
+
+        def fraud_checks():
+            fraud.detect_wash_sale(transactions)
+            fraud.detect_pump_dump(transactions)
+            fraud.detect_suspicious_volume(transactions)
+
+        def patterns():
+            learner.learn_patterns(transactions)
+            for tx in transactions:
+                learner.detect_anomalies(tx)
+
+        self.measure('detectors.anomaly', lambda: AnomalyDetector().scan_frame(transactions), self.rows)
+        self.measure('detectors.fraud', fraud_checks, self.rows)
+        self.measure('detectors.patterns', patterns, self.rows)
+
+    def run_web(self, engine):
+        import web_server as ws
+
+        ws.app.config['TESTING'] = True
+        client = ws.app.test_client()
+        with client.session_transaction() as sess:
+            sess['username'] = 'benchmark'
+            sess['csrf_token'] = 'benchmark'
+            sess['csrf_created_at'] = time.time()
+        with mock.patch.multiple(ws, BASE_DIR=self.workdir, DB_FILE=engine.DB_FILE, OUTPUT_DIR=engine.OUTPUT_DIR):
+            for name, method, url, body in WEB_REQUESTS:
+                def call():
+                    response = client.open(url, method=method, json=body, headers={'X-CSRF-Token': 'benchmark'})
+                    size = len(response.get_data())  # drain streamed bodies inside the timing
+                    return response.status_code, size
+                status, size = self.measure(name, call)
+                self.results['stages'][name].update(status=status, response_bytes=size)
+
+
+# ----------------------------------------------------------------------
+# Baselines
+# ----------------------------------------------------------------------
+
+def comparable(results, baseline):
+    """True if both runs used the same ledger parameters."""
+    keys = ('rows', 'seed', 'coins', 'sources', 'wash_density')
+    return all(results['meta'].get(k) == baseline.get('meta', {}).get(k) for k in keys)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_seconds=MIN_REGRESSION_SECONDS):
+    """Regression messages for stages (and peak RSS) worse than baseline by more than threshold."""
+    regressions = []
+    for name, stage in results['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if not base or not base.get('seconds'):
+            continue
+        slower = stage['seconds'] - base['seconds']
+        if stage['seconds'] > base['seconds'] * (1 + threshold) and slower >= min_seconds:
+            regressions.append(f"{name}: {stage['seconds']:.3f}s vs baseline {base['seconds']:.3f}s "
+                               f"(+{slower / base['seconds']:.0%})")
+    peak, base_peak = results.get('peak_rss_mb'), baseline.get('peak_rss_mb')
+    if peak and base_peak and peak > base_peak * (1 + threshold):
+        regressions.append(f"peak RSS: {peak} MB vs baseline {base_peak} MB (+{peak / base_peak - 1:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='End-to-end benchmark on a synthetic ledger')
+    parser.add_argument('--size', default='10k', help="Ledger rows: 10k, 1m, 10m or a number (default 10k)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--coins', type=int, default=8)
+    parser.add_argument('--sources', type=int, default=6)
+    parser.add_argument('--wash-density', type=float, default=0.05,
+                        help='Share of sells followed by a repurchase within 30 days (default 0.05)')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument('--methods', default=','.join(METHODS), help='Accounting methods for the engine stages')
+    parser.add_argument('--output', help='Results JSON path (default outputs/benchmarks/bench_<rows>_<ts>.json)')
+    parser.add_argument('--baseline', help='Baseline JSON (default outputs/benchmarks/baseline_<rows>.json)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown before failing, as a fraction (default 0.25)')
+    parser.add_argument('--keep-workdir', action='store_true', help='Keep the generated workspace')
+    parser.add_argument('--verbose', action='store_true', help='Show engine warnings and reviewer output')
+    args = parser.parse_args(argv)
+
+    rows = ledger.parse_size(args.size)
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    bench = Benchmark(rows, seed=args.seed, coins=args.coins, sources=args.sources,
+                      wash_density=args.wash_density, stages=stages,
+                      methods=[m.strip() for m in args.methods.split(',') if m.strip()], verbose=args.verbose)
+    try:
+        results = bench.run()
+    finally:
+        if not args.keep_workdir:
+            shutil.rmtree(bench.workdir, ignore_errors=True)
+
+    output = Path(args.output or RESULTS_DIR / f"bench_{rows}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results: {output}")
+
+    baseline_path = Path(args.baseline or RESULTS_DIR / f"baseline_{rows}.json")
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+        return 0
+    baseline = json.loads(baseline_path.read_text())
+    if not comparable(results, baseline):
+        print(f"Baseline {baseline_path} was recorded with different ledger parameters; not compared")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} of {baseline_path.name}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
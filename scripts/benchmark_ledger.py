@@ -0,0 +1,158 @@
+"""Deterministic synthetic ledgers for the benchmark harness (scripts/benchmark.py).
+
+The same seed and parameters always produce the same trades, so timings from
+different commits or machines are measured on identical input.
+
+Shape of a ledger:
+    - rows trades spread evenly over `days` days from 2023-01-01
+    - `coins` coins with independent multiplicative random-walk prices
+    - `sources` exchanges/wallets; sells only spend what a source holds
+    - wash_density: share of sells followed by a repurchase of the same coin
+      on the same source within the 30-day wash sale window
+
+Outputs:
+    iter_ledger(...)          trade dicts in date order (trades table columns)
+    load_trades(conn, rows)   bulk INSERT into an existing trades table
+    write_ingest_csvs(...)    one CSV per source in the Ingestor's column format
+
+Usage:
+    python scripts/benchmark_ledger.py 10k out_dir/      # write ingest CSVs
+"""
+import csv
+import heapq
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+START_DATE = datetime(2023, 1, 1)
+WASH_WINDOW_DAYS = 30
+LOAD_BATCH_ROWS = 50_000  # Rows per executemany() in load_trades
+
+COINS = ['BTC', 'ETH', 'SOL', 'ADA', 'DOT', 'MATIC', 'AVAX', 'LINK', 'XRP', 'LTC']
+SOURCES = ['COINBASE', 'KRAKEN', 'GEMINI', 'BINANCE', 'LEDGER', 'METAMASK']
+BASE_PRICES = {'BTC': 20000.0, 'ETH': 1500.0, 'SOL': 20.0, 'ADA': 0.3, 'DOT': 5.0, 'MATIC': 0.8,
+               'AVAX': 15.0, 'LINK': 6.0, 'XRP': 0.4, 'LTC': 70.0}
+
+TRADE_COLUMNS = ['id', 'date', 'source', 'destination', 'action', 'coin', 'amount', 'price_usd', 'fee',
+                 'fee_coin', 'batch_id']
+INGEST_COLUMNS = ['date', 'type', 'received_coin', 'received_amount', 'sent_coin', 'sent_amount',
+                  'price_usd', 'fee']
+INGEST_TYPES = {'BUY': 'buy', 'INCOME': 'staking', 'SELL': 'sell'}
+
+
+def parse_size(text) -> int:
+    """'10k', '1m', '2.5M' or a plain row count."""
+    text = str(text).strip().lower()
+    if text in SIZES:
+        return SIZES[text]
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if multiplier > 1 else text
+    return int(float(number) * multiplier)
+
+
+def names(base, count, pattern):
+    """count names: base first, then pattern % n for the rest."""
+    return base[:count] + [pattern % n for n in range(len(base), count)]
+
+
+def iter_ledger(rows, seed=42, coins=8, sources=6, wash_density=0.05, days=730):
+    """Yield `rows` trade dicts in date order (see module docstring)."""
+    rng = random.Random(seed)
+    coin_names = names(COINS, coins, 'TKN%03d')
+    source_names = names(SOURCES, sources, 'WALLET%02d')
+    prices = {c: BASE_PRICES.get(c, rng.uniform(0.5, 500.0)) for c in coin_names}
+    holdings = {}
+    rebuys = []  # heap of (due date, seq, coin, source, amount)
+    step = timedelta(seconds=days * 86400 / max(rows, 1))
+    when = START_DATE
+
+    for i in range(rows):
+        when += step
+        if rebuys and rebuys[0][0] <= when:
+            _, _, coin, source, amount = heapq.heappop(rebuys)
+            action = 'BUY'
+        else:
+            coin = coin_names[rng.randrange(len(coin_names))]
+            source = source_names[rng.randrange(len(source_names))]
+            held = holdings.get((coin, source), 0.0)
+            roll = rng.random()
+            if held <= 0 or roll < 0.45:
+                action, amount = 'BUY', rng.uniform(50, 5000) / prices[coin]
+            elif roll < 0.55:
+                action, amount = 'INCOME', rng.uniform(1, 50) / prices[coin]
+            else:
+                action, amount = 'SELL', held * rng.uniform(0.1, 0.9)
+                if rng.random() < wash_density:
+                    due = when + timedelta(days=rng.uniform(1, WASH_WINDOW_DAYS - 1))
+                    heapq.heappush(rebuys, (due, i, coin, source, amount))
+
+        prices[coin] *= math.exp(rng.gauss(0, 0.01))
+        holdings[(coin, source)] = holdings.get((coin, source), 0.0) + (-amount if action == 'SELL' else amount)
+        price = prices[coin]
+        yield {
+            'id': f"BENCH_{i:08d}",
+            'date': when.strftime('%Y-%m-%dT%H:%M:%S+00:00'),
+            'source': source,
+            'destination': None,
+            'action': action,
+            'coin': coin,
+            'amount': f"{amount:.8f}",
+            'price_usd': f"{price:.8f}",
+            'fee': f"{amount * price * 0.001:.2f}" if action != 'INCOME' else '0',
+            'fee_coin': None,
+            'batch_id': 'BENCH',
+        }
+
+
+def load_trades(conn, rows, batch_rows=LOAD_BATCH_ROWS) -> int:
+    """Bulk-insert trade dicts into conn's trades table; returns the row count."""
+    sql = f"INSERT OR IGNORE INTO trades ({', '.join(TRADE_COLUMNS)}) VALUES ({', '.join('?' * len(TRADE_COLUMNS))})"
+    total, batch = 0, []
+    with conn:
+        for row in rows:
+            batch.append([row[c] for c in TRADE_COLUMNS])
+            if len(batch) >= batch_rows:
+                conn.executemany(sql, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            total += len(batch)
+    return total
+
+
+def write_ingest_csvs(rows, directory) -> list:
+    """Write trade dicts as one ingestable CSV per source; returns the paths."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    files, writers = {}, {}
+    try:
+        for row in rows:
+            source = row['source']
+            if source not in writers:
+                files[source] = open(directory / f"bench_{source.lower()}.csv", 'w', newline='', encoding='utf-8')
+                writers[source] = csv.writer(files[source])
+                writers[source].writerow(INGEST_COLUMNS)
+            incoming = row['action'] != 'SELL'
+            writers[source].writerow([
+                row['date'], INGEST_TYPES[row['action']],
+                row['coin'], row['amount'] if incoming else '0',
+                row['coin'], '0' if incoming else row['amount'],
+                row['price_usd'], row['fee'],
+            ])
+    finally:
+        for f in files.values():
+            f.close()
+    return sorted(Path(f.name) for f in files.values())
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(f"Usage: python {os.path.basename(__file__)} SIZE OUTPUT_DIR")
+        sys.exit(2)
+    paths = write_ingest_csvs(iter_ledger(parse_size(sys.argv[1])), sys.argv[2])
+    print(f"Wrote {len(paths)} files to {sys.argv[2]}")
@@ -5,8 +5,10 @@ Includes: Fraud Detection, Smart Descriptions, DeFi Classification, AML, Pattern
 
 import json
 import hashlib
+import sqlite3
+import threading
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 from collections import defaultdict
@@ -405,43 +407,186 @@ class AMLDetector:
 
 
 class TransactionHistory:
-    """Track transaction changes for undo/history"""
-    
-    def __init__(self, history_file: Optional[Path] = None):
-        self.history_file = history_file or Path('outputs/logs/transaction_history.jsonl')
-        self.history_file.parent.mkdir(exist_ok=True)
-    
+    """Track transaction changes for undo/history
+
+    Changes are stored in an SQLite table indexed by (transaction_id, timestamp)
+    next to the legacy ``transaction_history.jsonl`` file. Any existing JSONL
+    history is imported once on first use and the file is renamed to
+    ``*.jsonl.imported`` so it is never scanned again.
+
+    One instance may be shared between threads (the web server keeps one per
+    history file); queued changes are guarded by a lock.
+    """
+
+    IMPORT_BATCH_SIZE = 1000
+    DEFAULT_FILE = Path('outputs/logs/transaction_history.jsonl')
+
+    def __init__(self, history_file: Optional[Path] = None, autoflush: bool = True):
+        self.history_file = Path(history_file or self.DEFAULT_FILE)
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        self.db_file = self.history_file.with_suffix('.db')
+        self.autoflush = autoflush
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._init_store()
+        self._import_legacy_jsonl()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_file), timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_store(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute('''CREATE TABLE IF NOT EXISTS transaction_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                transaction_id TEXT NOT NULL,
+                old_value TEXT,
+                new_value TEXT,
+                reason TEXT,
+                change_hash TEXT
+            )''')
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_transaction_history_tx_ts "
+                "ON transaction_history (transaction_id, timestamp)"
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _import_legacy_jsonl(self) -> int:
+        """One-time import of the old append-only JSONL history file"""
+        if not self.history_file.exists():
+            return 0
+        imported = 0
+        batch = []
+        conn = self._connect()
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                        batch.append(self._entry_to_row(entry))
+                    except (ValueError, KeyError):
+                        continue
+                    if len(batch) >= self.IMPORT_BATCH_SIZE:
+                        self._insert_rows(conn, batch)
+                        imported += len(batch)
+                        batch = []
+            if batch:
+                self._insert_rows(conn, batch)
+                imported += len(batch)
+            conn.commit()
+        finally:
+            conn.close()
+        self.history_file.replace(self.history_file.with_suffix('.jsonl.imported'))
+        return imported
+
+    @staticmethod
+    def _entry_to_row(entry: Dict) -> tuple:
+        return (
+            entry['timestamp'],
+            str(entry['transaction_id']),
+            json.dumps(entry.get('old_value')),
+            json.dumps(entry.get('new_value')),
+            entry.get('reason'),
+            entry.get('change_hash'),
+        )
+
+    @staticmethod
+    def _row_to_entry(row: sqlite3.Row) -> Dict:
+        return {
+            'timestamp': row['timestamp'],
+            'transaction_id': row['transaction_id'],
+            'old_value': json.loads(row['old_value']) if row['old_value'] is not None else None,
+            'new_value': json.loads(row['new_value']) if row['new_value'] is not None else None,
+            'reason': row['reason'],
+            'change_hash': row['change_hash'],
+        }
+
+    @staticmethod
+    def _insert_rows(conn: sqlite3.Connection, rows: List[tuple]) -> None:
+        conn.executemany(
+            "INSERT INTO transaction_history "
+            "(timestamp, transaction_id, old_value, new_value, reason, change_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
     def record_change(self, tx_id: str, old_value: Dict, new_value: Dict, reason: str) -> None:
-        """Record a transaction change for audit trail"""
+        """Record a transaction change for audit trail
+
+        With ``autoflush=False`` the change is only queued; call ``flush()`` to
+        persist queued changes in one batch or ``discard_pending()`` to drop them.
+        """
         entry = {
             'timestamp': datetime.now().isoformat(),
-            'transaction_id': tx_id,
+            'transaction_id': str(tx_id),
             'old_value': old_value,
             'new_value': new_value,
             'reason': reason,
             'change_hash': hashlib.sha256(str((tx_id, old_value, new_value)).encode()).hexdigest()[:8]
         }
-        
-        with open(self.history_file, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
-    
+        with self._pending_lock:
+            self._pending.append(self._entry_to_row(entry))
+        if self.autoflush:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all queued changes with a single executemany"""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        conn = self._connect()
+        try:
+            self._insert_rows(conn, rows)
+            conn.commit()
+        finally:
+            conn.close()
+        return len(rows)
+
+    def discard_pending(self) -> int:
+        """Drop queued changes that were never flushed"""
+        with self._pending_lock:
+            count = len(self._pending)
+            self._pending = []
+        return count
+
     def get_history(self, tx_id: str) -> List[Dict]:
         """Get all changes for a transaction"""
-        history = []
-        if self.history_file.exists():
-            with open(self.history_file, 'r') as f:
-                for line in f:
-                    entry = json.loads(line)
-                    if entry['transaction_id'] == tx_id:
-                        history.append(entry)
-        return history
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT timestamp, transaction_id, old_value, new_value, reason, change_hash "
+                "FROM transaction_history WHERE transaction_id = ? ORDER BY timestamp, id",
+                (str(tx_id),)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [self._row_to_entry(row) for row in rows]
     
     def revert(self, tx_id: str, steps: int = 1) -> Optional[Dict]:
         """Get the previous version of a transaction"""
-        hist = self.get_history(tx_id)
-        if len(hist) >= steps:
-            return hist[-steps]['old_value']
-        return None
+        if steps < 1:
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT old_value FROM transaction_history WHERE transaction_id = ? "
+                "ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?",
+                (str(tx_id), steps - 1)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or row['old_value'] is None:
+            return None
+        return json.loads(row['old_value'])
 
 
 class NaturalLanguageSearch:
@@ -481,27 +626,43 @@ class NaturalLanguageSearch:
     
     def search(self, transactions: List[Dict], query: str) -> List[Dict]:
         """Search transactions using natural language"""
+        return list(self.iter_search(transactions, query))
+    
+    def iter_search(self, transactions: Iterable[Dict], query: str) -> Iterator[Dict]:
+        """Lazy search() over any row iterable (e.g. a streamed DB cursor).
+        Only "largest"/"biggest" queries hold the matches in memory, to sort them."""
         filters = self.parse_query(query)
-        results = transactions
-        
-        if 'action' in filters:
-            results = [t for t in results if t.get('action') == filters['action']]
-        
-        if 'coin' in filters:
-            results = [t for t in results if t.get('coin') == filters['coin']]
-        
-        if 'year' in filters:
-            year = filters['year']
-            results = [t for t in results if t.get('date', '').startswith(str(year))]
-        
-        if 'min_amount' in filters:
-            results = [t for t in results if to_decimal(t.get('amount', 0)) >= filters['min_amount']]
+        results = (t for t in transactions if self.matches(t, filters))
         
         # Sort by price descending if asking for largest
         if 'largest' in query.lower() or 'biggest' in query.lower():
-            results.sort(key=lambda t: to_decimal(t.get('price_usd', 0)) * to_decimal(t.get('amount', 1)), reverse=True)
+            results = sorted(results, key=lambda t: to_decimal(t.get('price_usd', 0)) * to_decimal(t.get('amount', 1)), reverse=True)
         
-        return results
+        return iter(results)
+    
+    def matches(self, tx: Dict, filters: Dict) -> bool:
+        """True if tx passes the parse_query() filters"""
+        if 'action' in filters and tx.get('action') != filters['action']:
+            return False
+        if 'coin' in filters and tx.get('coin') != filters['coin']:
+            return False
+        if 'year' in filters and not tx.get('date', '').startswith(str(filters['year'])):
+            return False
+        if 'min_amount' in filters and not to_decimal(tx.get('amount', 0)) >= filters['min_amount']:
+            return False
+        return True
+    
+    def sql_filter(self, filters: Dict) -> Tuple[str, List]:
+        """WHERE clause and params pre-selecting parse_query() matches in the trades table"""
+        clauses, params = [], []
+        for column in ('action', 'coin'):
+            if column in filters:
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        if 'year' in filters:
+            clauses.append("substr(date, 1, ?) = ?")
+            params += [len(str(filters['year'])), str(filters['year'])]
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
 
 
 if __name__ == '__main__':
@@ -4,6 +4,9 @@ Detects common data entry errors and suspicious patterns:
 - Price entry errors (total value entered as per-unit price)
 - Extreme amounts/prices
 - Timestamp gaps and duplicates
+
+scan_row checks a single row; scan_frame runs the same heuristics as NumPy
+masks over whole columns for CSV ingestion and bulk reports.
 """
 from typing import Dict, List
 from decimal import Decimal, InvalidOperation
@@ -12,6 +15,75 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+_DAY_NS = 86_400 * 10**9
+
+
+def _to_float(value) -> float:
+    """float(value or 0) as scan_row does it; unparseable values become NaN (never flagged)."""
+    try:
+        return float(value or 0)
+    except (ValueError, TypeError):
+        return float('nan')
+
+
+def _column_floats(frame, column):
+    """Column as a float64 array with scan_row's conversion rules."""
+    import numpy as np
+    if column not in frame.columns:
+        return np.zeros(len(frame))
+    values = frame[column]
+    if values.dtype.kind in 'biuf':
+        return values.to_numpy(dtype=float)
+    return np.fromiter((_to_float(v) for v in values.tolist()), dtype=float, count=len(values))
+
+
+def _utc_offset_mask(strings):
+    """True where an ISO-style date string carries Z or a +/-HH[:MM] offset after the date part."""
+    import numpy as np
+    text = np.strings.rstrip(np.asarray(strings, dtype=np.str_))
+    return (np.strings.endswith(text, 'Z')
+            | (np.strings.find(text, '+', 10) >= 0)
+            | (np.strings.find(text, '-', 10) >= 0))
+
+
+def _parse_timestamps(values):
+    """Parse dates to UTC epoch nanoseconds plus a validity mask.
+
+    ISO-8601 strings are parsed vectorized, naive and offset-qualified ones
+    in separate calls (a mixed call applies the first offset to naive
+    values). Anything else falls back to the scalar pd.to_datetime used by
+    detect_timestamp_gap, so both paths agree on every value.
+    """
+    import numpy as np
+    import pandas as pd
+    values = np.asarray(values, dtype=object)
+    stamps = np.zeros(len(values), dtype=np.int64)
+    valid = np.zeros(len(values), dtype=bool)
+    if pd.api.types.infer_dtype(values, skipna=True) == 'string':
+        is_str = ~pd.isna(values)
+    else:
+        is_str = np.fromiter((type(v) is str for v in values), dtype=bool, count=len(values))
+    if is_str.any():
+        aware = np.zeros(len(values), dtype=bool)
+        aware[is_str] = _utc_offset_mask(values[is_str])
+        for group in (is_str & aware, is_str & ~aware):
+            if group.any():
+                parsed = pd.to_datetime(values[group], utc=True, errors='coerce', format='ISO8601')
+                stamps[group] = parsed.as_unit('ns').asi8
+                valid[group] = parsed.notna()
+    for pos in np.flatnonzero(~valid):
+        value = values[pos]
+        if value is None or (not is_str[pos] and pd.isna(value) is True):
+            continue
+        try:
+            parsed = pd.to_datetime(value, utc=True)
+        except Exception:
+            continue
+        if not pd.isna(parsed):
+            stamps[pos] = parsed.as_unit('ns').value
+            valid[pos] = True
+    return stamps, valid
+
 
 class AnomalyDetector:
     def __init__(self):
@@ -157,6 +229,110 @@ class AnomalyDetector:
         
         return anomalies
 
+    def scan_frame(self, frame, prev_row: Dict = None) -> Dict:
+        """Run all anomaly checks over a whole DataFrame (or list of row dicts).
+
+        Equivalent to calling scan_row on each row with the previous row as
+        prev_row (prev_row for the first row), but evaluated as column masks.
+
+        Returns:
+            {index label: [anomalies]} for flagged rows only, in row order
+        """
+        import numpy as np
+        import pandas as pd
+        if not isinstance(frame, pd.DataFrame):
+            frame = pd.DataFrame.from_records(list(frame))
+        n = len(frame)
+        if n == 0:
+            return {}
+
+        amount = _column_floats(frame, 'amount')
+        price = _column_floats(frame, 'price_usd')
+        with np.errstate(all='ignore'):
+            total = amount * price
+
+            # PRICE_ERROR: heuristic 1 wins over heuristic 2 (same order as detect_price_error)
+            eligible = (amount > 0) & (price > 0) & (amount >= 0.00001)
+            price_tiny = eligible & (amount <= 0.01) & (price >= 50) & (price <= 100000)
+            price_small = eligible & ~price_tiny & (amount >= 0.01) & (amount <= 0.5) & (price >= 1000) & (price <= 50000)
+
+            extreme_high = total > 1_000_000
+            extreme_dust = (total > 0) & (total < 0.01)
+
+        has_prev = np.ones(n, dtype=bool)
+        has_prev[0] = bool(prev_row)
+        dates = frame['date'].tolist() if 'date' in frame.columns else [None] * n
+        first_prev = prev_row.get('date') if prev_row else None
+        stamps, parsed = _parse_timestamps([first_prev] + dates)
+        comparable = has_prev & parsed[:-1] & parsed[1:]
+        # NaT slots hold int64 min, so only trust comparisons where both parsed
+        with np.errstate(over='ignore'):
+            out_of_order = comparable & (stamps[1:] < stamps[:-1])
+            gap_days = (stamps[1:] - stamps[:-1]) // _DAY_NS
+        large_gap = comparable & ~out_of_order & (gap_days > 30)
+
+        # One small code per check (0 = clean) so the flagged rows can be
+        # walked as plain Python values instead of per-element NumPy lookups
+        price_code = np.where(price_tiny, 1, np.where(price_small, 2, 0))
+        extreme_code = np.where(extreme_high, 1, np.where(extreme_dust, 2, 0))
+        gap_code = np.where(out_of_order, 1, np.where(large_gap, 2, 0))
+        flagged = np.flatnonzero(price_code | extreme_code | gap_code)
+
+        labels = frame.index.tolist()
+        results = {}
+        for pos, a, p, pc, ec, gc, days in zip(
+                flagged.tolist(), amount[flagged].tolist(), price[flagged].tolist(),
+                price_code[flagged].tolist(), extreme_code[flagged].tolist(),
+                gap_code[flagged].tolist(), gap_days[flagged].tolist()):
+            anomalies = []
+            if pc == 1:
+                anomalies.append({
+                    "type": "PRICE_ERROR",
+                    "anomaly": True,
+                    "severity": "MEDIUM",
+                    "message": f"Possible price entry error: {a} units at ${p}/unit = ${p * a:.2f} total.",
+                    "suggested_fix": f"Verify: if correct per-unit price = ${p / a:.2f}"
+                })
+            elif pc == 2:
+                anomalies.append({
+                    "type": "PRICE_ERROR",
+                    "anomaly": True,
+                    "severity": "MEDIUM",
+                    "message": f"Price entry suspicious: {a} units at ${p}/unit. May be total value entered as price.",
+                    "suggested_fix": f"Verify: actual per-unit price = ${p / a:.2f}"
+                })
+            if ec == 1:
+                anomalies.append({
+                    "type": "EXTREME_VALUE",
+                    "anomaly": True,
+                    "severity": "MEDIUM",
+                    "message": f"Extremely high transaction value: ${a * p:,.2f}. Verify amount and price."
+                })
+            elif ec == 2:
+                anomalies.append({
+                    "type": "EXTREME_VALUE",
+                    "anomaly": True,
+                    "severity": "LOW",
+                    "message": f"Dust amount: ${a * p:.6f}. May be test transaction or rounding error."
+                })
+            if gc == 1:
+                previous = first_prev if pos == 0 else dates[pos - 1]
+                anomalies.append({
+                    "type": "TIMESTAMP_GAP",
+                    "anomaly": True,
+                    "severity": "HIGH",
+                    "message": f"Out-of-order timestamp: {dates[pos]} before previous {previous}"
+                })
+            elif gc == 2:
+                anomalies.append({
+                    "type": "TIMESTAMP_GAP",
+                    "anomaly": True,
+                    "severity": "LOW",
+                    "message": f"Large gap: {days} days since last transaction"
+                })
+            results[labels[pos]] = anomalies
+        return results
+
     def is_price_anomaly(self, price: float, recent_prices: List[float]) -> bool:
         """Simple range-based price anomaly check used in integration tests."""
         if price is None:
@@ -0,0 +1,242 @@
+"""
+================================================================================
+STREAMING BACKUP - Constant-Memory Backup Export and Restore
+================================================================================
+
+Builds and restores backups without ever holding the database, the zip
+archive or the encrypted payload in memory.
+
+Pipeline:
+    1. Snapshot - SQLite online backup API copies the live database page by
+       page into a temporary file (consistent even while the app is writing)
+    2. Archive - zipfile writes every member in chunks straight to disk;
+       CSV exports are fed from the cursor with fetchmany()
+    3. Encrypt - the archive is sealed chunk by chunk with the caller's
+       Fernet cipher; every chunk carries its sequence number and a final
+       flag so reordering or truncation is detected on restore
+    4. Serve - callers iterate the encrypted/plain chunks (Flask streamed
+       response, or a file on disk for the CLI)
+
+Encrypted Stream Format:
+    STREAM_MAGIC (8 bytes)
+    repeated: 4-byte big-endian token length + Fernet token
+    token plaintext: 8-byte chunk index + 1-byte final flag + chunk data
+
+    Files that do not start with STREAM_MAGIC are treated as legacy backups
+    (a single Fernet token over the whole archive) and still restore.
+
+Temporary files are created next to the destination (outputs/backups for the
+web UI) rather than in /tmp, which is often RAM-backed on NAS devices.
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import io
+import csv
+import json
+import shutil
+import sqlite3
+import struct
+import tempfile
+import zipfile
+from pathlib import Path
+from datetime import datetime, timezone
+
+from src.utils.lazy import lazy_module
+
+fernet = lazy_module('cryptography.fernet')
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB per read/encrypt step
+SNAPSHOT_PAGES_PER_STEP = 1024  # SQLite pages copied per backup() step
+CSV_FETCH_SIZE = 5000  # Rows pulled per fetchmany() when exporting CSV
+STREAM_MAGIC = b'CTTSTRM1'
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+_CHUNK_HEADER = struct.Struct('>QB')  # chunk index, final flag
+_TOKEN_LENGTH = struct.Struct('>I')
+
+
+# ====================================================================================
+# SNAPSHOT & ARCHIVE
+# ====================================================================================
+
+def snapshot_database(db_path: Path, dest_path: Path) -> Path:
+    """
+    Copy a database to dest_path using the SQLite online backup API.
+
+    Pages are copied in steps so memory stays flat regardless of DB size.
+    Files that are not SQLite databases are copied verbatim.
+    """
+    db_path, dest_path = Path(db_path), Path(dest_path)
+    with open(db_path, 'rb') as f:
+        is_sqlite = f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    if not is_sqlite:
+        shutil.copyfile(db_path, dest_path)
+        return dest_path
+
+    src = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+    dst = sqlite3.connect(str(dest_path))
+    try:
+        src.backup(dst, pages=SNAPSHOT_PAGES_PER_STEP)
+    finally:
+        dst.close()
+        src.close()
+    return dest_path
+
+
+def write_trades_csv(zf: zipfile.ZipFile, conn, arcname: str = 'trades_export.csv'):
+    """Stream the trades table into a zip member, fetchmany() at a time."""
+    cursor = conn.execute("SELECT * FROM trades")
+    if not cursor.description:
+        zf.writestr(arcname, 'No data found')
+        return
+    with zf.open(arcname, 'w') as raw, io.TextIOWrapper(raw, encoding='utf-8', newline='') as text:
+        writer = csv.writer(text)
+        writer.writerow([d[0] for d in cursor.description])
+        while True:
+            rows = cursor.fetchmany(CSV_FETCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+
+
+def build_trades_export_zip(conn, dest_path: Path) -> Path:
+    """Write a zip containing trades_export.csv to dest_path."""
+    with zipfile.ZipFile(dest_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        write_trades_csv(zf, conn)
+    return dest_path
+
+
+def build_backup_zip(dest_path: Path, db_file: Path, file_groups) -> Path:
+    """
+    Write a full backup archive to dest_path.
+
+    Args:
+        dest_path: Zip file to create
+        db_file: Live database; archived as crypto_master.db via snapshot_database
+        file_groups: Iterable of [(path, arcname), ...] alternatives. The first
+            existing path of each group is archived (e.g. prefer encrypted keys).
+
+    Returns:
+        dest_path
+    """
+    dest_path = Path(dest_path)
+    manifest = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'version': '1.0',
+        'includes': []
+    }
+    with zipfile.ZipFile(dest_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        db_file = Path(db_file)
+        if db_file.exists():
+            with tempfile.TemporaryDirectory(dir=dest_path.parent) as tmp:
+                snapshot = snapshot_database(db_file, Path(tmp) / 'crypto_master.db')
+                zf.write(str(snapshot), 'crypto_master.db')
+            manifest['includes'].append('crypto_master.db')
+
+        for group in file_groups:
+            for path, arcname in group:
+                if Path(path).exists():
+                    zf.write(str(path), arcname)
+                    manifest['includes'].append(arcname)
+                    break
+
+        zf.writestr('manifest.json', json.dumps(manifest, indent=2))
+    return dest_path
+
+
+# ====================================================================================
+# CHUNKED ENCRYPTION
+# ====================================================================================
+
+def iter_encrypted_chunks(fileobj, cipher, chunk_size: int = CHUNK_SIZE):
+    """Yield the encrypted stream for fileobj, one sealed chunk at a time."""
+    yield STREAM_MAGIC
+    index = 0
+    chunk = fileobj.read(chunk_size)
+    while True:
+        following = fileobj.read(chunk_size) if chunk else b''
+        final = not following
+        token = cipher.encrypt(_CHUNK_HEADER.pack(index, final) + chunk)
+        yield _TOKEN_LENGTH.pack(len(token)) + token
+        if final:
+            return
+        chunk = following
+        index += 1
+
+
+def decrypt_stream(src, dst, cipher):
+    """
+    Decrypt an encrypted backup from src into dst.
+
+    Accepts both the chunked stream format and legacy single-token backups.
+    Raises InvalidToken on a wrong key, tampering, reordering or truncation.
+    """
+    head = src.read(len(STREAM_MAGIC))
+    if head != STREAM_MAGIC:
+        # Legacy backups are one Fernet token over the whole archive
+        dst.write(cipher.decrypt(head + src.read()))
+        return
+
+    expected = 0
+    while True:
+        length_bytes = src.read(_TOKEN_LENGTH.size)
+        if len(length_bytes) != _TOKEN_LENGTH.size:
+            raise fernet.InvalidToken
+        (length,) = _TOKEN_LENGTH.unpack(length_bytes)
+        token = src.read(length)
+        if len(token) != length:
+            raise fernet.InvalidToken
+        plain = cipher.decrypt(token)
+        index, final = _CHUNK_HEADER.unpack_from(plain)
+        if index != expected:
+            raise fernet.InvalidToken
+        dst.write(plain[_CHUNK_HEADER.size:])
+        if final:
+            break
+        expected += 1
+    if src.read(1):
+        raise fernet.InvalidToken
+
+
+def encrypt_file(src_path: Path, dest_path: Path, cipher) -> Path:
+    """Encrypt src_path into dest_path using the chunked stream format."""
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        for block in iter_encrypted_chunks(src, cipher):
+            dst.write(block)
+    return Path(dest_path)
+
+
+def decrypt_file(src_path: Path, dest_path: Path, cipher) -> Path:
+    """Decrypt a chunked (or legacy) encrypted backup into dest_path."""
+    with open(src_path, 'rb') as src, open(dest_path, 'wb') as dst:
+        decrypt_stream(src, dst, cipher)
+    return Path(dest_path)
+
+
+# ====================================================================================
+# STREAMED DELIVERY
+# ====================================================================================
+
+def iter_backup_file(path: Path, cipher=None, cleanup_dir: Path = None, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield a backup file in chunks, encrypting on the fly when a cipher is given.
+
+    cleanup_dir (typically the temp directory holding path) is removed once the
+    generator finishes or is closed, so aborted downloads leave nothing behind.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if cipher is not None:
+                yield from iter_encrypted_chunks(f, cipher, chunk_size)
+            else:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+    finally:
+        if cleanup_dir is not None:
+            shutil.rmtree(cleanup_dir, ignore_errors=True)
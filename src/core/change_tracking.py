@@ -0,0 +1,168 @@
+"""
+================================================================================
+CHANGE TRACKING - Ledger Fingerprints for Change-Driven Runs
+================================================================================
+
+Decides whether a Transaction run has anything to do by comparing the
+trades and config.json against what the last successful run saw. The same
+per-year fingerprints key the report cache (src/core/report_cache.py),
+which decides which years a run recomputes.
+
+Fingerprints:
+    ledger_fingerprints(conn)   one token per calendar year of trades
+                                (keyed 'YYYY'; rows with unparseable dates
+                                fall under their first four characters),
+                                read from the ledger_years aggregate
+    ledger_digests(conn)        content hash per year; a full sorted scan,
+                                kept for verification
+    config_fingerprint(path)    digest of config.json (None if missing)
+
+    Auto_Runner records both in the status file after each successful run
+    (keys 'ledger_fingerprints' and 'config_fingerprint').
+
+Schema:
+    ledger_years(year, count, stamp)    per-year row count and a random
+                                        stamp renewed on every insert,
+                                        delete or update in that year
+    ledger_years_insert / _delete / _update triggers on trades
+
+    Like trade_stats, the triggers cover every write path, so reading the
+    fingerprints costs one row per year however large the ledger is.
+    ensure_ledger_years() installs them and rebuilds the table (new stamps
+    for every year) when the triggers are missing or on request, which
+    run_automation does for --force.
+
+Changed Years:
+    first_changed_year() returns the earliest year whose trades were added,
+    removed or edited (ALL_YEARS when a changed row has no numeric year).
+
+Usage:
+    from src.core.change_tracking import first_changed_year, ledger_fingerprints
+
+    recorded = get_status().get('ledger_fingerprints', {})
+    if first_changed_year(recorded, ledger_fingerprints(db.conn)) is None:
+        ...  # no trades changed since the last run
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+ALL_YEARS = 0
+"""first_changed_year() result meaning every year changed."""
+
+_FETCH_ROWS = 5000
+
+_BUMP = """INSERT INTO ledger_years (year, count, stamp) VALUES (IFNULL(substr({row}.date, 1, 4), ''), {delta}, hex(randomblob(8)))
+                ON CONFLICT (year) DO UPDATE SET count = count + {delta}, stamp = excluded.stamp;"""
+
+_TRIGGERS = {
+    'ledger_years_insert': f"""
+        CREATE TRIGGER ledger_years_insert AFTER INSERT ON trades BEGIN
+            {_BUMP.format(row='NEW', delta=1)}
+        END""",
+    'ledger_years_delete': f"""
+        CREATE TRIGGER ledger_years_delete AFTER DELETE ON trades BEGIN
+            {_BUMP.format(row='OLD', delta=-1)}
+            DELETE FROM ledger_years WHERE count <= 0;
+        END""",
+    'ledger_years_update': f"""
+        CREATE TRIGGER ledger_years_update AFTER UPDATE ON trades BEGIN
+            {_BUMP.format(row='OLD', delta=-1)}
+            {_BUMP.format(row='NEW', delta=1)}
+            DELETE FROM ledger_years WHERE count <= 0;
+        END""",
+}
+
+
+def _installed(conn) -> bool:
+    rows = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'trades' AND name IN (?, ?, ?)",
+        tuple(_TRIGGERS)).fetchone()
+    return rows[0] == len(_TRIGGERS)
+
+
+def ensure_ledger_years(conn, rebuild: bool = False) -> bool:
+    """
+    Install the per-year aggregate and its triggers, rebuilding the table
+    from the trades when the triggers were missing or rebuild is set.
+    Returns True when a rebuild happened. Commits any open transaction.
+    """
+    conn.commit()
+    if not rebuild and _installed(conn):
+        return False
+    with conn:
+        conn.execute("""CREATE TABLE IF NOT EXISTS ledger_years (
+            year TEXT PRIMARY KEY,
+            count INTEGER NOT NULL,
+            stamp TEXT NOT NULL
+        ) WITHOUT ROWID""")
+        conn.execute("DELETE FROM ledger_years")
+        conn.execute("INSERT INTO ledger_years (year, count, stamp) "
+                     "SELECT IFNULL(substr(date, 1, 4), ''), COUNT(*), hex(randomblob(8)) FROM trades "
+                     "GROUP BY IFNULL(substr(date, 1, 4), '')")
+        for name, sql in _TRIGGERS.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(sql)
+    logger.info("[DB] Rebuilt per-year ledger fingerprints")
+    return True
+
+
+def ledger_fingerprints(conn) -> Dict[str, str]:
+    """Change token per calendar year of the trade date ('count:stamp'). Installs the aggregate on first use."""
+    if not _installed(conn):
+        ensure_ledger_years(conn)
+    return {year: f"{count}:{stamp}" for year, count, stamp in
+            conn.execute("SELECT year, count, stamp FROM ledger_years")}
+
+
+def ledger_digests(conn) -> Dict[str, str]:
+    """Digest of every stored trade, one per calendar year of the trade date."""
+    cursor = conn.execute("SELECT substr(date, 1, 4), * FROM trades ORDER BY 1, id")
+    digests = {}
+    year, digest = None, None
+    while True:
+        rows = cursor.fetchmany(_FETCH_ROWS)
+        if not rows:
+            break
+        for row in rows:
+            if row[0] != year:
+                if digest is not None:
+                    digests[str(year)] = digest.hexdigest()
+                year, digest = row[0], hashlib.blake2b(digest_size=16)
+            digest.update('\x1f'.join(map(str, row[1:])).encode('utf-8'))
+            digest.update(b'\x1e')
+    if digest is not None:
+        digests[str(year)] = digest.hexdigest()
+    return digests
+
+
+def config_fingerprint(path) -> Optional[str]:
+    """Digest of the config file, or None when it does not exist."""
+    path = Path(path)
+    try:
+        return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+
+def first_changed_year(recorded: Dict[str, str], current: Dict[str, str]) -> Optional[int]:
+    """
+    Earliest year whose trades were added, removed or edited, or None.
+    Changed rows without a numeric year mark every year as changed.
+    """
+    changed = [y for y in set(recorded) | set(current) if recorded.get(y) != current.get(y)]
+    if not changed:
+        return None
+    years = [int(y) for y in changed if y.isdigit()]
+    if len(years) < len(changed):
+        return ALL_YEARS
+    return min(years)
+
@@ -0,0 +1,180 @@
+"""
+================================================================================
+COLUMNAR - Optional Parquet Export/Import for Trades and Year Reports
+================================================================================
+
+Parquet copies of the trades table and the per-year reports. Columnar files
+load an order of magnitude faster than re-parsing CSV and keep every value
+exactly as stored (all columns are written as strings, like the TEXT
+columns in SQLite).
+
+Optional Dependency:
+    pyarrow. Without it CSV stays the only format: pyarrow_available()
+    returns False, read_report() reads the CSV and the Parquet writers
+    raise ColumnarUnavailable with an install hint.
+
+Year Reports:
+    config.json "performance": {"report_format": "parquet"} makes
+    TransactionEngine.export write NAME.parquet next to every NAME.csv.
+    read_report(csv_path) prefers the Parquet copy when it is at least as
+    new as the CSV (carryover between years, web report viewers).
+
+Trades:
+    write_trades_parquet(conn, path)   streams SELECT * FROM trades in
+                                       record batches (cli.py export
+                                       --format parquet)
+    import_trades_parquet(conn, path)  bulk INSERT OR IGNORE, one batch per
+                                       executemany() in a single
+                                       transaction (cli.py transactions
+                                       import-parquet)
+
+Usage:
+    from src.core import columnar
+
+    if columnar.pyarrow_available():
+        columnar.write_trades_parquet(conn, Path('trades.parquet'))
+    df = columnar.read_report(year_dir / 'US_transaction_LOSS_ANALYSIS.csv')
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import logging
+from pathlib import Path
+from typing import List
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+FORMATS = ('csv', 'parquet')
+PARQUET_BATCH_ROWS = 50000  # Rows per record batch / executemany() call
+
+
+class ColumnarUnavailable(RuntimeError):
+    """Parquet support was requested but pyarrow is not installed."""
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ColumnarUnavailable("Parquet support requires pyarrow (pip install pyarrow)") from None
+    return pa, pq
+
+
+def parquet_path(csv_path) -> Path:
+    return Path(csv_path).with_suffix('.parquet')
+
+
+def report_format(config) -> str:
+    """Configured year report format ('csv' or 'parquet'); 'csv' when pyarrow is missing."""
+    fmt = str((config or {}).get('performance', {}).get('report_format', 'csv')).lower()
+    if fmt == 'parquet' and not pyarrow_available():
+        logger.warning("[EXPORT] report_format is 'parquet' but pyarrow is not installed; writing CSV only")
+        return 'csv'
+    return fmt if fmt in FORMATS else 'csv'
+
+
+# ----------------------------------------------------------------------
+# Year reports
+# ----------------------------------------------------------------------
+
+def write_report(df, csv_path, fmt: str = 'csv') -> List[Path]:
+    """Write df as csv_path (and its Parquet copy for fmt='parquet'); returns the files written."""
+    csv_path = Path(csv_path)
+    df.to_csv(csv_path, index=False)
+    written = [csv_path]
+    if fmt == 'parquet':
+        written.append(write_parquet(df, parquet_path(csv_path)))
+    return written
+
+
+def write_parquet(df, path) -> Path:
+    """Write df to Parquet with every column as strings (missing values stay null)."""
+    pa, pq = _parquet()
+    table = pa.Table.from_pandas(df.astype(str).where(df.notna(), None), preserve_index=False)
+    pq.write_table(table, str(path))
+    return Path(path)
+
+
+def read_report(csv_path):
+    """
+    DataFrame for a report, from its Parquet copy when present and not older
+    than the CSV, else from the CSV. Numeric columns are restored like
+    read_csv would infer them.
+    """
+    import pandas as pd
+
+    csv_path = Path(csv_path)
+    pq_path = parquet_path(csv_path)
+    if pq_path.exists() and pyarrow_available():
+        if not csv_path.exists() or pq_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns:
+            df = pd.read_parquet(pq_path)
+            for name in df.columns:
+                try:
+                    df[name] = pd.to_numeric(df[name])
+                except (ValueError, TypeError):
+                    pass
+            return df
+    return pd.read_csv(csv_path)
+
+
+def parquet_rows(path) -> int:
+    _, pq = _parquet()
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+# ----------------------------------------------------------------------
+# Trades
+# ----------------------------------------------------------------------
+
+def write_trades_parquet(conn, dest_path, batch_rows: int = PARQUET_BATCH_ROWS) -> int:
+    """Stream the trades table into a Parquet file; returns the row count."""
+    pa, pq = _parquet()
+    cursor = conn.execute("SELECT * FROM trades")
+    columns = [d[0] for d in cursor.description]
+    schema = pa.schema([(name, pa.string()) for name in columns])
+    total = 0
+    with pq.ParquetWriter(str(dest_path), schema) as writer:
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            arrays = [pa.array([None if r[i] is None else str(r[i]) for r in rows], pa.string())
+                      for i in range(len(columns))]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            total += len(rows)
+    return total
+
+
+def import_trades_parquet(conn, path, batch_rows: int = PARQUET_BATCH_ROWS) -> int:
+    """
+    Bulk-load a Parquet trade dump into trades (columns matched by name,
+    existing ids kept). Returns the number of trades inserted.
+    """
+    _, pq = _parquet()
+    table_columns = [row[1] for row in conn.execute("PRAGMA table_info(trades)")]
+    source = pq.ParquetFile(str(path))
+    columns = [c for c in source.schema_arrow.names if c in table_columns]
+    if 'id' not in columns:
+        raise ValueError(f"{Path(path).name} has no 'id' column")
+    sql = (f"INSERT OR IGNORE INTO trades ({', '.join(columns)}) "
+           f"VALUES ({', '.join('?' for _ in columns)})")
+    inserted = 0
+    with conn:
+        for batch in source.iter_batches(batch_size=batch_rows, columns=columns):
+            values = [[None if v is None else str(v) for v in batch.column(i).to_pylist()]
+                      for i in range(batch.num_columns)]
+            # rowcount counts the trades rows only (not trade_stats trigger writes)
+            inserted += conn.executemany(sql, zip(*values)).rowcount
+    logger.info(f"[IMPORT] Loaded {inserted} trades from {Path(path).name}")
+    return inserted
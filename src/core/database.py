@@ -19,6 +19,7 @@ Data Model:
     - UTC timestamp normalization
     - Source/destination tracking for transfers
     - Batch ID for atomic multi-leg transactions
+    - Trigger-maintained dashboard counts (trade_stats, see src/core/trade_stats.py)
 
 Features:
     - Automatic schema updates for new columns
@@ -41,7 +42,6 @@ Last Modified: December 2025
 import sqlite3
 import shutil
 import logging
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 from decimal import Decimal
@@ -69,9 +69,19 @@ def _resolve_db_file():
 DB_FILE = _resolve_db_file()
 BASE_DIR = _BASE_DIR
 from src.utils.config import load_config
+from src.core.snapshots import snapshot_store_for
+from src.core.change_tracking import ensure_ledger_years
+from src.core.trade_queries import TRADES_DDL
+from src.core.trade_stats import ensure_trade_stats
+from src.core import integrity
+from src.utils.lazy import lazy_module
+
+pd = lazy_module('pandas')
 
 logger = logging.getLogger("Crypto_Transaction_Engine")
 
+SAFETY_SNAPSHOT_LABEL = 'safety'
+
 # Load global config
 GLOBAL_CONFIG = load_config()
 
@@ -170,18 +180,25 @@ class DatabaseManager:
             except Exception:
                 self.db_file = Path(DB_FILE)
 
-        self._ensure_integrity()
+        # Stamp of the file as verified at open; close() carries it over our own writes
+        self._verified_stamp = integrity.db_stamp(self.db_file) if self._ensure_integrity() else None
         self.conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
         self.cursor = self.conn.cursor()
+        self._open_data_version = self._data_version()
         self._init_tables()
 
     def _backup_path(self):
-        """Get path for safety backup file."""
+        """Legacy single-copy safety backup (pre-snapshot installs)."""
         return self.db_file.with_suffix('.bak')
 
+    def snapshot_store(self):
+        """Incremental snapshot store kept next to the database file."""
+        return snapshot_store_for(self.db_file)
+
     def create_safety_backup(self):
         """
-        Create a safety backup of the database before destructive operations.
+        Snapshot the database before destructive operations.
+        Only chunks that changed since the previous snapshot are written.
         Only creates backup if enabled in config.
         """
         if not GLOBAL_CONFIG['general']['create_db_backups']:
@@ -189,58 +206,72 @@ class DatabaseManager:
         if self.db_file.exists():
             self.conn.commit()
             try:
-                shutil.copy(self.db_file, self._backup_path())
+                manifest = self.snapshot_store().create_snapshot(self.db_file, label=SAFETY_SNAPSHOT_LABEL)
+                self._safety_snapshot_id = manifest['id']
             except Exception as e:
                 logger.warning(f"Failed to create safety backup: {e}")
 
     def restore_safety_backup(self):
         """
-        Restore database from safety backup.
+        Restore database from the latest safety snapshot.
         Used for rollback after failed operations.
         """
         if not GLOBAL_CONFIG['general']['create_db_backups']:
             return
-        backup_path = self._backup_path()
-        if backup_path.exists():
-            self.close()
-            try:
-                shutil.copy(backup_path, self.db_file)
-                self.conn = sqlite3.connect(str(self.db_file))
-                self.cursor = self.conn.cursor()
-                logger.info("[SAFE] Restored database backup.")
-            except Exception as e:
-                logger.error(f"Failed to restore backup: {e}")
+        store = self.snapshot_store()
+        snapshot = getattr(self, '_safety_snapshot_id', None) or store.latest(SAFETY_SNAPSHOT_LABEL)
+        legacy_path = self._backup_path()
+        if not snapshot and not legacy_path.exists():
+            return
+        self.close()
+        self._verified_stamp = None
+        try:
+            if snapshot:
+                store.restore(snapshot, self.db_file)
+            else:
+                shutil.copy(legacy_path, self.db_file)
+            self.conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+            self.cursor = self.conn.cursor()
+            logger.info("[SAFE] Restored database backup.")
+        except Exception as e:
+            logger.error(f"Failed to restore backup: {e}")
 
     def remove_safety_backup(self):
         """Remove safety backup after successful operation."""
-        pass  # Kept for backward compatibility
+        pass  # Snapshots are pruned by the store's retention policy
 
     def _ensure_integrity(self):
         """
-        Check database integrity before opening.
+        Check database integrity before opening: PRAGMA quick_check, skipped
+        when the file is unchanged since its last verified check (the full
+        integrity_check runs as a scheduled job; see src/core/integrity.py).
         Recovers corrupted database by moving it aside and starting fresh.
+        Returns True when the file is known to be good.
         """
         if not self.db_file.exists():
-            return
-        conn = None
+            return False
+        if not integrity.quick_check_needed(self.db_file):
+            return True
         try:
-            conn = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
-            conn.execute("PRAGMA integrity_check")
-            conn.close()
+            return integrity.run_check(self.db_file, 'quick') == 'ok'
         except Exception as e:
             # If database is locked, do not attempt recovery here (Windows file lock)
             if isinstance(e, sqlite3.OperationalError) and 'locked' in str(e).lower():
-                try:
-                    if conn:
-                        conn.close()
-                except Exception:
-                    pass
-                return
-            try:
-                if conn:
-                    conn.close()
-            finally:
-                self._recover_db()
+                return False
+            self._recover_db()
+            return False
+
+    def check_integrity(self, full=False):
+        """Run quick_check (or integrity_check with full=True) now; returns 'ok' or the problems found."""
+        if self.conn is not None:
+            self.conn.commit()
+        return integrity.run_check(self.db_file, 'full' if full else 'quick')
+
+    def _data_version(self):
+        try:
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return None
 
     def _get_base_dir(self):
         """Resolve BASE_DIR dynamically to support test monkeypatching."""
@@ -332,21 +363,11 @@ class DatabaseManager:
         Runs migrations if existing table has old schema.
         """
         try:
-            self.cursor.execute('''CREATE TABLE IF NOT EXISTS trades (
-                id TEXT PRIMARY KEY,
-                date TEXT,
-                source TEXT,
-                destination TEXT,
-                action TEXT,
-                coin TEXT,
-                amount TEXT,
-                price_usd TEXT,
-                fee TEXT,
-                fee_coin TEXT,
-                batch_id TEXT
-            )''')
+            self.cursor.execute(TRADES_DDL)
             self.conn.commit()
             self._migrate_to_text_precision()
+            ensure_trade_stats(self.conn)
+            ensure_ledger_years(self.conn)
         except sqlite3.OperationalError as e:
             if 'locked' in str(e).lower():
                 # Defer table initialization; operations will surface lock appropriately
@@ -502,6 +523,16 @@ class DatabaseManager:
             except Exception:
                 pass
     
+    def change_token(self):
+        """
+        Cheap token that changes whenever the trades data may have changed.
+
+        PRAGMA data_version moves when another connection commits;
+        total_changes counts writes made through this connection.
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, self.conn.total_changes)
+
     def get_all(self):
         """
         Retrieve all trades from database.
@@ -509,12 +540,21 @@ class DatabaseManager:
         Returns:
             DataFrame with all trades, sorted by date ascending.
             Numeric columns are converted to Decimal for precision.
+
+        The parsed ledger is cached per connection and reused (as a copy)
+        until change_token() moves, so several years computed in one run, or
+        repeated runs on a long-lived manager, parse the trades once.
         """
+        token = self.change_token()
+        cached = getattr(self, '_ledger_cache', None)
+        if cached is not None and cached[0] is self.conn and cached[1] == token:
+            return cached[2].copy()
         df = pd.read_sql_query("SELECT * FROM trades ORDER BY date ASC", self.conn)
         for col in ['amount', 'price_usd', 'fee']:
             if col in df.columns:
                 df[col] = df[col].apply(lambda x: to_decimal(x) if x else Decimal('0'))
-        return df
+        self._ledger_cache = (self.conn, token, df)
+        return df.copy()
     
     def get_zeros(self):
         """
@@ -548,10 +588,19 @@ class DatabaseManager:
                     self.conn.commit()
                 except Exception:
                     pass
+                # No other connection committed while we were open: the file is still verified
+                verified = (getattr(self, '_verified_stamp', None) is not None
+                            and self._data_version() == self._open_data_version)
                 self.conn.close()
+                if verified:
+                    try:
+                        integrity.mark_verified(self.db_file, self._verified_stamp)
+                    except Exception as e:
+                        logger.debug(f"[DB] Could not record integrity state: {e}")
         finally:
             self.conn = None
             self.cursor = None
+            self._ledger_cache = None
 
     # Make DatabaseManager usable as a context manager
     def __enter__(self):
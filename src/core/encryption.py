@@ -52,11 +52,9 @@ import logging
 from pathlib import Path
 from datetime import datetime
 import shutil
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import filelock
+import tempfile
 
+from src.core.backup import snapshot_database, encrypt_file, decrypt_file
 from src.utils.constants import (
     DB_ENCRYPTION_SALT_LENGTH,
     DB_ENCRYPTION_ITERATIONS,
@@ -71,6 +69,10 @@ from src.utils.constants import (
     KEYS_FILE,
     WALLETS_FILE
 )
+from src.utils.lazy import lazy_module
+
+fernet = lazy_module('cryptography.fernet')
+filelock = lazy_module('filelock')
 
 logger = logging.getLogger("Crypto_Transaction_Engine")
 
@@ -111,6 +113,9 @@ class DatabaseEncryption:
         # Mix context into password to derive different keys
         password_with_context = f"{password}::{context}" if context else password
         
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
@@ -141,7 +146,7 @@ class DatabaseEncryption:
     @staticmethod
     def generate_random_key():
         """Generate random 256-bit encryption key for database."""
-        return Fernet.generate_key()
+        return fernet.Fernet.generate_key()
     
     @staticmethod
     def encrypt_key(db_key: bytes, password: str, salt: bytes = None, context: str = ""):
@@ -158,7 +163,7 @@ class DatabaseEncryption:
             (encrypted_key, salt) tuple
         """
         password_key, used_salt = DatabaseEncryption.derive_key_from_password(password, salt, context)
-        cipher = Fernet(password_key)
+        cipher = fernet.Fernet(password_key)
         encrypted_key = cipher.encrypt(db_key)
         return encrypted_key, used_salt
     
@@ -177,7 +182,7 @@ class DatabaseEncryption:
             Decrypted database key
         """
         password_key, _ = DatabaseEncryption.derive_key_from_password(password, salt, context)
-        cipher = Fernet(password_key)
+        cipher = fernet.Fernet(password_key)
         return cipher.decrypt(encrypted_key)
     
     @staticmethod
@@ -250,18 +255,13 @@ class DatabaseEncryption:
             
             # Decrypt to verify password
             db_key = DatabaseEncryption.decrypt_key(encrypted_key, password, salt)
-            cipher = Fernet(db_key)
-            
-            # Read database file
-            with open(DB_FILE, 'rb') as f:
-                db_content = f.read()
+            cipher = fernet.Fernet(db_key)
             
-            # Encrypt database
-            encrypted_db = cipher.encrypt(db_content)
-            
-            # Write encrypted backup
-            with open(backup_path, 'wb') as f:
-                f.write(encrypted_db)
+            # Snapshot via the online backup API, then seal it chunk by chunk
+            backup_path = Path(backup_path)
+            with tempfile.TemporaryDirectory(dir=backup_path.parent) as tmp:
+                snapshot = snapshot_database(DB_FILE, Path(tmp) / 'snapshot.db')
+                encrypt_file(snapshot, backup_path, cipher)
             
             logger.info(f"[BACKUP] Created encrypted backup at {backup_path}")
             return backup_path
@@ -298,23 +298,26 @@ class DatabaseEncryption:
             
             # Decrypt database key
             db_key = DatabaseEncryption.decrypt_key(encrypted_key, password, salt)
-            cipher = Fernet(db_key)
-            
-            # Read and decrypt backup
-            with open(encrypted_backup_path, 'rb') as f:
-                encrypted_db = f.read()
+            cipher = fernet.Fernet(db_key)
             
-            decrypted_db = cipher.decrypt(encrypted_db)
-            
-            # Create backup of current database
-            if target_db_path.exists():
-                backup_name = target_db_path.with_suffix(f'.bak.{datetime.now().strftime("%Y%m%d_%H%M%S")}')
-                shutil.copy(target_db_path, backup_name)
-                logger.info(f"[BACKUP] Saved current DB to {backup_name}")
-            
-            # Restore encrypted backup
-            with open(target_db_path, 'wb') as f:
-                f.write(decrypted_db)
+            # Decrypt backup next to the target so the swap below is atomic
+            target_db_path = Path(target_db_path)
+            fd, tmp_name = tempfile.mkstemp(suffix='.restore', dir=target_db_path.parent)
+            os.close(fd)
+            try:
+                decrypt_file(encrypted_backup_path, tmp_name, cipher)
+                
+                # Create backup of current database
+                if target_db_path.exists():
+                    backup_name = target_db_path.with_suffix(f'.bak.{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+                    shutil.copy(target_db_path, backup_name)
+                    logger.info(f"[BACKUP] Saved current DB to {backup_name}")
+                
+                # Restore encrypted backup
+                os.replace(tmp_name, target_db_path)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
             
             logger.info(f"[BACKUP] Restored database from encrypted backup")
             return target_db_path
@@ -343,7 +346,7 @@ def _get_or_create_key(path: Path):
             return path.read_bytes()
         except Exception:
             pass
-    key = Fernet.generate_key()
+    key = fernet.Fernet.generate_key()
     _ensure_parent(path)
     try:
         path.write_bytes(key)
@@ -366,11 +369,11 @@ def get_api_key_cipher():
             password = os.environ.get('CRYPTO_TRANSACTION_PASSWORD')
             if password:
                 key = DatabaseEncryption.derive_fernet_key(password, salt, 'api_keys')
-                return Fernet(key)
+                return fernet.Fernet(key)
         except Exception:
             pass
     # Fallback to file-based key for backward compatibility
-    return Fernet(_get_or_create_key(API_KEY_ENCRYPTION_FILE))
+    return fernet.Fernet(_get_or_create_key(API_KEY_ENCRYPTION_FILE))
 
 
 def get_wallet_cipher():
@@ -383,11 +386,11 @@ def get_wallet_cipher():
             password = os.environ.get('CRYPTO_TRANSACTION_PASSWORD')
             if password:
                 key = DatabaseEncryption.derive_fernet_key(password, salt, 'wallets')
-                return Fernet(key)
+                return fernet.Fernet(key)
         except Exception:
             pass
     # Fallback to file-based key for backward compatibility
-    return Fernet(_get_or_create_key(WEB_ENCRYPTION_KEY_FILE))
+    return fernet.Fernet(_get_or_create_key(WEB_ENCRYPTION_KEY_FILE))
 
 
 def encrypt_api_keys(data):
@@ -51,29 +51,21 @@ Version: 30 (2025 Compliance Edition)
 """
 
 import sqlite3
-import pandas as pd
-import ccxt
 import json
 import time
 import shutil
 import sys
 import os
-import requests
-import yfinance as yf
 import hashlib
 import decimal
 from datetime import datetime, timedelta
 from pathlib import Path
 from decimal import Decimal, ROUND_HALF_UP
 import logging
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
-import filelock
-from src.rules_model_bridge import classify as classify_rules_ml
-from src.ml_service import MLService
-from src.anomaly_detector import AnomalyDetector
+from src.utils.lazy import lazy_module
+from src.utils.jsonl_sink import JsonlSink
+from src.utils.progress import NULL_PROGRESS
 
 # Import from modular structure
 from src.core.encryption import (
@@ -90,6 +82,22 @@ from src.core.encryption import (
     get_wallet_cipher
 )
 from src.core.database import DatabaseManager
+from src.core import columnar, report_catalog, wallet_balances
+
+# Exchange, price and dataframe stacks are imported on first use so that
+# commands which never touch them (status, backups, key management) start fast.
+pd = lazy_module('pandas')
+ccxt = lazy_module('ccxt')
+requests = lazy_module('requests')
+yf = lazy_module('yfinance')
+# Key handling, file locks and the ML/validation helpers are likewise only
+# needed once a command encrypts, saves settings or ingests transactions.
+fernet = lazy_module('cryptography.fernet')
+filelock = lazy_module('filelock')
+rules_model_bridge = lazy_module('src.rules_model_bridge')
+ml_service = lazy_module('src.ml_service')
+anomaly_detector = lazy_module('src.anomaly_detector')
+transaction_validator = lazy_module('src.transaction_validator')
 
 # ==========================================
 # CONSTANTS
@@ -100,6 +108,11 @@ DECIMAL_PRECISION = 8  # Crypto precision (satoshi level)
 USD_PRECISION = 2  # USD rounding precision
 LONG_TERM_HOLDING_DAYS = 365  # Days for long-term capital gains
 
+# Ingestion Validation Constants
+INGEST_ACTIONS = {'BUY', 'SELL', 'INCOME', 'DEPOSIT', 'SPEND'}  # Actions _proc_csv_smart can emit
+VALIDATION_CHUNK_ROWS = 5000  # Trades held and validated per columnar pass during ingestion
+PROGRESS_EVERY_ROWS = 500  # Rows between progress hook updates during ingestion and reports
+
 # Database Constants
 MAX_DB_BACKUP_SIZE_MB = 100  # Maximum database backup size
 DB_RETRY_ATTEMPTS = 3  # Number of retries for database operations
@@ -204,7 +217,7 @@ def _get_or_create_key(path: Path):
             return path.read_bytes()
         except Exception:
             pass
-    key = Fernet.generate_key()
+    key = fernet.Fernet.generate_key()
     _ensure_parent(path)
     try:
         path.write_bytes(key)
@@ -238,11 +251,11 @@ def get_api_key_cipher():
             password = os.environ.get('CRYPTO_TRANSACTION_PASSWORD')
             if password:
                 key = DatabaseEncryption.derive_fernet_key(password, salt, 'api_keys')
-                return Fernet(key)
+                return fernet.Fernet(key)
         except Exception:
             pass
     # Fallback to file-based key for backward compatibility
-    return Fernet(_get_or_create_key(API_KEY_ENCRYPTION_FILE))
+    return fernet.Fernet(_get_or_create_key(API_KEY_ENCRYPTION_FILE))
 
 
 def get_wallet_cipher():
@@ -255,11 +268,11 @@ def get_wallet_cipher():
             password = os.environ.get('CRYPTO_TRANSACTION_PASSWORD')
             if password:
                 key = DatabaseEncryption.derive_fernet_key(password, salt, 'wallets')
-                return Fernet(key)
+                return fernet.Fernet(key)
         except Exception:
             pass
     # Fallback to file-based key for backward compatibility
-    return Fernet(_get_or_create_key(WEB_ENCRYPTION_KEY_FILE))
+    return fernet.Fernet(_get_or_create_key(WEB_ENCRYPTION_KEY_FILE))
 
 
 def encrypt_api_keys(data):
@@ -473,9 +486,22 @@ def update_status(key, value):
     except Exception as e:
         logger.error(f"Failed to update status: {e}")
 
+_data_change_listeners = []
+
+def on_data_changed(callback):
+    """Register callback() to run after every mark_data_changed() (e.g. the scheduler's debounced recompute)."""
+    if callback not in _data_change_listeners:
+        _data_change_listeners.append(callback)
+    return callback
+
 def mark_data_changed():
     """Mark that data has changed (requires re-run)"""
     update_status('last_data_change', datetime.now().isoformat())
+    for callback in list(_data_change_listeners):
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Data change listener failed: {e}")
 
 def mark_run_complete(success=True):
     """Mark that calculation run completed"""
@@ -486,7 +512,8 @@ def load_config():
     defaults = {
         "general": {"run_audit": True, "create_db_backups": True},
         "accounting": {"method": "FIFO"},
-        "performance": {"respect_free_tier_limits": True, "api_timeout_seconds": 30},
+        "performance": {"respect_free_tier_limits": True, "api_timeout_seconds": 30, "isolated_runs": False,
+                        "report_format": "csv"},
         "logging": {"compress_older_than_days": 30},
         "compliance": {
             "strict_broker_mode": True,
@@ -527,6 +554,32 @@ ML_AUTO_SHUTDOWN = bool(GLOBAL_CONFIG.get('ml_fallback', {}).get('auto_shutdown_
 ML_LOG_FILE = LOG_DIR / 'model_suggestions.log'
 ANOMALY_LOG_FILE = LOG_DIR / 'anomalies.log'
 
+def reload_config():
+    """
+    Re-read config.json for long-lived processes (the in-process Auto_Runner).
+    GLOBAL_CONFIG is updated in place so existing references see the change,
+    and the settings derived from it above are recomputed.
+    """
+    global STRICT_BROKER_MODE, BROKER_SOURCES, STAKING_transactionABLE_ON_RECEIPT, DEFI_LP_CONSERVATIVE
+    global COLLECTIBLE_PREFIXES, COLLECTIBLE_TOKENS
+    global ML_FALLBACK_ENABLED, ML_CONFIDENCE_THRESHOLD, ML_MODEL_NAME, ML_AUTO_SHUTDOWN
+    fresh = load_config()
+    GLOBAL_CONFIG.clear()
+    GLOBAL_CONFIG.update(fresh)
+    compliance = GLOBAL_CONFIG.get('compliance', {})
+    ml = GLOBAL_CONFIG.get('ml_fallback', {})
+    STRICT_BROKER_MODE = bool(compliance.get('strict_broker_mode', True))
+    BROKER_SOURCES = set(compliance.get('broker_sources', ['COINBASE','KRAKEN','GEMINI','BINANCE','ROBINHOOD','ETORO']))
+    STAKING_transactionABLE_ON_RECEIPT = bool(compliance.get('staking_transactionable_on_receipt', True))
+    DEFI_LP_CONSERVATIVE = bool(compliance.get('defi_lp_conservative', True))
+    COLLECTIBLE_PREFIXES = set(compliance.get('collectible_prefixes', ['NFT-','ART-']))
+    COLLECTIBLE_TOKENS = set(compliance.get('collectible_tokens', ['NFT','PUNK','BAYC']))
+    ML_FALLBACK_ENABLED = bool(ml.get('enabled', False))
+    ML_CONFIDENCE_THRESHOLD = float(ml.get('confidence_threshold', 0.85))
+    ML_MODEL_NAME = ml.get('model_name', 'shim')
+    ML_AUTO_SHUTDOWN = bool(ml.get('auto_shutdown_after_batch', True))
+    return GLOBAL_CONFIG
+
 # DeFi protocol patterns for LP detection
 DEFI_LP_PATTERNS = ['UNI-V2', 'UNI-V3', 'SUSHI', 'CURVE', 'BALANCER', 'AAVE', 
                     'COMPOUND', 'MAKER', 'YEARN', '-LP', '_LP', 'POOL']
@@ -612,31 +665,37 @@ class NetworkRetry:
 # 2. INGESTOR
 # ====================================================================================
 class Ingestor:
-    def __init__(self, db):
+    def __init__(self, db, fetcher=None):
         self.db = db
-        self.fetcher = PriceFetcher()
+        self.fetcher = fetcher or PriceFetcher()
         self.ml_enabled = ML_FALLBACK_ENABLED
-        self.ml_service = MLService(mode=ML_MODEL_NAME, auto_shutdown_after_inference=False) if self.ml_enabled else None
-        self.anomaly_detector = AnomalyDetector()
+        self.ml_service = ml_service.MLService(mode=ML_MODEL_NAME, auto_shutdown_after_inference=False) if self.ml_enabled else None
+        self.anomaly_detector = anomaly_detector.AnomalyDetector()
         self.prev_row = None
+        self._log_sinks = {}
+        self.last_validation = None
+        self.progress = NULL_PROGRESS  # ProgressHook for csv_scan / csv_rows / api_sync
 
     def run_csv_scan(self):
         logger.info("--- 1. SCANNING INPUTS ---")
         self.db.create_safety_backup()
         try:
-            found = False
-            for fp in INPUT_DIR.glob('*.csv'):
+            files = sorted(INPUT_DIR.glob('*.csv'))
+            for i, fp in enumerate(files):
                 logger.info(f"-> Processing: {fp.name}")
-                found = True
+                self.progress.update('csv_scan', i, len(files), message=fp.name)
                 self._proc_csv_smart(fp, f"CSV_{fp.name}_{datetime.now().strftime('%Y%m%d')}")
                 self._archive(fp)
-            if not found: logger.info("   No new CSV files.")
+            if files: self.progress.update('csv_scan', len(files), len(files))
+            else: logger.info("   No new CSV files.")
             self.db.remove_safety_backup()
         except ValueError:
             self.db.restore_safety_backup()
             raise
         except:
             self.db.restore_safety_backup()
+        finally:
+            self.flush_logs()
 
     def _proc_csv_smart(self, fp, batch):
         # Pre-validate CSV content for delimiter and required columns
@@ -659,13 +718,29 @@ class Ingestor:
 
         df = pd.read_csv(fp)
         df.columns = [c.lower().strip() for c in df.columns]
+
+        # Anomaly detection for the whole file in one vectorized pass
+        flagged = self.anomaly_detector.scan_frame(df, self.prev_row)
+
+        # Validated in fixed-size chunks as they are saved, so memory stays
+        # bounded by VALIDATION_CHUNK_ROWS whatever the file size
+        validation = {'valid': 0, 'invalid': 0, 'samples': []}
+        pending = []
+        def save(trade):
+            self.db.save_trade(trade)
+            pending.append(trade)
+            if len(pending) >= VALIDATION_CHUNK_ROWS:
+                self._validate_chunk(pending, validation)
+                pending.clear()
         
-        for idx, r in df.iterrows():
+        total_rows = len(df)
+        for pos, (idx, r) in enumerate(df.iterrows()):
+            if pos % PROGRESS_EVERY_ROWS == 0:
+                self.progress.update('csv_rows', pos, total_rows, message=fp.name)
             classified = False
             row_dict = r.to_dict()
             
-            # Run anomaly detection on each row
-            anomalies = self.anomaly_detector.scan_row(row_dict, self.prev_row)
+            anomalies = flagged.get(idx)
             if anomalies:
                 self._log_anomalies(anomalies, row_dict, batch, idx)
             
@@ -701,8 +776,8 @@ class Ingestor:
                         sell_price = Decimal('0')
                         buy_price = Decimal('0')
                     
-                    self.db.save_trade({'id': f"{batch}_{idx}_SELL", 'date': d.isoformat(), 'source': 'SWAP', 'action': 'SELL', 'coin': str(sent_c), 'amount': sent_a, 'price_usd': sell_price, 'fee': fee, 'batch_id': batch})
-                    self.db.save_trade({'id': f"{batch}_{idx}_BUY", 'date': d.isoformat(), 'source': 'SWAP', 'action': 'BUY', 'coin': str(recv_c), 'amount': recv_a, 'price_usd': buy_price, 'fee': 0, 'batch_id': batch})
+                    save({'id': f"{batch}_{idx}_SELL", 'date': d.isoformat(), 'source': 'SWAP', 'action': 'SELL', 'coin': str(sent_c), 'amount': sent_a, 'price_usd': sell_price, 'fee': fee, 'batch_id': batch})
+                    save({'id': f"{batch}_{idx}_BUY", 'date': d.isoformat(), 'source': 'SWAP', 'action': 'BUY', 'coin': str(recv_c), 'amount': recv_a, 'price_usd': buy_price, 'fee': 0, 'batch_id': batch})
                     # Ensure no other branch processes this row
                     classified = True
                     continue
@@ -722,7 +797,7 @@ class Ingestor:
                     except (ValueError, decimal.InvalidOperation) as e:
                         logger.warning(f"   [Price parse] Row {idx}: Invalid price value {p}: {e}")
                         price_usd = Decimal('0')
-                    self.db.save_trade({'id': f"{batch}_{idx}_IN", 'date': d.isoformat(), 'source': source_lbl, 'action': act, 'coin': str(recv_c), 'amount': recv_a, 'price_usd': price_usd, 'fee': fee, 'batch_id': batch})
+                    save({'id': f"{batch}_{idx}_IN", 'date': d.isoformat(), 'source': source_lbl, 'action': act, 'coin': str(recv_c), 'amount': recv_a, 'price_usd': price_usd, 'fee': fee, 'batch_id': batch})
                     classified = True
                     # Backfill zero prices (second pass for outgoing-only trades)
                     if to_decimal(p) == 0:
@@ -736,7 +811,7 @@ class Ingestor:
                 elif sent_c and sent_a > 0:
                     act = 'SELL'
                     if any(x in tx_type for x in ['fee','cost']): act = 'SPEND'
-                    self.db.save_trade({'id': f"{batch}_{idx}_OUT", 'date': d.isoformat(), 'source': 'MANUAL', 'action': act, 'coin': str(sent_c), 'amount': sent_a, 'price_usd': p, 'fee': fee, 'batch_id': batch})
+                    save({'id': f"{batch}_{idx}_OUT", 'date': d.isoformat(), 'source': 'MANUAL', 'action': act, 'coin': str(sent_c), 'amount': sent_a, 'price_usd': p, 'fee': fee, 'batch_id': batch})
                     classified = True
             except Exception as e:
                 logger.warning(f"   [SKIP] Row {idx} failed: {type(e).__name__}: {e}")
@@ -744,6 +819,31 @@ class Ingestor:
                 if self.ml_enabled and not classified:
                     self._ml_fallback(r, batch, idx)
         self.db.commit()
+        self.progress.update('csv_rows', total_rows, total_rows, message=fp.name)
+        if pending:
+            self._validate_chunk(pending, validation)
+        self.last_validation = self._report_validation(validation, fp.name)
+        self.flush_logs()
+
+    def _validate_chunk(self, chunk, summary):
+        """Columnar validation of a chunk of saved trades, added to summary (report-only)."""
+        valid_actions = transaction_validator.TransactionValidator.VALID_ACTIONS | INGEST_ACTIONS
+        valid, errors = transaction_validator.TransactionValidator.validate_frame(chunk, valid_actions)
+        summary['valid'] += int(valid.sum())
+        summary['invalid'] += len(errors)
+        for pos, messages in errors.items():
+            if len(summary['samples']) >= 5:
+                break
+            summary['samples'].append({'id': chunk[pos]['id'], 'errors': messages})
+
+    def _report_validation(self, summary, name):
+        """Log the validation summary of one file and return it."""
+        if summary['invalid']:
+            total = summary['valid'] + summary['invalid']
+            logger.warning(f"   [VALIDATION] {summary['invalid']} of {total} trades from {name} failed validation")
+            for sample in summary['samples']:
+                logger.warning(f"      {sample['id']}: {'; '.join(sample['errors'])}")
+        return summary
 
     def _ml_fallback(self, row, batch, idx):
         try:
@@ -759,7 +859,7 @@ class Ingestor:
                 else:
                     tx[k] = str(v)
 
-            suggestion = classify_rules_ml(tx, ml=self.ml_service)
+            suggestion = rules_model_bridge.classify(tx, ml=self.ml_service)
             entry = {
                 'batch': batch,
                 'row_index': int(idx),
@@ -774,30 +874,41 @@ class Ingestor:
         except Exception as e:
             logger.debug(f"   [ML_FALLBACK] Row {idx} failed: {e}")
 
+    def _log_sink(self, path):
+        """Buffered JSONL writer for path (one per log file, created on first use)."""
+        sink = self._log_sinks.get(path)
+        if sink is None:
+            sink = self._log_sinks[path] = JsonlSink(path)
+        return sink
+
+    def flush_logs(self):
+        """Write out buffered anomaly and ML suggestion log entries."""
+        for path, sink in self._log_sinks.items():
+            try:
+                sink.flush()
+            except Exception as e:
+                logger.debug(f"   [LOG] Failed to flush {path}: {e}")
+
     def _log_ml_suggestion(self, entry):
         try:
-            LOG_DIR.mkdir(parents=True, exist_ok=True)
-            with open(ML_LOG_FILE, 'a', encoding='utf-8') as fh:
-                fh.write(json.dumps(entry) + "\n")
+            self._log_sink(ML_LOG_FILE).write(entry)
         except Exception as e:
             logger.debug(f"   [ML_LOG] Failed to write suggestion: {e}")
 
     def _log_anomalies(self, anomalies, row, batch, idx):
         try:
-            LOG_DIR.mkdir(parents=True, exist_ok=True)
-            for anom in anomalies:
-                entry = {
-                    'batch': batch,
-                    'row_index': int(idx),
-                    'anomaly_type': anom.get('type'),
-                    'severity': anom.get('severity'),
-                    'message': anom.get('message'),
-                    'suggested_fix': anom.get('suggested_fix'),
-                    'raw': {k: str(v) if not isinstance(v, (int, float, str)) else v for k, v in row.items()},
-                    'timestamp': datetime.utcnow().isoformat() + 'Z'
-                }
-                with open(ANOMALY_LOG_FILE, 'a', encoding='utf-8') as fh:
-                    fh.write(json.dumps(entry) + "\n")
+            raw = {k: str(v) if not isinstance(v, (int, float, str)) else v for k, v in row.items()}
+            timestamp = datetime.utcnow().isoformat() + 'Z'
+            self._log_sink(ANOMALY_LOG_FILE).write_many({
+                'batch': batch,
+                'row_index': int(idx),
+                'anomaly_type': anom.get('type'),
+                'severity': anom.get('severity'),
+                'message': anom.get('message'),
+                'suggested_fix': anom.get('suggested_fix'),
+                'raw': raw,
+                'timestamp': timestamp
+            } for anom in anomalies)
         except Exception as e:
             logger.debug(f"   [ANOMALY_LOG] Failed to write: {e}")
 
@@ -819,7 +930,8 @@ class Ingestor:
             return
         self.db.create_safety_backup()
         try:
-            for name, creds in keys.items():
+            for i, (name, creds) in enumerate(keys.items()):
+                self.progress.update('api_sync', i, len(keys), message=name)
                 if "PASTE_" in creds.get('apiKey', '') or not hasattr(ccxt, name): continue
                 ex = getattr(ccxt, name)({'apiKey': creds['apiKey'], 'secret': creds['secret'], 'enableRateLimit':True})
                 src = f"{name.upper()}_API"
@@ -835,6 +947,7 @@ class Ingestor:
                 for t in nt:
                     self.db.save_trade({'id':f"{name}_{t['id']}", 'date':t['datetime'], 'source':src, 'action':'BUY' if t['side']=='buy' else 'SELL', 'coin':t['symbol'].split('/')[0], 'amount':float(t['amount']), 'price_usd':float(t['price']), 'fee':t['fee']['cost'] if t['fee'] else 0, 'batch_id':f"API_{name}"})
                 self.db.commit()
+            self.progress.update('api_sync', len(keys), len(keys))
             self.db.remove_safety_backup()
         except: self.db.restore_safety_backup()
 
@@ -901,73 +1014,82 @@ class PriceFetcher:
         except: pass
         return None
 
+def backfill_missing_prices(db, fetcher=None, progress=NULL_PROGRESS):
+    """Fetch prices for trades stored with a zero price. Returns how many were filled."""
+    fetcher = fetcher or PriceFetcher()
+    zeros = db.get_zeros()
+    total, filled = len(zeros), 0
+    for pos, (_, r) in enumerate(zeros.iterrows()):
+        if pos % 50 == 0:
+            progress.update('price_backfill', pos, total)
+        p = fetcher.get_price(r['coin'], pd.to_datetime(r['date'], format='mixed', utc=True))
+        if p:
+            db.update_price(r['id'], p)
+            filled += 1
+    db.commit()
+    progress.update('price_backfill', total, total, message=f"{filled} filled")
+    return filled
+
 # ==========================================
 # 4. AUDITOR
 # ==========================================
 class WalletAuditor:
-    def __init__(self, db):
+    """
+    Cross-checks on-chain balances of the wallets.json addresses.
+
+    Lookups run concurrently with per-provider rate limits, batch endpoints
+    and a day-keyed balance cache (src/core/wallet_balances.py). Balances
+    are summed per coin into self.real.
+    """
+    def __init__(self, db, providers=None, cache=None):
         self.db = db
         self.calc, self.real, self.max_balances = {}, {}, {}
         self.BLOCKCHAIN_TO_SYMBOL = {
-            'ethereum':'ETH','bitcoin':'BTC','polygon':'MATIC','solana':'SOL','arbitrum':'ARBITRUM','optimism':'OPTIMISM'
+            'ethereum':'ETH','bitcoin':'BTC','polygon':'MATIC','solana':'SOL','arbitrum':'ARBITRUM','optimism':'OPTIMISM',
+            'litecoin':'LTC','dogecoin':'DOGE','bitcoin-cash':'BCH','bsc':'BNB','avalanche':'AVAX'
         }
+        self.providers = providers  # None: built from api_keys.json
+        self.cache = cache
+        self.balances = {}  # (chain, address) -> Decimal
+        self.stats = {}
     def run_audit(self):
         if not GLOBAL_CONFIG['general']['run_audit']:
             logger.info("--- 4. AUDIT SKIPPED (Lite Version) ---")
             return
         logger.info("RUNNING AUDIT: Wallet address balances cross-check")
-        # Respect throttling even if external checks are mocked
         try:
-            wallets = load_wallets_file()
-            if GLOBAL_CONFIG.get('performance', {}).get('respect_free_tier_limits', False) and wallets:
-                for _, v in wallets.items():
-                    addrs = v.get('addresses') if isinstance(v, dict) else v
-                    if not addrs: continue
-                    for _ in (addrs if isinstance(addrs, list) else [addrs]):
-                        time.sleep(0.1)
-
-            keys = load_api_keys_file()
-            if keys:
-                for _ in range(5):
-                    try:
-                        requests.get("https://api.moralis.io/health", timeout=1)
-                    except:
-                        time.sleep(0.05)
-                bc_key = keys.get('blockchair', {}).get('apiKey', '')
-                if bc_key:
-                    self.check_blockchair(bc_key)
-        except:
-            pass
+            providers = self.providers
+            if providers is None:
+                keys = load_api_keys_file() or {}
+                providers = []
+                if keys.get('moralis', {}).get('apiKey'):
+                    providers.append(wallet_balances.MoralisProvider(keys['moralis']['apiKey']))
+                if keys.get('blockchair', {}).get('apiKey'):
+                    providers.append(wallet_balances.BlockchairProvider(keys['blockchair']['apiKey']))
+            if providers:
+                self.check_balances(providers)
+        except Exception as e:
+            logger.warning(f"[AUDIT] Balance cross-check failed: {e}")
     def check_blockchair(self, api_key):
-        wallets = load_wallets_file()
+        return self.check_balances([wallet_balances.BlockchairProvider(api_key)])
+    def check_balances(self, providers):
+        """Fetch balances for every wallet address; returns the number of addresses checked."""
+        wallets = wallet_balances.wallet_addresses(load_wallets_file())
         if not wallets:
             return 0
-        total_calls = 0
-        for chain, data in wallets.items():
-            addrs = data.get('addresses') if isinstance(data, dict) else data
-            if not addrs: continue
-            for addr in (addrs if isinstance(addrs, list) else [addrs]):
-                total_calls += 1
-                if GLOBAL_CONFIG.get('performance', {}).get('respect_free_tier_limits', True):
-                    time.sleep(0.1)
-                try:
-                    mapping = {'bitcoin':'bitcoin','ethereum':'ethereum','polygon':'polygon','solana':'solana','btc':'bitcoin','eth':'ethereum','matic':'polygon','sol':'solana'}
-                    chain_path = mapping.get(chain.lower(), chain.lower())
-                    r = requests.get(f"https://api.blockchair.com/{chain_path}/dashboards/address/{addr}", timeout=5)
-                    try:
-                        if r.status_code == 200:
-                            data = r.json().get('data', {}).get(addr, {}).get('address', {})
-                            bal = data.get('balance', 0)
-                            symbol = 'BTC' if chain_path == 'bitcoin' else chain_path.upper()
-                            if chain_path == 'bitcoin':
-                                self.real[symbol] = float(bal) / 1e8
-                            else:
-                                self.real[symbol] = float(bal)
-                    except:
-                        pass
-                except:
-                    pass
-        return total_calls
+        if self.cache is None:
+            self.cache = wallet_balances.BalanceCache(OUTPUT_DIR / 'cache' / 'wallet_balances.json')
+        free_tier = GLOBAL_CONFIG.get('performance', {}).get('respect_free_tier_limits', True)
+        checker = wallet_balances.BalanceChecker(providers, cache=self.cache, free_tier=free_tier)
+        found = checker.check(wallets)
+        for (chain, addr), amount in found.items():
+            self.balances[(chain, addr)] = amount
+            symbol = self.BLOCKCHAIN_TO_SYMBOL.get(chain, chain.upper())
+            self.real[symbol] = self.real.get(symbol, 0.0) + float(amount)
+        self.stats = checker.stats
+        logger.info(f"[AUDIT] {len(found)} of {checker.stats['addresses']} balance(s) checked "
+                    f"({checker.stats['cached']} cached, {checker.stats['requests']} request(s))")
+        return checker.stats['addresses']
 
 # ==========================================
 # 5. Transaction ENGINE
@@ -981,6 +1103,7 @@ class TransactionEngine:
         self.prior_carryover = {'short': 0.0, 'long': 0.0}
         self.wash_sale_log = []
         self.sale_log = []
+        self.progress = NULL_PROGRESS  # ProgressHook for engine / export / manual_review
         self._load_prior_year_data()
         # Emit configuration warnings
         acct_method = str(GLOBAL_CONFIG.get('accounting', {}).get('method', 'FIFO')).upper()
@@ -997,9 +1120,9 @@ class TransactionEngine:
 
     def _load_prior_year_data(self):
         prior_file = OUTPUT_DIR / f"Year_{self.year - 1}" / "US_transaction_LOSS_ANALYSIS.csv"
-        if prior_file.exists():
+        if prior_file.exists() or columnar.parquet_path(prior_file).exists():
             try:
-                df = pd.read_csv(prior_file)
+                df = columnar.read_report(prior_file)
                 row_short = df[df['Item'] == 'Short-Term Carryover to Next Year']
                 if not row_short.empty: self.prior_carryover['short'] = float(row_short['Value'].iloc[0])
                 row_long = df[df['Item'] == 'Long-Term Carryover to Next Year']
@@ -1052,7 +1175,11 @@ class TransactionEngine:
             if c not in all_buys_dict: all_buys_dict[c] = []
             all_buys_dict[c].append(pd.to_datetime(r['date'], format='mixed', utc=True))
 
-        for _, t in df.iterrows():
+        progress = getattr(self, 'progress', NULL_PROGRESS)
+        total_rows = len(df)
+        for pos, (_, t) in enumerate(df.iterrows()):
+            if pos % PROGRESS_EVERY_ROWS == 0:
+                progress.update('engine', pos, total_rows, year=self.year)
             d = pd.to_datetime(t['date'], format='mixed', utc=True)
             if d.year > self.year: continue
             is_yr = (d.year == self.year)
@@ -1156,6 +1283,7 @@ class TransactionEngine:
                                         'Term': fterm, 'Source': src, 'Collectible': False})
                 
                 if dst: self._transfer(t['coin'], amt, src, dst, d)
+        progress.update('engine', total_rows, total_rows, year=self.year)
 
     def _get_bucket(self, c, s):
         if c not in self.holdings_by_source: self.holdings_by_source[c] = {}
@@ -1257,9 +1385,19 @@ class TransactionEngine:
             rem -= take
             if l['a'] <= Decimal('0'): fb.pop(0)
 
+    def carryover(self):
+        """Loss carryover to next year: short-term beyond the $3,000 deduction, all long-term."""
+        return {'short': max(self.us_losses['short'] - 3000.0, 0.0), 'long': max(self.us_losses['long'], 0.0)}
+
     def export(self):
+        progress = getattr(self, 'progress', NULL_PROGRESS)
+        progress.update('export', 0, 1, year=self.year)
         yd = OUTPUT_DIR/f"Year_{self.year}"
         if not yd.exists(): yd.mkdir(parents=True)
+        fmt = columnar.report_format(GLOBAL_CONFIG)
+        written = []
+        def write(df, name):
+            written.extend(columnar.write_report(df, yd/name, fmt))
         if self.tt:
             # Detailed rows mirror TT with audit placeholders
             detailed_rows = []
@@ -1270,20 +1408,20 @@ class TransactionEngine:
                 rr['Wash_Disallowed_By_Broker'] = 'PENDING' if rr['Unmatched_Sell'] == 'YES' else ''
                 detailed_rows.append(rr)
             # Write standard TT
-            pd.DataFrame(self.tt).to_csv(yd/'CAP_GAINS.csv', index=False)
-        if self.inc: pd.DataFrame(self.inc).to_csv(yd/'INCOME_REPORT.csv', index=False)
+            write(pd.DataFrame(self.tt), 'CAP_GAINS.csv')
+        if self.inc: write(pd.DataFrame(self.inc), 'INCOME_REPORT.csv')
         if self.sale_log:
             df = pd.DataFrame(self.sale_log)
             grp = df.groupby(['Source','Coin']).agg(
                 Total_Proceeds=('Proceeds','sum'), Total_Cost_Basis=('Cost Basis','sum'), Net_Gain=('Gain','sum'), Tx_Count=('Proceeds','count')
             ).reset_index()
-            grp.to_csv(yd/'1099_RECONCILIATION.csv', index=False)
+            write(grp, '1099_RECONCILIATION.csv')
             # Detailed reconciliation
-            pd.DataFrame(detailed_rows if self.tt else []).to_csv(yd/'1099_RECONCILIATION_DETAILED.csv', index=False)
+            write(pd.DataFrame(detailed_rows if self.tt else []), '1099_RECONCILIATION_DETAILED.csv')
         
         # Loss Report with carryovers and totals
-        carry_short = max(self.us_losses['short'] - 3000.0, 0.0)
-        carry_long = max(self.us_losses['long'], 0.0)
+        carry = self.carryover()
+        carry_short, carry_long = carry['short'], carry['long']
         total_net = (sum([r['Gain'] for r in self.sale_log]) if self.sale_log else 0.0) - self.us_losses['short'] - self.us_losses['long']
         # Compute collectibles long-term amount
         collectibles_long = 0.0
@@ -1303,8 +1441,8 @@ class TransactionEngine:
             {'Item': 'Long-Term Carryover to Next Year', 'Value': carry_long},
             {'Item': 'Total Net Capital Gain/Loss', 'Value': total_net},
         ]
-        pd.DataFrame(loss_rpt).to_csv(yd/'US_transaction_LOSS_ANALYSIS.csv', index=False)
-        if self.wash_sale_log: pd.DataFrame(self.wash_sale_log).to_csv(yd/'WASH_SALE_REPORT.csv', index=False)
+        write(pd.DataFrame(loss_rpt), 'US_transaction_LOSS_ANALYSIS.csv')
+        if self.wash_sale_log: write(pd.DataFrame(self.wash_sale_log), 'WASH_SALE_REPORT.csv')
         
         # Holdings snapshots (current year and end-of-year)
         # Flatten holdings_by_source into rows
@@ -1314,13 +1452,17 @@ class TransactionEngine:
                 total_amt = sum([float(l['a']) for l in lots])
                 holdings_rows.append({'Source': src, 'Coin': coin, 'Holdings': total_amt})
         if holdings_rows:
-            pd.DataFrame(holdings_rows).to_csv(yd/'CURRENT_HOLDINGS_DRAFT.csv', index=False)
-            pd.DataFrame(holdings_rows).to_csv(yd/'EOY_HOLDINGS_SNAPSHOT.csv', index=False)
+            write(pd.DataFrame(holdings_rows), 'CURRENT_HOLDINGS_DRAFT.csv')
+            write(pd.DataFrame(holdings_rows), 'EOY_HOLDINGS_SNAPSHOT.csv')
         # Minimal transaction_REPORT presence
-        pd.DataFrame({'Summary':['Generated'], 'Year':[self.year]}).to_csv(yd/'transaction_REPORT.csv', index=False)
+        write(pd.DataFrame({'Summary':['Generated'], 'Year':[self.year]}), 'transaction_REPORT.csv')
+        report_catalog.record(yd, written, source='engine')
+        progress.update('export', 1, 1, year=self.year)
     
     def run_manual_review(self, db):
         """Run post-processing review for audit risks"""
+        progress = getattr(self, 'progress', NULL_PROGRESS)
+        progress.update('manual_review', 0, 1, year=self.year)
         try:
             from Transaction_Reviewer import TransactionReviewer
             reviewer = TransactionReviewer(db, self.year, transaction_engine=self)
@@ -1334,6 +1476,7 @@ class TransactionEngine:
                 logger.warning(f"[!] REVIEW NEEDED: {len(report['warnings'])} warning(s) require attention!")
                 logger.warning(f"   Check outputs/Year_{self.year}/REVIEW_WARNINGS.csv for details.")
             
+            progress.update('manual_review', 1, 1, year=self.year)
             return report
         except Exception as e:
             logger.warning(f"Review assistant not available: {e}")
@@ -1350,11 +1493,7 @@ if __name__ == "__main__":
         ingestor.run_csv_scan()
         ingestor.run_api_sync()
         StakeActivityCSVManager(db).run()
-        bf = PriceFetcher()
-        for _, r in db.get_zeros().iterrows():
-            p = bf.get_price(r['coin'], pd.to_datetime(r['date'], format='mixed', utc=True))
-            if p: db.update_price(r['id'], p)
-        db.commit()
+        backfill_missing_prices(db)
         y = input("\nEnter Transaction Year: ")
         if y.isdigit():
             eng = TransactionEngine(db, y)
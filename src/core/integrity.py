@@ -0,0 +1,193 @@
+"""
+================================================================================
+INTEGRITY - Tiered SQLite Integrity Checks
+================================================================================
+
+Keeps corruption detection cheap on the paths that open the database often
+(CLI commands, CSV uploads, runs) while still running the exhaustive check
+regularly.
+
+Tiers:
+    open    PRAGMA quick_check when DatabaseManager opens the database, but
+            only if the file (size/mtime of the database and its -wal file)
+            changed since the last verified check. A connection that was
+            verified at open and saw no commits from other connections
+            (PRAGMA data_version unchanged) re-stamps the file as verified
+            when it closes, so a process's own writes do not force a
+            re-check on the next open.
+    full    PRAGMA integrity_check, run by the scheduler every
+            INTEGRITY_FULL_CHECK_HOURS (ScheduleManager) or on demand from
+            /api/diagnostics/schema-check.
+
+Cached Results:
+    Stored in the status file under 'db_integrity' for the current database:
+        {'db': path, 'verified_stamp': [...],
+         'quick': {'result': 'ok', 'checked_at': iso, 'seconds': 0.01},
+         'full':  {...}}
+    Diagnostics and /api/system-health report these instead of re-running
+    the checks on every request.
+
+Usage:
+    from src.core import integrity
+
+    if integrity.quick_check_needed(db_file):
+        integrity.run_check(db_file, 'quick')
+    integrity.health(db_file, INTEGRITY_FULL_CHECK_HOURS * 2)['message']
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.lazy import lazy_module
+
+# The engine imports DatabaseManager, which imports this module, so the
+# status helpers are resolved on first use rather than at import time.
+engine = lazy_module('src.core.engine')
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+STATUS_KEY = 'db_integrity'
+PRAGMAS = {'quick': 'quick_check', 'full': 'integrity_check'}
+_MAX_RESULT_CHARS = 500
+
+
+def db_stamp(db_file) -> Optional[List[int]]:
+    """[size, mtime_ns] of the database plus its -wal file, or None if missing."""
+    db_file = Path(db_file)
+    stamp = []
+    for path in (db_file, db_file.with_name(db_file.name + '-wal')):
+        try:
+            st = path.stat()
+        except OSError:
+            if path == db_file:
+                return None
+            st = None
+        stamp += [st.st_size, st.st_mtime_ns] if st else [0, 0]
+    return stamp
+
+
+# ----------------------------------------------------------------------
+# Status file (the engine's, so tests can monkeypatch STATUS_FILE)
+# ----------------------------------------------------------------------
+
+def integrity_state(db_file) -> Dict:
+    """Cached check results for db_file ({} if none recorded)."""
+    state = engine.get_status().get(STATUS_KEY) or {}
+    return state if state.get('db') == str(Path(db_file)) else {}
+
+
+def _save_state(db_file, state: Dict):
+    state['db'] = str(Path(db_file))
+    engine.update_status(STATUS_KEY, state)
+
+
+# ----------------------------------------------------------------------
+# Checks
+# ----------------------------------------------------------------------
+
+def quick_check_needed(db_file) -> bool:
+    """True unless the file is unchanged since it was last verified."""
+    stamp = db_stamp(db_file)
+    return stamp is None or integrity_state(db_file).get('verified_stamp') != stamp
+
+
+def run_check(db_file, kind: str = 'quick', conn=None) -> str:
+    """
+    Run quick_check or integrity_check and cache the result. Returns 'ok'
+    or the reported problems. Connection errors propagate (a file that is
+    not a database raises sqlite3.DatabaseError).
+    """
+    pragma = PRAGMAS[kind]
+    start = time.monotonic()
+    own = conn is None
+    if own:
+        conn = sqlite3.connect(f"{Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        stamp = db_stamp(db_file)
+        rows = [str(r[0]) for r in conn.execute(f"PRAGMA {pragma}").fetchall()]
+    finally:
+        if own:
+            conn.close()
+    result = '; '.join(rows)[:_MAX_RESULT_CHARS] or 'unknown'
+    state = integrity_state(db_file)
+    state[kind] = {'result': result, 'checked_at': datetime.now().isoformat(),
+                   'seconds': round(time.monotonic() - start, 3)}
+    if result == 'ok':
+        state['verified_stamp'] = stamp
+    else:
+        state.pop('verified_stamp', None)
+        logger.error(f"[DB] {pragma} reported problems in {Path(db_file).name}: {result}")
+    _save_state(db_file, state)
+    return result
+
+
+def mark_verified(db_file, previous_stamp):
+    """Carry a verified state across this process's own writes (see module docstring)."""
+    state = integrity_state(db_file)
+    if previous_stamp is None or state.get('verified_stamp') != previous_stamp:
+        return
+    stamp = db_stamp(db_file)
+    if stamp != previous_stamp:
+        state['verified_stamp'] = stamp
+        _save_state(db_file, state)
+
+
+def summary(db_file, max_full_age_hours: Optional[float] = None) -> Dict:
+    """
+    Cached results for diagnostics: quick/full entries (or None), whether
+    the file changed since it was verified, and whether the last full check
+    is older than max_full_age_hours.
+    """
+    state = integrity_state(db_file)
+    full = state.get('full')
+    overdue = full is None
+    if full and max_full_age_hours is not None:
+        age = datetime.now() - datetime.fromisoformat(full['checked_at'])
+        overdue = age.total_seconds() > max_full_age_hours * 3600
+    return {
+        'quick': state.get('quick'),
+        'full': full,
+        'changed_since_verified': state.get('verified_stamp') != db_stamp(db_file),
+        'full_overdue': overdue,
+    }
+
+
+def problems(summary_: Dict) -> Optional[str]:
+    """The first non-ok cached result, or None."""
+    for kind in ('full', 'quick'):
+        entry = summary_.get(kind)
+        if entry and entry['result'] != 'ok':
+            return f"{PRAGMAS[kind]}: {entry['result']}"
+    return None
+
+
+def health(db_file, max_full_age_hours: Optional[float] = None) -> Dict:
+    """
+    summary() plus 'ok' and a one-line 'message' for diagnostics pages.
+    Runs a quick_check only when nothing is recorded for this database yet.
+    """
+    info = summary(db_file, max_full_age_hours)
+    if info['quick'] is None and info['full'] is None and db_stamp(db_file) is not None:
+        run_check(db_file, 'quick')
+        info = summary(db_file, max_full_age_hours)
+    problem = problems(info)
+    if problem:
+        info.update(ok=False, message=f"Database integrity check reported: {problem}")
+        return info
+    kind = 'full' if info['full'] else 'quick'
+    if info[kind] is None:
+        info.update(ok=True, message='Database integrity: nothing to check yet (no database file)')
+        return info
+    message = f"Database integrity verified ({PRAGMAS[kind]}, {info[kind]['checked_at'][:16].replace('T', ' ')})"
+    if info['full_overdue']:
+        message += '; full integrity_check is due'
+    info.update(ok=True, message=message)
+    return info
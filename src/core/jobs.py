@@ -0,0 +1,583 @@
+"""
+================================================================================
+BACKGROUND JOBS - SQLite-Backed Job Queue and Worker Pool
+================================================================================
+
+Runs long operations (CSV imports, Transaction runs, ML reprocessing) off the
+request thread. HTTP handlers submit a job and return its id immediately; the
+UI polls /api/progress/<job_id> or /api/jobs/<job_id>.
+
+Storage:
+    <db>_jobs.db next to the trades database holds one row per job: type,
+    status, real progress counters, message, params, result and error.
+    The table is the queue: every process (gunicorn workers, the Auto_Runner
+    subprocess) reads and writes the same rows, so progress survives
+    restarts and is visible from any worker.
+
+Lifecycle:
+    queued -> running -> completed | error | cancelled
+
+    - submit() inserts a queued row and wakes the dispatcher
+    - The dispatcher claims queued rows in a write transaction, honouring the
+      per-type limit (counted across processes) and the local pool size
+    - Handlers receive a JobReporter and report (current, total) counters,
+      directly or through a ProgressHook (hook_for_job); writes are
+      throttled to one per JOB_PROGRESS_INTERVAL seconds
+    - cancel() flags the row; the reporter raises JobCancelled at the
+      handler's next progress report or check_cancelled() call
+    - Rows left 'running' by a process that no longer exists are marked as
+      errors when a manager starts; finished rows are pruned after
+      JOB_RETENTION_DAYS
+
+Usage:
+    manager = JobManager(job_store_for(DB_FILE))
+    manager.register('csv_upload', import_csv)   # import_csv(reporter, path=...)
+    job_id = manager.submit('csv_upload', path='inputs/trades.csv')
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from src.utils.progress import ProgressHook, describe
+from src.utils.constants import (
+    JOB_MAX_WORKERS,
+    JOB_TYPE_LIMITS,
+    JOB_PROGRESS_INTERVAL,
+    JOB_POLL_SECONDS,
+    JOB_RETENTION_DAYS,
+)
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+FINISHED_STATUSES = ('completed', 'error', 'cancelled')
+
+# Environment variables that let a child process report into its parent's job
+ENV_JOB_DB = 'CRYPTO_JOB_DB'
+ENV_JOB_ID = 'CRYPTO_JOB_ID'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    current INTEGER,
+    total INTEGER,
+    message TEXT,
+    params TEXT,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler once cancellation has been requested."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def job_store_for(db_file) -> 'JobStore':
+    """Return the job store that lives next to db_file."""
+    db_file = Path(db_file)
+    return JobStore(db_file.with_name(f"{db_file.stem}_jobs.db"))
+
+
+def process_owner() -> str:
+    """Identifier of this process as recorded on the jobs it runs."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner) -> bool:
+    """False only when owner is a process on this host that no longer exists."""
+    host, _, pid = str(owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+class JobStore:
+    """
+    The jobs table. Every method opens its own short-lived connection, so a
+    store can be shared freely between threads and processes.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        return conn
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(row)
+        for key in ('params', 'result'):
+            job[key] = json.loads(job[key]) if job[key] else None
+        job['progress'] = int(job['progress'] or 0)
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, job_id):
+        """Job as a dict, or None if the id is unknown."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._to_dict(row) if row else None
+
+    def list(self, limit: int = 50, job_type=None, status=None) -> list:
+        """Most recent jobs first, optionally filtered by type and status."""
+        clauses, args = [], []
+        if job_type:
+            clauses.append("type = ?")
+            args.append(job_type)
+        if status:
+            clauses.append("status = ?")
+            args.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", (*args, int(limit))
+            ).fetchall()
+        finally:
+            conn.close()
+        return [self._to_dict(r) for r in rows]
+
+    def cancel_requested(self, job_id) -> bool:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def create(self, job_type: str, params=None, message: str = 'Queued') -> str:
+        job_id = uuid.uuid4().hex
+        now = _now()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, type, status, message, params, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, job_type, message, json.dumps(params or {}, default=str), now, now),
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def claim(self, owner: str, job_types, limits: dict, slots: int) -> list:
+        """
+        Atomically move up to `slots` queued jobs of the given types to
+        running, oldest first, without exceeding any per-type limit.
+        """
+        if slots <= 0 or not job_types:
+            return []
+        job_types = list(job_types)
+        marks = ','.join('?' * len(job_types))
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            running = dict(conn.execute(
+                "SELECT type, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY type"
+            ).fetchall())
+            queued = conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'queued' AND type IN ({marks}) ORDER BY created_at",
+                job_types,
+            ).fetchall()
+            claimed, now = [], _now()
+            for row in queued:
+                limit = limits.get(row['type'])
+                if limit is not None and running.get(row['type'], 0) >= limit:
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, updated_at = ?, "
+                    "message = 'Starting...' WHERE id = ?",
+                    (owner, now, now, row['id']),
+                )
+                running[row['type']] = running.get(row['type'], 0) + 1
+                claimed.append(row['id'])
+                if len(claimed) >= slots:
+                    break
+            conn.execute("COMMIT")
+            rows = [conn.execute("SELECT * FROM jobs WHERE id = ?", (i,)).fetchone() for i in claimed]
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return [self._to_dict(r) for r in rows]
+
+    def update_progress(self, job_id, percent=None, current=None, total=None, message=None) -> bool:
+        """Record progress; returns True when cancellation has been requested."""
+        sets, args = ["updated_at = ?"], [_now()]
+        for column, value in (('progress', percent), ('current', current), ('total', total), ('message', message)):
+            if value is not None:
+                sets.append(f"{column} = ?")
+                args.append(value)
+        conn = self._connect()
+        try:
+            conn.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE id = ?", (*args, job_id))
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return bool(row and row[0])
+
+    def finish(self, job_id, status: str, message=None, result=None, error=None):
+        now = _now()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, message = COALESCE(?, message), result = ?, error = ?, "
+                "progress = CASE WHEN ? = 'completed' THEN 100 ELSE progress END, "
+                "finished_at = ?, updated_at = ? WHERE id = ?",
+                (status, message, json.dumps(result, default=str) if result is not None else None,
+                 error, status, now, now, job_id),
+            )
+        finally:
+            conn.close()
+
+    def request_cancel(self, job_id):
+        """Cancel a queued job outright or flag a running one. Returns the job or None."""
+        now = _now()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', message = 'Cancelled before start', "
+                "finished_at = ?, updated_at = ? WHERE id = ? AND status = 'queued'",
+                (now, now, job_id),
+            )
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, message = 'Cancelling...', updated_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (now, job_id),
+            )
+        finally:
+            conn.close()
+        return self.get(job_id)
+
+    def recover(self, owner_alive=_owner_alive) -> int:
+        """Fail running jobs whose owning process has exited. Returns how many."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT id, owner FROM jobs WHERE status = 'running'").fetchall()
+        finally:
+            conn.close()
+        lost = [r['id'] for r in rows if not owner_alive(r['owner'])]
+        for job_id in lost:
+            self.finish(job_id, 'error', message='Interrupted: the process running this job exited',
+                        error='interrupted')
+        return len(lost)
+
+    def prune(self, days: int = JOB_RETENTION_DAYS) -> int:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        marks = ','.join('?' * len(FINISHED_STATUSES))
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({marks}) AND finished_at < ?", (*FINISHED_STATUSES, cutoff)
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+
+class JobReporter:
+    """
+    Progress and cancellation handle passed to job handlers.
+
+    reporter(current, total) matches the progress_callback signature of
+    reprocess_transactions; span() maps a sub-task onto part of the overall
+    0-100 range. Pipeline stages report through a ProgressHook instead, see
+    hook_for_job().
+    """
+
+    def __init__(self, store: JobStore, job_id: str, min_interval: float = JOB_PROGRESS_INTERVAL):
+        self.store = store
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._cancel = threading.Event()
+        self._last_write = 0.0
+        self._last_poll = 0.0
+
+    def __call__(self, current, total, message=None):
+        self.update(current, total, message)
+
+    def update(self, current=None, total=None, message=None):
+        """Report counters for the whole job (0-100%)."""
+        self.span(0, 100)(current, total, message)
+
+    def span(self, start: float, end: float, label=None):
+        """Return a progress callback whose 0..total maps onto start..end percent."""
+        def report(current=None, total=None, message=None):
+            fraction = min(current, total) / total if current is not None and total else None
+            percent = start + (end - start) * fraction if fraction is not None else None
+            if message is None and label and current is not None:
+                message = f"{label}: {current:,} of {total:,}" if total else f"{label}: {current:,}"
+            self.report(percent, current, total, message, force=fraction == 1)
+        return report
+
+    def stage(self, percent: float, message: str):
+        """Record a stage change; always written."""
+        self.report(percent, None, None, message, force=True)
+
+    def report(self, percent, current, total, message, force=False):
+        """Write progress (throttled unless force); raises JobCancelled once cancelled."""
+        self.check_cancelled(poll=False)
+        now = time.monotonic()
+        if not force and now - self._last_write < self.min_interval:
+            return
+        self._last_write = self._last_poll = now
+        if self.store.update_progress(self.job_id, percent, current, total, message):
+            self._cancel.set()
+            raise JobCancelled(self.job_id)
+
+    def cancel(self):
+        """Flag cancellation locally (the manager calls this for its own jobs)."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        try:
+            self.check_cancelled()
+        except JobCancelled:
+            return True
+        return False
+
+    def check_cancelled(self, poll=True):
+        """Raise JobCancelled if cancellation was requested (polls the store at most once per interval)."""
+        if not self._cancel.is_set() and poll:
+            now = time.monotonic()
+            if now - self._last_poll >= self.min_interval:
+                self._last_poll = now
+                if self.store.cancel_requested(self.job_id):
+                    self._cancel.set()
+        if self._cancel.is_set():
+            raise JobCancelled(self.job_id)
+
+
+class JobProgress:
+    """
+    ProgressHook subscriber that records pipeline events on a job row.
+
+    spans maps a stage name, or a (stage, year) pair, to the (start, end)
+    percent range of the job that stage covers. Stages without a span only
+    update the message.
+    """
+
+    def __init__(self, reporter: JobReporter, spans=None):
+        self.reporter = reporter
+        self.spans = dict(spans or {})
+
+    def __call__(self, event):
+        span = self.spans.get((event['stage'], event['year'])) or self.spans.get(event['stage'])
+        done, total = event['done'], event['total']
+        fraction = min(done, total) / total if span and done is not None and total else None
+        percent = span[0] + (span[1] - span[0]) * fraction if fraction is not None else None
+        self.reporter.report(percent, done, total, describe(event), force=fraction == 1)
+
+
+def hook_for_job(reporter: JobReporter, spans=None, *subscribers) -> ProgressHook:
+    """ProgressHook that reports into reporter's job (plus any extra subscribers)."""
+    return ProgressHook(JobProgress(reporter, spans), *subscribers,
+                        task_id=reporter.job_id, propagate=(JobCancelled,))
+
+
+def reporter_from_env():
+    """JobReporter for the job a parent process passed via the environment, or None."""
+    db_path, job_id = os.environ.get(ENV_JOB_DB), os.environ.get(ENV_JOB_ID)
+    if not db_path or not job_id:
+        return None
+    return JobReporter(JobStore(db_path), job_id)
+
+
+def child_env(reporter: JobReporter, base=None) -> dict:
+    """Environment for a subprocess that should report into reporter's job."""
+    env = dict(os.environ if base is None else base)
+    env[ENV_JOB_DB] = str(reporter.store.path)
+    env[ENV_JOB_ID] = reporter.job_id
+    return env
+
+
+class JobManager:
+    """
+    Bounded worker pool that runs jobs from a JobStore.
+
+    Features:
+    - At most max_workers jobs run in this process
+    - Per-type concurrency limits, counted across all processes sharing the store
+    - Cancellation of queued and running jobs
+    - The pool and dispatcher thread start on first submit()
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = JOB_MAX_WORKERS, limits=None,
+                 poll_interval: float = JOB_POLL_SECONDS):
+        self.store = store
+        self.max_workers = max(1, int(max_workers))
+        self.limits = dict(JOB_TYPE_LIMITS if limits is None else limits)
+        self.poll_interval = poll_interval
+        self.owner = process_owner()
+        self._handlers = {}
+        self._running = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._executor = None
+        self._dispatcher = None
+        self._stopped = False
+
+    def register(self, job_type: str, handler, limit=None):
+        """Register handler(reporter, **params) for job_type; limit overrides JOB_TYPE_LIMITS."""
+        self._handlers[job_type] = handler
+        if limit is not None:
+            self.limits[job_type] = limit
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, job_type: str, **params) -> str:
+        """Queue a job and return its id without waiting for it to start."""
+        if job_type not in self._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        job_id = self.store.create(job_type, params)
+        self._ensure_started()
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def list(self, limit: int = 50, job_type=None, status=None) -> list:
+        return self.store.list(limit, job_type, status)
+
+    def cancel(self, job_id):
+        """Request cancellation; returns the updated job or None if unknown."""
+        job = self.store.request_cancel(job_id)
+        with self._lock:
+            reporter = self._running.get(job_id)
+        if reporter is not None:
+            reporter.cancel()
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes (or timeout seconds pass); returns the job."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job['status'] in FINISHED_STATUSES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(0.05)
+
+    def shutdown(self, wait: bool = True):
+        """Stop dispatching; running jobs are asked to cancel unless wait is True."""
+        self._stopped = True
+        self._wake.set()
+        if not wait:
+            with self._lock:
+                for reporter in self._running.values():
+                    reporter.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+    # ------------------------------------------------------------------
+    # Dispatch
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._dispatcher is not None:
+                return
+            try:
+                self.store.recover()
+                self.store.prune()
+            except Exception as e:
+                logger.warning(f"[JOBS] Could not clean up job table: {e}")
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        while not self._stopped:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stopped:
+                return
+            try:
+                self._claim_and_start()
+            except Exception as e:
+                logger.warning(f"[JOBS] Dispatch failed: {e}")
+
+    def _claim_and_start(self):
+        with self._lock:
+            slots = self.max_workers - len(self._running)
+        for job in self.store.claim(self.owner, self._handlers.keys(), self.limits, slots):
+            reporter = JobReporter(self.store, job['id'])
+            with self._lock:
+                self._running[job['id']] = reporter
+            self._executor.submit(self._run, job, reporter)
+
+    def _run(self, job, reporter):
+        job_id, job_type = job['id'], job['type']
+        try:
+            result = self._handlers[job_type](reporter, **(job['params'] or {}))
+            message = result.get('message') if isinstance(result, dict) else None
+            self.store.finish(job_id, 'completed', message=message or 'Completed', result=result)
+        except JobCancelled:
+            logger.info(f"[JOBS] {job_type} job {job_id} cancelled")
+            self.store.finish(job_id, 'cancelled', message='Cancelled')
+        except Exception as e:
+            logger.exception(f"[JOBS] {job_type} job {job_id} failed")
+            self.store.finish(job_id, 'error', message=str(e), error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+            self._wake.set()
@@ -0,0 +1,189 @@
+"""
+================================================================================
+REPORT CACHE - Per-Year Report Freshness with Upstream Invalidation
+================================================================================
+
+Records, for every exported year, the inputs its reports were computed from,
+so Auto_Runner can skip years whose reports are still current.
+
+Cache Key (per year Y):
+    - CACHE_VERSION (bump when report logic changes)
+    - config fingerprint (config.json and the 2025 migration inventory)
+    - fingerprint of the trades dated in Y (plus Y+1 when the wash sale rule
+      is on, since replacement buys up to 30 days later affect Y)
+    - upstream state: the lot state and loss carryover Y-1 ended with
+
+Upstream State:
+    After a year is exported its end-of-year lots (per coin and source, in
+    FIFO order) and carryover are digested into the entry's 'state'. Year
+    Y+1 keys on that digest, so re-running Y after an edit only invalidates
+    Y+1 when Y's lots or carryover actually changed. When Y has no fresh
+    entry, the key falls back to every earlier year's trade fingerprint plus
+    the carryover file Y+1 reads, which is always safe.
+
+Storage:
+    OUTPUT_DIR/.report_cache.json  {"version": 1, "years": {"2024": {...}}}
+    A year also counts as stale when its transaction_REPORT.csv is missing.
+
+Usage:
+    cache = ReportCache.load(OUTPUT_DIR, fingerprints, config_digest)
+    if not cache.check(year):
+        engine.run(); engine.export()
+        cache.record(year, engine)
+    logger.info(cache.summary())
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+CACHE_VERSION = 1
+CACHE_FILE_NAME = '.report_cache.json'
+CARRYOVER_FILE_NAME = 'US_transaction_LOSS_ANALYSIS.csv'
+MARKER_FILE_NAME = 'transaction_REPORT.csv'
+
+
+def _digest(parts) -> str:
+    return hashlib.blake2b(json.dumps(parts, default=str).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def file_digest(path) -> Optional[str]:
+    """Digest of a file's bytes, or None when it does not exist."""
+    try:
+        return hashlib.blake2b(Path(path).read_bytes(), digest_size=16).hexdigest()
+    except OSError:
+        return None
+
+
+def engine_state_digest(engine) -> str:
+    """Digest of the lots and carryover a TransactionEngine ended its year with."""
+    lots = []
+    for coin in sorted(engine.holdings_by_source, key=str):
+        for source in sorted(engine.holdings_by_source[coin], key=str):
+            lots.append([coin, source, [[str(l['a']), str(l['p']), str(l['d'])]
+                                        for l in engine.holdings_by_source[coin][source]]])
+    return _digest([lots, engine.carryover()])
+
+
+class ReportCache:
+    """Freshness records for exported years (see module docstring)."""
+
+    def __init__(self, output_dir, fingerprints: Dict[str, str], config_digest: Optional[str],
+                 wash_sale: bool = False, entries: Optional[Dict] = None):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / CACHE_FILE_NAME
+        self.fingerprints = fingerprints
+        self.config_digest = config_digest
+        self.wash_sale = wash_sale
+        self.entries = entries or {}
+        self.hits = 0
+        self.misses = 0
+        self._keys = {}
+
+    @classmethod
+    def load(cls, output_dir, fingerprints, config_digest, wash_sale=False):
+        path = Path(output_dir) / CACHE_FILE_NAME
+        entries = {}
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                entries = data.get('years', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"[CACHE] Ignoring unreadable report cache {path.name}: {e}")
+        return cls(output_dir, fingerprints, config_digest, wash_sale, entries)
+
+    def save(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'years': self.entries}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def _year_dir(self, year) -> Path:
+        return self.output_dir / f"Year_{year}"
+
+    def _undated(self):
+        """Fingerprints of trades without a numeric year; they may affect any year."""
+        return sorted((y, fp) for y, fp in self.fingerprints.items() if not y.isdigit())
+
+    def upstream(self, year: int) -> str:
+        """Digest of the state year starts from."""
+        prev = self.entries.get(str(year - 1))
+        if prev is not None and self.is_fresh(year - 1):
+            return prev['state']
+        history = sorted((y, fp) for y, fp in self.fingerprints.items() if y.isdigit() and int(y) < year)
+        carryover = file_digest(self._year_dir(year - 1) / CARRYOVER_FILE_NAME)
+        return _digest(['history', history, carryover])
+
+    def key(self, year: int) -> str:
+        if year not in self._keys:
+            parts = [CACHE_VERSION, self.config_digest, year, self.fingerprints.get(str(year)), self._undated()]
+            if self.wash_sale:
+                parts.append(self.fingerprints.get(str(year + 1)))
+            parts.append(self.upstream(year))
+            self._keys[year] = _digest(parts)
+        return self._keys[year]
+
+    def is_fresh(self, year: int) -> bool:
+        entry = self.entries.get(str(year))
+        return (entry is not None and entry.get('key') == self.key(year)
+                and (self._year_dir(year) / MARKER_FILE_NAME).exists())
+
+    # ------------------------------------------------------------------
+    # Run integration
+    # ------------------------------------------------------------------
+
+    def check(self, year: int) -> bool:
+        """is_fresh(year), counted as a cache hit or miss."""
+        fresh = self.is_fresh(year)
+        if fresh:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return fresh
+
+    def record(self, year: int, engine):
+        """
+        Store the entry for a year that was just run and exported. Failures
+        only leave the year uncached; they never fail the run.
+        """
+        self._keys.clear()  # later years key on this year's new state
+        try:
+            self.entries[str(year)] = {
+                'key': self.key(year),
+                'state': engine_state_digest(engine),
+                'updated': datetime.now().isoformat(),
+            }
+            self._keys.clear()
+            self.save()
+        except Exception as e:
+            self.entries.pop(str(year), None)
+            self._keys.clear()
+            logger.warning(f"[CACHE] Could not record reports for {year}: {e}")
+
+    def stats(self) -> Dict:
+        checked = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hits / checked, 3) if checked else 0.0}
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{stats['hits']} year(s) up to date, {stats['misses']} recomputed "
+                f"(hit rate {stats['hit_rate']:.0%})")
@@ -0,0 +1,177 @@
+"""
+================================================================================
+REPORT CATALOG - Per-Year Manifest of Generated Reports
+================================================================================
+
+Lists the artifacts in an outputs/Year_<year> folder so the web UI can show
+reports and review warnings without walking, stat()-ing and re-parsing the
+files on every page view.
+
+Writers:
+    TransactionEngine.export        CSV reports (CAP_GAINS.csv, ...) and their
+                                    Parquet copies (src/core/columnar.py)
+    TransactionReviewer.export_report  review JSON + REVIEW_*.csv
+
+Manifest (Year_<year>/.report_catalog.json, written atomically):
+    {
+        "version": 1,
+        "artifacts": {
+            "CAP_GAINS.csv": {"size": 1234, "rows": 10, "sha256": "...",
+                              "modified": iso, "generated_at": iso,
+                              "source": "engine"}
+        },
+        "review_json": "transaction_review_2024_20250101_120000.json"
+    }
+    "rows" counts CSV data rows (header excluded) and Parquet rows; None
+    for other files.
+
+Readers:
+    Each write replaces the manifest by rename, which updates the folder's
+    mtime, so a reader can cache list_reports(year_dir) keyed on the folder
+    stamp (src/utils/file_cache.FileStampCache). Reports in the folder
+    that the manifest does not know (older runs, other tools) are listed from a
+    stat() so nothing disappears from the UI.
+
+Usage:
+    from src.core import report_catalog
+
+    report_catalog.record(year_dir, [year_dir / 'CAP_GAINS.csv'], source='engine')
+    reports = report_catalog.list_reports(year_dir)
+    review = report_catalog.load_review(year_dir)   # {'warnings', 'suggestions'}
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.core import columnar
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+CATALOG_FILE_NAME = '.report_catalog.json'
+CATALOG_VERSION = 1
+REPORT_SUFFIXES = ('.csv', '.parquet')
+REVIEW_COLUMNS = ('Category', 'Severity', 'Title', 'Count', 'Description', 'Action')
+
+_lock = threading.Lock()
+
+
+def _describe(path: Path, source: str) -> Dict:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    rows = None
+    if path.suffix.lower() == '.csv':
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            rows = max(sum(1 for _ in csv.reader(f)) - 1, 0)
+    elif path.suffix.lower() == '.parquet' and columnar.pyarrow_available():
+        rows = columnar.parquet_rows(path)
+    st = path.stat()
+    return {
+        'size': st.st_size,
+        'rows': rows,
+        'sha256': digest.hexdigest(),
+        'modified': datetime.fromtimestamp(st.st_mtime).isoformat(),
+        'generated_at': datetime.now().isoformat(),
+        'source': source,
+    }
+
+
+def load_catalog(year_dir) -> Dict:
+    """The folder's manifest, or an empty one if missing or unreadable."""
+    try:
+        with open(Path(year_dir) / CATALOG_FILE_NAME) as f:
+            data = json.load(f)
+        if data.get('version') == CATALOG_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {'version': CATALOG_VERSION, 'artifacts': {}}
+
+
+def record(year_dir, paths: Iterable, source: str, review_json: Optional[str] = None):
+    """
+    Add or refresh entries for paths (files in year_dir) and drop entries
+    whose files are gone. Failures are logged; exports never fail on the
+    catalog.
+    """
+    year_dir = Path(year_dir)
+    try:
+        with _lock:
+            catalog = load_catalog(year_dir)
+            artifacts = catalog['artifacts']
+            for path in paths:
+                path = Path(path)
+                if path.exists():
+                    artifacts[path.name] = _describe(path, source)
+            for name in [n for n in artifacts if not (year_dir / n).exists()]:
+                del artifacts[name]
+            if review_json is not None:
+                catalog['review_json'] = review_json
+            fd, tmp = tempfile.mkstemp(dir=year_dir, prefix=CATALOG_FILE_NAME, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(catalog, f, indent=2)
+            os.replace(tmp, year_dir / CATALOG_FILE_NAME)
+    except Exception as e:
+        logger.warning(f"[CATALOG] Could not update report catalog in {year_dir}: {e}")
+
+
+def list_reports(year_dir) -> List[Dict]:
+    """
+    CSV and Parquet reports in year_dir: name, size, modified, plus rows,
+    sha256 and generated_at for files the manifest describes.
+    """
+    year_dir = Path(year_dir)
+    artifacts = load_catalog(year_dir)['artifacts']
+    reports = []
+    for path in sorted(p for p in year_dir.iterdir() if p.suffix.lower() in REPORT_SUFFIXES):
+        entry = artifacts.get(path.name)
+        if entry is None:
+            st = path.stat()
+            entry = {'size': st.st_size, 'modified': datetime.fromtimestamp(st.st_mtime).isoformat()}
+        reports.append(dict(entry, name=path.name))
+    return reports
+
+
+def _read_review_csv(path: Path) -> List[Dict]:
+    if not path.exists():
+        return []
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        if str(row.get('Count', '')).isdigit():
+            row['Count'] = int(row['Count'])
+    return rows
+
+
+def load_review(year_dir) -> Dict[str, List[Dict]]:
+    """
+    Warnings and suggestions from the latest review, as REVIEW_*.csv style
+    records. Reads the review JSON named in the manifest, or the CSVs when
+    there is none.
+    """
+    year_dir = Path(year_dir)
+    name = load_catalog(year_dir).get('review_json')
+    if name and (year_dir / name).exists():
+        with open(year_dir / name) as f:
+            data = json.load(f)
+        return {
+            key: [{col: item.get(col.lower()) for col in REVIEW_COLUMNS} for item in data.get(key) or []]
+            for key in ('warnings', 'suggestions')
+        }
+    return {
+        'warnings': _read_review_csv(year_dir / 'REVIEW_WARNINGS.csv'),
+        'suggestions': _read_review_csv(year_dir / 'REVIEW_SUGGESTIONS.csv'),
+    }
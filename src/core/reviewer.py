@@ -51,6 +51,7 @@ from datetime import timedelta
 from pathlib import Path
 import logging
 import src.core.engine as app
+from src.core import report_catalog
 
 logger = logging.getLogger("Crypto_Transaction_Engine")
 
@@ -958,4 +959,7 @@ class TransactionReviewer:
             suggestions_df.to_csv(csv_suggestions_path, index=False)
             logger.info(f"Suggestions exported to {csv_suggestions_path}")
         
+        report_catalog.record(output_path, [json_filepath, output_path / 'REVIEW_WARNINGS.csv',
+                                            output_path / 'REVIEW_SUGGESTIONS.csv'],
+                              source='reviewer', review_json=json_filename)
         return json_filepath
\ No newline at end of file
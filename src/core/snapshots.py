@@ -0,0 +1,340 @@
+"""
+================================================================================
+DATABASE SNAPSHOTS - Incremental, Deduplicated Snapshot Store
+================================================================================
+
+Point-in-time snapshots of the trades database that only store what changed.
+
+Storage Layout:
+    <store>/objects/ab/abcdef...   zlib-compressed chunk, named by its SHA-256
+    <store>/snapshots/<id>.json    manifest: ordered list of chunk hashes
+    <store>/.lock                  cross-process lock (web UI, CLI, Auto_Runner)
+
+How It Works:
+    1. The database file is read in fixed-size chunks. The chunk size is a
+       multiple of every SQLite page size, so an updated page only dirties
+       the chunk that contains it.
+    2. Each chunk is addressed by its hash; chunks already in the store are
+       not written again. A snapshot of a 3 GB database that changed a few
+       thousand rows writes a few megabytes.
+    3. Restore concatenates the chunks of a manifest into a temp file next
+       to the target and atomically replaces it.
+
+Consistency:
+    The file is read while holding a write lock (BEGIN IMMEDIATE) after a
+    WAL checkpoint, so no writer can change it mid-read. If the checkpoint
+    could not drain the WAL (a long reader is active), the snapshot falls
+    back to the SQLite online backup API.
+
+Retention:
+    Per label, the newest keep_last snapshots are kept plus the newest
+    snapshot of each of the last keep_daily days. Chunks no longer
+    referenced by any manifest are garbage collected.
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.core.backup import snapshot_database, SQLITE_HEADER
+from src.utils.constants import DB_SNAPSHOT_CHUNK_SIZE, DB_SNAPSHOT_KEEP_LAST, DB_SNAPSHOT_KEEP_DAILY
+from src.utils.lazy import lazy_module
+
+filelock = lazy_module('filelock')
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+LOCK_TIMEOUT_SECONDS = 300
+
+
+def snapshot_store_for(db_file) -> 'SnapshotStore':
+    """Return the snapshot store that lives next to db_file."""
+    db_file = Path(db_file)
+    return SnapshotStore(db_file.with_name(f"{db_file.name}.snapshots"))
+
+
+def _parse_time(value) -> datetime:
+    """Accept a datetime or ISO string; naive values are treated as UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class SnapshotStore:
+    """
+    Content-addressed snapshot store for a SQLite database file.
+
+    Features:
+    - Only chunks that changed since earlier snapshots are written
+    - Point-in-time restore by snapshot id or timestamp
+    - Per-label retention (keep last N + one per day) with chunk GC
+    """
+
+    def __init__(self, root, chunk_size=DB_SNAPSHOT_CHUNK_SIZE,
+                 keep_last=DB_SNAPSHOT_KEEP_LAST, keep_daily=DB_SNAPSHOT_KEEP_DAILY):
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.manifests_dir = self.root / 'snapshots'
+        self.chunk_size = chunk_size
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self._thread_lock = threading.RLock()
+        self._file_lock = filelock.FileLock(str(self.root / '.lock'), timeout=LOCK_TIMEOUT_SECONDS)
+
+    @contextmanager
+    def _locked(self):
+        """Serialize store mutations across threads and processes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._thread_lock, self._file_lock:
+            yield
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def create_snapshot(self, db_path, label: str = 'manual') -> dict:
+        """
+        Snapshot db_path and apply retention for label.
+
+        Returns:
+            The snapshot manifest (id, created, size, chunk counts, ...)
+        """
+        db_path = Path(db_path)
+        with self._locked():
+            manifest = self._write_snapshot(db_path, label)
+            self.apply_retention(label)
+        logger.info(
+            f"[SNAPSHOT] {manifest['id']}: {manifest['new_chunks']}/{len(manifest['chunks'])} chunks written "
+            f"({manifest['bytes_written']} bytes)"
+        )
+        return manifest
+
+    def _write_snapshot(self, db_path: Path, label: str) -> dict:
+        created = datetime.now(timezone.utc)
+        previous = self.latest(label)
+        known = set(previous['chunks']) if previous else set()
+
+        chunks, size, new_chunks, bytes_written = [], 0, 0, 0
+        with self._open_consistent(db_path) as f:
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                if digest not in known:
+                    written = self._store_object(digest, data)
+                    if written:
+                        new_chunks += 1
+                        bytes_written += written
+                    known.add(digest)
+                chunks.append(digest)
+                size += len(data)
+
+        manifest = {
+            'id': f"{created.strftime('%Y%m%dT%H%M%S%fZ')}_{label}",
+            'label': label,
+            'created': created.isoformat(),
+            'source': db_path.name,
+            'size': size,
+            'chunk_size': self.chunk_size,
+            'chunks': chunks,
+            'new_chunks': new_chunks,
+            'bytes_written': bytes_written,
+        }
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        target = self.manifests_dir / f"{manifest['id']}.json"
+        tmp = target.with_suffix('.json.tmp')
+        tmp.write_text(json.dumps(manifest), encoding='utf-8')
+        os.replace(tmp, target)
+        return manifest
+
+    @contextmanager
+    def _open_consistent(self, db_path: Path):
+        """Yield a readable file whose content is a consistent database image."""
+        with open(db_path, 'rb') as f:
+            is_sqlite = f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+        if not is_sqlite:
+            with open(db_path, 'rb') as f:
+                yield f
+            return
+
+        conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("BEGIN IMMEDIATE")
+            wal = Path(f"{db_path}-wal")
+            if wal.exists() and wal.stat().st_size:
+                # Committed pages still live in the WAL; copy through SQLite instead
+                conn.execute("ROLLBACK")
+                with tempfile.TemporaryDirectory(dir=self.root) as tmp:
+                    copy = snapshot_database(db_path, Path(tmp) / db_path.name)
+                    with open(copy, 'rb') as f:
+                        yield f
+                return
+            with open(db_path, 'rb') as f:
+                yield f
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _store_object(self, digest: str, data: bytes) -> int:
+        """Write a chunk unless already present. Returns bytes written (0 if deduplicated)."""
+        path = self._object_path(digest)
+        if path.exists():
+            return 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = zlib.compress(data, 1)
+        tmp = path.with_name(f"{digest}.tmp")
+        tmp.write_bytes(payload)
+        os.replace(tmp, path)
+        return len(payload)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def list_snapshots(self, label: str = None) -> list:
+        """Return manifests (oldest first), optionally filtered by label."""
+        if not self.manifests_dir.exists():
+            return []
+        manifests = []
+        for path in self.manifests_dir.glob('*.json'):
+            try:
+                manifest = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"[SNAPSHOT] Skipping unreadable manifest {path.name}: {e}")
+                continue
+            if label is None or manifest.get('label') == label:
+                manifests.append(manifest)
+        return sorted(manifests, key=lambda m: m['created'])
+
+    def latest(self, label: str = None):
+        """Newest manifest (optionally for label), or None."""
+        snapshots = self.list_snapshots(label)
+        return snapshots[-1] if snapshots else None
+
+    def find_snapshot(self, at, label: str = None):
+        """Newest manifest created at or before `at` (datetime or ISO string), or None."""
+        at = _parse_time(at)
+        match = None
+        for manifest in self.list_snapshots(label):
+            if _parse_time(manifest['created']) <= at:
+                match = manifest
+        return match
+
+    def get_snapshot(self, snapshot_id: str) -> dict:
+        path = self.manifests_dir / f"{snapshot_id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"Snapshot {snapshot_id} not found")
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    # ------------------------------------------------------------------
+    # Restore
+    # ------------------------------------------------------------------
+
+    def restore(self, snapshot, dest_path) -> Path:
+        """
+        Rebuild a snapshot into dest_path (atomic replace).
+
+        Args:
+            snapshot: Manifest dict or snapshot id
+            dest_path: Database file to write. Open connections to it must be
+                closed first; stale -wal/-shm files are removed.
+        """
+        dest_path = Path(dest_path)
+        with self._locked():
+            manifest = self.get_snapshot(snapshot) if isinstance(snapshot, str) else snapshot
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=f".{dest_path.name}.", suffix='.restore', dir=dest_path.parent)
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    for digest in manifest['chunks']:
+                        data = zlib.decompress(self._object_path(digest).read_bytes())
+                        if hashlib.sha256(data).hexdigest() != digest:
+                            raise ValueError(f"Snapshot chunk {digest} is corrupted")
+                        out.write(data)
+                for suffix in ('-wal', '-shm'):
+                    stale = Path(f"{dest_path}{suffix}")
+                    if stale.exists():
+                        stale.unlink()
+                os.replace(tmp_name, dest_path)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+        logger.info(f"[SNAPSHOT] Restored {manifest['id']} to {dest_path.name}")
+        return dest_path
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def apply_retention(self, label: str = None, keep_last: int = None, keep_daily: int = None) -> list:
+        """
+        Delete snapshots outside the retention policy and GC orphaned chunks.
+
+        Returns:
+            Ids of removed snapshots
+        """
+        keep_last = self.keep_last if keep_last is None else keep_last
+        keep_daily = self.keep_daily if keep_daily is None else keep_daily
+        with self._locked():
+            snapshots = self.list_snapshots(label)
+            keep = {m['id'] for m in snapshots[-keep_last:]} if keep_last else set()
+
+            if keep_daily:
+                newest_per_day = {}
+                for manifest in snapshots:
+                    newest_per_day[_parse_time(manifest['created']).date()] = manifest['id']
+                for day in sorted(newest_per_day)[-keep_daily:]:
+                    keep.add(newest_per_day[day])
+
+            removed = []
+            for manifest in snapshots:
+                if manifest['id'] not in keep:
+                    (self.manifests_dir / f"{manifest['id']}.json").unlink(missing_ok=True)
+                    removed.append(manifest['id'])
+            if removed:
+                self.collect_garbage()
+        return removed
+
+    def collect_garbage(self) -> int:
+        """Remove chunks not referenced by any manifest. Returns the number removed."""
+        with self._locked():
+            referenced = set()
+            for manifest in self.list_snapshots():
+                referenced.update(manifest['chunks'])
+            removed = 0
+            if self.objects_dir.exists():
+                for path in self.objects_dir.glob('*/*'):
+                    if path.name not in referenced:
+                        path.unlink(missing_ok=True)
+                        removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        """Snapshot count, logical size of the newest snapshot and on-disk store size."""
+        snapshots = self.list_snapshots()
+        stored = sum(p.stat().st_size for p in self.objects_dir.glob('*/*')) if self.objects_dir.exists() else 0
+        return {
+            'snapshots': len(snapshots),
+            'latest_size': snapshots[-1]['size'] if snapshots else 0,
+            'stored_bytes': stored,
+        }
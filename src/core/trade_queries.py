@@ -0,0 +1,101 @@
+"""
+================================================================================
+TRADE QUERIES - Lightweight Read Helpers for the Trades Table
+================================================================================
+
+Plain sqlite3 helpers shared by the web server and the CLI, so commands such
+as `cli.py transactions list` can read trades without importing the web
+server (and with it Flask, the scheduler and the engine).
+
+Functions:
+    connect(db_file)      sqlite3 connection with sqlite3.Row rows; creates
+                          the trades schema on a fresh database
+    ensure_schema(conn)   trades table plus the trade_stats and ledger_years
+                          aggregates
+    list_trades(conn)     paginated, filtered page of trades, newest first
+
+Usage:
+    conn = connect(DB_FILE)
+    try:
+        page = list_trades(conn, page=1, per_page=50, filters={'coin': 'BTC'})
+    finally:
+        conn.close()
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import sqlite3
+from typing import Dict, Optional
+
+from src.core.change_tracking import ensure_ledger_years
+from src.core.trade_stats import ensure_trade_stats
+
+FILTER_COLUMNS = ('coin', 'action', 'source')
+
+TRADES_DDL = '''CREATE TABLE IF NOT EXISTS trades (
+    id TEXT PRIMARY KEY,
+    date TEXT,
+    source TEXT,
+    destination TEXT,
+    action TEXT,
+    coin TEXT,
+    amount TEXT,
+    price_usd TEXT,
+    fee TEXT,
+    fee_coin TEXT,
+    batch_id TEXT
+)'''
+
+
+def ensure_schema(conn):
+    """Create the trades table and its aggregates if missing (commits)."""
+    conn.execute(TRADES_DDL)
+    conn.commit()
+    ensure_trade_stats(conn)
+    ensure_ledger_years(conn)
+
+
+def connect(db_file, **kwargs) -> sqlite3.Connection:
+    """Open the trades database with name-addressable rows, creating the schema if needed."""
+    conn = sqlite3.connect(str(db_file), **kwargs)
+    conn.row_factory = sqlite3.Row
+    try:
+        ensure_schema(conn)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def list_trades(conn, page: int = 1, per_page: int = 50, search: Optional[str] = None,
+                filters: Optional[Dict] = None) -> Dict:
+    """One page of trades matching search (coin/source/action LIKE) and exact-match filters."""
+    where_clauses = []
+    params = []
+
+    if search:
+        where_clauses.append("(coin LIKE ? OR source LIKE ? OR action LIKE ?)")
+        search_term = f"%{search}%"
+        params.extend([search_term, search_term, search_term])
+
+    for column in FILTER_COLUMNS:
+        if filters and filters.get(column):
+            where_clauses.append(f"{column} = ?")
+            params.append(filters[column])
+
+    where = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+    total = conn.execute(f"SELECT COUNT(*) FROM trades{where}", params).fetchone()[0]
+
+    cursor = conn.execute(f"SELECT * FROM trades{where} ORDER BY date DESC LIMIT ? OFFSET ?",
+                          params + [per_page, (page - 1) * per_page])
+    transactions = [dict(row) for row in cursor.fetchall()]
+
+    return {
+        'transactions': transactions,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': (total + per_page - 1) // per_page
+    }
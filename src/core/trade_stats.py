@@ -0,0 +1,121 @@
+"""
+================================================================================
+TRADE STATS - Materialized Dashboard Aggregates
+================================================================================
+
+Keeps per-action and per-coin trade counts in a small table maintained by
+SQLite triggers, so the dashboard (/api/stats) reads a handful of rows
+instead of scanning and grouping the whole trades table on every load.
+
+Schema:
+    trade_stats(kind, key, count)   kind is 'action' or 'coin'; NULL keys
+                                    are stored as ''
+    trade_stats_insert / _delete / _update triggers on trades
+    idx_trades_date                 so MIN/MAX(date) is an index lookup
+
+Maintenance:
+    Triggers keep the counts exact for every write path (web UI edits,
+    ingestion, ML reprocessing, other processes). ensure_trade_stats()
+    creates the table and triggers and rebuilds the counts whenever the
+    triggers are missing: a new database, or after a schema migration
+    recreated the trades table.
+
+Usage:
+    from src.core.trade_stats import read_trade_stats
+
+    stats = read_trade_stats(conn)
+    stats['total'], stats['actions'], stats['top_coins'], stats['date_range']
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import logging
+from typing import Dict
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+KINDS = ('action', 'coin')
+
+_TRIGGERS = {
+    'trade_stats_insert': """
+        CREATE TRIGGER trade_stats_insert AFTER INSERT ON trades BEGIN
+            INSERT INTO trade_stats (kind, key, count) VALUES ('action', IFNULL(NEW.action, ''), 1)
+                ON CONFLICT (kind, key) DO UPDATE SET count = count + 1;
+            INSERT INTO trade_stats (kind, key, count) VALUES ('coin', IFNULL(NEW.coin, ''), 1)
+                ON CONFLICT (kind, key) DO UPDATE SET count = count + 1;
+        END""",
+    'trade_stats_delete': """
+        CREATE TRIGGER trade_stats_delete AFTER DELETE ON trades BEGIN
+            UPDATE trade_stats SET count = count - 1 WHERE kind = 'action' AND key = IFNULL(OLD.action, '');
+            UPDATE trade_stats SET count = count - 1 WHERE kind = 'coin' AND key = IFNULL(OLD.coin, '');
+            DELETE FROM trade_stats WHERE count <= 0;
+        END""",
+    'trade_stats_update': """
+        CREATE TRIGGER trade_stats_update AFTER UPDATE OF action, coin ON trades BEGIN
+            UPDATE trade_stats SET count = count - 1 WHERE kind = 'action' AND key = IFNULL(OLD.action, '');
+            UPDATE trade_stats SET count = count - 1 WHERE kind = 'coin' AND key = IFNULL(OLD.coin, '');
+            INSERT INTO trade_stats (kind, key, count) VALUES ('action', IFNULL(NEW.action, ''), 1)
+                ON CONFLICT (kind, key) DO UPDATE SET count = count + 1;
+            INSERT INTO trade_stats (kind, key, count) VALUES ('coin', IFNULL(NEW.coin, ''), 1)
+                ON CONFLICT (kind, key) DO UPDATE SET count = count + 1;
+            DELETE FROM trade_stats WHERE count <= 0;
+        END""",
+}
+
+
+def _installed(conn) -> bool:
+    rows = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'trades' AND name IN (?, ?, ?)",
+        tuple(_TRIGGERS)).fetchone()
+    return rows[0] == len(_TRIGGERS)
+
+
+def ensure_trade_stats(conn) -> bool:
+    """
+    Install the aggregates table, triggers and date index on conn's
+    database, rebuilding the counts if the triggers were missing. Returns
+    True when a rebuild happened. Commits any open transaction.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trades_date ON trades(date)")
+    conn.commit()
+    if _installed(conn):
+        return False
+    with conn:
+        conn.execute("""CREATE TABLE IF NOT EXISTS trade_stats (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (kind, key)
+        ) WITHOUT ROWID""")
+        conn.execute("DELETE FROM trade_stats")
+        for kind in KINDS:
+            conn.execute(f"INSERT INTO trade_stats (kind, key, count) "
+                         f"SELECT '{kind}', IFNULL({kind}, ''), COUNT(*) FROM trades GROUP BY IFNULL({kind}, '')")
+        for name, sql in _TRIGGERS.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(sql)
+    logger.info("[DB] Rebuilt dashboard trade statistics")
+    return True
+
+
+def read_trade_stats(conn, top_coins: int = 10) -> Dict:
+    """
+    Dashboard aggregates: total, actions, top_coins (most traded first)
+    and date_range {'min', 'max'}. Installs the aggregates on first use.
+    """
+    if not _installed(conn):
+        ensure_trade_stats(conn)
+    actions = {key or None: count for key, count in
+               conn.execute("SELECT key, count FROM trade_stats WHERE kind = 'action'")}
+    coins = {key or None: count for key, count in
+             conn.execute("SELECT key, count FROM trade_stats WHERE kind = 'coin' ORDER BY count DESC LIMIT ?",
+                          (top_coins,))}
+    min_date, max_date = conn.execute("SELECT MIN(date), MAX(date) FROM trades").fetchone()
+    return {
+        'total': sum(actions.values()),
+        'actions': actions,
+        'top_coins': coins,
+        'date_range': {'min': min_date, 'max': max_date},
+    }
@@ -0,0 +1,378 @@
+"""
+================================================================================
+WALLET BALANCES - Concurrent, Rate-Limited On-Chain Balance Lookups
+================================================================================
+
+Fetches native balances for the addresses in wallets.json on behalf of
+WalletAuditor. Requests run on a bounded thread pool; each provider has its
+own token bucket, and providers that accept several addresses per request
+get them in batches, so a few hundred addresses take a handful of calls
+instead of one sleeping call each.
+
+Providers:
+    blockchair  Bitcoin-like chains (batched via dashboards/addresses, up
+                to 100 per call) and Ethereum (one address per call). Works
+                without an API key; a real key is sent as ?key=.
+    moralis     EVM chains (Ethereum, Polygon, BSC, Arbitrum, Optimism,
+                Base, Avalanche), batched via wallets/balances (25 per call).
+                Needs an API key. Preferred for EVM chains when configured.
+
+Rate Limits:
+    AUDIT_RATE_LIMITS (free tier) or AUDIT_RATE_LIMITS_PAID per provider,
+    as (requests per second, burst). Timeouts, 429s and 5xx responses are
+    retried API_RETRY_MAX_ATTEMPTS times with exponential backoff
+    (Retry-After is honoured on 429).
+
+Cache:
+    BalanceCache keys balances by (chain, address, period), where period is
+    the UTC day or an explicit block number, and reuses them for
+    AUDIT_BALANCE_CACHE_TTL_SECONDS. Stored as JSON (default
+    outputs/cache/wallet_balances.json) so repeated runs on the same day do
+    not query the providers again.
+
+Usage:
+    checker = BalanceChecker([MoralisProvider(key), BlockchairProvider()],
+                             cache=BalanceCache(OUTPUT_DIR / 'cache' / 'wallet_balances.json'))
+    balances = checker.check(wallet_addresses(load_wallets_file()))
+    # {('bitcoin', '1A1z...'): Decimal('0.5'), ...}
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.constants import (
+    API_RETRY_DELAY_MS,
+    API_RETRY_MAX_ATTEMPTS,
+    API_TIMEOUT_SECONDS,
+    AUDIT_BALANCE_CACHE_TTL_SECONDS,
+    AUDIT_MAX_WORKERS,
+    AUDIT_RATE_LIMITS,
+    AUDIT_RATE_LIMITS_PAID,
+)
+from src.utils.lazy import lazy_module
+
+requests = lazy_module('requests')
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+CACHE_VERSION = 1
+CHAIN_ALIASES = {
+    'btc': 'bitcoin', 'eth': 'ethereum', 'matic': 'polygon', 'sol': 'solana', 'ltc': 'litecoin',
+    'doge': 'dogecoin', 'bch': 'bitcoin-cash', 'arb': 'arbitrum', 'op': 'optimism', 'bnb': 'bsc',
+    'avax': 'avalanche',
+}
+
+
+def normalize_chain(name: str) -> str:
+    name = str(name).strip().lower()
+    return CHAIN_ALIASES.get(name, name)
+
+
+def wallet_addresses(wallets) -> Dict[str, List[str]]:
+    """{chain: [address, ...]} from a wallets.json mapping (deduplicated, order kept)."""
+    result = {}
+    for chain, data in (wallets or {}).items():
+        addrs = data.get('addresses') if isinstance(data, dict) else data
+        if not addrs:
+            continue
+        seen = result.setdefault(normalize_chain(chain), [])
+        for addr in (addrs if isinstance(addrs, list) else [addrs]):
+            addr = str(addr).strip()
+            if addr and addr not in seen:
+                seen.append(addr)
+    return {chain: addrs for chain, addrs in result.items() if addrs}
+
+
+def _real_key(api_key) -> Optional[str]:
+    """The key, or None for empty values and PASTE_* placeholders."""
+    if not api_key or str(api_key).upper().startswith('PASTE'):
+        return None
+    return str(api_key)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a request may be sent."""
+
+    def __init__(self, rate: float, burst: int, clock=None):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._clock = clock or time.monotonic
+        self._tokens = float(self.burst)
+        self._updated = self._clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping if none is available; returns the seconds waited."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1  # reserve; a negative balance is the queue ahead of us
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def rate_limiters(free_tier: bool = True) -> Dict[str, TokenBucket]:
+    limits = AUDIT_RATE_LIMITS if free_tier else AUDIT_RATE_LIMITS_PAID
+    return {name: TokenBucket(rate, burst) for name, (rate, burst) in limits.items()}
+
+
+class BalanceCache:
+    """TTL cache of balances keyed by (chain, address, period); see the module docstring."""
+
+    def __init__(self, path=None, ttl: float = AUDIT_BALANCE_CACHE_TTL_SECONDS, clock=None):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self._clock = clock or time.time
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def period(block: Optional[int] = None, day=None) -> str:
+        if block is not None:
+            return f"block:{int(block)}"
+        return str(day or datetime.now(timezone.utc).date())
+
+    @staticmethod
+    def _key(chain, address, period) -> str:
+        return f"{chain}|{address}|{period}"
+
+    def _fresh(self, entry) -> bool:
+        return self._clock() - entry.get('fetched_at', 0) < self.ttl
+
+    def _load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+                entries = data.get('entries') or {}
+                self._entries = {k: v for k, v in entries.items() if isinstance(v, dict) and self._fresh(v)}
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug(f"[AUDIT] Balance cache not loaded from {self.path}: {e}")
+
+    def get(self, chain: str, address: str, period: str) -> Optional[Decimal]:
+        with self._lock:
+            entry = self._entries.get(self._key(chain, address, period))
+            if entry is None or not self._fresh(entry):
+                return None
+            return Decimal(entry['balance'])
+
+    def put(self, chain: str, address: str, period: str, balance: Decimal, block: Optional[int] = None):
+        with self._lock:
+            self._entries[self._key(chain, address, period)] = {
+                'balance': str(balance), 'block': block, 'fetched_at': self._clock()}
+            self._dirty = True
+
+    def save(self):
+        """Write the unexpired entries if anything changed (atomic replace)."""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            entries = {k: v for k, v in self._entries.items() if self._fresh(v)}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix='.wallet_balances_')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'entries': entries}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug(f"[AUDIT] Balance cache not saved to {self.path}: {e}")
+
+
+class ProviderError(Exception):
+    """A balance request failed after its retries."""
+
+
+class BalanceProvider:
+    """Base class; subclasses set name, chains ({chain: decimals}) and implement fetch()."""
+    name = ''
+    base_url = ''
+    chains: Dict[str, int] = {}
+    batch_chains: frozenset = frozenset()
+    batch_size = 1
+
+    def __init__(self, api_key=None, base_url=None, timeout: float = API_TIMEOUT_SECONDS,
+                 retries: int = API_RETRY_MAX_ATTEMPTS, retry_delay: float = API_RETRY_DELAY_MS / 1000):
+        self.api_key = _real_key(api_key)
+        self.base_url = (base_url or self.base_url).rstrip('/')
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.retry_delay = retry_delay
+
+    def supports(self, chain: str) -> bool:
+        return chain in self.chains
+
+    def batches(self, chain: str, addresses: Sequence[str]) -> List[List[str]]:
+        size = self.batch_size if chain in self.batch_chains else 1
+        return [list(addresses[i:i + size]) for i in range(0, len(addresses), size)]
+
+    def fetch(self, chain: str, addresses: Sequence[str]) -> Dict[str, Tuple[Decimal, Optional[int]]]:
+        """{address: (balance in coins, block or None)} for the addresses the provider reported."""
+        raise NotImplementedError
+
+    def _units(self, chain, raw) -> Decimal:
+        try:
+            return Decimal(str(raw)) / (Decimal(10) ** self.chains[chain])
+        except (InvalidOperation, TypeError, ValueError):
+            raise ProviderError(f"{self.name}: unreadable balance {raw!r} for {chain}")
+
+    def _get(self, url: str, params=None, headers=None):
+        """GET url and return its JSON, retrying timeouts, connection errors, 429 and 5xx."""
+        for attempt in range(self.retries):
+            delay = self.retry_delay * (2 ** attempt)
+            try:
+                r = requests.get(url, params=params, headers=headers, timeout=self.timeout)
+                if r.status_code == 200:
+                    return r.json()
+                if r.status_code != 429 and r.status_code < 500:
+                    raise ProviderError(f"{self.name}: HTTP {r.status_code}")
+                if r.status_code == 429:
+                    try:
+                        delay = max(delay, float(r.headers.get('Retry-After')))
+                    except (TypeError, ValueError):
+                        pass
+                error = ProviderError(f"{self.name}: HTTP {r.status_code}")
+            except requests.exceptions.RequestException as e:
+                error = ProviderError(f"{self.name}: {type(e).__name__}: {e}")
+            if attempt < self.retries - 1:
+                time.sleep(delay)
+        raise error
+
+
+class BlockchairProvider(BalanceProvider):
+    name = 'blockchair'
+    base_url = 'https://api.blockchair.com'
+    chains = {'bitcoin': 8, 'bitcoin-cash': 8, 'litecoin': 8, 'dogecoin': 8, 'dash': 8, 'zcash': 8,
+              'ethereum': 18}
+    batch_chains = frozenset({'bitcoin', 'bitcoin-cash', 'litecoin', 'dogecoin', 'dash', 'zcash'})
+    batch_size = 100
+
+    def fetch(self, chain, addresses):
+        params = {'key': self.api_key} if self.api_key else None
+        if len(addresses) == 1:
+            addr = addresses[0]
+            body = self._get(f"{self.base_url}/{chain}/dashboards/address/{addr}", params=params) or {}
+            found = {addr: ((body.get('data') or {}).get(addr) or {}).get('address')}
+        else:
+            body = self._get(f"{self.base_url}/{chain}/dashboards/addresses/{','.join(addresses)}",
+                             params=params) or {}
+            found = (body.get('data') or {}).get('addresses') or {}
+        block = (body.get('context') or {}).get('state')
+        return {addr: (self._units(chain, info.get('balance', 0)), block)
+                for addr, info in found.items() if isinstance(info, dict) and addr in addresses}
+
+
+class MoralisProvider(BalanceProvider):
+    name = 'moralis'
+    base_url = 'https://deep-index.moralis.io/api/v2.2'
+    chain_ids = {'ethereum': 'eth', 'polygon': 'polygon', 'bsc': 'bsc', 'arbitrum': 'arbitrum',
+                 'optimism': 'optimism', 'base': 'base', 'avalanche': 'avalanche'}
+    chains = {chain: 18 for chain in chain_ids}
+    batch_chains = frozenset(chain_ids)
+    batch_size = 25
+
+    def supports(self, chain):
+        return self.api_key is not None and chain in self.chains
+
+    def fetch(self, chain, addresses):
+        headers = {'X-API-Key': self.api_key, 'accept': 'application/json'}
+        by_lower = {a.lower(): a for a in addresses}
+        if len(addresses) == 1:
+            body = self._get(f"{self.base_url}/{addresses[0]}/balance", params={'chain': self.chain_ids[chain]},
+                             headers=headers) or {}
+            return {addresses[0]: (self._units(chain, body.get('balance', 0)), None)}
+        body = self._get(f"{self.base_url}/wallets/balances",
+                         params={'chain': self.chain_ids[chain], 'wallet_addresses': list(addresses)},
+                         headers=headers) or []
+        result = {}
+        for block_set in body if isinstance(body, list) else [body]:
+            block = block_set.get('block_number')
+            for item in block_set.get('wallet_balances') or []:
+                addr = by_lower.get(str(item.get('address', '')).lower())
+                if addr:
+                    result[addr] = (self._units(chain, item.get('balance', 0)), int(block) if block else None)
+        return result
+
+
+class BalanceChecker:
+    """Runs balance lookups for many addresses on a bounded pool, one token bucket per provider."""
+
+    def __init__(self, providers: Iterable[BalanceProvider], cache: Optional[BalanceCache] = None,
+                 limiters: Optional[Dict[str, TokenBucket]] = None, max_workers: int = AUDIT_MAX_WORKERS,
+                 free_tier: bool = True):
+        self.providers = list(providers)
+        self.cache = cache or BalanceCache()
+        self.limiters = limiters if limiters is not None else rate_limiters(free_tier)
+        self.max_workers = max(1, max_workers)
+        self.stats = {'addresses': 0, 'cached': 0, 'requests': 0, 'failed': 0, 'unsupported': 0}
+
+    def provider_for(self, chain: str) -> Optional[BalanceProvider]:
+        return next((p for p in self.providers if p.supports(chain)), None)
+
+    def _fetch(self, provider, chain, batch):
+        limiter = self.limiters.get(provider.name)
+        if limiter is not None:
+            limiter.acquire()
+        return provider.fetch(chain, batch)
+
+    def check(self, wallets: Dict[str, List[str]], block: Optional[int] = None) -> Dict[Tuple[str, str], Decimal]:
+        """Balances for {chain: [address, ...]}; addresses whose lookup failed are left out."""
+        period = BalanceCache.period(block)
+        balances = {}
+        jobs = []
+        for chain, addresses in wallets.items():
+            self.stats['addresses'] += len(addresses)
+            provider = self.provider_for(chain)
+            if provider is None:
+                self.stats['unsupported'] += len(addresses)
+                logger.debug(f"[AUDIT] No balance provider configured for {chain}; skipped {len(addresses)} address(es)")
+                continue
+            pending = []
+            for addr in addresses:
+                cached = self.cache.get(chain, addr, period)
+                if cached is None:
+                    pending.append(addr)
+                else:
+                    balances[(chain, addr)] = cached
+                    self.stats['cached'] += 1
+            jobs.extend((provider, chain, batch) for batch in provider.batches(chain, pending))
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)),
+                                    thread_name_prefix='wallet-audit') as pool:
+                futures = {pool.submit(self._fetch, *job): job for job in jobs}
+                for future in as_completed(futures):
+                    provider, chain, batch = futures[future]
+                    self.stats['requests'] += 1
+                    try:
+                        found = future.result()
+                    except Exception as e:
+                        self.stats['failed'] += len(batch)
+                        logger.warning(f"[AUDIT] {provider.name} balance lookup failed for "
+                                       f"{len(batch)} {chain} address(es): {e}")
+                        continue
+                    for addr, (amount, found_block) in found.items():
+                        balances[(chain, addr)] = amount
+                        self.cache.put(chain, addr, period, amount, found_block)
+            self.cache.save()
+        return balances
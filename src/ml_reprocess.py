@@ -0,0 +1,177 @@
+"""Batched ML reprocessing of stored transactions.
+
+Runs every row of the trades table through rules-first classification and
+sends only the rule misses to the ML service, a batch at a time:
+
+1. Rows are read in keyset-paginated batches (rowid > last), so memory is
+   bounded by the batch size and no read cursor is held across commits.
+2. The rule pass is a vectorized pandas mask: a row whose action is already
+   a known action (``KNOWN_ACTIONS``) is a rule hit and is never relabelled.
+3. Rule misses go to ``MLService.suggest_batch`` in one call per batch
+   (falling back to per-row ``suggest`` for services without a batch API).
+4. Only suggestions at or above the confidence threshold
+   (``ml_fallback.confidence_threshold``) that name a known action are
+   written, with one ``executemany`` + commit per batch. Every suggestion is
+   appended to the suggestion log with a single write per batch.
+
+Used by ``POST /api/transactions/reprocess-all`` (background task reporting
+through ``progress_store``) and ``cli.py tx reprocess``.
+"""
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.transaction_validator import TransactionValidator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_CONFIDENCE_THRESHOLD = 0.85  # Same default as ml_fallback.confidence_threshold
+# Actions the engine, importers and ML service use; rows labelled with one are kept as-is
+KNOWN_ACTIONS = frozenset(
+    TransactionValidator.VALID_ACTIONS
+    | {'DEPOSIT', 'WITHDRAWAL', 'FEE', 'SPEND', 'LOSS', 'SWAP', 'GIFT', 'GIFT_IN', 'STAKING', 'AIRDROP', 'MINING'}
+)
+_SELECT_BATCH = (
+    "SELECT rowid AS _rowid, * FROM trades WHERE rowid > ? ORDER BY rowid LIMIT ?"
+)
+
+
+def iter_transaction_batches(conn, batch_size: int):
+    """Yield DataFrames of at most batch_size trades, paginated by rowid."""
+    last_rowid = -1
+    while True:
+        cursor = conn.execute(_SELECT_BATCH, (last_rowid, batch_size))
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        frame = pd.DataFrame.from_records([tuple(r) for r in rows], columns=columns)
+        last_rowid = int(frame['_rowid'].iloc[-1])
+        yield frame
+
+
+def apply_rules(frame: pd.DataFrame) -> pd.Series:
+    """Vectorized rule pass: rows whose action is already a known action. Misses are None."""
+    labels = pd.Series([None] * len(frame), index=frame.index, dtype=object)
+    actions = frame['action'].fillna('').astype(str).str.strip().str.upper()
+    hit = actions.isin(KNOWN_ACTIONS)
+    labels[hit] = actions[hit]
+    return labels
+
+
+def build_ml_rows(frame: pd.DataFrame) -> List[Dict]:
+    """Build the row dicts the ML service expects for each trade."""
+    action = frame['action'].fillna('').astype(str)
+    coin = frame['coin'].fillna('').astype(str)
+    ml_frame = pd.DataFrame({
+        'description': action + ' ' + coin,
+        'amount': frame['amount'].fillna(0),
+        'price_usd': frame['price_usd'].fillna(0),
+        'coin': coin,
+        'action': action,
+        'source': frame['source'].fillna('').astype(str),
+        'date': frame['date'].fillna('').astype(str),
+    })
+    return ml_frame.to_dict('records')
+
+
+def suggest_many(ml_service, rows: List[Dict]) -> List[Dict]:
+    """One batched inference call when the service supports it."""
+    if not rows:
+        return []
+    suggest_batch = getattr(ml_service, 'suggest_batch', None)
+    if callable(suggest_batch):
+        return suggest_batch(rows)
+    return [ml_service.suggest(row) for row in rows]
+
+
+def reprocess_transactions(conn, ml_service, batch_size: int = DEFAULT_BATCH_SIZE,
+                           log_file: Optional[Path] = None,
+                           progress_callback: Optional[Callable[[int, int], None]] = None,
+                           confidence_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD) -> Dict:
+    """Reclassify every stored trade.
+
+    Args:
+        conn: sqlite3 connection to the trades database (used for reads and writes)
+        ml_service: object with ``suggest_batch(rows)`` or ``suggest(row)``
+        batch_size: rows per read / inference / write batch
+        log_file: model_suggestions.log path; ML suggestions are appended as JSON lines
+        progress_callback: called as ``progress_callback(processed, total)`` after each batch
+        confidence_threshold: minimum suggestion confidence for a label to be written;
+            weaker suggestions are only logged
+
+    Returns:
+        dict with processed, updated, rule_hits, ml_calls and total counts, plus
+        cache_hit_rate / tokens_per_sec when the service reports them
+    """
+    batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+    total = conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    stats = {'total': total, 'processed': 0, 'updated': 0, 'rule_hits': 0, 'ml_calls': 0}
+
+    log_handle = None
+    if log_file is not None:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        log_handle = open(log_file, 'a', encoding='utf-8')
+    try:
+        for frame in iter_transaction_batches(conn, batch_size):
+            labels = apply_rules(frame)
+            misses = labels.isna().to_numpy()
+            ml_rows = build_ml_rows(frame[misses])
+            suggestions = suggest_many(ml_service, ml_rows)
+            stats['rule_hits'] += int((~misses).sum())
+            stats['ml_calls'] += 1 if ml_rows else 0
+
+            updates, log_lines = [], []
+            timestamp = datetime.now().isoformat()
+            miss_ids = frame.loc[misses, 'id'].tolist()
+            for tx_id, row, suggestion in zip(miss_ids, ml_rows, suggestions):
+                new_action = suggestion.get('suggested_label')
+                confidence = suggestion.get('confidence', 0) or 0
+                applied = (bool(new_action) and str(new_action).upper() in KNOWN_ACTIONS
+                           and confidence >= confidence_threshold and new_action != row['action'])
+                if applied:
+                    updates.append((str(new_action).upper(), tx_id))
+                log_lines.append(json.dumps({
+                    'timestamp': timestamp,
+                    'transaction_id': tx_id,
+                    'date': row['date'],
+                    'coin': row['coin'],
+                    'original_action': row['action'],
+                    'suggested_action': new_action,
+                    'confidence': confidence,
+                    'explanation': suggestion.get('explanation', ''),
+                    'applied': applied,
+                }) + '\n')
+
+            if updates:
+                conn.executemany("UPDATE trades SET action = ? WHERE id = ?", updates)
+                conn.commit()
+            if log_handle is not None and log_lines:
+                log_handle.write(''.join(log_lines))
+                log_handle.flush()
+
+            stats['processed'] += len(frame)
+            stats['updated'] += len(updates)
+            if progress_callback is not None:
+                progress_callback(stats['processed'], total)
+    finally:
+        if log_handle is not None:
+            log_handle.close()
+
+    get_stats = getattr(ml_service, 'get_stats', None)
+    if callable(get_stats):
+        ml_stats = get_stats()
+        stats['cache_hit_rate'] = round(ml_stats.get('cache_hit_rate', 0.0), 4)
+        stats['tokens_per_sec'] = round(ml_stats.get('tokens_per_sec', 0.0), 2)
+
+    logger.info(
+        f"[ML] Reprocessed {stats['processed']} transactions: {stats['rule_hits']} rule hits, "
+        f"{stats['updated']} updated in {stats['ml_calls']} inference batches "
+        f"(cache hit rate {stats.get('cache_hit_rate', 0.0):.1%}, {stats.get('tokens_per_sec', 0.0):.1f} tokens/sec)"
+    )
+    return stats
@@ -11,42 +11,178 @@ Usage:
     # Real mode (requires: pip install torch transformers)
     svc = MLService(mode="tinyllama", auto_shutdown_after_inference=True)
     svc.suggest(tx)  # First inference loads model
+    svc.suggest_batch(txs)  # Padded batches; repeated patterns come from the cache
     svc.shutdown()   # Free memory after use
+    svc.get_stats()  # tokens/sec and cache hit rate
+
+Suggestion cache:
+    Model results are stored in a small SQLite cache keyed by a normalized
+    transaction signature (coin, type keywords in the description, amount
+    order of magnitude). Repeated patterns across CSV imports skip inference.
+    Model modes use the cache by default; pass cache_file to use it in shim mode.
 
 Environment:
     ML_MODEL_NAME: Override model (default: "TheBloke/TinyLlama-1.1B-Chat-v1.0-GGUF")
     ML_DEVICE: "cpu" or "cuda" (default: auto-detect)
+    ML_CACHE_FILE: Suggestion cache path (empty string disables the cache)
 """
 import os
+import re
 import sys
-from typing import Dict, Optional
+import math
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+MODEL_MODES = ("tinyllama", "gemma")
+VALID_LABELS = {"BUY", "SELL", "DEPOSIT", "WITHDRAWAL", "FEE", "INCOME", "TRANSFER"}
+DEFAULT_BATCH_SIZE = 8
+CACHE_VERSION = 1  # Bump when the prompt or label parsing changes
+
+# Words that decide the label; the signature keeps only these from a description
+SIGNATURE_KEYWORDS = (
+    "buy", "bought", "sell", "sold", "exchange", "exchanged", "trade", "swap",
+    "deposit", "received", "incoming", "withdraw", "withdrawal", "sent", "to wallet",
+    "fee", "commission", "service charge", "income", "reward", "staking", "airdrop",
+    "interest", "mining", "transfer",
+)
+
+
+def _description(tx: Dict) -> str:
+    return (tx.get("description") or tx.get("memo") or tx.get("note") or "").strip()
+
+
+def _amount_bucket(value) -> str:
+    """Order-of-magnitude bucket so 0.51 and 0.87 share a signature."""
+    try:
+        amount = abs(float(value or 0))
+    except (TypeError, ValueError):
+        return "na"
+    if amount == 0 or math.isnan(amount):
+        return "0"
+    if math.isinf(amount):
+        return "inf"
+    return f"e{math.floor(math.log10(amount))}"
+
+
+def transaction_signature(tx: Dict) -> str:
+    """Normalized signature used as the suggestion cache key.
+
+    Two transactions with the same coin, the same label keywords in their
+    description and amounts of the same magnitude get the same suggestion.
+    """
+    desc = re.sub(r"\s+", " ", _description(tx).lower())
+    keywords = sorted(k for k in SIGNATURE_KEYWORDS if k in desc)
+    coin = str(tx.get("coin") or "").strip().upper()
+    return f"{coin}|{','.join(keywords)}|{_amount_bucket(tx.get('amount'))}"
+
+
+class SuggestionCache:
+    """Persistent signature -> suggestion cache (SQLite, safe across threads)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ml_suggestion_cache ("
+            "key TEXT PRIMARY KEY, label TEXT, confidence REAL, explanation TEXT, "
+            "hits INTEGER DEFAULT 0, updated_at REAL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            # Stay under SQLite's host parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, label, confidence, explanation FROM ml_suggestion_cache "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, label, confidence, explanation in rows:
+                    found[key] = {"suggested_label": label, "confidence": confidence, "explanation": explanation}
+            if found:
+                self._conn.executemany(
+                    "UPDATE ml_suggestion_cache SET hits = hits + 1 WHERE key = ?", [(k,) for k in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, entries: Dict[str, Dict]):
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ml_suggestion_cache (key, label, confidence, explanation, hits, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, ?)",
+                [(k, v.get("suggested_label"), v.get("confidence", 0.0), v.get("explanation", ""), now)
+                 for k, v in entries.items()]
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _default_cache_file() -> Optional[Path]:
+    env = os.environ.get("ML_CACHE_FILE")
+    if env is not None:
+        return Path(env) if env else None
+    try:
+        from src.utils.constants import OUTPUT_DIR
+    except Exception:
+        OUTPUT_DIR = Path.cwd() / "outputs"
+    return OUTPUT_DIR / "cache" / "ml_suggestions.db"
+
 
 class MLService:
-    def __init__(self, mode: str = "shim", auto_shutdown_after_inference: bool = False):
+    def __init__(self, mode: str = "shim", auto_shutdown_after_inference: bool = False,
+                 batch_size: int = DEFAULT_BATCH_SIZE, cache_file=None):
         """Initialize ML service.
         
         Args:
-            mode: "shim" (keywords) or "tinyllama" (real model)
-            auto_shutdown_after_inference: if True, model unloads after each suggest()
+            mode: "shim" (keywords) or "tinyllama"/"gemma" (real model)
+            auto_shutdown_after_inference: if True, model unloads after each suggest()/suggest_batch()
+            batch_size: prompts per padded pipeline batch
+            cache_file: suggestion cache path (default: ML_CACHE_FILE or outputs/cache
+                for model modes, no cache for shim mode)
         """
         self.mode = mode
         self.auto_shutdown = auto_shutdown_after_inference
+        self.batch_size = max(1, int(batch_size))
         self.model = None
         self.tokenizer = None
         self.device = None
         self.pipe = None
         self._use_count = 0
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "generated_tokens": 0, "inference_seconds": 0.0}
+
+        if cache_file is None and mode in MODEL_MODES:
+            cache_file = _default_cache_file()
+        self.cache = None
+        if cache_file:
+            try:
+                self.cache = SuggestionCache(cache_file)
+            except Exception as e:
+                logger.warning(f"[ML] Suggestion cache unavailable ({cache_file}): {e}")
 
     def _load_model(self):
         """Load real model on first use (lazy loading) with recovery attempts."""
-        if self.model is not None:
+        if self.pipe is not None:
             return  # Already loaded
 
-        if self.mode != "tinyllama":
+        if self.mode not in MODEL_MODES:
             return
 
         try:
@@ -109,16 +245,69 @@ class MLService:
             "explanation": str
           }
         """
-        if self.mode == "shim":
+        if self.mode == "shim" and self.cache is None:
             return self._suggest_shim(tx)
-        elif self.mode == "gemma":
-            return self._suggest_gemma(tx)
+        if self.mode == "shim" or self.mode in MODEL_MODES:
+            return self.suggest_batch([tx])[0]
+        return {"suggested_label": "unknown", "confidence": 0.0, "explanation": "mode not configured"}
+
+    def suggest_batch(self, txs: List[Dict]) -> List[Dict]:
+        """Return suggestions for many transactions, in order.
+
+        Cached signatures are answered without inference; the remaining
+        unique signatures run through the model in padded batches.
+        """
+        txs = list(txs)
+        if self.mode != "shim" and self.mode not in MODEL_MODES:
+            return [{"suggested_label": "unknown", "confidence": 0.0, "explanation": "mode not configured"} for _ in txs]
+
+        results: List[Optional[Dict]] = [None] * len(txs)
+        pending: Dict[str, List[int]] = {}
+        if self.cache is not None:
+            keys = [self._cache_key(tx) for tx in txs]
+            cached = self.cache.get_many(keys)
+            for i, key in enumerate(keys):
+                if key in cached:
+                    results[i] = dict(cached[key])
+                    self.stats["cache_hits"] += 1
+                else:
+                    pending.setdefault(key, []).append(i)
+                    self.stats["cache_misses"] += 1
         else:
-            return {"suggested_label": "unknown", "confidence": 0.0, "explanation": "mode not configured"}
+            pending = {str(i): [i] for i in range(len(txs))}
+
+        if pending:
+            representatives = [txs[indices[0]] for indices in pending.values()]
+            if self.mode in MODEL_MODES:
+                fresh, from_model = self._suggest_model_batch(representatives)
+            else:
+                fresh, from_model = [self._suggest_shim(tx) for tx in representatives], True
+            for (key, indices), suggestion in zip(pending.items(), fresh):
+                for i in indices:
+                    results[i] = dict(suggestion)
+            # Shim fallbacks must not be remembered as model answers
+            if self.cache is not None and from_model:
+                self.cache.put_many(dict(zip(pending.keys(), fresh)))
+
+        return results
+
+    def get_stats(self) -> Dict:
+        """Cache hit rate and generation throughput since this service was created."""
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        seconds = self.stats["inference_seconds"]
+        return {
+            **self.stats,
+            "cache_hit_rate": self.stats["cache_hits"] / lookups if lookups else 0.0,
+            "tokens_per_sec": self.stats["generated_tokens"] / seconds if seconds else 0.0,
+        }
+
+    def _cache_key(self, tx: Dict) -> str:
+        model = os.environ.get("ML_MODEL_NAME", "google/gemma-2b-it") if self.mode in MODEL_MODES else "shim"
+        return f"v{CACHE_VERSION}|{self.mode}|{model}|{transaction_signature(tx)}"
 
     def _suggest_shim(self, tx: Dict) -> Dict:
         """Simple keyword-based heuristics to emulate classification."""
-        description = (tx.get("description") or tx.get("memo") or tx.get("note") or "").strip()
+        description = _description(tx)
         desc = description.lower()
 
         if any(k in desc for k in ("buy", "bought", "exchange", "trade")):
@@ -142,54 +331,65 @@ class MLService:
 
         return {"suggested_label": "TRANSFER", "confidence": 0.58, "explanation": "no clear keywords found; fallback to TRANSFER"}
 
-    def _suggest_gemma(self, tx: Dict) -> Dict:
-        """Use real Gemma model for classification."""
-        self._load_model()
-        
-        if self.pipe is None:
-            # Model failed to load; fall back to shim
-            return self._suggest_shim(tx)
-
-        try:
-            description = (tx.get("description") or tx.get("memo") or tx.get("note") or "").strip()
-            if not description:
-                description = "No description"
-
-            # Craft prompt for classification
-            prompt = f"""Classify this cryptocurrency transaction into ONE category: BUY, SELL, DEPOSIT, WITHDRAWAL, FEE, INCOME, or TRANSFER.
+    @staticmethod
+    def _build_prompt(tx: Dict) -> str:
+        description = _description(tx) or "No description"
+        return f"""Classify this cryptocurrency transaction into ONE category: BUY, SELL, DEPOSIT, WITHDRAWAL, FEE, INCOME, or TRANSFER.
 
 Description: {description}
 
 Category:"""
 
-            # Generate with strict output
-            result = self.pipe(
-                prompt,
+    def _suggest_model_batch(self, txs: List[Dict]):
+        """Run the text-generation pipeline over txs in padded batches.
+
+        Returns (suggestions, from_model); from_model is False when the
+        shim answered instead because the model could not run.
+        """
+        self._load_model()
+
+        if self.pipe is None:
+            # Model failed to load; fall back to shim
+            return [self._suggest_shim(tx) for tx in txs], False
+
+        try:
+            tokenizer = getattr(self.pipe, "tokenizer", None)
+            if tokenizer is not None:
+                # Decoder-only models pad on the left and usually lack a pad token
+                tokenizer.padding_side = "left"
+                if tokenizer.pad_token_id is None:
+                    tokenizer.pad_token_id = tokenizer.eos_token_id
+
+            prompts = [self._build_prompt(tx) for tx in txs]
+            # Similar lengths in the same batch keep padding small
+            order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+            started = time.perf_counter()
+            outputs = self.pipe(
+                [prompts[i] for i in order],
+                batch_size=self.batch_size,
                 max_new_tokens=10,
-                temperature=0.1,  # Low temp = more deterministic
-                top_p=0.9,
                 do_sample=False,
+                return_full_text=False,
             )
+            self.stats["inference_seconds"] += time.perf_counter() - started
 
-            output_text = result[0]["generated_text"][len(prompt):].strip().upper()
-            
-            # Parse label (take first word if multiple)
-            label = output_text.split()[0] if output_text else "TRANSFER"
-            valid_labels = {"BUY", "SELL", "DEPOSIT", "WITHDRAWAL", "FEE", "INCOME", "TRANSFER"}
-            if label not in valid_labels:
-                label = "TRANSFER"
+            results: List[Optional[Dict]] = [None] * len(txs)
+            for position, i in enumerate(order):
+                generated = outputs[position]
+                if isinstance(generated, list):
+                    generated = generated[0]
+                text = generated["generated_text"]
+                if tokenizer is not None:
+                    self.stats["generated_tokens"] += len(tokenizer.encode(text, add_special_tokens=False))
+                results[i] = self._parse_label(text)
+
+            self._use_count += len(txs)
 
-            self._use_count += 1
-            
             # Auto-shutdown after use if configured
             if self.auto_shutdown:
                 self.shutdown()
 
-            return {
-                "suggested_label": label,
-                "confidence": 0.88,  # Gemma confidence is empirical
-                "explanation": f"Gemma model classified as {label}"
-            }
+            return results, True
 
         except RuntimeError as e:
             if "out of memory" in str(e).lower():
@@ -197,12 +397,25 @@ Category:"""
                 logger.warning(f"[ML] 💡 Try enabling auto_shutdown_after_batch or reducing batch size")
             else:
                 logger.warning(f"[ML] ⚠️  Runtime error during inference: {e}")
-            logger.warning(f"[ML] → Using lightweight 'shim' mode for this transaction")
-            return self._suggest_shim(tx)
+            logger.warning(f"[ML] → Using lightweight 'shim' mode for this batch")
+            return [self._suggest_shim(tx) for tx in txs], False
         except Exception as e:
             logger.warning(f"[ML] ⚠️  Gemma inference failed: {e}")
-            logger.warning(f"[ML] → Using lightweight 'shim' mode for this transaction")
-            return self._suggest_shim(tx)
+            logger.warning(f"[ML] → Using lightweight 'shim' mode for this batch")
+            return [self._suggest_shim(tx) for tx in txs], False
+
+    @staticmethod
+    def _parse_label(output_text: str) -> Dict:
+        output_text = output_text.strip().upper()
+        # Parse label (take first word if multiple)
+        label = output_text.split()[0] if output_text else "TRANSFER"
+        if label not in VALID_LABELS:
+            label = "TRANSFER"
+        return {
+            "suggested_label": label,
+            "confidence": 0.88,  # Gemma confidence is empirical
+            "explanation": f"Gemma model classified as {label}"
+        }
 
     def shutdown(self):
         """Free model memory."""
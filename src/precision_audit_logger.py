@@ -1,14 +1,77 @@
 """
-Precision audit logging for Transaction-critical operations.
-Logs all fraud detection, fee calculations, and Transaction-sensitive computations
-with full Decimal precision for audit trails and debugging.
+================================================================================
+PRECISION AUDIT LOGGER - Asynchronous Structured Alert Records
+================================================================================
+
+Audit trail for fraud detection, wash sale, structuring, fee and
+Transaction-calculation events, with full Decimal precision (Decimals are
+written as strings).
+
+Pipeline:
+    Detectors call log_*(**fields). The calling thread only checks the
+    per-type rate cap and puts (alert_type, time, fields) on a queue. A
+    QueueListener thread builds the LogRecord, formats the message and
+    writes one JSON object per line through a background JsonlSink, so no
+    string formatting or JSON encoding happens inside detector loops.
+
+    precision_logger (logging.getLogger('precision_audit')) sends records
+    through the same queue via a QueueHandler that defers formatting.
+
+Records (outputs/logs/precision_audit.log):
+    {"timestamp": "2025-12-01T10:00:00", "level": "WARNING",
+     "logger": "precision_audit", "message": "WASH_SALE | coin=BTC | ...",
+     "alert_type": "WASH_SALE", "severity": "high", "coin": "BTC", ...}
+    This is the format AuditLogManager (src/web/audit_endpoints.py) reads.
+
+Rate Cap and Drops:
+    At most PRECISION_AUDIT_RATE_LIMIT events per alert type per second are
+    kept. Events that arrive while PRECISION_AUDIT_QUEUE_SIZE are still
+    waiting are dropped. get_audit_stats() reports logged and dropped
+    counts per alert type. New drops are also written as an AUDIT_DROPPED
+    record when the pipeline is flushed or stopped.
+
+Usage:
+    from src.precision_audit_logger import log_wash_sale_detection
+
+    log_wash_sale_detection(tx_id='b1|s1', coin='BTC', loss_amount='120.50')
+    flush_precision_audit()   # wait for the writer (end of a run, tests)
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
 """
 
-import logging
+import atexit
 import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
 from decimal import Decimal
-from typing import Dict, Any
-from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.utils.constants import LOG_DIR, PRECISION_AUDIT_QUEUE_SIZE, PRECISION_AUDIT_RATE_LIMIT
+from src.utils.jsonl_sink import JsonlSink, JsonlSinkHandler
+
+PRECISION_AUDIT_LOG = LOG_DIR / 'precision_audit.log'
+
+SEVERITY = {
+    'WASH_SALE': 'high',
+    'STRUCTURING': 'high',
+    'PUMP_DUMP': 'medium',
+    'FRAUD_DETECTION': 'medium',
+    'ANOMALY': 'medium',
+    'SUSPICIOUS_VOLUME': 'low',
+    'FEE_CALCULATION': 'low',
+    'TRANSACTION_CALC': 'info',
+    'AUDIT_DROPPED': 'medium',
+}
+
+# Fields that would collide with LogRecord attributes are written with a trailing underscore
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -19,23 +82,163 @@ class DecimalEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+def _event_record(alert_type: str, created: float, fields: Dict[str, Any]) -> logging.LogRecord:
+    """Build the LogRecord for one queued event (runs on the writer thread)."""
+    severity = fields.pop('severity', None) or SEVERITY.get(alert_type, 'medium')
+    level = logging.WARNING if severity == 'high' else logging.INFO
+    attrs = {'alert_type': alert_type, 'severity': severity}
+    for key, value in fields.items():
+        attrs[f"{key}_" if key in _RESERVED else key] = value
+    message = ' | '.join([alert_type] + [f"{k}={v}" for k, v in fields.items()])
+    record = logging.makeLogRecord({'name': 'precision_audit', 'levelno': level,
+                                    'levelname': logging.getLevelName(level), 'msg': message})
+    record.__dict__.update(attrs)
+    record.created = created
+    return record
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def __init__(self, pipeline):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        self.pipeline.start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.pipeline.count_drop(getattr(record, 'alert_type', 'LOG'))
+
+
+class _EventListener(QueueListener):
+    """QueueListener that turns queued event tuples into LogRecords."""
+
+    def prepare(self, item):
+        if isinstance(item, logging.LogRecord):
+            return item
+        return _event_record(*item)
+
+
+class PrecisionAuditPipeline:
+    """
+    Bounded queue plus writer thread for audit events (see module docstring).
+    The writer starts on the first event and after every stop().
+    """
+
+    def __init__(self, path=PRECISION_AUDIT_LOG, queue_size: int = PRECISION_AUDIT_QUEUE_SIZE,
+                 rate_limit: int = PRECISION_AUDIT_RATE_LIMIT):
+        self.path = Path(path)
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.rate_limit = int(rate_limit)
+        self.logged = defaultdict(int)
+        self.dropped = defaultdict(int)
+        self._reported = {}
+        self._windows = {}
+        self._lock = threading.Lock()
+        self._handler = None
+        self._listener = None
+
+    def start(self):
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is None:
+                self._handler = JsonlSinkHandler(JsonlSink(self.path, background=True))
+                self._listener = _EventListener(self.queue, self._handler)
+                self._listener.start()
+
+    def submit(self, alert_type: str, fields: Dict[str, Any]) -> bool:
+        """Queue one event; False if it was dropped by the rate cap or a full queue."""
+        if self._listener is None:
+            self.start()
+        now = time.time()
+        with self._lock:
+            if self.rate_limit:
+                second = int(now)
+                window = self._windows.get(alert_type)
+                if window is None or window[0] != second:
+                    window = self._windows[alert_type] = [second, 0]
+                if window[1] >= self.rate_limit:
+                    self.dropped[alert_type] += 1
+                    return False
+                window[1] += 1
+            try:
+                self.queue.put_nowait((alert_type, now, fields))
+            except queue.Full:
+                self.dropped[alert_type] += 1
+                return False
+            self.logged[alert_type] += 1
+        return True
+
+    def count_drop(self, alert_type: str):
+        with self._lock:
+            self.dropped[alert_type] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'logged': dict(self.logged), 'dropped': dict(self.dropped),
+                    'pending': self.queue.qsize()}
+
+    def stop(self):
+        """Write everything queued so far (plus a drop summary) and stop the writer."""
+        with self._lock:
+            listener, handler = self._listener, self._handler
+            self._listener = self._handler = None
+            new_drops = {t: n - self._reported.get(t, 0) for t, n in self.dropped.items()
+                         if n > self._reported.get(t, 0)}
+            self._reported = dict(self.dropped)
+        if listener is None:
+            return
+        listener.stop()
+        if new_drops:
+            handler.handle(_event_record('AUDIT_DROPPED', time.time(), {'dropped': new_drops}))
+        handler.close()
+
+    flush = stop
+
+
+_pipeline = PrecisionAuditPipeline()
+atexit.register(lambda: _pipeline.stop())
+
+
+def configure_precision_audit(path=None, queue_size: Optional[int] = None,
+                              rate_limit: Optional[int] = None) -> PrecisionAuditPipeline:
+    """Replace the process-wide pipeline (flushing the old one), e.g. to log elsewhere."""
+    global _pipeline
+    old = _pipeline
+    old.stop()
+    _pipeline = PrecisionAuditPipeline(
+        path if path is not None else old.path,
+        queue_size if queue_size is not None else old.queue.maxsize,
+        rate_limit if rate_limit is not None else old.rate_limit,
+    )
+    for handler in precision_logger.handlers:
+        if isinstance(handler, _DeferredQueueHandler):
+            handler.pipeline, handler.queue = _pipeline, _pipeline.queue
+    return _pipeline
+
+
+def flush_precision_audit():
+    """Block until every queued event has been written."""
+    _pipeline.flush()
+
+
+def get_audit_stats() -> Dict[str, Any]:
+    """Logged, dropped and pending event counts of the current pipeline."""
+    return _pipeline.stats()
+
+
 def create_precision_logger(name: str) -> logging.Logger:
-    """Create a logger for precision-critical operations."""
+    """Create a logger whose records go through the audit queue."""
     logger = logging.getLogger(name)
-    
-    # File handler with JSON format for machine parsing
-    import os
-    log_dir = 'outputs/logs'
-    os.makedirs(log_dir, exist_ok=True)
-    handler = logging.FileHandler('outputs/logs/precision_audit.log')
-    formatter = logging.Formatter(
-        '%(asctime)s | %(name)s | %(levelname)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    if not any(isinstance(h, _DeferredQueueHandler) for h in logger.handlers):
+        logger.addHandler(_DeferredQueueHandler(_pipeline))
     logger.setLevel(logging.DEBUG)
-    
     return logger
 
 
@@ -43,91 +246,36 @@ def create_precision_logger(name: str) -> logging.Logger:
 precision_logger = create_precision_logger('precision_audit')
 
 
-def log_fraud_detection(
-    tx: Dict[str, Any],
-    fraud_score: Decimal,
-    flags: Dict[str, Any]
-) -> None:
-    """Log fraud detection with full precision."""
-    precision_logger.info(
-        f"FRAUD_DETECTION | tx_id={tx.get('id')} | "
-        f"coin={tx.get('coin')} | amount={tx.get('amount')} | "
-        f"price={tx.get('price_usd')} | fraud_score={fraud_score} | "
-        f"flags={json.dumps(flags, cls=DecimalEncoder)}"
-    )
+def log_audit_event(alert_type: str, **fields) -> bool:
+    """Queue one structured audit event; returns False if it was dropped."""
+    return _pipeline.submit(alert_type, fields)
 
 
-def log_fee_calculation(
-    tx_id: str,
-    total_value: Decimal,
-    fee: Decimal,
-    fee_pct: Decimal
-) -> None:
-    """Log fee calculation with full precision."""
-    precision_logger.info(
-        f"FEE_CALC | tx_id={tx_id} | "
-        f"total_value={total_value} | fee={fee} | fee_pct={fee_pct}%"
-    )
+def log_fraud_detection(alert_type: str = 'FRAUD_DETECTION', **fields) -> bool:
+    """Log a fraud detector hit (PUMP_DUMP, SUSPICIOUS_VOLUME, ...)."""
+    return _pipeline.submit(alert_type, fields)
 
 
-def log_transaction_calculation(
-    tx_id: str,
-    action: str,
-    coin: str,
-    amount: Decimal,
-    price_usd: Decimal,
-    proceeds: Decimal,
-    cost_basis: Decimal,
-    capital_gain: Decimal
-) -> None:
-    """Log Transaction calculation with full precision."""
-    precision_logger.info(
-        f"transaction_CALC | tx_id={tx_id} | action={action} | "
-        f"coin={coin} | amount={amount} | price_usd={price_usd} | "
-        f"proceeds={proceeds} | cost_basis={cost_basis} | "
-        f"capital_gain={capital_gain}"
-    )
+def log_fee_calculation(**fields) -> bool:
+    """Log an unusual fee calculation."""
+    return _pipeline.submit('FEE_CALCULATION', fields)
 
 
-def log_wash_sale_detection(
-    coin: str,
-    buy_tx_id: str,
-    sell_tx_id: str,
-    buy_price: Decimal,
-    sell_price: Decimal,
-    days_apart: int
-) -> None:
-    """Log wash sale detection with full precision."""
-    precision_logger.warning(
-        f"WASH_SALE | coin={coin} | "
-        f"buy_tx={buy_tx_id} @ {buy_price} | "
-        f"sell_tx={sell_tx_id} @ {sell_price} | "
-        f"days_apart={days_apart}"
-    )
+def log_transaction_calculation(**fields) -> bool:
+    """Log a Transaction calculation (proceeds, cost basis, gain)."""
+    return _pipeline.submit('TRANSACTION_CALC', fields)
 
 
-def log_structuring_alert(
-    total_value: Decimal,
-    num_txs: int,
-    days: int,
-    avg_per_tx: Decimal
-) -> None:
-    """Log structuring (AML) alert with full precision."""
-    precision_logger.warning(
-        f"STRUCTURING | total_value={total_value} | "
-        f"num_txs={num_txs} | days_span={days} | avg_per_tx={avg_per_tx}"
-    )
+def log_wash_sale_detection(**fields) -> bool:
+    """Log a possible wash sale."""
+    return _pipeline.submit('WASH_SALE', fields)
 
 
-def log_anomaly_detection(
-    tx_id: str,
-    anomaly_type: str,
-    expected: Decimal,
-    actual: Decimal,
-    deviation_pct: Decimal
-) -> None:
-    """Log anomaly detection with full precision."""
-    precision_logger.info(
-        f"ANOMALY | tx_id={tx_id} | type={anomaly_type} | "
-        f"expected={expected} | actual={actual} | deviation={deviation_pct}%"
-    )
+def log_structuring_alert(**fields) -> bool:
+    """Log a structuring (AML) alert."""
+    return _pipeline.submit('STRUCTURING', fields)
+
+
+def log_anomaly_detection(**fields) -> bool:
+    """Log a price or amount anomaly."""
+    return _pipeline.submit('ANOMALY', fields)
@@ -0,0 +1,184 @@
+"""
+================================================================================
+REVIEW CACHE - On-Disk TTL Cache and Wallet History Prefetch for the Fixer
+================================================================================
+
+Keeps the slow lookups of the interactive review fixer on disk so prompts do
+not wait on the network, and repeated sessions do not repeat the same calls.
+
+Namespaces (TTL from REVIEW_CACHE_TTL_SECONDS):
+    token_map - CoinGecko {chain: {symbol: contract_address}} map
+    explorer  - Explorer JSON pages (Blockchair, Etherscan-compatible APIs)
+                keyed by URL and query parameters; API keys are left out of
+                the key so a page fetched with any key is reused
+    price     - Historical prices resolved on-chain, keyed by coin and date
+
+Prefetch:
+    prefetch() downloads a list of explorer pages on a thread pool before the
+    interactive loop starts. Each explorer service has its own token bucket
+    (REVIEW_PREFETCH_RATE_LIMITS) so parallel requests stay within the free
+    tier. Failed pages are skipped; the fixer fetches them again on demand.
+
+Storage:
+    JSON at outputs/cache/review_fixer.json, written atomically by save().
+    Expired entries are dropped on load and on save. Only successful (HTTP
+    200) JSON objects are cached.
+
+Usage:
+    cache = ReviewCache(OUTPUT_DIR / 'cache' / 'review_fixer.json')
+    data, cached = fetch_json(cache, url, {'address': wallet, 'apikey': key})
+    prefetch(cache, [('etherscan', url, params), ...])
+    cache.save()
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.core.wallet_balances import TokenBucket
+from src.utils.constants import (
+    REVIEW_CACHE_TTL_SECONDS,
+    REVIEW_PREFETCH_RATE_LIMITS,
+    REVIEW_PREFETCH_WORKERS,
+)
+from src.utils.lazy import lazy_module
+
+requests = lazy_module('requests')
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+CACHE_VERSION = 1
+SECRET_PARAMS = frozenset({'key', 'apikey', 'api_key'})
+
+
+def explorer_key(url: str, params: Optional[Dict] = None) -> str:
+    """Cache key for an explorer request: URL plus sorted params, without API keys."""
+    query = '&'.join(f"{k}={v}" for k, v in sorted((params or {}).items()) if k.lower() not in SECRET_PARAMS)
+    return f"{url}?{query}" if query else url
+
+
+class ReviewCache:
+    """Thread-safe JSON cache of {namespace: {key: value}} with a TTL per namespace."""
+
+    def __init__(self, path=None, ttls: Optional[Dict[str, float]] = None, clock=None):
+        self.path = Path(path) if path else None
+        self.ttls = dict(REVIEW_CACHE_TTL_SECONDS, **(ttls or {}))
+        self._clock = clock or time.time
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Dict]] = {}
+        self._dirty = False
+        self._load()
+
+    def _fresh(self, namespace, entry) -> bool:
+        return self._clock() - entry.get('cached_at', 0) < self.ttls.get(namespace, 0)
+
+    def _load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+                for namespace, entries in (data.get('entries') or {}).items():
+                    if isinstance(entries, dict):
+                        self._entries[namespace] = {k: v for k, v in entries.items()
+                                                    if isinstance(v, dict) and self._fresh(namespace, v)}
+        except (OSError, ValueError, TypeError) as e:
+            logger.debug(f"[REVIEW] Cache not loaded from {self.path}: {e}")
+
+    def get(self, namespace: str, key: str):
+        """Cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(namespace, {}).get(key)
+            if entry is None or not self._fresh(namespace, entry):
+                return None
+            return entry['value']
+
+    def age(self, namespace: str, key: str) -> Optional[float]:
+        """Seconds since the entry was cached, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(namespace, {}).get(key)
+            if entry is None or not self._fresh(namespace, entry):
+                return None
+            return self._clock() - entry['cached_at']
+
+    def put(self, namespace: str, key: str, value):
+        with self._lock:
+            self._entries.setdefault(namespace, {})[key] = {'value': value, 'cached_at': self._clock()}
+            self._dirty = True
+
+    def save(self):
+        """Write the unexpired entries if anything changed (atomic replace)."""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            entries = {ns: {k: v for k, v in items.items() if self._fresh(ns, v)}
+                       for ns, items in self._entries.items()}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix='.review_fixer_')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'entries': entries}, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug(f"[REVIEW] Cache not saved to {self.path}: {e}")
+
+
+def fetch_json(cache: Optional[ReviewCache], url: str, params: Optional[Dict] = None,
+               limiter: Optional[TokenBucket] = None, timeout: float = 10) -> Tuple[object, bool]:
+    """GET an explorer page through the cache. Returns (data, from_cache); raises on HTTP errors."""
+    key = explorer_key(url, params)
+    if cache is not None:
+        data = cache.get('explorer', key)
+        if data is not None:
+            return data, True
+    if limiter is not None:
+        limiter.acquire()
+    response = requests.get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if cache is not None and response.status_code == 200 and isinstance(data, dict):
+        cache.put('explorer', key, data)
+    return data, False
+
+
+def prefetch(cache: ReviewCache, pages: Iterable[Tuple[str, str, Dict]],
+             max_workers: int = REVIEW_PREFETCH_WORKERS, limiters: Optional[Dict[str, TokenBucket]] = None) -> Dict:
+    """Fetch (service, url, params) pages in parallel into the cache; returns counts."""
+    limits = dict(REVIEW_PREFETCH_RATE_LIMITS)
+    limiters = dict(limiters or {})
+    stats = {'pages': 0, 'cached': 0, 'fetched': 0, 'failed': 0}
+    pending = []
+    for service, url, params in pages:
+        stats['pages'] += 1
+        if cache.get('explorer', explorer_key(url, params)) is not None:
+            stats['cached'] += 1
+            continue
+        if service not in limiters:
+            limiters[service] = TokenBucket(*limits.get(service, limits['default']))
+        pending.append((service, url, params))
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            futures = {pool.submit(fetch_json, cache, url, params, limiters[service]): url
+                       for service, url, params in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    stats['fetched'] += 1
+                except Exception as e:
+                    stats['failed'] += 1
+                    logger.debug(f"[REVIEW] Prefetch failed for {futures[future]}: {str(e)[:100]}")
+    cache.save()
+    return stats
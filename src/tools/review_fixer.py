@@ -31,6 +31,14 @@ Price Fetching:
     - Token ID caching for performance
     - Fallback to multiple sources
 
+Caching & Prefetch:
+    - Token contract maps, wallet explorer pages and on-chain prices are
+      kept in outputs/cache/review_fixer.json with a TTL per kind
+      (REVIEW_CACHE_TTL_SECONDS; see src/tools/review_cache.py)
+    - When missing prices need review, every configured wallet's history
+      is prefetched in parallel before the first prompt, so blockchain
+      checks answer from the cache
+
 Safety Features:
     - Database backup before any modifications
     - Transaction-based changes (atomic commits)
@@ -66,12 +74,23 @@ import datetime as dt
 import src.core.engine as app
 from src.core.engine import DatabaseManager, logger
 from src.processors import PriceFetcher
+from src.advanced_ml_features import TransactionHistory
+from src.tools.review_cache import ReviewCache, fetch_json, prefetch
 
 # ====================================================================================
-# TOKEN CACHE CONFIGURATION
+# CACHE CONFIGURATION (TTLs: REVIEW_CACHE_TTL_SECONDS in src/utils/constants.py)
 # ====================================================================================
-TOKEN_CACHE_FILE = Path("configs/cached_token_addresses.json")
-CACHE_REFRESH_DAYS = 7  # Refresh cache every 7 days
+REVIEW_CACHE_NAME = "review_fixer.json"  # Stored under outputs/cache/
+TOKEN_MAP_KEY = "coingecko"  # Key of the token contract map in the 'token_map' namespace
+
+# Etherscan-compatible explorer per chain: (api_keys.json entry, API URL)
+EXPLORER_APIS = {
+    'ethereum': ('etherscan', 'https://api.etherscan.io/api'),
+    'polygon': ('polygonscan', 'https://api.polygonscan.com/api'),
+    'bsc': ('bscscan', 'https://api.bscscan.com/api'),
+    'avalanche': ('snowtrace', 'https://api.snowtrace.io/api'),
+    'fantom': ('ftmscan', 'https://api.ftmscan.com/api'),
+}
 
 # ====================================================================================
 # API RATE LIMITING CONFIGURATION (CoinGecko Free Tier: 10-30 calls/min)
@@ -135,9 +154,13 @@ class InteractiveReviewFixer:
         self.fixes_applied = []
         self.backup_file = None
         self._token_map_cache = None  # Session-level cache to avoid repeated API calls
+        self.cache = ReviewCache(app.OUTPUT_DIR / 'cache' / REVIEW_CACHE_NAME)
         
         # Set up session logging
         self._setup_session_log()
+        
+        # Staged edits are queued here and written in one batch on 'save'
+        self.history = TransactionHistory(self.log_file.parent / 'transaction_history.jsonl', autoflush=False)
     
     def _setup_session_log(self):
         """Set up logging for this fixer session"""
@@ -268,6 +291,10 @@ class InteractiveReviewFixer:
         # Create backup
         self.create_backup()
         
+        # Blockchain checks for missing prices read wallet histories; load them all up front
+        if any(w.get('category') == 'MISSING_PRICES' for w in warnings):
+            self.prefetch_wallet_histories()
+        
         # Process each warning with guided flow
         for i, warning in enumerate(warnings, 1):
             print(f"\n{'='*80}")
@@ -620,6 +647,7 @@ class InteractiveReviewFixer:
     def _rename_coin(self, transaction_id, old_name, new_name):
         """Rename a coin in the database (staged, not committed)"""
         self.db.cursor.execute("UPDATE trades SET coin = ? WHERE id = ?", (new_name, transaction_id))
+        self.history.record_change(transaction_id, {'coin': old_name}, {'coin': new_name}, 'Review fixer: rename coin')
         self.fixes_applied.append({
             'type': 'rename',
             'id': transaction_id,
@@ -629,7 +657,11 @@ class InteractiveReviewFixer:
     
     def _update_price(self, transaction_id, price):
         """Update price_usd for a transaction (staged, not committed)"""
+        old_price = self._get_transaction(transaction_id).get('price_usd')
         self.db.update_price(transaction_id, price)
+        self.history.record_change(
+            transaction_id, {'price_usd': old_price}, {'price_usd': str(price)}, 'Review fixer: update price'
+        )
         self.fixes_applied.append({
             'type': 'price_update',
             'id': transaction_id,
@@ -638,7 +670,9 @@ class InteractiveReviewFixer:
     
     def _delete_transaction(self, transaction_id):
         """Delete a transaction (staged, not committed)"""
+        old_row = self._get_transaction(transaction_id)
         self.db.cursor.execute("DELETE FROM trades WHERE id = ?", (transaction_id,))
+        self.history.record_change(transaction_id, old_row, None, 'Review fixer: delete transaction')
         self.fixes_applied.append({
             'type': 'delete',
             'id': transaction_id
@@ -764,43 +798,22 @@ class InteractiveReviewFixer:
         if self._token_map_cache is not None:
             return self._token_map_cache
         
-        cache_path = TOKEN_CACHE_FILE
-        
-        # Check if cache exists and is recent
-        if cache_path.exists():
-            try:
-                with open(cache_path, 'r') as f:
-                    cache_data = json.load(f)
-                
-                cached_time = datetime.fromisoformat(cache_data.get('cached_at', '2000-01-01'))
-                age_days = (datetime.now() - cached_time).days
-                
-                if age_days < CACHE_REFRESH_DAYS:
-                    print(f"[*] Using cached token addresses (age: {age_days} days)")
-                    tokens = cache_data.get('tokens', {})
-                    self._token_map_cache = tokens  # Store in session cache
-                    return tokens
-                else:
-                    print(f"[*] Cache expired (age: {age_days} days), fetching fresh...")
-            except Exception as e:
-                print(f"[!] Error reading cache: {e}")
+        # Check the on-disk cache (expires after REVIEW_CACHE_TTL_SECONDS['token_map'])
+        tokens = self.cache.get('token_map', TOKEN_MAP_KEY)
+        if tokens is not None:
+            age_days = int((self.cache.age('token_map', TOKEN_MAP_KEY) or 0) // 86400)
+            print(f"[*] Using cached token addresses (age: {age_days} days)")
+            self._token_map_cache = tokens  # Store in session cache
+            return tokens
         
         # Fetch fresh data
         token_map = self._fetch_token_addresses_from_api()
         
         if token_map:
-            # Save to cache
-            try:
-                cache_path.parent.mkdir(parents=True, exist_ok=True)
-                cache_data = {
-                    'cached_at': datetime.now().isoformat(),
-                    'tokens': token_map
-                }
-                with open(cache_path, 'w') as f:
-                    json.dump(cache_data, f, indent=2)
-                print(f"[*] Token addresses cached to {cache_path}")
-            except Exception as e:
-                print(f"[!] Error saving cache: {e}")
+            # Save right away: the fetch takes several minutes on the free tier
+            self.cache.put('token_map', TOKEN_MAP_KEY, token_map)
+            self.cache.save()
+            print(f"[*] Token addresses cached to {self.cache.path}")
         
         # Store in session cache
         self._token_map_cache = token_map
@@ -1108,28 +1121,15 @@ class InteractiveReviewFixer:
             for wallet in wallets:
                 try:
                     # Check Blockchair API for wallet transactions
-                    url = f"https://api.blockchair.com/bitcoin/addresses/{wallet}"
-                    params = {'key': blockchair_key}
-                    
-                    response = requests.get(url, params=params, timeout=10)
-                    response.raise_for_status()
-                    data = response.json()
+                    (url, params), (tx_url, tx_params) = self._bitcoin_history_pages(wallet, blockchair_key)
+                    data, cached = fetch_json(self.cache, url, params)
                     
                     if data.get('data') and wallet in data['data']:
                         wallet_data = data['data'][wallet]
                         
                         # Get transactions for this wallet
-                        tx_url = f"https://api.blockchair.com/bitcoin/transactions"
-                        tx_params = {
-                            'q': f'receiver({wallet})',
-                            'key': blockchair_key,
-                            'limit': 100,
-                            'offset': 0
-                        }
-                        
-                        tx_response = requests.get(tx_url, params=tx_params, timeout=10)
-                        tx_response.raise_for_status()
-                        tx_data = tx_response.json()
+                        tx_data, tx_cached = fetch_json(self.cache, tx_url, tx_params)
+                        cached = cached and tx_cached
                         
                         # Search for matching transaction
                         if tx_data.get('data'):
@@ -1143,7 +1143,8 @@ class InteractiveReviewFixer:
                                     # Return success with indication to use external price
                                     return True, None, f"✓ Found Bitcoin transaction on {tx_time} at {wallet[:16]}..."
                     
-                    time.sleep(0.5)  # Rate limiting for Blockchair
+                    if not cached:
+                        time.sleep(0.5)  # Rate limiting for Blockchair
                     
                 except Exception as e:
                     logger.debug(f"Blockchair check failed for {wallet}: {str(e)[:100]}")
@@ -1244,19 +1245,8 @@ class InteractiveReviewFixer:
                 try:
                     # Check normal transactions (ETH transfers)
                     if coin in ['ETH', 'WETH']:
-                        params = {
-                            'module': 'account',
-                            'action': 'txlist',
-                            'address': wallet,
-                            'startblock': 0,
-                            'endblock': 99999999,
-                            'sort': 'desc',
-                            'apikey': api_key
-                        }
-                        
-                        response = requests.get(api_url, params=params, timeout=10)
-                        response.raise_for_status()
-                        data = response.json()
+                        params = self._evm_history_params(wallet, 'txlist', api_key)
+                        data, cached = fetch_json(self.cache, api_url, params)
                         
                         if data.get('result') and isinstance(data['result'], list):
                             for tx in data['result']:
@@ -1272,19 +1262,9 @@ class InteractiveReviewFixer:
                     
                     # Check ERC-20 token transfers
                     else:
-                        params = {
-                            'module': 'account',
-                            'action': 'tokentxlist',
-                            'address': wallet,
-                            'startblock': 0,
-                            'endblock': 99999999,
-                            'sort': 'desc',
-                            'apikey': 'YourApiKeyToken'  # Placeholder - would use from keys.json
-                        }
-                        
-                        response = requests.get(api_url, params=params, timeout=10)
-                        response.raise_for_status()
-                        data = response.json()
+                        # Placeholder key - would use from keys.json
+                        params = self._evm_history_params(wallet, 'tokentxlist', 'YourApiKeyToken')
+                        data, cached = fetch_json(self.cache, api_url, params)
                         
                         if data.get('result') and isinstance(data['result'], list):
                             for tx in data['result']:
@@ -1296,7 +1276,8 @@ class InteractiveReviewFixer:
                                     tx_hash = tx.get('hash', 'unknown')
                                     return True, None, f"✓ Found {coin} transaction {tx_hash[:16]}... on {tx_time} from {wallet[:16]}..."
                     
-                    time.sleep(0.2)  # Rate limiting for Etherscan-compatible APIs
+                    if not cached:
+                        time.sleep(0.2)  # Rate limiting for Etherscan-compatible APIs
                     
                 except Exception as e:
                     logger.debug(f"EVM check failed for {wallet}: {str(e)[:100]}")
@@ -1307,6 +1288,80 @@ class InteractiveReviewFixer:
         
         return False, None, f"{coin} transaction not found in {len(wallets)} wallet(s) on {chain_name}"
     
+    @staticmethod
+    def _bitcoin_history_pages(wallet, blockchair_key):
+        """Blockchair (url, params) for a wallet's address page and received transactions"""
+        return [
+            (f"https://api.blockchair.com/bitcoin/addresses/{wallet}", {'key': blockchair_key}),
+            ("https://api.blockchair.com/bitcoin/transactions", {
+                'q': f'receiver({wallet})',
+                'key': blockchair_key,
+                'limit': 100,
+                'offset': 0
+            }),
+        ]
+    
+    @staticmethod
+    def _evm_history_params(wallet, action, api_key):
+        """Etherscan-compatible params for a wallet's transaction list ('txlist' or 'tokentxlist')"""
+        return {
+            'module': 'account',
+            'action': action,
+            'address': wallet,
+            'startblock': 0,
+            'endblock': 99999999,
+            'sort': 'desc',
+            'apikey': api_key
+        }
+    
+    def prefetch_wallet_histories(self):
+        """Download every configured wallet's explorer history in parallel into the cache
+        
+        Covers Bitcoin wallets (Blockchair key required) and wallets on chains in
+        EXPLORER_APIS whose explorer key is set. Pages still fresh in the cache are
+        not fetched again.
+        
+        Returns: dict of counts (pages, cached, fetched, failed)
+        """
+        try:
+            with open(app.WALLETS_FILE) as f:
+                wallets_data = json.load(f)
+            with open(app.KEYS_FILE) as f:
+                api_keys = json.load(f)
+        except Exception:
+            return {'pages': 0, 'cached': 0, 'fetched': 0, 'failed': 0}
+        
+        pages = []
+        for chain, wallet_list in (wallets_data if isinstance(wallets_data, dict) else {}).items():
+            if isinstance(wallet_list, dict):
+                wallet_list = wallet_list.get('addresses', [])
+            if not isinstance(wallet_list, list):
+                wallet_list = [wallet_list] if wallet_list else []
+            
+            if chain == 'bitcoin':
+                blockchair_key = api_keys.get('blockchair', {}).get('apiKey')
+                if blockchair_key:
+                    for wallet in wallet_list:
+                        pages.extend(('blockchair', url, params)
+                                     for url, params in self._bitcoin_history_pages(wallet, blockchair_key))
+            elif chain in EXPLORER_APIS:
+                key_name, api_url = EXPLORER_APIS[chain]
+                api_key = api_keys.get(key_name, {}).get('apiKey')
+                if api_key:
+                    for wallet in wallet_list:
+                        for action in ('txlist', 'tokentxlist'):
+                            pages.append((key_name, api_url, self._evm_history_params(wallet, action, api_key)))
+        
+        if not pages:
+            return {'pages': 0, 'cached': 0, 'fetched': 0, 'failed': 0}
+        
+        print(f"\n[*] Prefetching {len(pages)} wallet history page(s)...")
+        stats = prefetch(self.cache, pages)
+        self._log(f"Prefetch: {stats}")
+        print(f"[*] Wallet histories ready ({stats['cached']} cached, {stats['fetched']} fetched, "
+              f"{stats['failed']} failed)")
+        return stats
+    
     def _infer_chain_from_coin(self, coin):
         """Infer blockchain network from coin symbol
         
@@ -1370,7 +1425,27 @@ class InteractiveReviewFixer:
         return "Blockchain Explorer: https://etherscan.io (for Ethereum) or check your exchange"
     
     def _try_blockchain_price(self, coin, date_str):
-        """Attempt on-chain pricing using wallets/key context. Returns (price, message)."""
+        """Attempt on-chain pricing using wallets/key context. Returns (price, message).
+        
+        Resolved prices are cached by coin and date (REVIEW_CACHE_TTL_SECONDS['price']).
+        """
+        try:
+            day = _parse_date_flexible(date_str).isoformat()
+        except ValueError:
+            day = str(date_str)
+        key = f"{coin.upper()}|{day}"
+        
+        cached = self.cache.get('price', key)
+        if cached is not None:
+            return float(cached), f"cached on-chain price for {coin.upper()} on {day}"
+        
+        price, message = self._lookup_blockchain_price(coin, date_str)
+        if price is not None:
+            self.cache.put('price', key, str(price))
+        return price, message
+    
+    def _lookup_blockchain_price(self, coin, date_str):
+        """On-chain price lookup behind _try_blockchain_price. Returns (price, message)."""
         # If no wallets, we can't infer chains
         if not app.WALLETS_FILE.exists():
             return None, "wallets.json not found"
@@ -1492,6 +1567,7 @@ class InteractiveReviewFixer:
             if choice == 'save':
                 print("\n[*] Committing changes to database...")
                 self.db.commit()
+                self.history.flush()
                 print(f"\n✓ Successfully saved {len(self.fixes_applied)} change(s) to database!")
                 print(f"\n✓ Backup still available at: {self.backup_file.name}")
                 print("\nNext steps:")
@@ -1501,6 +1577,7 @@ class InteractiveReviewFixer:
             
             elif choice in ['discard', 'undo']:
                 print("\n[*] Rolling back all changes...")
+                self.history.discard_pending()
                 self.db.connection.rollback()
                 print(f"\n✓ All {len(self.fixes_applied)} change(s) discarded. Database unchanged.")
                 print(f"✓ Backup preserved at: {self.backup_file.name}")
@@ -1512,16 +1589,21 @@ class InteractiveReviewFixer:
 
 
 def main():
-    """Command-line entry point"""
+    """Command-line entry point (usage: review_fixer.py [year] [--profile])"""
     import sys
+    from src.utils.profiling import RunProfiler
     
     print("\n" + "="*80)
     print("INTERACTIVE REVIEW FIXER")
     print("="*80)
     
+    args = [a for a in sys.argv[1:] if a != '--profile']
+    # Wall time includes time spent at prompts; compare it with CPU time
+    profiler = RunProfiler('review', app.OUTPUT_DIR / "logs" / "profiles", enabled='--profile' in sys.argv)
+    
     # Get year
-    if len(sys.argv) > 1:
-        year = sys.argv[1]
+    if args:
+        year = args[0]
     else:
         from datetime import datetime
         year = input(f"\nEnter Transaction year [{datetime.now().year}]: ").strip() or str(datetime.now().year)
@@ -1533,14 +1615,17 @@ def main():
     fixer = InteractiveReviewFixer(db, year)
     
     try:
-        fixer.run_interactive_fixer()
+        with profiler.stage(f'review_{year}'):
+            fixer.run_interactive_fixer()
     except KeyboardInterrupt:
         print("\n\nInterrupted by user. No changes saved.")
     except Exception as e:
         print(f"\n\nError: {e}")
         logger.exception("Fixer error")
     finally:
+        fixer.cache.save()
         db.close()
+        profiler.finish()
 
 
 if __name__ == "__main__":
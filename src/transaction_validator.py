@@ -4,6 +4,7 @@ Ensures all transactions meet minimum data quality before ML processing.
 """
 
 from typing import Dict, List, Tuple, Optional
+from datetime import datetime
 from decimal import Decimal
 from src.decimal_utils import to_decimal, SATOSHI, STRUCTURING_THRESHOLD
 
@@ -42,75 +43,235 @@ class TransactionValidator:
         if missing:
             errors.append(f"Missing required fields: {missing}")
         
-        # Type checks
-        if not isinstance(tx.get('action'), str):
-            errors.append("action must be string")
-        elif tx['action'].upper() not in cls.VALID_ACTIONS:
-            errors.append(f"action '{tx['action']}' not in {cls.VALID_ACTIONS}")
+        for check, field in ((cls._action_error, 'action'), (cls._coin_error, 'coin')):
+            error = check(tx.get(field))
+            if error:
+                errors.append(error)
+        errors.extend(cls._amount_errors(tx.get('amount')))
+        errors.extend(cls._price_errors(tx.get('price_usd')))
+        error = cls._date_error(tx.get('date', ''))
+        if error:
+            errors.append(error)
         
-        if not isinstance(tx.get('coin'), str):
-            errors.append("coin must be string")
-        elif tx['coin'].upper() not in cls.VALID_COINS and not cls._is_custom_token(tx['coin']):
-            errors.append(f"coin '{tx['coin']}' not recognized (or custom token)")
-        
-        # Numeric validation
+        return len(errors) == 0, errors
+
+    # ------------------------------------------------------------------
+    # Per-field checks (shared by the row and columnar paths)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _action_error(cls, action, valid_actions=None) -> Optional[str]:
+        valid_actions = cls.VALID_ACTIONS if valid_actions is None else valid_actions
+        if not isinstance(action, str):
+            return "action must be string"
+        if action.upper() not in valid_actions:
+            return f"action '{action}' not in {valid_actions}"
+        return None
+
+    @classmethod
+    def _coin_error(cls, coin) -> Optional[str]:
+        if not isinstance(coin, str):
+            return "coin must be string"
+        if coin.upper() not in cls.VALID_COINS and not cls._is_custom_token(coin):
+            return f"coin '{coin}' not recognized (or custom token)"
+        return None
+
+    @classmethod
+    def _amount_errors(cls, value) -> List[str]:
+        errors = []
         try:
-            amount = to_decimal(tx.get('amount'))
+            amount = to_decimal(value)
             if amount < cls.MIN_AMOUNT:
                 errors.append(f"amount {amount} below minimum {cls.MIN_AMOUNT}")
             if amount > cls.MAX_AMOUNT:
                 errors.append(f"amount {amount} exceeds maximum {cls.MAX_AMOUNT}")
         except Exception as e:
             errors.append(f"amount conversion failed: {e}")
-        
+        return errors
+
+    @classmethod
+    def _price_errors(cls, value) -> List[str]:
+        errors = []
         try:
-            price = to_decimal(tx.get('price_usd'))
+            price = to_decimal(value)
             if price < cls.MIN_PRICE and price != Decimal(0):  # Allow 0 for income/transfers
                 errors.append(f"price {price} below minimum {cls.MIN_PRICE}")
             if price > cls.MAX_PRICE:
                 errors.append(f"price {price} exceeds maximum {cls.MAX_PRICE}")
         except Exception as e:
             errors.append(f"price_usd conversion failed: {e}")
-        
-        # Date validation
+        return errors
+
+    @staticmethod
+    def _date_error(date_str) -> Optional[str]:
+        # NaN (an empty CSV cell) counts as empty
+        if not date_str or date_str != date_str:
+            return "date is empty"
         try:
-            from datetime import datetime
-            date_str = tx.get('date', '')
-            if not date_str:
-                errors.append("date is empty")
-            else:
-                datetime.fromisoformat(date_str)
+            datetime.fromisoformat(date_str)
+        except (ValueError, TypeError):
+            return f"date '{date_str}' not ISO format"
+        return None
+
+    # ------------------------------------------------------------------
+    # Columnar validation
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def validate_frame(cls, data, valid_actions=None):
+        """
+        Validate many transactions at once with column-wise checks.
+
+        Produces the same errors as validate_transaction for every row, but
+        evaluates each check over whole columns: action and coin checks run
+        once per distinct value, amount/price range checks are float masks
+        (values near a bound, zero or unparseable are re-checked exactly
+        with Decimal), dates are parsed in one pass, and error strings are
+        built only for failing rows.
+
+        Args:
+            data: DataFrame, dict of column arrays, or list of transaction dicts.
+            valid_actions: Override the accepted action set (default VALID_ACTIONS).
+
+        Returns:
+            (valid_mask, errors) — boolean NumPy array per row and
+            {row position: [error messages]} for invalid rows only.
+        """
+        import numpy as np
+        import pandas as pd
+
+        columns, missing_by_row, n = cls._columns_of(data)
+        if n == 0:
+            return np.ones(0, dtype=bool), {}
+
+        # (position, messages) per check, in validate_transaction's message order
+        found = {'missing': [], 'action': [], 'coin': [], 'numbers': [], 'date': []}
+
+        for pos, missing in missing_by_row.items():
+            found['missing'].append((pos, [f"Missing required fields: {missing}"]))
+
+        # Action and coin: one check per distinct value (code -1 is None/NaN)
+        for field, check in (('action', lambda v: cls._action_error(v, valid_actions)),
+                             ('coin', cls._coin_error)):
+            codes, uniques = pd.factorize(columns[field], use_na_sentinel=True)
+            messages = [check(v) for v in uniques] + [check(None)]
+            bad = np.array([m is not None for m in messages])[codes]
+            found[field] = [(pos, [messages[codes[pos]]]) for pos in np.flatnonzero(bad)]
+
+        # Amount and price: float pre-filter, exact Decimal check on candidates
+        for field, lo, hi, check in (('amount', cls.MIN_AMOUNT, cls.MAX_AMOUNT, cls._amount_errors),
+                                     ('price_usd', cls.MIN_PRICE, cls.MAX_PRICE, cls._price_errors)):
+            values = columns[field]
+            floats = cls._as_floats(values)
+            with np.errstate(invalid='ignore'):
+                clear = (floats >= float(lo) * (1 + 1e-9)) & (floats <= float(hi) * (1 - 1e-9))
+            for pos in np.flatnonzero(~clear):
+                field_errors = check(values.iat[pos])
+                if field_errors:
+                    found['numbers'].append((pos, field_errors))
+
+        # Dates: one fromisoformat pass; per-value messages only if something fails
+        dates = columns['date']
+        try:
+            for _ in map(datetime.fromisoformat, dates.tolist()):
+                pass
+        except (ValueError, TypeError):
+            codes, uniques = pd.factorize(dates, use_na_sentinel=True)
+            messages = [cls._date_error(v) for v in uniques] + [cls._date_error(None)]
+            bad = np.array([m is not None for m in messages])[codes]
+            for pos in np.flatnonzero(bad):
+                value = dates.iat[pos]
+                # Distinct non-string values can compare equal (1 == 1.0) but print differently
+                message = messages[codes[pos]] if type(value) is str else cls._date_error(value)
+                found['date'].append((pos, [message]))
+
+        errors = {}
+        for entries in found.values():
+            for pos, messages in entries:
+                errors.setdefault(int(pos), []).extend(messages)
+        errors = dict(sorted(errors.items()))
+        valid = np.ones(n, dtype=bool)
+        valid[list(errors)] = False
+        return valid, errors
+
+    @classmethod
+    def _columns_of(cls, data):
+        """Required columns as Series, per-row missing-field sets, and row count."""
+        import pandas as pd
+        if isinstance(data, pd.DataFrame):
+            present, n = set(data.columns), len(data)
+            columns = {f: data[f].reset_index(drop=True) for f in cls.REQUIRED_FIELDS if f in present}
+        elif isinstance(data, dict):
+            present = set(data.keys())
+            n = len(next(iter(data.values()))) if data else 0
+            columns = {f: pd.Series(list(data[f]), dtype=object) for f in cls.REQUIRED_FIELDS if f in present}
+        else:
+            transactions = list(data)
+            n = len(transactions)
+            columns = {f: pd.Series([tx.get(f) for tx in transactions], dtype=object)
+                       for f in cls.REQUIRED_FIELDS - {'date'}}
+            columns['date'] = pd.Series([tx.get('date', '') for tx in transactions], dtype=object)
+            missing_by_row = {}
+            for pos, tx in enumerate(transactions):
+                if not tx.keys() >= cls.REQUIRED_FIELDS:
+                    missing_by_row[pos] = cls.REQUIRED_FIELDS - set(tx.keys())
+            return columns, missing_by_row, n
+
+        # Absent columns read like tx.get(field) on every row
+        for field in cls.REQUIRED_FIELDS - present:
+            columns[field] = pd.Series([None if field != 'date' else ''] * n, dtype=object)
+        missing = cls.REQUIRED_FIELDS - present
+        missing_by_row = {pos: missing for pos in range(n)} if missing else {}
+        return columns, missing_by_row, n
+
+    @staticmethod
+    def _as_floats(values):
+        """Float view of a column for range pre-filtering; NaN where float(str(v)) fails."""
+        import numpy as np
+        if values.dtype.kind in 'iuf':
+            return values.to_numpy(dtype=float)
+        items = values.tolist()
+        try:
+            if all(type(v) is str for v in items):
+                return np.fromiter(map(float, items), dtype=float, count=len(items))
         except ValueError:
-            errors.append(f"date '{tx.get('date')}' not ISO format")
-        
-        return len(errors) == 0, errors
+            pass
+
+        def as_float(value):
+            if type(value) is bool:
+                return float('nan')  # to_decimal rejects bools
+            try:
+                return float(str(value))
+            except (TypeError, ValueError):
+                return float('nan')
+
+        return np.fromiter((as_float(v) for v in items), dtype=float, count=len(items))
     
     @classmethod
-    def validate_batch(cls, transactions: List[Dict]) -> Tuple[int, List[Dict]]:
+    def validate_batch(cls, transactions) -> Tuple[int, List[Dict]]:
         """
         Validate a batch of transactions.
         
         Args:
-            transactions: List of transaction dicts.
+            transactions: List of transaction dicts, DataFrame, or dict of column arrays.
         
         Returns:
             (valid_count, invalid_transactions) — count of valid txs and list of invalid ones.
         """
-        valid_count = 0
-        invalid_txs = []
-        
-        for i, tx in enumerate(transactions):
-            is_valid, errors = cls.validate_transaction(tx)
-            if is_valid:
-                valid_count += 1
-            else:
-                invalid_txs.append({
-                    'index': i,
-                    'transaction': tx,
-                    'errors': errors
-                })
-        
-        return valid_count, invalid_txs
+        import pandas as pd
+        valid_mask, errors = cls.validate_frame(transactions)
+        if isinstance(transactions, pd.DataFrame):
+            get_row = lambda pos: transactions.iloc[pos].to_dict()
+        elif isinstance(transactions, dict):
+            get_row = lambda pos: {k: v[pos] for k, v in transactions.items()}
+        else:
+            transactions = transactions if isinstance(transactions, list) else list(transactions)
+            get_row = transactions.__getitem__
+        invalid_txs = [
+            {'index': pos, 'transaction': get_row(pos), 'errors': row_errors}
+            for pos, row_errors in errors.items()
+        ]
+        return int(valid_mask.sum()), invalid_txs
     
     @classmethod
     def _is_custom_token(cls, token: str) -> bool:
@@ -132,15 +293,15 @@ def validate_and_log(transactions: List[Dict]) -> List[Dict]:
     Returns:
         List of validated transactions (invalid ones filtered out).
     """
-    valid_count, invalid_txs = TransactionValidator.validate_batch(transactions)
+    transactions = list(transactions)
+    valid_mask, errors = TransactionValidator.validate_frame(transactions)
     
-    if invalid_txs:
+    if errors:
         import logging
         logger = logging.getLogger(__name__)
-        for inv in invalid_txs:
+        for index, messages in errors.items():
             logger.warning(
-                f"Invalid transaction at index {inv['index']}: {'; '.join(inv['errors'])}"
+                f"Invalid transaction at index {index}: {'; '.join(messages)}"
             )
     
-    return [tx for tx in transactions 
-            if TransactionValidator.validate_transaction(tx)[0]]
+    return [tx for tx, ok in zip(transactions, valid_mask) if ok]
@@ -117,11 +117,67 @@ LONG_TERM_HOLDING_DAYS = 365  # Days threshold for long-term capital gains treat
 Database configuration and safety parameters
 """
 MAX_DB_BACKUP_SIZE_MB = 100  # Maximum database backup size in MB
+DB_SNAPSHOT_CHUNK_SIZE = 64 * 1024  # Snapshot chunk size in bytes (multiple of every SQLite page size)
+DB_SNAPSHOT_KEEP_LAST = 10  # Most recent snapshots always kept per label
+DB_SNAPSHOT_KEEP_DAILY = 7  # Additionally keep the newest snapshot of each of the last N days
 DB_RETRY_ATTEMPTS = 3  # Number of retry attempts for failed database operations
 DB_RETRY_DELAY_MS = 100  # Milliseconds to wait between retry attempts
 DB_ENCRYPTION_SALT_LENGTH = 16  # Salt length in bytes for key derivation
 DB_ENCRYPTION_ITERATIONS = 480000  # PBKDF2 iterations (OWASP 2023 recommendation)
 
+# ==========================================
+# LOG SINK CONSTANTS
+# ==========================================
+"""
+Buffered JSON-lines log writer (anomaly, ML suggestion and audit logs)
+"""
+LOG_SINK_MAX_RECORDS = 1000  # Flush after this many buffered records
+LOG_SINK_MAX_BYTES = 1024 * 1024  # Flush after this many buffered bytes
+LOG_SINK_FLUSH_SECONDS = 2.0  # Flush when this long has passed since the last flush
+
+# ==========================================
+# PRECISION AUDIT LOG CONSTANTS
+# ==========================================
+"""
+Queue-based precision audit logger (fraud, wash sale, structuring, fee alerts)
+"""
+PRECISION_AUDIT_QUEUE_SIZE = 10000  # Events waiting for the writer thread before new ones are dropped
+PRECISION_AUDIT_RATE_LIMIT = 500  # Events kept per alert type per second (0 = no cap)
+
+# ==========================================
+# BACKGROUND JOB CONSTANTS
+# ==========================================
+"""
+Job queue for uploads, Transaction runs and ML reprocessing (src/core/jobs.py)
+"""
+JOB_MAX_WORKERS = 4  # Jobs one process runs at the same time
+JOB_TYPE_LIMITS = {  # Jobs of one type allowed to run at once (across processes)
+    'csv_upload': 1,
+    'transaction_calc': 1,
+    'ml_reprocess': 1,
+}
+JOB_PROGRESS_INTERVAL = 0.5  # Minimum seconds between progress writes for one job
+JOB_POLL_SECONDS = 1.0  # How often idle dispatchers look for queued jobs
+JOB_RETENTION_DAYS = 7  # Finished jobs older than this are pruned
+
+# ==========================================
+# CHANGE-DRIVEN SCHEDULING CONSTANTS
+# ==========================================
+"""
+Recompute-on-change runs started by data edits (src/web/scheduler.py)
+"""
+SCHEDULE_DEBOUNCE_SECONDS = 60  # Wait this long after the last edit before recomputing
+SCHEDULE_DEBOUNCE_MAX_SECONDS = 600  # Never delay a recompute more than this after the first edit
+
+# ==========================================
+# INTEGRITY CHECK CONSTANTS
+# ==========================================
+"""
+Tiered SQLite integrity checks (src/core/integrity.py)
+"""
+INTEGRITY_FULL_CHECK_HOURS = 24  # Scheduled PRAGMA integrity_check interval
+INTEGRITY_FULL_CHECK_DELAY_SECONDS = 300  # Earliest full check after the web server starts
+
 # ==========================================
 # API CONSTANTS
 # ==========================================
@@ -132,6 +188,72 @@ API_RETRY_MAX_ATTEMPTS = 3  # Maximum number of retries for failed API calls
 API_RETRY_DELAY_MS = 1000  # Initial delay between retries in milliseconds
 API_TIMEOUT_SECONDS = 10  # Timeout for API requests in seconds
 
+# ==========================================
+# WALLET AUDIT CONSTANTS
+# ==========================================
+"""
+Concurrent on-chain balance checks for WalletAuditor (src/core/wallet_balances.py)
+"""
+AUDIT_MAX_WORKERS = 8  # Balance requests in flight at once (across providers)
+AUDIT_RATE_LIMITS = {  # Free-tier (requests per second, burst) per provider
+    'blockchair': (0.5, 5),
+    'moralis': (5.0, 5),
+}
+AUDIT_RATE_LIMITS_PAID = {  # Used when performance.respect_free_tier_limits is off
+    'blockchair': (5.0, 10),
+    'moralis': (25.0, 25),
+}
+AUDIT_BALANCE_CACHE_TTL_SECONDS = 6 * 3600  # Cached balances are reused for this long (same day or block)
+
+# ==========================================
+# REVIEW FIXER CACHE CONSTANTS
+# ==========================================
+"""
+On-disk cache and wallet history prefetch for the review fixer (src/tools/review_cache.py)
+"""
+REVIEW_CACHE_TTL_SECONDS = {  # How long each kind of cached entry is reused
+    'token_map': 7 * 86400,  # CoinGecko contract addresses change rarely
+    'explorer': 6 * 3600,  # Wallet transaction pages gain new transactions over time
+    'price': 30 * 86400,  # Resolved historical prices do not change
+}
+REVIEW_PREFETCH_WORKERS = 6  # Explorer pages fetched at once before the prompts start
+REVIEW_PREFETCH_RATE_LIMITS = {  # (requests per second, burst) per explorer service
+    'blockchair': (0.5, 5),
+    'default': (4.0, 4),  # Etherscan-compatible explorers (free tier allows 5/s)
+}
+
+# ==========================================
+# STREAMING RESPONSE CONSTANTS
+# ==========================================
+"""
+NDJSON/CSV/zip response streaming for large result sets (src/web/streaming.py)
+"""
+STREAM_CHUNK_BYTES = 64 * 1024  # Body bytes buffered before a chunk is sent
+STREAM_FETCH_ROWS = 1000  # Rows pulled per fetchmany() when streaming from a cursor
+STREAM_GZIP_LEVEL = 6  # zlib level for gzip Content-Encoding
+
+# ==========================================
+# PROFILING CONSTANTS
+# ==========================================
+"""
+Per-stage profiles written by --profile runs (src/utils/profiling.py)
+"""
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.005  # Stack sampling interval for the collapsed-stack flamegraph text
+PROFILE_TOP_ALLOCATIONS = 10  # Largest allocation sites recorded per stage
+PROFILE_KEEP_RUNS = 20  # Profile runs kept in outputs/logs/profiles; older ones are removed
+PROFILE_LIST_LIMIT = 10  # Recent profiles shown on the diagnostics page
+
+# ==========================================
+# REQUEST METRICS CONSTANTS
+# ==========================================
+"""
+Per-endpoint latency, response size and SQLite query metrics (src/web/metrics.py)
+"""
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+METRICS_SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)  # Response bytes
+METRICS_SLOWEST_REQUESTS = 20  # Slowest request samples kept for /api/metrics
+METRICS_RATE_LIMIT = "12 per minute"  # /api/metrics scrapes allowed per client (15s scrape interval = 4)
+
 # ==========================================
 # DEFI PROTOCOL PATTERNS
 # ==========================================
@@ -0,0 +1,79 @@
+"""
+================================================================================
+FILE CACHE - In-Memory Values Validated by File Stat
+================================================================================
+
+Caches values derived from files or directories (parsed reports, folder
+listings) and reuses them until the path's modification time or size
+changes, so hot endpoints stat a path instead of re-reading it.
+
+Validation:
+    stat_stamp(path) -> (st_mtime_ns, st_size), or None if the path is
+    missing. A directory's mtime changes when entries are added, removed
+    or renamed in it, but not when a file inside it is rewritten, so cache
+    a directory listing and the files in it as separate entries.
+
+Usage:
+    from src.utils.file_cache import FileStampCache
+
+    summaries = FileStampCache()
+    rows = summaries.get(path, lambda p: list(csv.DictReader(open(p))))
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def stat_stamp(path) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of path, or None when it does not exist."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class FileStampCache:
+    """
+    Thread-safe map of path -> value, reloaded when the path's stamp changes.
+
+    The loader runs outside the lock; if two threads miss at once both load
+    and the last one wins, which is harmless for read-only derived values.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[Optional[Tuple[int, int]], Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, loader: Callable[[Path], Any]) -> Any:
+        """Cached loader(path), or a fresh one if the path changed (missing paths are cached too)."""
+        path = Path(path)
+        key = str(path)
+        stamp = stat_stamp(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = loader(path)
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (stamp, value)
+        return value
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(Path(path)), None)
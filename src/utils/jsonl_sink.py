@@ -0,0 +1,274 @@
+"""
+================================================================================
+JSONL SINK - Buffered, Batched JSON-Lines Writer
+================================================================================
+
+Shared writer for append-only JSON-lines logs (anomalies, ML suggestions,
+audit trails). Records are buffered in memory and written in batches, so a
+1M-row import costs a handful of writes instead of millions of open/close
+calls.
+
+Flush Policy:
+    - Size: once max_records records or max_bytes bytes are buffered
+    - Time: once flush_interval seconds have passed since the last flush
+    - Explicit: flush() / close() (Ingestor flushes when a scan completes
+      or fails)
+
+Options:
+    background=True   - a daemon thread performs the writes; write() only
+                        appends to the buffer
+    compression       - None, 'gzip' or 'zstd'. Each flush appends one
+                        compressed segment (gzip members and zstd frames
+                        concatenate into a valid stream), so the file is
+                        always readable with `zcat` / `zstdcat` or
+                        iter_jsonl(). zstd needs the optional `zstandard`
+                        package and falls back to gzip without it.
+
+Logging Integration:
+    JsonlSinkHandler adapts a sink to the logging module, so existing
+    loggers (precision audit, web audit) can route structured records
+    through the same buffered writer.
+
+Usage:
+    from src.utils.jsonl_sink import JsonlSink
+
+    with JsonlSink(LOG_DIR / 'anomalies.log') as sink:
+        for entry in entries:
+            sink.write(entry)
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from src.utils.constants import (
+    LOG_SINK_MAX_RECORDS,
+    LOG_SINK_MAX_BYTES,
+    LOG_SINK_FLUSH_SECONDS,
+)
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+COMPRESSIONS = (None, 'gzip', 'zstd')
+
+
+def _zstd_compressor():
+    """Return a zstd compress function, or None when zstandard is not installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard.ZstdCompressor(level=3).compress
+
+
+class JsonlSink:
+    """
+    Buffered JSON-lines appender with size/time flushing.
+
+    Thread-safe: several threads may write to one sink. Records are
+    serialized at write() time so later mutation of the caller's dict does
+    not change what is logged.
+    """
+
+    def __init__(self, path, max_records: int = LOG_SINK_MAX_RECORDS,
+                 max_bytes: int = LOG_SINK_MAX_BYTES,
+                 flush_interval: float = LOG_SINK_FLUSH_SECONDS,
+                 background: bool = False, compression: Optional[str] = None,
+                 default: Optional[Callable] = str):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression!r}")
+        self.path = Path(path)
+        self.max_records = max(1, int(max_records))
+        self.max_bytes = max(1, int(max_bytes))
+        self.flush_interval = flush_interval
+        self.default = default
+        self.compression = compression
+        self._compress = None
+        if compression == 'gzip':
+            self._compress = gzip.compress
+        elif compression == 'zstd':
+            self._compress = _zstd_compressor()
+            if self._compress is None:
+                logger.warning("[LOG] zstandard not installed; writing gzip segments instead")
+                self.compression = 'gzip'
+                self._compress = gzip.compress
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+        self._dir_ready = False
+        self._closed = False
+        self.records_written = 0
+        self.flushes = 0
+
+        self._wake = threading.Event()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name=f"jsonl-sink-{self.path.name}", daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def write(self, record: Dict):
+        """Buffer one record; flushes when the size or time threshold is reached."""
+        self.write_many((record,))
+
+    def write_many(self, records: Iterable[Dict]):
+        """Buffer several records with a single lock acquisition."""
+        lines = [json.dumps(r, default=self.default) + "\n" for r in records]
+        if not lines:
+            return
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"Sink {self.path.name} is closed")
+            self._buffer.extend(lines)
+            self._buffered_bytes += sum(len(line) for line in lines)
+            due = self._flush_due()
+        if due:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def _flush_due(self) -> bool:
+        return (len(self._buffer) >= self.max_records
+                or self._buffered_bytes >= self.max_bytes
+                or time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def flush(self):
+        """Write everything buffered so far in one append."""
+        # The write lock is taken first so concurrent flushes append in buffer order
+        with self._write_lock:
+            with self._lock:
+                lines, self._buffer = self._buffer, []
+                self._buffered_bytes = 0
+                self._last_flush = time.monotonic()
+            if not lines:
+                return
+            payload = ''.join(lines).encode('utf-8')
+            if self._compress is not None:
+                payload = self._compress(payload)
+            if not self._dir_ready:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._dir_ready = True
+            with open(self.path, 'ab') as fh:
+                fh.write(payload)
+            self.records_written += len(lines)
+            self.flushes += 1
+
+    def pending(self) -> int:
+        """Number of buffered records not yet written."""
+        with self._lock:
+            return len(self._buffer)
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"[LOG] Background flush of {self.path.name} failed: {e}")
+            if self._closed:
+                return
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def close(self):
+        """Flush remaining records and stop the background thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonlSinkHandler(logging.Handler):
+    """
+    logging.Handler that writes each record as a JSON object to a JsonlSink.
+
+    The record contains timestamp, level, logger and message plus any fields
+    passed through `extra=`.
+    """
+
+    _STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def __init__(self, sink: JsonlSink, level=logging.NOTSET):
+        super().__init__(level)
+        self.sink = sink
+
+    def to_dict(self, record: logging.LogRecord) -> Dict:
+        entry = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self._STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        return entry
+
+    def emit(self, record):
+        try:
+            self.sink.write(self.to_dict(record))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        try:
+            self.sink.close()
+        finally:
+            super().close()
+
+
+def iter_jsonl(path) -> Iterator[Dict]:
+    """Yield records from a plain, gzip or zstd JSON-lines file written by JsonlSink."""
+    path = Path(path)
+    with open(path, 'rb') as fh:
+        magic = fh.read(4)
+    if magic[:2] == b'\x1f\x8b':
+        stream = gzip.open(path, 'rt', encoding='utf-8')
+    elif magic == b'\x28\xb5\x2f\xfd':
+        import io
+        import zstandard
+        raw = open(path, 'rb')
+        stream = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True), encoding='utf-8')
+    else:
+        stream = open(path, 'r', encoding='utf-8')
+    with stream:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
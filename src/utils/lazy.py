@@ -0,0 +1,65 @@
+"""
+================================================================================
+LAZY IMPORTS - Deferred Module Attributes
+================================================================================
+
+Keeps heavy third-party stacks (ccxt, yfinance, pandas, requests, Flask) off
+the startup path of modules that only need them for some operations.
+
+    ccxt = lazy_module('ccxt')      # nothing imported yet
+    ccxt.binance(...)               # first attribute access imports ccxt
+
+The proxy resolves the real module through sys.modules on every access and
+forwards attribute writes, so unittest.mock.patch('src.core.engine.yf.download')
+and monkeypatch.setattr(cli.web_server, ...) still patch the real module.
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the named module on first use."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        object.__setattr__(self, '_lazy_target', name)
+
+    def _load(self) -> types.ModuleType:
+        name = object.__getattribute__(self, '_lazy_target')
+        module = sys.modules.get(name)
+        if module is None or module is self:
+            module = importlib.import_module(name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        name = object.__getattribute__(self, '_lazy_target')
+        loaded = 'loaded' if name in sys.modules else 'not loaded'
+        return f"<lazy module '{name}' ({loaded})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """Return a proxy for module `name`; the import happens on first attribute access."""
+    return LazyModule(name)
+
+
+def is_loaded(name: str) -> bool:
+    """True once module `name` has actually been imported."""
+    return name in sys.modules
@@ -0,0 +1,306 @@
+"""
+================================================================================
+PROFILING - Per-Stage CPU, Stack and Memory Profiles for --profile Runs
+================================================================================
+
+Wraps pipeline stages (CSV scan, API sync, each engine year, manual review,
+...) so a slow nightly run leaves more behind than log timestamps.
+
+Per Stage:
+    cProfile        <stage>.pstats (python -m pstats, snakeviz)
+    Stack sampler   <stage>.folded - collapsed stacks ("a;b;c count") of the
+                    thread running the stage, sampled every
+                    PROFILE_SAMPLE_INTERVAL_SECONDS; feed to flamegraph.pl
+                    or speedscope
+    tracemalloc     peak traced memory and the PROFILE_TOP_ALLOCATIONS
+                    largest allocation sites still live at the stage end
+    Timing          wall time, CPU time, rows and rows per second (rows come
+                    from the progress events the stage reports, see
+                    src/utils/progress.py, or are set on the stage record)
+
+Layout:
+    outputs/logs/profiles/<command>_<timestamp>/
+        summary.json    run_id, command, started, finished, stages[...]
+        <stage>.pstats
+        <stage>.folded
+    Only the newest PROFILE_KEEP_RUNS runs are kept.
+
+Notes:
+    - Stages do not nest: a stage opened inside another one is a no-op and
+      its time is counted in the outer stage.
+    - A disabled profiler (the default when --profile is absent) passes
+      stages straight through.
+
+Usage:
+    profiler = RunProfiler('autorunner', OUTPUT_DIR / 'logs' / 'profiles', enabled=True)
+    progress.subscribe(profiler)
+    with profiler.stage('csv_scan', rows_from='csv_rows'):
+        ingest.run_csv_scan()
+    profiler.finish()
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import cProfile
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.utils.constants import (
+    PROFILE_KEEP_RUNS,
+    PROFILE_LIST_LIMIT,
+    PROFILE_SAMPLE_INTERVAL_SECONDS,
+    PROFILE_TOP_ALLOCATIONS,
+)
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+SUMMARY_FILE = 'summary.json'
+_MB = 1024 * 1024
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread and counts collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def folded(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class StageRecord:
+    """Measurements for one stage; `rows` may be set by the code inside the stage."""
+
+    def __init__(self, name: str, rows_from: Optional[str] = None):
+        self.name = name
+        self.rows_from = rows_from
+        self.rows = None
+        self.progress = {}  # (stage, year, message) -> highest `done` reported
+        self.result = {}
+
+    def progress_rows(self) -> Optional[int]:
+        counts = [done for (stage, _, _), done in self.progress.items() if stage == self.rows_from]
+        return sum(counts) if counts else None
+
+
+class RunProfiler:
+    """
+    Profiles the stages of one run and writes them under out_dir.
+
+    Also a progress subscriber (callable with event dicts), which is how
+    stages report the rows they processed.
+    """
+
+    def __init__(self, command: str, out_dir, enabled: bool = True,
+                 sample_interval: float = PROFILE_SAMPLE_INTERVAL_SECONDS,
+                 keep_runs: int = PROFILE_KEEP_RUNS):
+        self.command = command
+        self.enabled = enabled
+        self.out_dir = Path(out_dir)
+        self.sample_interval = sample_interval
+        self.keep_runs = keep_runs
+        self.started = datetime.now()
+        self.run_id = f"{command}_{self.started.strftime('%Y%m%d_%H%M%S')}"
+        self.run_dir = None
+        self.stages: List[Dict] = []
+        self._current = None
+
+    def __call__(self, event: Dict):
+        current = self._current
+        if current is None or event.get('done') is None:
+            return
+        key = (event['stage'], event.get('year'), event.get('message'))
+        current.progress[key] = max(current.progress.get(key, 0), event['done'])
+
+    def _ensure_run_dir(self) -> Path:
+        if self.run_dir is None:
+            run_dir = self.out_dir / self.run_id
+            suffix = 1
+            while run_dir.exists():
+                suffix += 1
+                run_dir = self.out_dir / f"{self.run_id}_{suffix}"
+            run_dir.mkdir(parents=True)
+            self.run_dir = run_dir
+            self.run_id = run_dir.name
+        return self.run_dir
+
+    @contextmanager
+    def stage(self, name: str, rows_from: Optional[str] = None):
+        """Profile the body as stage `name`; rows_from names the progress stage whose counts are its rows."""
+        record = StageRecord(name, rows_from)
+        if not self.enabled or self._current is not None:
+            yield record
+            return
+
+        run_dir = self._ensure_run_dir()
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base_memory = tracemalloc.get_traced_memory()[0]
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:  # another profiler owns the hook
+            logger.debug(f"[PROFILE] cProfile unavailable for {name}: {e}")
+            profile = None
+        sampler = StackSampler(threading.get_ident(), self.sample_interval).start()
+        self._current = record
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        error = None
+        try:
+            yield record
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._current = None
+            sampler.stop()
+            if profile is not None:
+                profile.disable()
+            peak = tracemalloc.get_traced_memory()[1]
+            top = self._top_allocations()
+            if started_tracing:
+                tracemalloc.stop()
+            self._save_stage(run_dir, record, profile, sampler, wall, cpu, peak - base_memory, top, error)
+
+    def _top_allocations(self) -> List[Dict]:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        top = []
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            top.append({'location': f"{frame.filename}:{frame.lineno}",
+                        'size_kb': round(stat.size / 1024, 1), 'count': stat.count})
+        return top
+
+    def _save_stage(self, run_dir, record, profile, sampler, wall, cpu, peak_bytes, top, error):
+        base = record.name.replace('/', '_')
+        pstats_file = folded_file = None
+        try:
+            if profile is not None:
+                pstats_file = f"{base}.pstats"
+                profile.dump_stats(str(run_dir / pstats_file))
+            folded_file = f"{base}.folded"
+            (run_dir / folded_file).write_text(sampler.folded(), encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"[PROFILE] Could not write profile files for {record.name}: {e}")
+
+        rows = record.rows if record.rows is not None else record.progress_rows()
+        record.result = {
+            'name': record.name,
+            'wall_seconds': round(wall, 4),
+            'cpu_seconds': round(cpu, 4),
+            'peak_memory_mb': round(max(peak_bytes, 0) / _MB, 2),
+            'rows': rows,
+            'rows_per_second': round(rows / wall, 1) if rows and wall > 0 else None,
+            'samples': sum(sampler.stacks.values()),
+            'pstats': pstats_file,
+            'folded': folded_file,
+            'top_allocations': top,
+        }
+        if error:
+            record.result['error'] = error
+        self.stages.append(record.result)
+        logger.info(f"[PROFILE] {record.name}: {wall:.2f}s wall, {cpu:.2f}s CPU, "
+                    f"peak {record.result['peak_memory_mb']} MB")
+
+    def finish(self) -> Optional[Path]:
+        """Write summary.json for the stages profiled so far and prune old runs; returns its path."""
+        if not self.enabled or not self.stages:
+            return None
+        run_dir = self._ensure_run_dir()
+        summary = {
+            'run_id': self.run_id,
+            'command': self.command,
+            'started': self.started.isoformat(timespec='seconds'),
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'wall_seconds': round(sum(s['wall_seconds'] for s in self.stages), 4),
+            'stages': self.stages,
+        }
+        path = run_dir / SUMMARY_FILE
+        path.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+        prune_profiles(self.out_dir, self.keep_runs)
+        logger.info(f"[PROFILE] Wrote {len(self.stages)} stage profile(s) to {run_dir}")
+        return path
+
+
+def _run_dirs(out_dir) -> List[Path]:
+    """Profile run directories, newest first."""
+    out_dir = Path(out_dir)
+    if not out_dir.is_dir():
+        return []
+    runs = [d for d in out_dir.iterdir() if (d / SUMMARY_FILE).is_file()]
+    return sorted(runs, key=lambda d: (d / SUMMARY_FILE).stat().st_mtime, reverse=True)
+
+
+def prune_profiles(out_dir, keep: int = PROFILE_KEEP_RUNS) -> int:
+    """Delete all but the newest `keep` profile runs; returns how many were removed."""
+    removed = 0
+    for run_dir in _run_dirs(out_dir)[keep:]:
+        shutil.rmtree(run_dir, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def list_profiles(out_dir, limit: int = PROFILE_LIST_LIMIT) -> List[Dict]:
+    """Summaries of the most recent profile runs, newest first (top allocations left out)."""
+    profiles = []
+    for run_dir in _run_dirs(out_dir)[:limit]:
+        try:
+            summary = json.loads((run_dir / SUMMARY_FILE).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.debug(f"[PROFILE] Skipping unreadable profile {run_dir}: {e}")
+            continue
+        for stage in summary.get('stages', []):
+            stage.pop('top_allocations', None)
+        summary['path'] = str(run_dir)
+        profiles.append(summary)
+    return profiles
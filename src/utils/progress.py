@@ -0,0 +1,205 @@
+"""
+================================================================================
+PROGRESS HOOKS - Pipeline Progress and Throughput Events
+================================================================================
+
+A small publish/subscribe interface the pipeline stages report to, so long
+runs have real progress and ETAs instead of guessed percentages.
+
+Reporting Stages:
+    csv_scan        Ingestor.run_csv_scan        files done / total files
+    csv_rows        Ingestor._proc_csv_smart     rows done / total rows
+    api_sync        Ingestor.run_api_sync        exchanges done / total
+    price_backfill  backfill_missing_prices      prices done / missing prices
+    engine          TransactionEngine.run        trades done / total (per year)
+    export          TransactionEngine.export     0/1 at start, 1/1 when written
+    manual_review   TransactionEngine.run_manual_review   0/1, 1/1
+    ml_reprocess    reprocess_transactions       trades done / total
+
+Events:
+    Each update() becomes one dict: task_id, stage, year, done, total,
+    message, ts, elapsed (seconds in this stage), rate (units per second)
+    and eta_seconds (None until both a rate and a total are known).
+
+Subscribers:
+    Any callable taking the event dict.
+    - ProgressRingBuffer   recent events per task in memory; the web server's
+                           progress_buffer feeds /api/progress/<task_id>
+    - JsonlProgressLog     appends events to a JSON-lines file through the
+                           buffered JsonlSink
+    - A hook with no subscribers is a no-op (NULL_PROGRESS); update()
+      returns before building an event, so stages can call it per chunk.
+
+Usage:
+    hook = ProgressHook(progress_buffer, task_id='run_1')
+    ingest.progress = hook
+    hook.update('csv_rows', 5000, 100000)
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional
+
+from src.utils.jsonl_sink import JsonlSink
+
+logger = logging.getLogger("Crypto_Transaction_Engine")
+
+STAGE_LABELS = {
+    'csv_scan': 'Scanning CSV files',
+    'csv_rows': 'Importing CSV rows',
+    'api_sync': 'Syncing exchange APIs',
+    'price_backfill': 'Backfilling prices',
+    'engine': 'Calculating trades',
+    'export': 'Writing reports',
+    'manual_review': 'Reviewing for audit risks',
+    'ml_reprocess': 'Reprocessing transactions',
+}
+
+
+def describe(event: Dict) -> str:
+    """Human-readable one-line summary of an event."""
+    label = STAGE_LABELS.get(event['stage'], event['stage'])
+    if event.get('year'):
+        label = f"{label} ({event['year']})"
+    if event.get('message'):
+        label = f"{label}: {event['message']}"
+    done, total = event.get('done'), event.get('total')
+    if done is not None:
+        label += f" - {done:,} of {total:,}" if total else f" - {done:,}"
+    eta = event.get('eta_seconds')
+    if eta is not None and done != total:
+        label += f", ~{int(eta) // 60}m {int(eta) % 60:02d}s left"
+    return label
+
+
+class ProgressHook:
+    """
+    Fan-out point for progress events.
+
+    Subscribers that raise are logged and dropped from that call only, except
+    for exceptions listed in `propagate` (e.g. JobCancelled), which are
+    re-raised so a subscriber can stop the stage that reported.
+    """
+
+    def __init__(self, *subscribers: Callable[[Dict], None], task_id: Optional[str] = None,
+                 propagate: tuple = ()):
+        self.task_id = task_id
+        self.propagate = tuple(propagate)
+        self._subscribers: List[Callable[[Dict], None]] = list(subscribers)
+        self._stage_start = {}
+
+    def subscribe(self, subscriber: Callable[[Dict], None]):
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Callable[[Dict], None]):
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    def update(self, stage: str, done: Optional[int] = None, total: Optional[int] = None,
+               year: Optional[int] = None, message: Optional[str] = None):
+        """Report progress for stage; cheap no-op without subscribers."""
+        if not self._subscribers:
+            return
+        now = time.monotonic()
+        key = (stage, year)
+        start = self._stage_start.get(key)
+        if start is None or (done is not None and done == 0):
+            start = self._stage_start[key] = (now, done or 0)
+        elapsed = now - start[0]
+        rate = eta = None
+        if done is not None and elapsed > 0 and done > start[1]:
+            rate = (done - start[1]) / elapsed
+            if total:
+                eta = max(total - done, 0) / rate
+        event = {
+            'task_id': self.task_id,
+            'stage': stage,
+            'year': year,
+            'done': done,
+            'total': total,
+            'message': message,
+            'ts': time.time(),
+            'elapsed': round(elapsed, 3),
+            'rate': round(rate, 2) if rate is not None else None,
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+        }
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber(event)
+            except self.propagate:
+                raise
+            except Exception as e:
+                logger.debug(f"[PROGRESS] Subscriber {subscriber!r} failed: {e}")
+
+
+NULL_PROGRESS = ProgressHook()
+
+
+class ProgressRingBuffer:
+    """
+    Thread-safe in-memory store of the most recent events per task.
+
+    Keeps at most `per_task` events for each of the `max_tasks` most recently
+    updated tasks.
+    """
+
+    def __init__(self, per_task: int = 100, max_tasks: int = 200):
+        self.per_task = per_task
+        self.max_tasks = max_tasks
+        self._tasks: 'OrderedDict[str, deque]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict):
+        task_id = event.get('task_id')
+        with self._lock:
+            events = self._tasks.get(task_id)
+            if events is None:
+                events = self._tasks[task_id] = deque(maxlen=self.per_task)
+                while len(self._tasks) > self.max_tasks:
+                    self._tasks.popitem(last=False)
+            else:
+                self._tasks.move_to_end(task_id)
+            events.append(event)
+
+    def latest(self, task_id) -> Optional[Dict]:
+        with self._lock:
+            events = self._tasks.get(task_id)
+            return dict(events[-1]) if events else None
+
+    def history(self, task_id) -> List[Dict]:
+        with self._lock:
+            return [dict(e) for e in self._tasks.get(task_id, ())]
+
+    def clear(self, task_id=None):
+        with self._lock:
+            if task_id is None:
+                self._tasks.clear()
+            else:
+                self._tasks.pop(task_id, None)
+
+
+class JsonlProgressLog:
+    """Subscriber that appends events to a JSON-lines file (buffered)."""
+
+    def __init__(self, path, **sink_options):
+        self.sink = JsonlSink(path, **sink_options)
+
+    def __call__(self, event: Dict):
+        self.sink.write(event)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
@@ -3,7 +3,7 @@ Audit Log API Endpoints - Optional Enhancements
 ================================================
 
 This module provides three optional enhancements for audit trail management:
-1. API Endpoint - Download precision audit logs (CSV format)
+1. API Endpoint - Download precision audit logs (streamed CSV, or NDJSON with ?format=ndjson)
 2. Dashboard Visualization - Real-time audit events with severity levels
 3. Monthly Compliance Report - Generate compliance summary from audit logs
 
@@ -20,6 +20,8 @@ from collections import defaultdict
 from decimal import Decimal
 from flask import jsonify, send_file
 
+from src.web.streaming import stream_format, streamed_response
+
 
 class AuditLogManager:
     """Manager for precision audit logs"""
@@ -29,10 +31,12 @@ class AuditLogManager:
     
     def read_audit_logs(self, start_date=None, end_date=None, alert_type=None):
         """Read and filter audit logs"""
-        logs = []
-        
+        return list(self.iter_audit_logs(start_date, end_date, alert_type))
+    
+    def iter_audit_logs(self, start_date=None, end_date=None, alert_type=None):
+        """Yield filtered audit log entries one at a time (constant memory)"""
         if not self.audit_log_file.exists():
-            return logs
+            return
         
         try:
             with open(self.audit_log_file, 'r', encoding='utf-8') as f:
@@ -52,13 +56,31 @@ class AuditLogManager:
                         if alert_type and entry.get('alert_type') != alert_type:
                             continue
                         
-                        logs.append(entry)
+                        yield entry
                     except json.JSONDecodeError:
                         continue
         except Exception as e:
             print(f"Error reading audit logs: {e}")
-        
-        return logs
+    
+    def csv_fieldnames(self, logs):
+        """Sorted union of the keys of logs (any iterable), the CSV export header"""
+        all_keys = set()
+        for log in logs:
+            all_keys.update(log.keys())
+        return sorted(all_keys) or ['No audit logs found']
+    
+    @staticmethod
+    def csv_row(log):
+        """Convert Decimal to string and dicts to JSON for CSV compatibility"""
+        row = {}
+        for key, value in log.items():
+            if isinstance(value, Decimal):
+                row[key] = str(value)
+            elif isinstance(value, dict):
+                row[key] = json.dumps(value)
+            else:
+                row[key] = value
+        return row
     
     def export_to_csv(self, logs=None):
         """Export audit logs to CSV format"""
@@ -73,27 +95,11 @@ class AuditLogManager:
             csv_buffer.seek(0)
             return csv_buffer.getvalue()
         
-        # Get all unique keys from logs
-        all_keys = set()
-        for log in logs:
-            all_keys.update(log.keys())
-        
-        fieldnames = sorted(list(all_keys))
-        
-        writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames)
+        writer = csv.DictWriter(csv_buffer, fieldnames=self.csv_fieldnames(logs))
         writer.writeheader()
         
         for log in logs:
-            # Convert Decimal to string for CSV compatibility
-            row = {}
-            for key, value in log.items():
-                if isinstance(value, Decimal):
-                    row[key] = str(value)
-                elif isinstance(value, dict):
-                    row[key] = json.dumps(value)
-                else:
-                    row[key] = value
-            writer.writerow(row)
+            writer.writerow(self.csv_row(log))
         
         csv_buffer.seek(0)
         return csv_buffer.getvalue()
@@ -223,26 +229,24 @@ def create_audit_endpoints(app, base_dir):
             end_date = datetime.now()
             start_date = end_date - timedelta(days=days)
             
-            # Get logs with filters
-            logs = audit_manager.read_audit_logs(
-                start_date=start_date,
-                end_date=end_date,
-                alert_type=alert_type
-            )
-            
-            # Export to CSV
-            csv_content = audit_manager.export_to_csv(logs)
+            # Stream the logs with filters (NDJSON with ?format=ndjson, CSV by default)
+            def logs():
+                return audit_manager.iter_audit_logs(
+                    start_date=start_date,
+                    end_date=end_date,
+                    alert_type=alert_type
+                )
             
-            # Return as downloadable CSV
-            csv_bytes = io.BytesIO(csv_content.encode('utf-8'))
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f'precision_audit_{timestamp}'
             
-            return send_file(
-                csv_bytes,
-                mimetype='text/csv',
-                as_attachment=True,
-                download_name=f'precision_audit_{timestamp}.csv'
-            )
+            if stream_format(request) == 'ndjson':
+                return streamed_response(logs(), 'ndjson', filename=filename)
+            
+            # CSV header needs every key, so scan once before streaming the rows
+            fieldnames = audit_manager.csv_fieldnames(logs())
+            return streamed_response((audit_manager.csv_row(log) for log in logs()), 'csv',
+                                     filename=filename, fieldnames=fieldnames)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
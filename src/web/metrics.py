@@ -0,0 +1,277 @@
+"""
+================================================================================
+METRICS - Per-Request Latency, Response Size and SQLite Query Metrics
+================================================================================
+
+In-process request metrics for the web server, exposed in Prometheus text
+format at /api/metrics so a Grafana/Prometheus setup can find slow pages.
+
+Collected Per Endpoint (method + URL rule, e.g. GET /api/reports/<year>):
+    - Request latency histogram (METRICS_LATENCY_BUCKETS seconds)
+    - Requests by status code
+    - Response size histogram (METRICS_SIZE_BUCKETS bytes); streamed
+      responses have no known size and are left out of it
+    - SQLite queries and query time, counted by MetricsConnection, the
+      connection class get_db_connection() opens
+
+Slowest Requests:
+    The METRICS_SLOWEST_REQUESTS slowest requests since the server started,
+    held in a fixed-size buffer (a min-heap: a new sample replaces the
+    fastest one kept), with path, status, query count and size.
+
+Notes:
+    - Queries are attributed to the request that runs them; connections used
+      outside a request (jobs, scheduler threads) are not counted.
+    - Rows a streamed response fetches after the view returns are not
+      included in its query time.
+    - Metrics reset when the process restarts, as Prometheus counters expect.
+
+Usage:
+    metrics = RequestMetrics()
+    app.before_request(metrics.start_request)
+    app.after_request(metrics.finish_request)
+    sqlite3.connect(db, factory=MetricsConnection)
+    Response(metrics.render_prometheus(), mimetype=PROMETHEUS_MIMETYPE)
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+from flask import g, has_request_context, request
+
+from src.utils.constants import METRICS_LATENCY_BUCKETS, METRICS_SIZE_BUCKETS, METRICS_SLOWEST_REQUESTS
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PREFIX = 'crypto_tracker'
+UNMATCHED_ENDPOINT = '<unmatched>'  # 404s share one label so unknown paths cannot grow the series
+
+
+class _RequestStats:
+    """Work done by the request in progress (kept on flask.g)."""
+    __slots__ = ('started', 'queries', 'query_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+def _current_stats() -> Optional[_RequestStats]:
+    if not has_request_context():
+        return None
+    return g.get('_request_stats')
+
+
+def _timed(method, *args):
+    stats = _current_stats()
+    if stats is None:
+        return method(*args)
+    start = time.perf_counter()
+    try:
+        return method(*args)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - start
+
+
+class MetricsCursor(sqlite3.Cursor):
+    """Cursor whose execute calls are counted and timed against the current request."""
+
+    def execute(self, *args):
+        return _timed(super().execute, *args)
+
+    def executemany(self, *args):
+        return _timed(super().executemany, *args)
+
+    def executescript(self, *args):
+        return _timed(super().executescript, *args)
+
+
+class MetricsConnection(sqlite3.Connection):
+    """sqlite3 connection (use as connect(factory=...)) whose statements are counted per request."""
+
+    def cursor(self, factory=MetricsCursor):
+        return super().cursor(factory)
+
+    # Shortcut methods go through cursor() so each statement is counted once
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def executemany(self, *args):
+        return self.cursor().executemany(*args)
+
+    def executescript(self, *args):
+        return self.cursor().executescript(*args)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        return zip(list(self.bounds) + [float('inf')], itertools.accumulate(self.counts))
+
+
+class _EndpointMetrics:
+    __slots__ = ('latency', 'size', 'statuses', 'queries', 'query_seconds')
+
+    def __init__(self, latency_buckets, size_buckets):
+        self.latency = Histogram(latency_buckets)
+        self.size = Histogram(size_buckets)
+        self.statuses: Dict[int, int] = {}
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+class RequestMetrics:
+    """Thread-safe per-endpoint request metrics for one Flask app."""
+
+    def __init__(self, latency_buckets: Sequence[float] = METRICS_LATENCY_BUCKETS,
+                 size_buckets: Sequence[float] = METRICS_SIZE_BUCKETS,
+                 slowest: int = METRICS_SLOWEST_REQUESTS):
+        self.latency_buckets = tuple(latency_buckets)
+        self.size_buckets = tuple(size_buckets)
+        self.slowest_size = slowest
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._endpoints: Dict[tuple, _EndpointMetrics] = {}
+        self._slowest: List[tuple] = []  # min-heap of (seconds, seq, sample)
+        self._seq = itertools.count()
+
+    # Flask hooks -------------------------------------------------------
+
+    def start_request(self):
+        g._request_stats = _RequestStats()
+
+    def finish_request(self, response):
+        stats = g.pop('_request_stats', None)
+        if stats is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ENDPOINT
+            size = response.content_length
+            if size is None and not response.is_streamed:
+                size = response.calculate_content_length()
+            self.observe(request.method, rule, response.status_code, time.perf_counter() - stats.started,
+                         size, stats.queries, stats.query_seconds, path=request.path)
+        return response
+
+    # Recording ---------------------------------------------------------
+
+    def observe(self, method: str, endpoint: str, status: int, seconds: float, size: Optional[int] = None,
+                queries: int = 0, query_seconds: float = 0.0, path: Optional[str] = None):
+        """Record one finished request."""
+        with self._lock:
+            key = (method, endpoint)
+            metrics = self._endpoints.get(key)
+            if metrics is None:
+                metrics = self._endpoints[key] = _EndpointMetrics(self.latency_buckets, self.size_buckets)
+            metrics.latency.observe(seconds)
+            if size is not None:
+                metrics.size.observe(size)
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.queries += queries
+            metrics.query_seconds += query_seconds
+
+            if self.slowest_size > 0 and (len(self._slowest) < self.slowest_size or seconds > self._slowest[0][0]):
+                sample = {'method': method, 'endpoint': endpoint, 'path': path or endpoint, 'status': status,
+                          'seconds': round(seconds, 6), 'queries': queries,
+                          'query_seconds': round(query_seconds, 6), 'bytes': size, 'at': time.time()}
+                entry = (seconds, next(self._seq), sample)
+                if len(self._slowest) < self.slowest_size:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self) -> List[Dict]:
+        """Slowest request samples, slowest first."""
+        with self._lock:
+            return [dict(sample) for _, _, sample in sorted(self._slowest, reverse=True)]
+
+    # Export ------------------------------------------------------------
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+            def histogram(name, attr):
+                for (method, endpoint), metrics in endpoints:
+                    hist = getattr(metrics, attr)
+                    if not hist.count:
+                        continue
+                    for bound, count in hist.cumulative():
+                        labels = _labels(method=method, endpoint=endpoint, le=_number(float(bound)))
+                        lines.append(f"{PREFIX}_{name}_bucket{labels} {count}")
+                    labels = _labels(method=method, endpoint=endpoint)
+                    lines.append(f"{PREFIX}_{name}_sum{labels} {_number(float(hist.total))}")
+                    lines.append(f"{PREFIX}_{name}_count{labels} {hist.count}")
+
+            family('http_request_duration_seconds', 'histogram', 'Request latency by endpoint.')
+            histogram('http_request_duration_seconds', 'latency')
+
+            family('http_response_size_bytes', 'histogram', 'Response body size by endpoint (streamed responses excluded).')
+            histogram('http_response_size_bytes', 'size')
+
+            family('http_requests_total', 'counter', 'Requests by endpoint and status code.')
+            for (method, endpoint), metrics in endpoints:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f"{PREFIX}_http_requests_total"
+                                 f"{_labels(method=method, endpoint=endpoint, status=status)} {count}")
+
+            family('db_queries_total', 'counter', 'SQLite statements run by requests, by endpoint.')
+            for (method, endpoint), metrics in endpoints:
+                lines.append(f"{PREFIX}_db_queries_total{_labels(method=method, endpoint=endpoint)} {metrics.queries}")
+
+            family('db_query_seconds_total', 'counter', 'Time spent in SQLite statements by requests, by endpoint.')
+            for (method, endpoint), metrics in endpoints:
+                lines.append(f"{PREFIX}_db_query_seconds_total{_labels(method=method, endpoint=endpoint)} "
+                             f"{_number(float(metrics.query_seconds))}")
+
+            family('slowest_request_seconds', 'gauge',
+                   f'The {self.slowest_size} slowest requests since start (rank 1 = slowest).')
+            for rank, (seconds, _, sample) in enumerate(sorted(self._slowest, reverse=True), 1):
+                labels = _labels(rank=rank, method=sample['method'], endpoint=sample['endpoint'],
+                                 path=sample['path'], status=sample['status'], queries=sample['queries'])
+                lines.append(f"{PREFIX}_slowest_request_seconds{labels} {_number(float(seconds))}")
+
+            family('metrics_start_time_seconds', 'gauge', 'Unix time the metrics were started.')
+            lines.append(f"{PREFIX}_metrics_start_time_seconds {_number(float(self.started))}")
+        return '\n'.join(lines) + '\n'
@@ -23,9 +23,15 @@ Schedule Storage:
                 "id": "daily_calc",
                 "frequency": "daily",
                 "time": "03:00",
-                "cascade": true
+                "cascade": true,
+                "only_if_changed": true
             }
-        ]
+        ],
+        "on_change": {
+            "enabled": true,
+            "debounce_seconds": 60,
+            "cascade": false
+        }
     }
 
 Schedule Types:
@@ -50,9 +56,27 @@ Cascade Mode:
     to current year in sequence. Useful for keeping multi-year
     data synchronized.
 
+Change-Driven Runs:
+    only_if_changed: the trigger first asks the runner whether anything
+        changed since the last successful run (new input CSVs, config.json,
+        trade fingerprints; see src/core/change_tracking.py) and skips the
+        run if not. Every run skips years whose reports are still fresh
+        (src/core/report_cache.py).
+    on_change: data edits (engine.mark_data_changed) schedule one
+        recompute debounce_seconds after the last edit of a burst, and at
+        most SCHEDULE_DEBOUNCE_MAX_SECONDS after the first.
+
+Database Integrity:
+    schedule_integrity_check() runs the full PRAGMA integrity_check every
+    INTEGRITY_FULL_CHECK_HOURS (counted from the last recorded full check),
+    skipping a slot while a calculation is running. Results are cached in
+    the status file for diagnostics (src/core/integrity.py).
+
 Integration:
     - Used by Web UI for schedule management
-    - Calls auto_runner.py for actual processing
+    - Runs Auto_Runner in-process through the shared runner (warm caches);
+      falls back to an auto_runner.py subprocess when no runner is given or
+      config.json sets performance.isolated_runs
     - Background scheduler (APScheduler library)
     - Survives web server restarts (persistent config)
 
@@ -63,7 +87,7 @@ Logging:
 Usage:
     from src.web.scheduler import ScheduleManager
     
-    scheduler = ScheduleManager(base_dir, auto_runner_path)
+    scheduler = ScheduleManager(base_dir, auto_runner_path, runner=get_auto_runner)
     scheduler.add_schedule(
         'daily_calc',
         frequency='daily',
@@ -72,7 +96,8 @@ Usage:
     )
 
 Safety:
-    - Only one calculation runs at a time (job queuing)
+    - Only one calculation runs at a time (the runner's lock; a trigger that
+      fires during a run is skipped)
     - Errors don't crash scheduler (exception handling)
     - Failed jobs logged for manual review
     - Can be disabled via Web UI
@@ -84,23 +109,42 @@ Last Modified: December 2025
 import json
 from pathlib import Path
 from datetime import datetime, time
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 import subprocess
 import sys
+import threading
 import logging
+from datetime import timedelta
+
+from src.core import integrity
+from src.utils.constants import (SCHEDULE_DEBOUNCE_SECONDS, SCHEDULE_DEBOUNCE_MAX_SECONDS,
+                                 INTEGRITY_FULL_CHECK_HOURS, INTEGRITY_FULL_CHECK_DELAY_SECONDS)
 
 logger = logging.getLogger("scheduler")
 
+ON_CHANGE_JOB_ID = 'on_change_recompute'
+INTEGRITY_JOB_ID = 'db_integrity_check'
+
 class ScheduleManager:
     """Manages automated scheduling of Transaction calculations"""
     
-    def __init__(self, base_dir: Path, auto_runner_path: Path):
+    def __init__(self, base_dir: Path, auto_runner_path: Path, runner: Optional[Callable] = None):
+        """
+        Args:
+            runner: Zero-argument callable returning the in-process AutoRunner,
+                or None to use a subprocess for that run
+        """
         self.base_dir = base_dir
         self.auto_runner_path = auto_runner_path
+        self.runner = runner
         self.config_file = base_dir / 'configs' / 'schedule_config.json'
+        self._debounce_lock = threading.Lock()
+        self._burst_started = None
+        self._integrity_db = None
         self.scheduler = BackgroundScheduler()
         self.scheduler.start()
         logger.info("Scheduler initialized")
@@ -131,10 +175,21 @@ class ScheduleManager:
             logger.error(f"Failed to save schedule config: {e}")
             raise
     
-    def run_transaction_calculation(self, cascade: bool = False):
+    def run_transaction_calculation(self, cascade: bool = False, only_if_changed: bool = False):
         """Execute Transaction calculation (called by scheduler)"""
         try:
-            logger.info(f"Running scheduled Transaction calculation (cascade={cascade})")
+            logger.info(f"Running scheduled Transaction calculation (cascade={cascade}, only_if_changed={only_if_changed})")
+            runner = self.runner() if self.runner else None
+            if runner is not None:
+                if runner.running:
+                    logger.warning("Skipping scheduled Transaction calculation: a calculation is already running")
+                    return
+                if only_if_changed and not runner.has_pending_changes():
+                    logger.info("Skipping scheduled Transaction calculation: no data changes since the last run")
+                    return
+                runner.run(cascade=cascade)
+                logger.info("Scheduled Transaction calculation completed successfully")
+                return
             cmd = [sys.executable, str(self.auto_runner_path)]
             if cascade:
                 cmd.append('--cascade')
@@ -149,8 +204,67 @@ class ScheduleManager:
         except Exception as e:
             logger.error(f"Error running scheduled Transaction calculation: {e}")
     
+    def notify_data_changed(self):
+        """Debounced recompute after a data edit (when on_change is enabled)"""
+        config = self.load_schedule_config()
+        settings = config.get('on_change') or {}
+        if not (config.get('enabled', False) and settings.get('enabled', False)):
+            return
+        now = datetime.now()
+        delay = timedelta(seconds=float(settings.get('debounce_seconds', SCHEDULE_DEBOUNCE_SECONDS)))
+        with self._debounce_lock:
+            if self._burst_started is None:
+                self._burst_started = now
+            run_at = min(now + delay, self._burst_started + timedelta(seconds=SCHEDULE_DEBOUNCE_MAX_SECONDS))
+            self.scheduler.add_job(
+                func=self._run_debounced,
+                trigger=DateTrigger(run_date=run_at),
+                id=ON_CHANGE_JOB_ID,
+                kwargs={'cascade': bool(settings.get('cascade', False))},
+                replace_existing=True
+            )
+
+    def _run_debounced(self, cascade: bool = False):
+        with self._debounce_lock:
+            self._burst_started = None
+        self.run_transaction_calculation(cascade=cascade, only_if_changed=True)
+
+    def schedule_integrity_check(self, db_file: Callable[[], Path], hours: float = INTEGRITY_FULL_CHECK_HOURS):
+        """Run the full integrity check every `hours` (db_file returns the current database path)"""
+        self._integrity_db = db_file
+        next_run = datetime.now() + timedelta(seconds=INTEGRITY_FULL_CHECK_DELAY_SECONDS)
+        last_full = integrity.summary(db_file())['full']
+        if last_full:
+            next_run = max(next_run, datetime.fromisoformat(last_full['checked_at']) + timedelta(hours=hours))
+        self.scheduler.add_job(
+            func=self.run_integrity_check,
+            trigger=IntervalTrigger(hours=hours),
+            id=INTEGRITY_JOB_ID,
+            next_run_time=next_run,
+            replace_existing=True
+        )
+        logger.info(f"Database integrity check scheduled every {hours}h (next: {next_run:%Y-%m-%d %H:%M})")
+
+    def run_integrity_check(self):
+        """Full PRAGMA integrity_check (called by scheduler)"""
+        try:
+            runner = self.runner() if self.runner else None
+            if runner is not None and runner.running:
+                logger.info("Skipping database integrity check: a calculation is running")
+                return
+            db_file = Path(self._integrity_db())
+            if not db_file.exists():
+                return
+            result = integrity.run_check(db_file, 'full')
+            if result == 'ok':
+                logger.info("Database integrity check passed")
+            else:
+                logger.error(f"Database integrity check reported problems: {result}")
+        except Exception as e:
+            logger.error(f"Error running database integrity check: {e}")
+
     def add_schedule(self, schedule_id: str, frequency: str, time_str: str = None, 
-                    day_of_week: str = None, cascade: bool = False):
+                    day_of_week: str = None, cascade: bool = False, only_if_changed: bool = False):
         """Add or update a schedule
         
         Args:
@@ -159,6 +273,7 @@ class ScheduleManager:
             time_str: Time in HH:MM format (for daily/weekly/monthly)
             day_of_week: Day name for weekly (mon, tue, wed, thu, fri, sat, sun)
             cascade: Whether to run in cascade mode
+            only_if_changed: Skip the run when no data changed since the last one
         """
         # Remove existing schedule if present
         try:
@@ -197,7 +312,7 @@ class ScheduleManager:
             func=self.run_transaction_calculation,
             trigger=trigger,
             id=schedule_id,
-            kwargs={'cascade': cascade},
+            kwargs={'cascade': cascade, 'only_if_changed': only_if_changed},
             replace_existing=True
         )
         
@@ -226,9 +341,10 @@ class ScheduleManager:
         """Reload all schedules from config file"""
         config = self.load_schedule_config()
         
-        # Clear existing schedules
+        # Clear existing schedules (a pending on-change recompute and the integrity check are kept)
         for job in self.scheduler.get_jobs():
-            self.scheduler.remove_job(job.id)
+            if job.id not in (ON_CHANGE_JOB_ID, INTEGRITY_JOB_ID):
+                self.scheduler.remove_job(job.id)
         
         if not config.get('enabled', False):
             logger.info("Scheduling is disabled")
@@ -242,7 +358,8 @@ class ScheduleManager:
                     frequency=schedule['frequency'],
                     time_str=schedule.get('time'),
                     day_of_week=schedule.get('day_of_week'),
-                    cascade=schedule.get('cascade', False)
+                    cascade=schedule.get('cascade', False),
+                    only_if_changed=schedule.get('only_if_changed', False)
                 )
             except Exception as e:
                 logger.error(f"Failed to add schedule {schedule.get('id')}: {e}")
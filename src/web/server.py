@@ -113,7 +113,7 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-from flask import Flask, render_template, request, jsonify, session, send_file, redirect, url_for, g
+from flask import Flask, Response, render_template, request, jsonify, session, send_file, redirect, url_for, g
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -136,6 +136,24 @@ import src.core.engine as txn_app  # Import for status updates
 from src.core.engine import DatabaseManager  # For unified CSV ingestion
 from src.processors import Ingestor
 from src.web.scheduler import ScheduleManager
+from src.web.streaming import iter_cursor, stream_format, streamed_response, zip_response
+from src.web.metrics import PROMETHEUS_MIMETYPE, MetricsConnection, RequestMetrics
+from src.core.backup import (
+    build_backup_zip,
+    build_trades_export_zip,
+    decrypt_file,
+    iter_backup_file
+)
+from src.core.snapshots import snapshot_store_for
+from src.core.jobs import JobManager, JobCancelled, job_store_for, child_env, hook_for_job
+from src.utils.progress import NULL_PROGRESS, ProgressRingBuffer
+from src.utils.profiling import list_profiles
+from src.utils.file_cache import FileStampCache
+from src.core.trade_stats import read_trade_stats
+from src.core import columnar, report_catalog
+from src.core import integrity
+from src.utils.constants import INTEGRITY_FULL_CHECK_HOURS, METRICS_RATE_LIMIT, PROFILE_LIST_LIMIT
+from src.core.trade_queries import list_trades
 from src.core.encryption import (
     DatabaseEncryption,
     get_api_key_cipher,
@@ -214,6 +232,17 @@ app.config['WTF_CSRF_TIME_LIMIT'] = None  # CSRF tokens don't expire
 
 # Progress tracking for long-running operations
 progress_store = {}
+# Recent pipeline progress events (stage, rate, ETA) per task, for /api/progress
+progress_buffer = ProgressRingBuffer()
+# Report-derived values (year folder listing, report catalogs, loss analysis) reused until the path changes
+report_file_cache = FileStampCache()
+# Latest review warnings/suggestions per year folder (keyed on the folder, like its catalog listing)
+review_cache = FileStampCache(max_entries=8)
+# Per-endpoint latency, response size and query metrics for /api/metrics. Registered
+# before the rate limiter and security hooks: timing starts first and is recorded last
+request_metrics = RequestMetrics()
+app.before_request(request_metrics.start_request)
+app.after_request(request_metrics.finish_request)
 
 # Disable CORS - API should only be accessible from same origin (web UI)
 # CORS(app)  # Removed for security
@@ -716,14 +745,17 @@ def generate_self_signed_cert():
 # ==========================================
 
 def get_db_connection():
-    """Get database connection with encryption layer"""
-    conn = sqlite3.connect(str(DB_FILE))
+    """Get database connection with encryption layer (statements are counted in request_metrics)"""
+    conn = sqlite3.connect(str(DB_FILE), factory=MetricsConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
-def _ingest_csv_with_engine(saved_path: Path):
+def _ingest_csv_with_engine(saved_path: Path, progress=NULL_PROGRESS):
     """Use the engine's Ingestor to process a single CSV file into trades and archive it.
-    Returns a summary dict with total_rows and new_trades.
+    Returns a summary dict with total_rows, new_trades and invalid_trades
+    (trades that failed TransactionValidator checks; they are still imported).
+    progress is a ProgressHook for the csv_rows stage; if a subscriber raises
+    JobCancelled the import is rolled back and the file is left in place.
     """
     # Count CSV rows (excluding header) for reporting
     total_rows = 0
@@ -739,20 +771,183 @@ def _ingest_csv_with_engine(saved_path: Path):
     try:
         before = db.cursor.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
         ing = Ingestor(db)
+        ing.progress = progress
         batch = f"CSV_{saved_path.name}_{datetime.now().strftime('%Y%m%d')}"
         # Process and archive using engine logic
-        ing._proc_csv_smart(saved_path, batch)
+        try:
+            ing._proc_csv_smart(saved_path, batch)
+        except JobCancelled:
+            db.conn.rollback()
+            raise
         ing._archive(saved_path)
         db.commit()
         after = db.cursor.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
         delta = max(0, int(after) - int(before))
-        return { 'total_rows': total_rows, 'new_trades': delta }
+        validation = ing.last_validation or {}
+        return { 'total_rows': total_rows, 'new_trades': delta, 'invalid_trades': validation.get('invalid', 0) }
     finally:
         try:
             db.close()
         except Exception:
             pass
 
+# ==========================================
+# BACKGROUND JOBS
+# ==========================================
+
+_job_managers = {}
+_job_managers_lock = threading.Lock()
+
+def get_job_manager():
+    """Job manager for the current database (created on first use)."""
+    db_path = Path(DB_FILE)
+    with _job_managers_lock:
+        manager = _job_managers.get(db_path)
+        if manager is None:
+            manager = JobManager(job_store_for(db_path))
+            manager.register('csv_upload', _csv_upload_job)
+            manager.register('transaction_calc', _transaction_calc_job)
+            manager.register('ml_reprocess', _ml_reprocess_job)
+            _job_managers[db_path] = manager
+    return manager
+
+_history_stores = {}
+_history_stores_lock = threading.Lock()
+
+def get_transaction_history():
+    """Change history store (created once per history file, so the schema setup and
+    legacy JSONL import do not run on every edit)."""
+    from src.advanced_ml_features import TransactionHistory
+    path = TransactionHistory.DEFAULT_FILE.resolve()
+    with _history_stores_lock:
+        history = _history_stores.get(path)
+        if history is None or not history.db_file.exists():
+            history = TransactionHistory(path)
+            _history_stores[path] = history
+    return history
+
+def _csv_upload_job(reporter, path):
+    """Job: ingest an uploaded CSV file."""
+    saved_path = Path(path)
+    reporter.stage(0, f'Importing {saved_path.name}...')
+    progress = hook_for_job(reporter, {'csv_rows': (0, 100)}, progress_buffer)
+    summary = _ingest_csv_with_engine(saved_path, progress=progress)
+    try:
+        txn_app.mark_data_changed()
+    except Exception:
+        pass
+    summary['filename'] = saved_path.name
+    summary['message'] = f"Imported {summary.get('new_trades', 0)} trades from {saved_path.name} (rows: {summary.get('total_rows', 0)})"
+    return summary
+
+def _isolated_runs():
+    """True when config.json asks for Auto_Runner to run in a subprocess."""
+    return bool(txn_app.load_config().get('performance', {}).get('isolated_runs', False))
+
+def _auto_runner_script():
+    return next((p for p in (BASE_DIR / 'auto_runner.py', BASE_DIR / 'Auto_Runner.py') if p.exists()),
+                BASE_DIR / 'auto_runner.py')
+
+def get_auto_runner():
+    """Shared in-process Auto_Runner (warm caches, one run at a time), or None in isolated mode."""
+    if _isolated_runs():
+        return None
+    if 'Auto_Runner' not in sys.modules:
+        context = txn_app.RUN_CONTEXT
+        import Auto_Runner
+        # Importing the script module marks the whole process as an autorunner; runs set that themselves
+        if txn_app.RUN_CONTEXT != context:
+            txn_app.set_run_context(context)
+    return sys.modules['Auto_Runner'].get_runner()
+
+def _friendly_calc_error(error_msg):
+    """Map a calculation failure to a message with guidance for the user."""
+    if 'rate limit' in error_msg.lower() or '429' in error_msg:
+        return 'API rate limit reached. Please wait a few minutes and try again, or the system will use cached price data.'
+    if 'api' in error_msg.lower() and ('timeout' in error_msg.lower() or 'connection' in error_msg.lower()):
+        return 'API connection error. Check your internet connection and try again.'
+    return f'Transaction calculation failed: {error_msg}'
+
+def _transaction_calc_job(reporter, cascade=False, force=False):
+    """Job: run Auto_Runner in-process (or in a subprocess when isolated_runs is set)."""
+    runner = get_auto_runner()
+    if runner is None:
+        return _transaction_calc_subprocess(reporter, cascade, force)
+    reporter.stage(0, 'Running Transaction calculation...')
+    try:
+        result = runner.run(cascade=cascade, reporter=reporter, force=force)
+    except JobCancelled:
+        raise
+    except Exception as e:
+        raise RuntimeError(_friendly_calc_error(str(e)[:500])) from e
+    message = 'Transaction calculation completed successfully'
+    if result.get('skipped'):
+        message += f" ({len(result['years'])} year(s) recomputed, {len(result['skipped'])} already up to date)"
+    return {'message': message, 'years': result['years'], 'skipped': result['skipped'], 'cache': result['cache']}
+
+def _transaction_calc_subprocess(reporter, cascade=False, force=False):
+    """Run Auto_Runner in a subprocess that reports progress into this job."""
+    cmd = [sys.executable, str(_auto_runner_script())]
+    if cascade:
+        cmd.append('--cascade')
+    if force:
+        cmd.append('--force')
+    reporter.stage(0, 'Running Transaction calculation...')
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, env=child_env(reporter))
+    try:
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=1)
+                break
+            except subprocess.TimeoutExpired:
+                reporter.check_cancelled()
+    except JobCancelled:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        raise
+
+    if process.returncode != 0:
+        error_msg = stderr[:500] if stderr else 'Unknown error'
+        # Check for specific error types to provide better user guidance
+        raise RuntimeError(_friendly_calc_error(error_msg))
+    return {'message': 'Transaction calculation completed successfully'}
+
+def _ml_reprocess_job(reporter, model_name='shim', batch_size=10, auto_shutdown=True,
+                      confidence_threshold=None):
+    """Job: reclassify every stored trade through rules + ML."""
+    from src.ml_service import MLService
+    from src.ml_reprocess import reprocess_transactions
+
+    ml_service = MLService(mode=model_name)
+    worker_conn = get_db_connection()
+    log_file = OUTPUT_DIR / 'logs' / 'model_suggestions.log'
+    progress = hook_for_job(reporter, {'ml_reprocess': (0, 100)}, progress_buffer)
+    try:
+        stats = reprocess_transactions(worker_conn, ml_service, batch_size, log_file,
+                                       lambda done, total: progress.update('ml_reprocess', done, total),
+                                       confidence_threshold=(txn_app.ML_CONFIDENCE_THRESHOLD
+                                                             if confidence_threshold is None
+                                                             else float(confidence_threshold)))
+        txn_app.mark_data_changed()
+    finally:
+        worker_conn.close()
+        if auto_shutdown:
+            try:
+                ml_service.shutdown()
+            except Exception:
+                pass
+    return {
+        'message': f"Reprocessing complete. Analyzed {stats['processed']} transactions, updated {stats['updated']}.",
+        'processed': stats['processed'],
+        'updated': stats['updated'],
+        'cache_hit_rate': stats.get('cache_hit_rate', 0.0),
+        'tokens_per_sec': stats.get('tokens_per_sec', 0.0)
+    }
+
 def init_db():
     """Initialize database tables"""
     conn = get_db_connection()
@@ -791,49 +986,10 @@ def decrypt_sensitive_field(value):
 def get_transactions(page=1, per_page=50, search=None, filters=None):
     """Get transactions with pagination and filtering - encrypted response"""
     conn = get_db_connection()
-    
-    query = "SELECT * FROM trades"
-    params = []
-    where_clauses = []
-    
-    if search:
-        where_clauses.append("(coin LIKE ? OR source LIKE ? OR action LIKE ?)")
-        search_term = f"%{search}%"
-        params.extend([search_term, search_term, search_term])
-    
-    if filters:
-        if filters.get('coin'):
-            where_clauses.append("coin = ?")
-            params.append(filters['coin'])
-        if filters.get('action'):
-            where_clauses.append("action = ?")
-            params.append(filters['action'])
-        if filters.get('source'):
-            where_clauses.append("source = ?")
-            params.append(filters['source'])
-    
-    if where_clauses:
-        query += " WHERE " + " AND ".join(where_clauses)
-    
-    # Get total count
-    count_query = query.replace("SELECT *", "SELECT COUNT(*)")
-    total = conn.execute(count_query, params).fetchone()[0]
-    
-    # Add pagination
-    query += " ORDER BY date DESC LIMIT ? OFFSET ?"
-    params.extend([per_page, (page - 1) * per_page])
-    
-    cursor = conn.execute(query, params)
-    transactions = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    
-    return {
-        'transactions': transactions,
-        'total': total,
-        'page': page,
-        'per_page': per_page,
-        'total_pages': (total + per_page - 1) // per_page
-    }
+    try:
+        return list_trades(conn, page, per_page, search, filters)
+    finally:
+        conn.close()
 
 # ==========================================
 # AUTHENTICATION ROUTES
@@ -1039,100 +1195,78 @@ def change_password():
 def download_full_backup():
     """Download full system backup (Database export to CSV)"""
     try:
-        memory_file = io.BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            # Export trades table to CSV
+        BACKUPS_DIR.mkdir(parents=True, exist_ok=True)
+        workdir = Path(tempfile.mkdtemp(prefix='export_', dir=BACKUPS_DIR))
+        try:
+            zip_path = workdir / 'trades_export.zip'
             conn = get_db_connection()
             try:
-                cursor = conn.execute("SELECT * FROM trades")
-                rows = cursor.fetchall()
-                
-                # Get column names
-                if cursor.description:
-                    column_names = [description[0] for description in cursor.description]
-                    
-                    # Write CSV to string buffer
-                    csv_buffer = io.StringIO()
-                    writer = csv.writer(csv_buffer)
-                    writer.writerow(column_names)
-                    writer.writerows(rows)
-                    
-                    # Add CSV to zip
-                    zf.writestr('trades_export.csv', csv_buffer.getvalue())
-                else:
-                    # Empty table or error
-                    zf.writestr('trades_export.csv', 'No data found')
-                
+                build_trades_export_zip(conn, zip_path)
             finally:
                 conn.close()
+        except Exception:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
         
-        memory_file.seek(0)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        return send_file(
-            memory_file,
+        return Response(
+            iter_backup_file(zip_path, cleanup_dir=workdir),
             mimetype='application/zip',
-            as_attachment=True,
-            download_name=f'crypto_transaction_db_export_{timestamp}.zip'
+            headers={
+                'Content-Disposition': f'attachment; filename=crypto_transaction_db_export_{timestamp}.zip',
+                'Content-Length': str(zip_path.stat().st_size)
+            }
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _backup_file_groups():
+    """Files included in a zip backup; the first existing path of each group wins."""
+    return [
+        [(BASE_DIR / '.db_key', '.db_key')],
+        [(BASE_DIR / '.db_salt', '.db_salt')],
+        [(CONFIG_FILE, 'config.json')],
+        # Prefer encrypted API keys / wallets if present
+        [(API_KEYS_ENCRYPTED_FILE, 'api_keys_encrypted.json'), (API_KEYS_FILE, 'api_keys.json')],
+        [(WALLETS_ENCRYPTED_FILE, 'wallets_encrypted.json'), (WALLETS_FILE, 'wallets.json')],
+        [(USERS_FILE, 'web_users.json')],
+    ]
+
 @app.route('/api/backup/zip', methods=['GET'])
 @login_required
 def api_backup_zip():
-    """Create a zip backup with necessary files. If DB key is available, encrypt zip with it."""
+    """Create a zip backup with necessary files. If DB key is available, encrypt zip with it.
+
+    The archive is built on disk from an online-backup snapshot of the database
+    and streamed to the client in chunks, so memory use does not grow with DB size.
+    """
     try:
         BACKUPS_DIR.mkdir(parents=True, exist_ok=True)
-
-        # Build zip in-memory
-        raw_zip = io.BytesIO()
-        with zipfile.ZipFile(raw_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
-            manifest = {
-                'created': datetime.now(timezone.utc).isoformat(),
-                'version': '1.0',
-                'includes': []
-            }
-
-            def add_file(path: Path, arcname: str):
-                if path.exists():
-                    zf.write(str(path), arcname)
-                    manifest['includes'].append(arcname)
-
-            add_file(DB_FILE, 'crypto_master.db')
-            add_file(BASE_DIR / '.db_key', '.db_key')
-            add_file(BASE_DIR / '.db_salt', '.db_salt')
-            add_file(CONFIG_FILE, 'config.json')
-            # Prefer encrypted API keys if present
-            add_file(API_KEYS_ENCRYPTED_FILE, 'api_keys_encrypted.json')
-            if 'api_keys_encrypted.json' not in manifest['includes']:
-                add_file(API_KEYS_FILE, 'api_keys.json')
-
-            # Prefer encrypted wallets if present
-            add_file(WALLETS_ENCRYPTED_FILE, 'wallets_encrypted.json')
-            if 'wallets_encrypted.json' not in manifest['includes']:
-                add_file(WALLETS_FILE, 'wallets.json')
-            add_file(USERS_FILE, 'web_users.json')
-
-            # Add manifest
-            zf.writestr('manifest.json', json.dumps(manifest, indent=2))
-
-        raw_zip.seek(0)
+        workdir = Path(tempfile.mkdtemp(prefix='backup_', dir=BACKUPS_DIR))
+        try:
+            zip_path = build_backup_zip(workdir / 'backup.zip', DB_FILE, _backup_file_groups())
+        except Exception:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
 
         # Encrypt zip with DB key if available
         db_key = app.config.get('DB_ENCRYPTION_KEY')
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         if db_key:
-            cipher = Fernet(db_key)
-            encrypted_bytes = cipher.encrypt(raw_zip.getvalue())
-            mem = io.BytesIO(encrypted_bytes)
-            mem.seek(0)
+            body = iter_backup_file(zip_path, cipher=Fernet(db_key), cleanup_dir=workdir)
             filename = f'backup_{timestamp}.zip.enc'
             mimetype = 'application/octet-stream'
-            return send_file(mem, mimetype=mimetype, as_attachment=True, download_name=filename)
+            headers = {'Content-Disposition': f'attachment; filename={filename}'}
         else:
             # Fallback: return plain zip
+            body = iter_backup_file(zip_path, cleanup_dir=workdir)
             filename = f'backup_{timestamp}.zip'
-            return send_file(raw_zip, mimetype='application/zip', as_attachment=True, download_name=filename)
+            mimetype = 'application/zip'
+            headers = {
+                'Content-Disposition': f'attachment; filename={filename}',
+                'Content-Length': str(zip_path.stat().st_size)
+            }
+        return Response(body, mimetype=mimetype, headers=headers)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1149,252 +1283,258 @@ def api_wizard_restore_backup():
         if not file.filename:
             return jsonify({'error': 'Empty filename'}), 400
 
-        data = file.read()
-        filename = file.filename.lower()
+        # Spool the upload to disk; decryption and extraction stream from there
+        BACKUPS_DIR.mkdir(parents=True, exist_ok=True)
+        workdir = Path(tempfile.mkdtemp(prefix='restore_', dir=BACKUPS_DIR))
+        upload_path = workdir / 'upload'
+        file.save(str(upload_path))
+
+        try:
+            filename = file.filename.lower()
 
-        # If encrypted, require password to decrypt with password-derived key
-        if filename.endswith('.enc'):
-            password = request.form.get('password', '')
-            if not password:
-                return jsonify({'error': 'Password required for encrypted backup'}), 400
+            # If encrypted, require password to decrypt with password-derived key
+            if filename.endswith('.enc'):
+                password = request.form.get('password', '')
+                if not password:
+                    return jsonify({'error': 'Password required for encrypted backup'}), 400
 
-            # Decrypt backup using the provided password (user's web account password)
-            # The backup contains .db_key and .db_salt files encrypted with their web password
-            from Crypto_Transaction_Engine import DatabaseEncryption
+                # Decrypt backup using the provided password (user's web account password)
+                # The backup contains .db_key and .db_salt files encrypted with their web password
+                from Crypto_Transaction_Engine import DatabaseEncryption
             
-            # First try to extract .db_key and .db_salt from the encrypted backup
-            # We need to decrypt the backup first to get these files
-            db_key_bytes = None
+                # First try to extract .db_key and .db_salt from the encrypted backup
+                # We need to decrypt the backup first to get these files
+                db_key_bytes = None
             
-            try:
-                # Try using existing local key files if present
-                if (BASE_DIR / '.db_key').exists() and (BASE_DIR / '.db_salt').exists():
-                    with open(BASE_DIR / '.db_key', 'rb') as f:
-                        enc_key = f.read()
-                    with open(BASE_DIR / '.db_salt', 'rb') as f:
-                        salt = f.read()
-                    db_key_bytes = DatabaseEncryption.decrypt_key(enc_key, password, salt)
-            except Exception:
-                pass
+                try:
+                    # Try using existing local key files if present
+                    if (BASE_DIR / '.db_key').exists() and (BASE_DIR / '.db_salt').exists():
+                        with open(BASE_DIR / '.db_key', 'rb') as f:
+                            enc_key = f.read()
+                        with open(BASE_DIR / '.db_salt', 'rb') as f:
+                            salt = f.read()
+                        db_key_bytes = DatabaseEncryption.decrypt_key(enc_key, password, salt)
+                except Exception:
+                    pass
             
-            if db_key_bytes is None:
-                # Extract key files from backup to decrypt with user's password
-                # The backup itself is encrypted with the DB key, so we need to:
-                # 1. Decrypt the .zip.enc outer layer (may need the DB key from inside)
-                # This is a bootstrapping problem - return helpful error
-                return jsonify({'error': 'Unable to decrypt backup. Please ensure you are using the correct web account password.'}), 400
+                if db_key_bytes is None:
+                    # Extract key files from backup to decrypt with user's password
+                    # The backup itself is encrypted with the DB key, so we need to:
+                    # 1. Decrypt the .zip.enc outer layer (may need the DB key from inside)
+                    # This is a bootstrapping problem - return helpful error
+                    return jsonify({'error': 'Unable to decrypt backup. Please ensure you are using the correct web account password.'}), 400
 
-            try:
-                cipher = Fernet(db_key_bytes)
-                zip_bytes = cipher.decrypt(data)
-            except Exception:
-                return jsonify({'error': 'Invalid password or corrupted backup'}), 400
-        else:
-            zip_bytes = data
-
-        # Extract zip bytes
-        tmp_mem = io.BytesIO(zip_bytes)
-        with zipfile.ZipFile(tmp_mem, 'r') as zf:
-            members = zf.namelist()
-            def restore_member(name, target_path: Path):
-                if name in members:
-                    target_path.parent.mkdir(parents=True, exist_ok=True)
-                    with zf.open(name) as src, open(target_path, 'wb') as dst:
-                        shutil.copyfileobj(src, dst)
-
-            # Determine restore mode (merge or replace). Default: merge
-            mode = request.form.get('mode', 'merge').lower()
-
-            # Handle database: merge or replace
-            if 'crypto_master.db' in members:
-                if mode == 'merge':
-                    fallback_to_replace = False
-                    tmpdb_path = None
-                    # Ensure target DB exists and has required schema
-                    try:
-                        conn_init = sqlite3.connect(str(DB_FILE))
-                        cur_init = conn_init.cursor()
-                        cur_init.execute("""
-                            CREATE TABLE IF NOT EXISTS trades (
-                                id TEXT PRIMARY KEY,
-                                date TEXT,
-                                source TEXT,
-                                destination TEXT,
-                                action TEXT,
-                                coin TEXT,
-                                amount TEXT,
-                                price_usd TEXT,
-                                fee TEXT,
-                                fee_coin TEXT,
-                                batch_id TEXT
-                            )
-                        """)
-                        conn_init.commit()
-                    except Exception:
-                        # If schema init fails for any reason, fallback to replace
-                        fallback_to_replace = True
-                    finally:
-                        try:
-                            conn_init.close()
-                        except Exception:
-                            pass
-                    # Extract backup DB to a temporary file
-                    try:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmpdb:
-                            with zf.open('crypto_master.db') as src:
-                                shutil.copyfileobj(src, tmpdb)
-                            tmpdb_path = Path(tmpdb.name)
-                        # Merge rows using ATTACH and INSERT OR IGNORE by primary key id
-                        conn = None
+                try:
+                    zip_path = decrypt_file(upload_path, workdir / 'backup.zip', Fernet(db_key_bytes))
+                except Exception:
+                    return jsonify({'error': 'Invalid password or corrupted backup'}), 400
+            else:
+                zip_path = upload_path
+
+            # Extract zip members straight from disk
+            with zipfile.ZipFile(zip_path, 'r') as zf:
+                members = zf.namelist()
+                def restore_member(name, target_path: Path):
+                    if name in members:
+                        target_path.parent.mkdir(parents=True, exist_ok=True)
+                        with zf.open(name) as src, open(target_path, 'wb') as dst:
+                            shutil.copyfileobj(src, dst)
+
+                # Determine restore mode (merge or replace). Default: merge
+                mode = request.form.get('mode', 'merge').lower()
+
+                # Handle database: merge or replace
+                if 'crypto_master.db' in members:
+                    if mode == 'merge':
+                        fallback_to_replace = False
+                        tmpdb_path = None
+                        # Ensure target DB exists and has required schema
                         try:
-                            conn = sqlite3.connect(str(DB_FILE))
-                            cur = conn.cursor()
-                            cur.execute("ATTACH DATABASE ? AS olddb", (str(tmpdb_path),))
-                            has_trades = cur.execute("SELECT name FROM olddb.sqlite_master WHERE type='table' AND name='trades'").fetchone()
-                            if has_trades:
-                                old_cols = [r[1] for r in cur.execute("PRAGMA olddb.table_info(trades)").fetchall()]
-                                target_cols = ['id','date','source','destination','action','coin','amount','price_usd','fee','fee_coin','batch_id']
-                                select_exprs = [f"olddb.trades.{c}" if c in old_cols else f"NULL AS {c}" for c in target_cols]
-                                insert_cols = ",".join(target_cols)
-                                select_sql = ", ".join(select_exprs)
-                                cur.execute(f"INSERT OR IGNORE INTO trades ({insert_cols}) SELECT {select_sql} FROM olddb.trades")
-                                conn.commit()
+                            conn_init = sqlite3.connect(str(DB_FILE))
+                            cur_init = conn_init.cursor()
+                            cur_init.execute("""
+                                CREATE TABLE IF NOT EXISTS trades (
+                                    id TEXT PRIMARY KEY,
+                                    date TEXT,
+                                    source TEXT,
+                                    destination TEXT,
+                                    action TEXT,
+                                    coin TEXT,
+                                    amount TEXT,
+                                    price_usd TEXT,
+                                    fee TEXT,
+                                    fee_coin TEXT,
+                                    batch_id TEXT
+                                )
+                            """)
+                            conn_init.commit()
                         except Exception:
-                            # If ATTACH or SELECT fails (e.g., not a real SQLite file), fallback to replace
+                            # If schema init fails for any reason, fallback to replace
                             fallback_to_replace = True
                         finally:
                             try:
-                                if conn:
-                                    conn.execute("DETACH DATABASE olddb")
+                                conn_init.close()
                             except Exception:
                                 pass
-                            if conn:
-                                conn.close()
-                    finally:
+                        # Extract backup DB to a temporary file
                         try:
-                            if tmpdb_path:
-                                tmpdb_path.unlink(missing_ok=True)
-                        except Exception:
-                            pass
-                    if fallback_to_replace:
-                        # Replace DB file if merge not possible
+                            with tempfile.NamedTemporaryFile(delete=False, suffix='.db', dir=workdir) as tmpdb:
+                                with zf.open('crypto_master.db') as src:
+                                    shutil.copyfileobj(src, tmpdb)
+                                tmpdb_path = Path(tmpdb.name)
+                            # Merge rows using ATTACH and INSERT OR IGNORE by primary key id
+                            conn = None
+                            try:
+                                conn = sqlite3.connect(str(DB_FILE))
+                                cur = conn.cursor()
+                                cur.execute("ATTACH DATABASE ? AS olddb", (str(tmpdb_path),))
+                                has_trades = cur.execute("SELECT name FROM olddb.sqlite_master WHERE type='table' AND name='trades'").fetchone()
+                                if has_trades:
+                                    old_cols = [r[1] for r in cur.execute("PRAGMA olddb.table_info(trades)").fetchall()]
+                                    target_cols = ['id','date','source','destination','action','coin','amount','price_usd','fee','fee_coin','batch_id']
+                                    select_exprs = [f"olddb.trades.{c}" if c in old_cols else f"NULL AS {c}" for c in target_cols]
+                                    insert_cols = ",".join(target_cols)
+                                    select_sql = ", ".join(select_exprs)
+                                    cur.execute(f"INSERT OR IGNORE INTO trades ({insert_cols}) SELECT {select_sql} FROM olddb.trades")
+                                    conn.commit()
+                            except Exception:
+                                # If ATTACH or SELECT fails (e.g., not a real SQLite file), fallback to replace
+                                fallback_to_replace = True
+                            finally:
+                                try:
+                                    if conn:
+                                        conn.execute("DETACH DATABASE olddb")
+                                except Exception:
+                                    pass
+                                if conn:
+                                    conn.close()
+                        finally:
+                            try:
+                                if tmpdb_path:
+                                    tmpdb_path.unlink(missing_ok=True)
+                            except Exception:
+                                pass
+                        if fallback_to_replace:
+                            # Replace DB file if merge not possible
+                            restore_member('crypto_master.db', DB_FILE)
+                    else:
+                        # Replace DB file
                         restore_member('crypto_master.db', DB_FILE)
-                else:
-                    # Replace DB file
-                    restore_member('crypto_master.db', DB_FILE)
 
-            restore_member('.db_key', BASE_DIR / '.db_key')
-            restore_member('.db_salt', BASE_DIR / '.db_salt')
-            restore_member('config.json', CONFIG_FILE)
+                restore_member('.db_key', BASE_DIR / '.db_key')
+                restore_member('.db_salt', BASE_DIR / '.db_salt')
+                restore_member('config.json', CONFIG_FILE)
             
-            # Handle API keys: merge or replace based on mode
-            if mode == 'merge':
-                # Load existing API keys
-                existing_api_keys = {}
-                try:
-                    existing_api_keys = load_api_keys_file()
-                except Exception:
-                    pass
-                
-                # Extract and load backup API keys to temp location
-                backup_api_keys = {}
-                if 'api_keys_encrypted.json' in members:
-                    try:
-                        with zf.open('api_keys_encrypted.json') as src:
-                            backup_data = json.load(src)
-                            if isinstance(backup_data, dict) and 'ciphertext' in backup_data:
-                                backup_api_keys = decrypt_api_keys(backup_data['ciphertext']) or {}
-                    except Exception:
-                        pass
-                elif 'api_keys.json' in members:
+                # Handle API keys: merge or replace based on mode
+                if mode == 'merge':
+                    # Load existing API keys
+                    existing_api_keys = {}
                     try:
-                        with zf.open('api_keys.json') as src:
-                            backup_api_keys = json.load(src)
+                        existing_api_keys = load_api_keys_file()
                     except Exception:
                         pass
                 
-                # Merge: backup keys take precedence, but keep existing keys not in backup
-                merged_api_keys = {**existing_api_keys, **backup_api_keys}
+                    # Extract and load backup API keys to temp location
+                    backup_api_keys = {}
+                    if 'api_keys_encrypted.json' in members:
+                        try:
+                            with zf.open('api_keys_encrypted.json') as src:
+                                backup_data = json.load(src)
+                                if isinstance(backup_data, dict) and 'ciphertext' in backup_data:
+                                    backup_api_keys = decrypt_api_keys(backup_data['ciphertext']) or {}
+                        except Exception:
+                            pass
+                    elif 'api_keys.json' in members:
+                        try:
+                            with zf.open('api_keys.json') as src:
+                                backup_api_keys = json.load(src)
+                        except Exception:
+                            pass
                 
-                # Save merged result
-                if merged_api_keys:
-                    try:
-                        save_api_keys_file(merged_api_keys)
-                    except Exception:
-                        pass
-            else:
-                # Replace mode: just restore from backup
-                if 'api_keys_encrypted.json' in members:
-                    restore_member('api_keys_encrypted.json', API_KEYS_ENCRYPTED_FILE)
+                    # Merge: backup keys take precedence, but keep existing keys not in backup
+                    merged_api_keys = {**existing_api_keys, **backup_api_keys}
+                
+                    # Save merged result
+                    if merged_api_keys:
+                        try:
+                            save_api_keys_file(merged_api_keys)
+                        except Exception:
+                            pass
                 else:
-                    restore_member('api_keys.json', API_KEYS_FILE)
+                    # Replace mode: just restore from backup
+                    if 'api_keys_encrypted.json' in members:
+                        restore_member('api_keys_encrypted.json', API_KEYS_ENCRYPTED_FILE)
+                    else:
+                        restore_member('api_keys.json', API_KEYS_FILE)
 
-            # Handle wallets: merge or replace based on mode
-            if mode == 'merge':
-                # Load existing wallets
-                existing_wallets = {}
-                try:
-                    existing_wallets = load_wallets_file()
-                except Exception:
-                    pass
-                
-                # Extract and load backup wallets
-                backup_wallets = {}
-                if 'wallets_encrypted.json' in members:
-                    try:
-                        with zf.open('wallets_encrypted.json') as src:
-                            backup_data = json.load(src)
-                            if isinstance(backup_data, dict) and 'ciphertext' in backup_data:
-                                backup_wallets = decrypt_wallets(backup_data['ciphertext']) or {}
-                    except Exception:
-                        pass
-                elif 'wallets.json' in members:
+                # Handle wallets: merge or replace based on mode
+                if mode == 'merge':
+                    # Load existing wallets
+                    existing_wallets = {}
                     try:
-                        with zf.open('wallets.json') as src:
-                            backup_wallets = json.load(src)
+                        existing_wallets = load_wallets_file()
                     except Exception:
                         pass
                 
-                # Merge wallets intelligently
-                merged_wallets = {}
-                all_chains = set(existing_wallets.keys()) | set(backup_wallets.keys())
+                    # Extract and load backup wallets
+                    backup_wallets = {}
+                    if 'wallets_encrypted.json' in members:
+                        try:
+                            with zf.open('wallets_encrypted.json') as src:
+                                backup_data = json.load(src)
+                                if isinstance(backup_data, dict) and 'ciphertext' in backup_data:
+                                    backup_wallets = decrypt_wallets(backup_data['ciphertext']) or {}
+                        except Exception:
+                            pass
+                    elif 'wallets.json' in members:
+                        try:
+                            with zf.open('wallets.json') as src:
+                                backup_wallets = json.load(src)
+                        except Exception:
+                            pass
+                
+                    # Merge wallets intelligently
+                    merged_wallets = {}
+                    all_chains = set(existing_wallets.keys()) | set(backup_wallets.keys())
                 
-                for chain in all_chains:
-                    existing_addrs = existing_wallets.get(chain, [])
-                    backup_addrs = backup_wallets.get(chain, [])
+                    for chain in all_chains:
+                        existing_addrs = existing_wallets.get(chain, [])
+                        backup_addrs = backup_wallets.get(chain, [])
                     
-                    # Normalize to lists
-                    if isinstance(existing_addrs, dict):
-                        existing_addrs = existing_addrs.get('addresses', [])
-                    if not isinstance(existing_addrs, list):
-                        existing_addrs = [existing_addrs] if existing_addrs else []
+                        # Normalize to lists
+                        if isinstance(existing_addrs, dict):
+                            existing_addrs = existing_addrs.get('addresses', [])
+                        if not isinstance(existing_addrs, list):
+                            existing_addrs = [existing_addrs] if existing_addrs else []
                     
-                    if isinstance(backup_addrs, dict):
-                        backup_addrs = backup_addrs.get('addresses', [])
-                    if not isinstance(backup_addrs, list):
-                        backup_addrs = [backup_addrs] if backup_addrs else []
+                        if isinstance(backup_addrs, dict):
+                            backup_addrs = backup_addrs.get('addresses', [])
+                        if not isinstance(backup_addrs, list):
+                            backup_addrs = [backup_addrs] if backup_addrs else []
                     
-                    # Merge and deduplicate addresses
-                    all_addrs = list(set(existing_addrs + backup_addrs))
-                    if all_addrs:
-                        merged_wallets[chain] = all_addrs
+                        # Merge and deduplicate addresses
+                        all_addrs = list(set(existing_addrs + backup_addrs))
+                        if all_addrs:
+                            merged_wallets[chain] = all_addrs
                 
-                # Save merged result
-                if merged_wallets:
-                    try:
-                        save_wallets_file(merged_wallets)
-                    except Exception:
-                        pass
-            else:
-                # Replace mode: just restore from backup
-                if 'wallets_encrypted.json' in members:
-                    restore_member('wallets_encrypted.json', WALLETS_ENCRYPTED_FILE)
+                    # Save merged result
+                    if merged_wallets:
+                        try:
+                            save_wallets_file(merged_wallets)
+                        except Exception:
+                            pass
                 else:
-                    restore_member('wallets.json', WALLETS_FILE)
+                    # Replace mode: just restore from backup
+                    if 'wallets_encrypted.json' in members:
+                        restore_member('wallets_encrypted.json', WALLETS_ENCRYPTED_FILE)
+                    else:
+                        restore_member('wallets.json', WALLETS_FILE)
             
-            restore_member('web_users.json', USERS_FILE)
+                restore_member('web_users.json', USERS_FILE)
 
-        return jsonify({'success': True, 'message': 'Backup restored. Please restart the server.'})
+            return jsonify({'success': True, 'message': 'Backup restored. Please restart the server.'})
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1406,6 +1546,7 @@ def factory_reset():
         # 1. Delete Database
         if DB_FILE.exists():
             os.remove(DB_FILE)
+        shutil.rmtree(snapshot_store_for(DB_FILE).root, ignore_errors=True)
         init_db() # Recreate empty schema
         
         # 2. Delete Configs (encrypted and legacy)
@@ -1759,16 +1900,12 @@ def api_upload_transactions():
         saved_path = UPLOAD_FOLDER / filename
         file.save(str(saved_path))
 
-        summary = _ingest_csv_with_engine(saved_path)
-        try:
-            txn_app.mark_data_changed()
-        except Exception:
-            pass
-
+        job_id = get_job_manager().submit('csv_upload', path=str(saved_path))
         return jsonify({
             'success': True,
-            'total_rows': summary.get('total_rows', 0),
-            'new_trades': summary.get('new_trades', 0)
+            'job_id': job_id,
+            'task_id': job_id,
+            'message': f'Import of {filename} started'
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1862,10 +1999,22 @@ def api_update_transaction(transaction_id):
     query = f"UPDATE trades SET {', '.join(updates)} WHERE id = ?"
     
     try:
+        # Capture previous values so the edit shows up in the change history
+        current = conn.execute("SELECT * FROM trades WHERE id = ?", (transaction_id,)).fetchone()
+        
         conn.execute(query, params)
         conn.commit()
         conn.close()
         
+        if current is not None:
+            changed = [f for f in allowed_fields if f in data]
+            get_transaction_history().record_change(
+                tx_id=str(transaction_id),
+                old_value={f: current[f] for f in changed},
+                new_value={f: data[f] for f in changed},
+                reason='Manual edit (web UI)'
+            )
+        
         # Mark data as changed
         txn_app.mark_data_changed()
         
@@ -1902,13 +2051,8 @@ def api_delete_transaction(transaction_id):
 @login_required
 @web_security_required
 def api_reprocess_all_transactions():
-    """Reprocess all transactions through ML model if enabled"""
+    """Reprocess all transactions through ML model if enabled (background task)"""
     try:
-        from src.ml_service import MLService
-        from src.rules_model_bridge import classify_rules_ml
-        from pathlib import Path
-        import logging
-        
         # Load config to check if ML is enabled
         with open(CONFIG_FILE, 'r') as f:
             config = json.load(f)
@@ -1920,118 +2064,36 @@ def api_reprocess_all_transactions():
                 'message': 'ML fallback is not enabled. Enable it in settings first.'
             }), 400
         
-        # Get all transactions from database
         conn = get_db_connection()
-        cursor = conn.execute("SELECT * FROM trades ORDER BY date ASC")
-        transactions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+        finally:
+            conn.close()
         
-        if not transactions:
-            return jsonify({
+        if not count:
+            return jsonify({'data': json.dumps({
                 'success': True,
                 'message': 'No transactions to reprocess',
                 'count': 0
-            })
-        
-        # Initialize ML service
-        ml_service = MLService(mode=ml_config.get('model_name', 'shim'))
-        
-        # Get batch size from config
-        batch_size = ml_config.get('batch_size', 10)
-        if batch_size < 1:
-            batch_size = 1
-        
-        # Setup logging for suggestions
-        log_dir = OUTPUT_DIR / 'logs'
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / 'model_suggestions.log'
-        
-        # Process transactions in batches
-        processed_count = 0
-        updated_count = 0
-        
-        # Split into batches
-        import gc
-        for batch_start in range(0, len(transactions), batch_size):
-            batch_end = min(batch_start + batch_size, len(transactions))
-            batch = transactions[batch_start:batch_end]
-            
-            for tx in batch:
-                try:
-                    # Convert database row to dict with proper keys
-                    row = {
-                        'description': f"{tx.get('action', '')} {tx.get('coin', '')}",
-                        'amount': tx.get('amount', 0),
-                        'price_usd': tx.get('price_usd', 0),
-                        'coin': tx.get('coin', ''),
-                        'action': tx.get('action', ''),
-                        'source': tx.get('source', ''),
-                        'date': tx.get('date', '')
-                    }
-                    
-                    # Run through ML classification bridge (tries rules first, then ML)
-                    result = classify_rules_ml(row, ml_service)
-                    
-                    processed_count += 1
-                    
-                    # If ML provided a classification different from current, update it
-                    if result.get('source') == 'ml' and result.get('label'):
-                        current_action = tx.get('action', '')
-                        new_action = result['label']
-                        
-                        if current_action != new_action:
-                            conn = get_db_connection()
-                            conn.execute(
-                                "UPDATE trades SET action = ? WHERE id = ?",
-                                (new_action, tx['id'])
-                            )
-                            conn.commit()
-                            conn.close()
-                            updated_count += 1
-                    
-                    # Log the suggestion
-                    if result.get('source') == 'ml':
-                        log_entry = {
-                            'timestamp': datetime.now().isoformat(),
-                            'transaction_id': tx['id'],
-                            'date': tx.get('date', ''),
-                            'coin': tx.get('coin', ''),
-                            'original_action': tx.get('action', ''),
-                            'suggested_action': result.get('label'),
-                            'confidence': result.get('confidence', 0),
-                            'explanation': result.get('explanation', '')
-                        }
-                        with open(log_file, 'a') as f:
-                            f.write(json.dumps(log_entry) + '\n')
-                    
-                except Exception as tx_error:
-                    print(f"Error processing transaction {tx.get('id')}: {tx_error}")
-                    continue
-            
-            # Memory cleanup after each batch
-            if (batch_end % batch_size == 0) or (batch_end == len(transactions)):
-                gc.collect()  # Force garbage collection between batches
-        
-        # Shutdown ML service if configured
-        if ml_config.get('auto_shutdown_after_batch', True):
-            try:
-                ml_service.shutdown()
-            except:
-                pass
-        
-        # Mark data as changed
-        txn_app.mark_data_changed()
+            })})
+        
+        batch_size = max(1, int(ml_config.get('batch_size', 10) or 1))
+        task_id = get_job_manager().submit(
+            'ml_reprocess',
+            model_name=ml_config.get('model_name', 'shim'),
+            batch_size=batch_size,
+            auto_shutdown=ml_config.get('auto_shutdown_after_batch', True),
+            confidence_threshold=ml_config.get('confidence_threshold')
+        )
         
-        return jsonify({
+        return jsonify({'data': json.dumps({
             'success': True,
-            'message': f'Reprocessing complete. Analyzed {processed_count} transactions, updated {updated_count}.',
-            'processed': processed_count,
-            'updated': updated_count
-        })
+            'job_id': task_id,
+            'task_id': task_id,
+            'message': f'Reprocessing {count} transactions started. Progress will be tracked.'
+        })})
     except Exception as e:
-        print(f"Error in reprocess endpoint: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in reprocess endpoint")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -2324,9 +2386,7 @@ def api_aml_detection():
 def api_transaction_history(tx_id):
     """Get transaction history and changes"""
     try:
-        from src.advanced_ml_features import TransactionHistory
-        
-        history_manager = TransactionHistory()
+        history_manager = get_transaction_history()
         
         # Get transaction from database
         conn = get_db_connection()
@@ -2363,11 +2423,13 @@ def api_natural_language_search():
         
         searcher = NaturalLanguageSearch()
         
-        # Get all transactions from database
-        conn = get_db_connection()
-        cursor = conn.execute("SELECT * FROM trades ORDER BY date ASC")
-        transactions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        # Stream trades from the database, pre-filtered in SQL where the query allows
+        where, params = searcher.sql_filter(searcher.parse_query(query))
+        transactions = iter_cursor(get_db_connection, f"SELECT * FROM trades{where} ORDER BY date ASC", params)
+        
+        fmt = stream_format(request)
+        if fmt:
+            return streamed_response(searcher.iter_search(transactions, query), fmt, filename='search_results')
         
         # Search (parse_query is called internally by search)
         results = searcher.search(transactions, query)
@@ -2387,8 +2449,6 @@ def api_natural_language_search():
 def api_update_transaction_with_history():
     """Update transaction and record in history"""
     try:
-        from src.advanced_ml_features import TransactionHistory
-        
         data = request.get_json()
         tx_id = str(data.get('id'))
         old_value = data.get('old_value')
@@ -2399,17 +2459,7 @@ def api_update_transaction_with_history():
         if not all([tx_id, old_value, new_value]):
             return jsonify({'success': False, 'error': 'Missing required fields'}), 400
         
-        history_manager = TransactionHistory()
-        
-        # Record the change
-        history_manager.record_change(
-            tx_id=tx_id,
-            old_value=old_value,
-            new_value=new_value,
-            reason=reason
-        )
-        
-        # Update database
+        # Update database; the change is only recorded once the update commits
         conn = get_db_connection()
         conn.execute(
             f"UPDATE trades SET {field} = ? WHERE id = ?",
@@ -2417,6 +2467,12 @@ def api_update_transaction_with_history():
         )
         conn.commit()
         conn.close()
+        get_transaction_history().record_change(
+            tx_id=tx_id,
+            old_value=old_value,
+            new_value=new_value,
+            reason=reason
+        )
         
         # Mark data as changed
         txn_app.mark_data_changed()
@@ -2450,76 +2506,97 @@ def api_bulk_anomaly_report():
         # Learn patterns first
         pattern_learner.learn_patterns(transactions)
         
-        all_anomalies = []
-        prev_row = None
-        
-        for tx in transactions:
-            # Basic anomaly detection
-            basic_anomalies = anomaly_detector.scan_row(tx, prev_row)
-            for anom in basic_anomalies:
-                all_anomalies.append({
-                    'tx_id': tx.get('id'),
-                    'date': tx.get('date'),
-                    'coin': tx.get('coin'),
-                    'amount': tx.get('amount'),
-                    'type': anom.get('type'),
-                    'severity': anom.get('severity'),
-                    'message': anom.get('message'),
-                    'category': 'basic_anomaly'
-                })
-            
-            # Pattern anomalies
-            pattern_anomalies = pattern_learner.detect_anomalies(tx)
-            for anom in pattern_anomalies:
-                all_anomalies.append({
-                    'tx_id': tx.get('id'),
-                    'date': tx.get('date'),
-                    'coin': tx.get('coin'),
-                    'amount': tx.get('amount'),
-                    'type': anom.get('type'),
-                    'severity': anom.get('severity'),
-                    'message': anom.get('message'),
-                    'category': 'pattern_anomaly'
-                })
-            
-            prev_row = tx
-        
         # Fraud detection (wash sales, pump & dump)
         wash_sales = fraud_detector.detect_wash_sale(transactions)
         pump_dumps = fraud_detector.detect_pump_dump(transactions)
         suspicious_volumes = fraud_detector.detect_suspicious_volume(transactions)
+        fraud_alerts = len(wash_sales) + len(pump_dumps) + len(suspicious_volumes)
         
-        for alert in wash_sales:
-            all_anomalies.append({
-                'tx_id': alert.get('buy_id'),
-                'date': '',
-                'coin': alert.get('coin'),
-                'type': 'wash_sale',
-                'severity': alert.get('severity'),
-                'message': alert.get('message'),
-                'category': 'fraud_detection'
-            })
-        
-        for alert in pump_dumps:
-            all_anomalies.append({
-                'tx_id': alert.get('buy_id'),
-                'coin': alert.get('coin'),
-                'type': 'pump_dump',
-                'severity': alert.get('severity'),
-                'message': alert.get('message'),
-                'category': 'fraud_detection'
-            })
-        
-        for alert in suspicious_volumes:
-            all_anomalies.append({
-                'tx_id': alert.get('tx_id'),
-                'coin': alert.get('coin'),
-                'type': 'suspicious_volume',
-                'severity': alert.get('severity'),
-                'message': alert.get('message'),
-                'category': 'fraud_detection'
-            })
+        def iter_anomalies():
+            # Basic anomaly detection over all rows at once, keyed by row position
+            basic_by_row = anomaly_detector.scan_frame(transactions)
+            
+            for pos, tx in enumerate(transactions):
+                for anom in basic_by_row.get(pos, []):
+                    yield {
+                        'tx_id': tx.get('id'),
+                        'date': tx.get('date'),
+                        'coin': tx.get('coin'),
+                        'amount': tx.get('amount'),
+                        'type': anom.get('type'),
+                        'severity': anom.get('severity'),
+                        'message': anom.get('message'),
+                        'category': 'basic_anomaly'
+                    }
+                
+                # Pattern anomalies
+                pattern_anomalies = pattern_learner.detect_anomalies(tx)
+                for anom in pattern_anomalies:
+                    yield {
+                        'tx_id': tx.get('id'),
+                        'date': tx.get('date'),
+                        'coin': tx.get('coin'),
+                        'amount': tx.get('amount'),
+                        'type': anom.get('type'),
+                        'severity': anom.get('severity'),
+                        'message': anom.get('message'),
+                        'category': 'pattern_anomaly'
+                    }
+            
+            for alert in wash_sales:
+                yield {
+                    'tx_id': alert.get('buy_id'),
+                    'date': '',
+                    'coin': alert.get('coin'),
+                    'type': 'wash_sale',
+                    'severity': alert.get('severity'),
+                    'message': alert.get('message'),
+                    'category': 'fraud_detection'
+                }
+            
+            for alert in pump_dumps:
+                yield {
+                    'tx_id': alert.get('buy_id'),
+                    'coin': alert.get('coin'),
+                    'type': 'pump_dump',
+                    'severity': alert.get('severity'),
+                    'message': alert.get('message'),
+                    'category': 'fraud_detection'
+                }
+            
+            for alert in suspicious_volumes:
+                yield {
+                    'tx_id': alert.get('tx_id'),
+                    'coin': alert.get('coin'),
+                    'type': 'suspicious_volume',
+                    'severity': alert.get('severity'),
+                    'message': alert.get('message'),
+                    'category': 'fraud_detection'
+                }
         
+        fmt = stream_format(request)
+        if fmt == 'csv':
+            return streamed_response(iter_anomalies(), fmt, filename='anomaly_report',
+                                     fieldnames=('tx_id', 'date', 'coin', 'amount', 'type',
+                                                 'severity', 'message', 'category'))
+        if fmt == 'ndjson':
+            # Anomalies as they are produced, then one summary line
+            def with_summary():
+                counts = {}
+                for anomaly in iter_anomalies():
+                    counts[anomaly.get('severity')] = counts.get(anomaly.get('severity'), 0) + 1
+                    yield anomaly
+                yield {'summary': {
+                    'total_anomalies': sum(counts.values()),
+                    'transactions_analyzed': len(transactions),
+                    'high_severity': counts.get('high', 0),
+                    'medium_severity': counts.get('medium', 0),
+                    'low_severity': counts.get('low', 0),
+                    'fraud_alerts': fraud_alerts
+                }}
+            return streamed_response(with_summary(), fmt, filename='anomaly_report')
+        
+        all_anomalies = list(iter_anomalies())
         return jsonify({
             'success': True,
             'anomalies': all_anomalies,
@@ -2529,7 +2606,7 @@ def api_bulk_anomaly_report():
                 'high_severity': len([a for a in all_anomalies if a.get('severity') == 'high']),
                 'medium_severity': len([a for a in all_anomalies if a.get('severity') == 'medium']),
                 'low_severity': len([a for a in all_anomalies if a.get('severity') == 'low']),
-                'fraud_alerts': len(wash_sales) + len(pump_dumps) + len(suspicious_volumes)
+                'fraud_alerts': fraud_alerts
             }
         })
     except Exception as e:
@@ -3102,36 +3179,12 @@ def api_test_wallet():
 @login_required
 @web_security_required
 def api_get_warnings():
-    """Get review warnings"""
+    """Get review warnings (latest year's review, cached until the folder changes)"""
     try:
-        warnings_file = None
-        suggestions_file = None
-        
-        # Find latest year folder
-        if OUTPUT_DIR.exists():
-            year_folders = [f for f in OUTPUT_DIR.iterdir() if f.is_dir() and f.name.startswith('Year_')]
-            if year_folders:
-                latest_year = max(year_folders, key=lambda x: x.name)
-                warnings_file = latest_year / 'REVIEW_WARNINGS.csv'
-                suggestions_file = latest_year / 'REVIEW_SUGGESTIONS.csv'
-        
-        warnings = []
-        suggestions = []
-        
-        if warnings_file and warnings_file.exists():
-            import pandas as pd
-            df = pd.read_csv(warnings_file)
-            warnings = df.to_dict('records')
-        
-        if suggestions_file and suggestions_file.exists():
-            import pandas as pd
-            df = pd.read_csv(suggestions_file)
-            suggestions = df.to_dict('records')
-        
-        result = {
-            'warnings': warnings,
-            'suggestions': suggestions
-        }
+        result = {'warnings': [], 'suggestions': []}
+        year_folders = report_file_cache.get(OUTPUT_DIR, _list_year_folders)
+        if year_folders:
+            result = review_cache.get(year_folders[-1], report_catalog.load_review)
         
         # return jsonify(result)
         return jsonify({'data': json.dumps(result)})
@@ -3156,34 +3209,22 @@ def get_download_warnings_config():
 @login_required
 @web_security_required
 def api_get_reports():
-    """List available reports"""
+    """List available reports from the per-year report catalogs"""
     try:
         reports = []
         
-        if OUTPUT_DIR.exists():
-            year_folders = [f for f in OUTPUT_DIR.iterdir() if f.is_dir() and f.name.startswith('Year_')]
+        for year_folder in reversed(report_file_cache.get(OUTPUT_DIR, _list_year_folders)):
+            year = year_folder.name.replace('Year_', '')
+            # Use forward slashes for web paths, regardless of OS
+            web_dir = str(year_folder.relative_to(BASE_DIR)).replace('\\', '/')
+            year_reports = [dict(entry, path=f"{web_dir}/{entry['name']}")
+                            for entry in report_file_cache.get(year_folder, report_catalog.list_reports)]
             
-            for year_folder in sorted(year_folders, key=lambda x: x.name, reverse=True):
-                year = year_folder.name.replace('Year_', '')
-                year_reports = []
-                
-                for report_file in year_folder.glob('*.csv'):
-                    # Use forward slashes for web paths, regardless of OS
-                    rel_path = report_file.relative_to(BASE_DIR)
-                    web_path = str(rel_path).replace('\\', '/')
-                    
-                    year_reports.append({
-                        'name': report_file.name,
-                        'path': web_path,
-                        'size': report_file.stat().st_size,
-                        'modified': datetime.fromtimestamp(report_file.stat().st_mtime).isoformat()
-                    })
-                
-                if year_reports:
-                    reports.append({
-                        'year': year,
-                        'reports': year_reports
-                    })
+            if year_reports:
+                reports.append({
+                    'year': year,
+                    'reports': year_reports
+                })
         
         # return jsonify(reports)
         return jsonify({'data': json.dumps(reports)})
@@ -3260,6 +3301,20 @@ def download_warning_acknowledged():
 # API ROUTES - STATISTICS & CHARTS
 # ==========================================
 
+def _list_year_folders(output_dir):
+    """Year_* report folders in output_dir, oldest first."""
+    if not output_dir.exists():
+        return []
+    return sorted((f for f in output_dir.iterdir() if f.is_dir() and f.name.startswith('Year_')),
+                  key=lambda f: f.name)
+
+def _load_loss_summary(path):
+    """First row of a US_transaction_LOSS_ANALYSIS.csv (or its Parquet copy), or None."""
+    if not path.exists():
+        return None
+    df = columnar.read_report(path)
+    return df.to_dict('records')[0] if not df.empty else None
+
 @app.route('/api/stats', methods=['GET'])
 @login_required
 @web_security_required
@@ -3267,49 +3322,23 @@ def api_get_stats():
     """Get statistics for dashboard"""
     try:
         conn = get_db_connection()
+        try:
+            stats = read_trade_stats(conn)
+        finally:
+            conn.close()
         
-        # Count transactions
-        total_transactions = conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
-        
-        # Count by action
-        actions = {}
-        cursor = conn.execute("SELECT action, COUNT(*) as count FROM trades GROUP BY action")
-        for row in cursor:
-            actions[row['action']] = row['count']
-        
-        # Count by coin
-        coins = {}
-        cursor = conn.execute("SELECT coin, COUNT(*) as count FROM trades GROUP BY coin ORDER BY count DESC LIMIT 10")
-        for row in cursor:
-            coins[row['coin']] = row['count']
-        
-        # Get date range
-        date_range = conn.execute("SELECT MIN(date) as min_date, MAX(date) as max_date FROM trades").fetchone()
-        
-        conn.close()
-        
-        # Try to load gains/losses from reports
+        # Gains/losses from the latest year's reports
         gains_losses = None
-        if OUTPUT_DIR.exists():
-            year_folders = [f for f in OUTPUT_DIR.iterdir() if f.is_dir() and f.name.startswith('Year_')]
-            if year_folders:
-                latest_year = max(year_folders, key=lambda x: x.name)
-                loss_analysis_file = latest_year / 'US_transaction_LOSS_ANALYSIS.csv'
-                
-                if loss_analysis_file.exists():
-                    import pandas as pd
-                    df = pd.read_csv(loss_analysis_file)
-                    if not df.empty:
-                        gains_losses = df.to_dict('records')[0]
+        year_folders = report_file_cache.get(OUTPUT_DIR, _list_year_folders)
+        if year_folders:
+            gains_losses = report_file_cache.get(year_folders[-1] / 'US_transaction_LOSS_ANALYSIS.csv',
+                                                 _load_loss_summary)
         
         result = {
-            'total_transactions': total_transactions,
-            'actions': actions,
-            'top_coins': coins,
-            'date_range': {
-                'min': date_range['min_date'],
-                'max': date_range['max_date']
-            },
+            'total_transactions': stats['total'],
+            'actions': stats['actions'],
+            'top_coins': stats['top_coins'],
+            'date_range': stats['date_range'],
             'gains_losses': gains_losses
         }
         
@@ -3339,18 +3368,13 @@ def api_upload_csv():
         saved_path = UPLOAD_FOLDER / filename
         file.save(str(saved_path))
 
-        summary = _ingest_csv_with_engine(saved_path)
-        try:
-            txn_app.mark_data_changed()
-        except Exception:
-            pass
-
+        job_id = get_job_manager().submit('csv_upload', path=str(saved_path))
         result = {
             'success': True,
-            'message': f"Imported {summary.get('new_trades', 0)} trades from {filename} (rows: {summary.get('total_rows', 0)})",
+            'message': f'Import of {filename} started',
             'filename': filename,
-            'new_trades': summary.get('new_trades', 0),
-            'total_rows': summary.get('total_rows', 0)
+            'job_id': job_id,
+            'task_id': job_id
         }
         return jsonify({'data': json.dumps(result)})
     except Exception as e:
@@ -3359,8 +3383,16 @@ def api_upload_csv():
 @app.route('/api/progress/<task_id>', methods=['GET'])
 @login_required
 def api_get_progress(task_id):
-    """Get progress of a long-running task"""
+    """Get progress of a long-running task (background job or setup task)"""
     try:
+        job = get_job_manager().get(task_id)
+        if job is not None:
+            # Result fields are also returned at the top level, as the old progress_store entries had them
+            response = {**(job['result'] or {}), **job}
+            event = progress_buffer.latest(task_id)
+            if event is not None:
+                response.update({k: event[k] for k in ('stage', 'year', 'rate', 'eta_seconds')})
+            return jsonify(response)
         progress = progress_store.get(task_id, {
             'status': 'not_found',
             'progress': 0,
@@ -3370,6 +3402,37 @@ def api_get_progress(task_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs', methods=['GET'])
+@login_required
+def api_list_jobs():
+    """List recent background jobs (optional ?type=, ?status=, ?limit=)"""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        jobs = get_job_manager().list(limit, request.args.get('type'), request.args.get('status'))
+        return jsonify({'data': json.dumps({'jobs': jobs})})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def api_get_job(job_id):
+    """Get one background job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'data': json.dumps(job)})
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+@web_security_required
+def api_cancel_job(job_id):
+    """Cancel a queued or running background job"""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    audit_log('JOB_CANCEL', f"{job['type']} {job_id}")
+    return jsonify({'data': json.dumps({'success': True, 'status': job['status'], 'message': job['message']})})
+
 @app.route('/api/run', methods=['POST'])
 @login_required
 @web_security_required
@@ -3388,69 +3451,17 @@ def api_run_transaction_calculation():
         if count == 0:
             return jsonify({'error': 'No transactions found. Please add transactions before running calculation.'}), 400
 
-        auto_runner = BASE_DIR / 'auto_runner.py'
-        if not auto_runner.exists():
+        if _isolated_runs() and not _auto_runner_script().exists():
             return jsonify({'error': 'auto_runner.py not found'}), 404
         
-        # Generate task ID
-        task_id = f"transaction_calc_{secrets.token_hex(8)}"
-        
-        # Initialize progress
-        progress_store[task_id] = {
-            'status': 'running',
-            'progress': 0,
-            'message': 'Starting Transaction calculation...',
-            'started_at': datetime.now(timezone.utc).isoformat()
-        }
-        
-        # Check for cascade mode
-        data = request.get_json() or {}
-        cmd = [sys.executable, str(auto_runner)]
-        if data.get('cascade'):
-            cmd.append('--cascade')
-            
-        # Run Auto_Runner.py in background with progress tracking
-        def run_with_progress():
-            try:
-                progress_store[task_id]['progress'] = 10
-                progress_store[task_id]['message'] = 'Running Transaction calculation...'
-                
-                process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-                
-                # Monitor process
-                while process.poll() is None:
-                    _time.sleep(1)
-                    # Increment progress (max 90% until complete)
-                    if progress_store[task_id]['progress'] < 90:
-                        progress_store[task_id]['progress'] += 5
-                
-                stdout, stderr = process.communicate()
-                
-                if process.returncode == 0:
-                    progress_store[task_id]['status'] = 'completed'
-                    progress_store[task_id]['progress'] = 100
-                    progress_store[task_id]['message'] = 'Transaction calculation completed successfully'
-                else:
-                    progress_store[task_id]['status'] = 'error'
-                    error_msg = stderr[:500] if stderr else 'Unknown error'
-                    
-                    # Check for specific error types to provide better user guidance
-                    if 'rate limit' in error_msg.lower() or '429' in error_msg:
-                        progress_store[task_id]['message'] = 'API rate limit reached. Please wait a few minutes and try again, or the system will use cached price data.'
-                    elif 'api' in error_msg.lower() and ('timeout' in error_msg.lower() or 'connection' in error_msg.lower()):
-                        progress_store[task_id]['message'] = 'API connection error. Check your internet connection and try again.'
-                    else:
-                        progress_store[task_id]['message'] = f'Transaction calculation failed: {error_msg}'
-                    
-            except Exception as e:
-                progress_store[task_id]['status'] = 'error'
-                progress_store[task_id]['message'] = f'Error: {str(e)}'
-        
-        thread = threading.Thread(target=run_with_progress, daemon=True)
-        thread.start()
+        # Check for cascade mode; force recomputes years the report cache considers fresh
+        data = request.get_json(silent=True) or {}
+        task_id = get_job_manager().submit('transaction_calc', cascade=bool(data.get('cascade')),
+                                           force=bool(data.get('force')))
         
         result = {
             'success': True,
+            'job_id': task_id,
             'task_id': task_id,
             'message': 'Transaction calculation started. Progress will be tracked.'
         }
@@ -3813,22 +3824,21 @@ def _compute_diagnostics():
             'icon': '[OK]',
             'message': 'Database connected'
         })
-        # Run quick schema integrity check
+        # Report cached integrity results (a quick_check runs only if none are recorded yet)
         try:
-            _res = conn.execute('PRAGMA integrity_check')
-            res = _res.fetchone() if hasattr(_res, 'fetchone') else ('ok',)
-            if res and isinstance(res[0], str) and res[0].lower() != 'ok':
+            db_health = integrity.health(DB_FILE, INTEGRITY_FULL_CHECK_HOURS * 2)
+            if not db_health['ok']:
                 issues.append({
                     'id': 'schema_integrity',
                     'severity': 'warning',
-                    'message': f'Database integrity check reported: {res[0]}',
+                    'message': db_health['message'],
                     'fix': {'action': 'schema_check', 'endpoint': '/api/diagnostics/schema-check'}
                 })
             else:
                 status.append({
                     'id': 'schema_ok',
                     'icon': '[OK]',
-                    'message': 'Database integrity verified'
+                    'message': db_health['message']
                 })
         except Exception as e:
             issues.append({
@@ -3880,6 +3890,36 @@ def api_diagnostics_last():
         app.config['DIAGNOSTICS_LAST'] = result
     return jsonify(result)
 
+@app.route('/api/diagnostics/profiles', methods=['GET'])
+@login_required
+def api_diagnostics_profiles():
+    """Most recent --profile runs (summary.json of each, newest first)"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', PROFILE_LIST_LIMIT)), 100))
+    except ValueError:
+        limit = PROFILE_LIST_LIMIT
+    profiles = list_profiles(OUTPUT_DIR / 'logs' / 'profiles', limit)
+    for profile in profiles:  # no absolute server paths in responses
+        try:
+            profile['path'] = str(Path(profile['path']).relative_to(BASE_DIR))
+        except ValueError:
+            profile['path'] = Path(profile['path']).name
+    return jsonify({'profiles': profiles})
+
+@app.route('/api/metrics', methods=['GET'])
+@limiter.limit(METRICS_RATE_LIMIT)
+def api_metrics():
+    """Request metrics in Prometheus text format; accepts a logged-in session or HTTP Basic
+    auth with a web user's credentials (for Prometheus scrape configs)"""
+    if 'username' not in session and not app.config.get('TESTING'):
+        auth = request.authorization
+        if not auth or not auth.username or not verify_password(auth.username, auth.password or ''):
+            if auth and auth.username:
+                audit_log('METRICS_AUTH_FAILED', 'Failed /api/metrics login', auth.username)
+            return Response('Authentication required\n', status=401, content_type='text/plain; charset=utf-8',
+                            headers={'WWW-Authenticate': 'Basic realm="metrics"'})
+    return Response(request_metrics.render_prometheus(), content_type=PROMETHEUS_MIMETYPE)
+
 @app.route('/api/diagnostics/generate-cert', methods=['POST'])
 @login_required
 @web_security_required
@@ -3898,13 +3938,14 @@ def api_diagnostics_generate_cert():
 @app.route('/api/diagnostics/schema-check', methods=['GET'])
 @login_required
 def api_diagnostics_schema_check():
-    """Run PRAGMA integrity_check and return result"""
+    """Run PRAGMA integrity_check now, record it for diagnostics and return the result"""
     try:
         conn = get_db_connection()
-        res = conn.execute('PRAGMA integrity_check').fetchone()
-        conn.close()
-        status = (res and res[0]) or 'unknown'
-        ok = isinstance(status, str) and status.lower() == 'ok'
+        try:
+            status = integrity.run_check(DB_FILE, 'full', conn=conn)
+        finally:
+            conn.close()
+        ok = status.lower() == 'ok'
         return jsonify({'success': True, 'status': status, 'ok': ok})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -3964,21 +4005,10 @@ def api_download_all_logs():
         if not log_dir.exists():
             return jsonify({'error': 'No logs directory found'}), 404
         
-        # Create zip in memory
-        mem_zip = io.BytesIO()
+        # Stream the zip as it is built instead of holding it in memory
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        with zipfile.ZipFile(mem_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for log_file in log_dir.glob('*.log'):
-                zf.write(log_file, arcname=log_file.name)
-        
-        mem_zip.seek(0)
-        return send_file(
-            mem_zip,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=f'all_logs_{timestamp}.zip'
-        )
+        log_files = sorted(log_dir.glob('*.log'))
+        return zip_response(((f, f.name) for f in log_files), f'all_logs_{timestamp}.zip')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -4129,24 +4159,14 @@ def api_system_health():
                 'message': f'Database error: {str(e)}'
             })
         
-        # Check 2: Database integrity
+        # Check 2: Database integrity (cached results; see src/core/integrity.py)
         try:
-            conn = get_db_connection()
-            integrity_check = conn.execute("PRAGMA integrity_check").fetchone()
-            conn.close()
-            
-            if integrity_check and integrity_check[0] == 'ok':
-                health_status['checks'].append({
-                    'name': 'Database Integrity',
-                    'status': 'OK',
-                    'message': 'Database integrity verified'
-                })
-            else:
-                health_status['checks'].append({
-                    'name': 'Database Integrity',
-                    'status': 'WARNING',
-                    'message': f'Integrity check result: {integrity_check[0] if integrity_check else "Unknown"}'
-                })
+            db_health = integrity.health(DB_FILE, INTEGRITY_FULL_CHECK_HOURS * 2)
+            health_status['checks'].append({
+                'name': 'Database Integrity',
+                'status': 'OK' if db_health['ok'] else 'WARNING',
+                'message': db_health['message']
+            })
         except Exception as e:
             health_status['checks'].append({
                 'name': 'Database Integrity',
@@ -5695,9 +5715,10 @@ def main():
     print("Crypto Transaction Tracker - Web UI Server")
 
     # Initialize scheduler
-    auto_runner_path = BASE_DIR / 'auto_runner.py'
-    scheduler = ScheduleManager(BASE_DIR, auto_runner_path)
+    scheduler = ScheduleManager(BASE_DIR, _auto_runner_script(), runner=get_auto_runner)
     scheduler.reload_schedules()
+    txn_app.on_data_changed(scheduler.notify_data_changed)
+    scheduler.schedule_integrity_check(lambda: DB_FILE)
     print("✓ Scheduler initialized\n")
 
     print("=" * 60)
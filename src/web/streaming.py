@@ -0,0 +1,204 @@
+"""
+================================================================================
+STREAMING - Constant-Memory NDJSON/CSV/Zip API Responses
+================================================================================
+
+Builds Flask responses from row iterators (DB cursors, log readers) so the
+body is produced while it is sent: memory stays flat and the first bytes
+leave before the last row is read, however large the result.
+
+Formats:
+    ndjson  one JSON object per line (application/x-ndjson)
+    csv     header from the given fieldnames (or the first row)
+    zip     zip_chunks(files) for log bundles; already compressed
+
+Compression:
+    NDJSON and CSV bodies are gzip-encoded on the fly when the client's
+    Accept-Encoding allows it (Content-Encoding: gzip, Vary: Accept-Encoding).
+
+Compatibility:
+    Endpoints keep their JSON responses by default; clients opt in with
+    ?format=ndjson or ?format=csv (stream_format()), so small result sets
+    and the existing front end are unchanged.
+
+Usage:
+    from src.web.streaming import iter_cursor, stream_format, streamed_response
+
+    fmt = stream_format(request)
+    if fmt:
+        rows = iter_cursor(get_db_connection, "SELECT * FROM trades")
+        return streamed_response(rows, fmt, filename='trades')
+
+Author: robertbiv
+Last Modified: December 2025
+================================================================================
+"""
+
+import csv
+import io
+import json
+import zipfile
+import zlib
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from flask import Response, request as flask_request, stream_with_context
+
+from src.utils.constants import STREAM_CHUNK_BYTES, STREAM_FETCH_ROWS, STREAM_GZIP_LEVEL
+
+FORMATS = ('ndjson', 'csv')
+MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv', 'zip': 'application/zip'}
+
+
+def stream_format(request) -> Optional[str]:
+    """'ndjson' or 'csv' when the request asks for a streamed body (?format=...), else None."""
+    fmt = (request.args.get('format') or '').lower()
+    if not fmt and request.is_json:
+        fmt = str((request.get_json(silent=True) or {}).get('format') or '').lower()
+    return fmt if fmt in FORMATS else None
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True if an Accept-Encoding header allows gzip (honours q=0)."""
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            q = params.strip()
+            if q.startswith('q='):
+                try:
+                    return float(q[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+
+# ----------------------------------------------------------------------
+# Row sources and encoders
+# ----------------------------------------------------------------------
+
+def iter_cursor(connect: Callable, sql: str, params: Sequence = (),
+                fetch_rows: int = STREAM_FETCH_ROWS) -> Iterator[dict]:
+    """Rows of a query as dicts, fetchmany() at a time; the connection closes when iteration ends."""
+    conn = connect()
+    try:
+        cursor = conn.execute(sql, params)
+        columns = [d[0] for d in cursor.description or ()]
+        while True:
+            rows = cursor.fetchmany(fetch_rows)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+    finally:
+        conn.close()
+
+
+def ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, default=str) + '\n'
+
+
+def csv_lines(rows: Iterable[dict], fieldnames: Optional[Sequence[str]] = None) -> Iterator[str]:
+    """CSV text for rows; keys missing from fieldnames are dropped."""
+    buffer = io.StringIO()
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(fieldnames or row), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if writer is None and fieldnames:
+        csv.writer(buffer).writerow(fieldnames)
+        yield buffer.getvalue()
+
+
+def batched(pieces: Iterable[str], chunk_bytes: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Join small text pieces into ~chunk_bytes UTF-8 chunks (the first piece is sent at once)."""
+    parts, size, first = [], 0, True
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_bytes or first:
+            first = False
+            yield b''.join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b''.join(parts)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = STREAM_GZIP_LEVEL) -> Iterator[bytes]:
+    """gzip-encode a chunk stream, flushing after every chunk so clients can decode as it arrives."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable write target for zipfile; bytes are drained by zip_chunks()."""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self.parts, self.size = b''.join(self.parts), [], 0
+        return data
+
+
+def zip_chunks(files: Iterable, chunk_bytes: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Stream a zip of (path, arcname) pairs without building it in memory or on disk."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for path, arcname in files:
+            with open(path, 'rb') as src, zf.open(arcname, 'w') as dest:
+                for block in iter(lambda: src.read(chunk_bytes), b''):
+                    dest.write(block)
+                    if sink.size >= chunk_bytes:
+                        yield sink.drain()
+            if sink.size:
+                yield sink.drain()
+    yield sink.drain()  # central directory
+
+
+# ----------------------------------------------------------------------
+# Responses
+# ----------------------------------------------------------------------
+
+def streamed_response(rows: Iterable[dict], fmt: str, filename: Optional[str] = None,
+                      fieldnames: Optional[Sequence[str]] = None, request=None) -> Response:
+    """
+    Stream rows as NDJSON or CSV, gzip-encoded when the client accepts it.
+    filename (without extension) makes the response a download.
+    """
+    request = request or flask_request
+    pieces = ndjson_lines(rows) if fmt == 'ndjson' else csv_lines(rows, fieldnames)
+    body = batched(pieces)
+    headers = {'Vary': 'Accept-Encoding', 'X-Accel-Buffering': 'no'}
+    if accepts_gzip(request.headers.get('Accept-Encoding')):
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+    if filename:
+        headers['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    return Response(stream_with_context(body), mimetype=MIMETYPES[fmt], headers=headers)
+
+
+def zip_response(files: Iterable, filename: str) -> Response:
+    """Stream a zip download of (path, arcname) pairs."""
+    return Response(stream_with_context(zip_chunks(files)), mimetype=MIMETYPES['zip'],
+                    headers={'Content-Disposition': f'attachment; filename={filename}',
+                             'X-Accel-Buffering': 'no'})
@@ -225,7 +225,7 @@ class TestTransactionHistory:
         
         history.record_change('tx1', old, new, 'ML classifier')
         
-        assert (tmp_path / 'history.jsonl').exists()
+        assert (tmp_path / 'history.db').exists()
     
     def test_get_history(self, tmp_path):
         """Test retrieving history"""
@@ -236,6 +236,63 @@ class TestTransactionHistory:
         
         hist = history.get_history('tx1')
         assert len(hist) == 1
+    
+    def test_revert(self, tmp_path):
+        """Test retrieving previous versions"""
+        from src.advanced_ml_features import TransactionHistory
+        
+        history = TransactionHistory(tmp_path / 'history.jsonl')
+        history.record_change('tx1', {'action': 'UNKNOWN'}, {'action': 'BUY'}, 'First')
+        history.record_change('tx1', {'action': 'BUY'}, {'action': 'SELL'}, 'Second')
+        history.record_change('tx2', {'action': 'X'}, {'action': 'Y'}, 'Other')
+        
+        assert history.revert('tx1') == {'action': 'BUY'}
+        assert history.revert('tx1', steps=2) == {'action': 'UNKNOWN'}
+        assert history.revert('tx1', steps=3) is None
+    
+    def test_batched_changes_flush_and_discard(self, tmp_path):
+        """Test queued changes are only persisted on flush"""
+        from src.advanced_ml_features import TransactionHistory
+        
+        history = TransactionHistory(tmp_path / 'history.jsonl', autoflush=False)
+        history.record_change('tx1', {'coin': 'A'}, {'coin': 'B'}, 'Staged')
+        history.record_change('tx1', {'coin': 'B'}, {'coin': 'C'}, 'Staged')
+        assert history.get_history('tx1') == []
+        
+        assert history.flush() == 2
+        assert len(history.get_history('tx1')) == 2
+        
+        history.record_change('tx1', {'coin': 'C'}, {'coin': 'D'}, 'Discarded')
+        assert history.discard_pending() == 1
+        assert history.flush() == 0
+        assert len(history.get_history('tx1')) == 2
+    
+    def test_legacy_jsonl_imported_once(self, tmp_path):
+        """Test existing JSONL history is imported into the indexed store"""
+        import json
+        from src.advanced_ml_features import TransactionHistory
+        
+        legacy = tmp_path / 'history.jsonl'
+        with open(legacy, 'w') as f:
+            for i in range(3):
+                f.write(json.dumps({
+                    'timestamp': f'2024-01-0{i + 1}T00:00:00',
+                    'transaction_id': 'tx1' if i < 2 else 'tx2',
+                    'old_value': {'n': i},
+                    'new_value': {'n': i + 1},
+                    'reason': 'legacy',
+                    'change_hash': 'abcd1234'
+                }) + '\n')
+        
+        history = TransactionHistory(legacy)
+        assert not legacy.exists()
+        assert (tmp_path / 'history.jsonl.imported').exists()
+        assert [h['new_value'] for h in history.get_history('tx1')] == [{'n': 1}, {'n': 2}]
+        
+        # Re-opening must not import the same entries again
+        history = TransactionHistory(legacy)
+        assert len(history.get_history('tx1')) == 2
+        assert len(history.get_history('tx2')) == 1
 
 
 class TestNaturalLanguageSearch:
@@ -49,6 +49,55 @@ class TestAnomalyDetector:
         assert any(a["type"] == "PRICE_ERROR" for a in anomalies)
 
 
+class TestScanFrame:
+    ROWS = [
+        {"date": "2024-01-01T00:00:00", "amount": 0.01, "price_usd": 50},
+        {"date": "2024-01-02T00:00:00", "amount": 2.5, "price_usd": 42000},
+        {"date": "2024-01-01T12:00:00", "amount": 1000, "price_usd": 5000},
+        {"date": "2024-03-15T00:00:00+05:00", "amount": 0.000001, "price_usd": 0.01},
+        {"date": "2024-07-01", "amount": 0.2, "price_usd": 5000},
+        {"date": "not a date", "amount": "abc", "price_usd": None},
+        {"date": "2024-09-01T00:00:00Z", "amount": "0.3", "price_usd": "4000"},
+        {"date": "01/15/2025", "amount": float("nan"), "price_usd": 100},
+        {"date": None, "amount": -1, "price_usd": 100},
+        {"date": "2025-06-01T00:00:00", "amount": 1, "price_usd": 0},
+    ]
+
+    @staticmethod
+    def _row_by_row(detector, rows, prev_row=None):
+        expected = {}
+        for idx, row in enumerate(rows):
+            anomalies = detector.scan_row(row, prev_row)
+            if anomalies:
+                expected[idx] = anomalies
+            prev_row = row
+        return expected
+
+    def test_matches_scan_row_for_dicts_and_frames(self):
+        detector = AnomalyDetector()
+        expected = self._row_by_row(detector, self.ROWS)
+        assert expected  # fixture rows exercise every heuristic
+        assert detector.scan_frame(self.ROWS) == expected
+        assert detector.scan_frame(pd.DataFrame(self.ROWS)) == expected
+
+    def test_prev_row_applies_to_first_row(self):
+        detector = AnomalyDetector()
+        prev = {"date": "2024-06-01T00:00:00"}
+        expected = self._row_by_row(detector, self.ROWS, prev)
+        assert detector.scan_frame(self.ROWS, prev) == expected
+        assert expected[0][-1]["message"].startswith("Out-of-order timestamp")
+
+    def test_keys_follow_frame_index_and_only_flagged_rows(self):
+        detector = AnomalyDetector()
+        frame = pd.DataFrame(self.ROWS[:3], index=[10, 20, 30])
+        result = detector.scan_frame(frame)
+        assert list(result) == [10, 30]
+        assert [a["type"] for a in result[30]] == ["EXTREME_VALUE", "TIMESTAMP_GAP"]
+
+    def test_empty_input(self):
+        assert AnomalyDetector().scan_frame([]) == {}
+
+
 class TestMLService:
     def test_shim_mode_basic(self):
         svc = MLService(mode="shim")
@@ -0,0 +1,256 @@
+"""
+Tests for the in-process Auto_Runner API (AutoRunner / get_runner) and the
+DatabaseManager parsed-ledger cache it relies on.
+"""
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+import Auto_Runner
+import src.core.encryption as encryption_module
+import src.core.engine as app
+from src.web.scheduler import ScheduleManager
+
+
+@pytest.fixture()
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'BASE_DIR', tmp_path)
+    monkeypatch.setattr(app, 'DB_FILE', tmp_path / 'crypto_master.db')
+    monkeypatch.setattr(app, 'OUTPUT_DIR', tmp_path / 'outputs')
+    monkeypatch.setattr(app, 'INPUT_DIR', tmp_path / 'inputs')
+    monkeypatch.setattr(app, 'ARCHIVE_DIR', tmp_path / 'processed_archive')
+    monkeypatch.setattr(app, 'CONFIG_FILE', tmp_path / 'config.json')
+    monkeypatch.setattr(app, 'STATUS_FILE', tmp_path / 'status.json')
+    monkeypatch.setattr(app, 'API_KEYS_ENCRYPTED_FILE', tmp_path / 'api_keys_encrypted.json')
+    monkeypatch.setattr(encryption_module, 'API_KEYS_ENCRYPTED_FILE', tmp_path / 'api_keys_encrypted.json')
+    monkeypatch.setattr(app, 'CURRENT_YEAR_OVERRIDE', None, raising=False)
+    monkeypatch.setattr(app, 'RUN_CONTEXT', app.RUN_CONTEXT)
+    (tmp_path / 'config.json').write_text(json.dumps({'transaction_year': 2025}))
+    app.initialize_folders()
+
+    db = app.DatabaseManager()
+    db.save_trade({'id': 'buy', 'date': '2024-01-01 12:00:00', 'source': 'Manual', 'action': 'BUY',
+                   'coin': 'BTC', 'amount': 1.0, 'price_usd': 10000.0, 'fee': 0, 'batch_id': '1'})
+    db.save_trade({'id': 'sell', 'date': '2025-03-01 12:00:00', 'source': 'Manual', 'action': 'SELL',
+                   'coin': 'BTC', 'amount': 0.5, 'price_usd': 30000.0, 'fee': 0, 'batch_id': '2'})
+    db.commit()
+    db.close()
+
+    runner = Auto_Runner.AutoRunner()
+    yield tmp_path, runner
+    runner.close()
+
+
+def test_runs_reuse_warm_database_and_ingestor(workspace, monkeypatch):
+    tmp_path, runner = workspace
+    reads = []
+    original = app.pd.read_sql_query
+
+    def counting_read(sql, *args, **kwargs):
+        if sql == "SELECT * FROM trades ORDER BY date ASC":
+            reads.append(sql)
+        return original(sql, *args, **kwargs)
+
+    monkeypatch.setattr(app.pd, 'read_sql_query', counting_read)
+
+    first = runner.run()
+    db, ingest = runner.db, runner.ingest
+    assert (first['cascade'], first['years']) == (False, [2024, 2025])
+    assert (tmp_path / 'outputs' / 'Year_2025' / 'CAP_GAINS.csv').exists()
+    # Both years were computed from one parse of the ledger
+    assert len(reads) == 1
+
+    second = runner.run()
+    assert second['years'] == []  # 2024 has its snapshot, 2025 is still fresh
+    assert second['skipped'] == [2025]
+    assert runner.db is db and runner.ingest is ingest
+    assert len(reads) == 1
+    assert runner.runs == 2
+
+
+def test_ledger_cache_sees_writes_from_any_connection(workspace):
+    tmp_path, _ = workspace
+    db = app.DatabaseManager()
+    try:
+        assert len(db.get_all()) == 2
+        db.save_trade({'id': 'more', 'date': '2025-04-01', 'source': 'Manual', 'action': 'BUY',
+                       'coin': 'ETH', 'amount': 1.0, 'price_usd': 2000.0, 'fee': 0, 'batch_id': '3'})
+        assert len(db.get_all()) == 3
+        db.commit()
+
+        other = sqlite3.connect(str(tmp_path / 'crypto_master.db'))
+        other.execute("DELETE FROM trades WHERE id='buy'")
+        other.commit()
+        other.close()
+        df = db.get_all()
+        assert sorted(df['id']) == ['more', 'sell']
+
+        # Callers get a copy; mutating it does not corrupt the cache
+        df.drop(df.index, inplace=True)
+        assert len(db.get_all()) == 2
+    finally:
+        db.close()
+
+
+def test_overlapping_run_is_rejected(workspace):
+    _, runner = workspace
+    runner._lock.acquire()
+    try:
+        assert runner.running
+        with pytest.raises(Auto_Runner.RunInProgress):
+            runner.run()
+    finally:
+        runner._lock.release()
+
+
+def test_run_restores_host_log_context(workspace):
+    _, runner = workspace
+    app.set_run_context('web')
+    runner.run()
+    assert app.RUN_CONTEXT == 'web'
+
+
+def test_database_and_config_reloaded_when_changed(workspace, monkeypatch):
+    tmp_path, runner = workspace
+    runner.run()
+    old_db = runner.db
+
+    (tmp_path / 'config.json').write_text(json.dumps({'transaction_year': 2025, 'accounting': {'method': 'HIFO'}}))
+    new_db = tmp_path / 'other.db'
+    monkeypatch.setattr(app, 'DB_FILE', new_db)
+    try:
+        runner.run()
+        assert runner.db is not old_db
+        assert runner.db.db_file == new_db
+        assert app.GLOBAL_CONFIG['accounting']['method'] == 'HIFO'
+    finally:
+        app.CONFIG_FILE.unlink()
+        app.reload_config()
+
+
+def _edit(tmp_path, sql):
+    """Change trades through another connection, as the web UI would."""
+    other = sqlite3.connect(str(tmp_path / 'crypto_master.db'))
+    other.execute(sql)
+    other.commit()
+    other.close()
+
+
+def test_report_cache_skips_fresh_years(workspace):
+    tmp_path, runner = workspace
+    assert runner.has_pending_changes()  # no baseline yet
+    first = runner.run(cascade=True)
+    assert first['years'] == [2024, 2025]
+    assert first['cache'] == {'hits': 0, 'misses': 2, 'hit_rate': 0.0}
+    assert not runner.has_pending_changes()
+
+    result = runner.run(cascade=True)
+    assert (result['years'], result['skipped']) == ([], [2024, 2025])
+    assert result['cache']['hits'] == 2
+
+    # An edit to a 2025 trade leaves 2024 alone
+    _edit(tmp_path, "UPDATE trades SET price_usd='35000' WHERE id='sell'")
+    assert runner.has_pending_changes()
+    result = runner.run(cascade=True)
+    assert (result['years'], result['skipped']) == ([2025], [2024])
+
+    # force recomputes everything
+    assert runner.run(cascade=True, force=True)['years'] == [2024, 2025]
+
+
+def test_report_cache_invalidates_downstream_only_on_state_change(workspace):
+    tmp_path, runner = workspace
+    runner.run(cascade=True)
+
+    # 2024 changes but ends with the same lots and carryover: 2025 stays cached
+    _edit(tmp_path, "UPDATE trades SET batch_id='import-2' WHERE id='buy'")
+    result = runner.run(cascade=True)
+    assert (result['years'], result['skipped']) == ([2024], [2025])
+
+    # A new cost basis changes the 2024 lots, so 2025 is recomputed as well
+    _edit(tmp_path, "UPDATE trades SET price_usd='12000' WHERE id='buy'")
+    assert runner.run(cascade=True)['years'] == [2024, 2025]
+
+    # Deleted reports are regenerated
+    (tmp_path / 'outputs' / 'Year_2025' / 'transaction_REPORT.csv').unlink()
+    assert runner.run(cascade=True)['years'] == [2025]
+
+
+def test_config_change_is_a_pending_change(workspace):
+    tmp_path, runner = workspace
+    runner.run()
+    assert not runner.has_pending_changes()
+    (tmp_path / 'config.json').write_text(json.dumps({'transaction_year': 2025, 'accounting': {'method': 'FIFO'}}))
+    assert runner.has_pending_changes()
+    (tmp_path / 'inputs' / 'new.csv').write_text('date,coin,amount\n')
+    assert runner.has_pending_changes()
+
+
+def test_pending_check_does_not_hold_run_lock(workspace, monkeypatch):
+    tmp_path, runner = workspace
+    runner.run()
+    _edit(tmp_path, "UPDATE trades SET price_usd='35000' WHERE id='sell'")
+
+    hashing, release = threading.Event(), threading.Event()
+    real_fingerprints = Auto_Runner.ledger_fingerprints
+
+    def slow_fingerprints(conn):
+        if threading.current_thread() is not threading.main_thread():
+            hashing.set()
+            release.wait(5)
+        return real_fingerprints(conn)
+
+    monkeypatch.setattr(Auto_Runner, 'ledger_fingerprints', slow_fingerprints)
+    answers = []
+    checker = threading.Thread(target=lambda: answers.append(runner.has_pending_changes()))
+    checker.start()
+    try:
+        assert hashing.wait(5)
+        assert not runner.running
+        assert runner.run()['years'] == [2025]  # not RunInProgress
+    finally:
+        release.set()
+        checker.join(5)
+    assert len(answers) == 1
+
+    # The run lock being held does not block the check either
+    runner._lock.acquire()
+    try:
+        assert not runner.has_pending_changes()
+    finally:
+        runner._lock.release()
+
+
+def test_get_runner_is_shared():
+    assert Auto_Runner.get_runner() is Auto_Runner.get_runner()
+
+
+class FakeRunner:
+    def __init__(self, running=False):
+        self.running = running
+        self.calls = []
+
+    def run(self, cascade=False):
+        self.calls.append(cascade)
+
+
+def test_scheduler_runs_in_process(tmp_path):
+    runner = FakeRunner()
+    manager = ScheduleManager(tmp_path, tmp_path / 'auto_runner.py', runner=lambda: runner)
+    try:
+        manager.run_transaction_calculation(cascade=True)
+        assert runner.calls == [True]
+
+        busy = FakeRunner(running=True)
+        manager.runner = lambda: busy
+        manager.run_transaction_calculation()
+        assert busy.calls == []
+    finally:
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
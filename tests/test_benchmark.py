@@ -0,0 +1,120 @@
+"""
+Tests for the benchmark harness (scripts/benchmark.py) and its seeded
+ledger generator (scripts/benchmark_ledger.py).
+"""
+
+import csv
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import src.core.engine as engine
+from scripts import benchmark
+
+ledger = benchmark.ledger
+
+
+def test_parse_size():
+    assert ledger.parse_size('10k') == 10_000
+    assert ledger.parse_size('1M') == 1_000_000
+    assert ledger.parse_size('2.5m') == 2_500_000
+    assert ledger.parse_size('1234') == 1234
+
+
+def test_ledger_is_deterministic():
+    first = list(ledger.iter_ledger(500, seed=7))
+    assert first == list(ledger.iter_ledger(500, seed=7))
+    assert first != list(ledger.iter_ledger(500, seed=8))
+
+
+def test_ledger_shape():
+    rows = list(ledger.iter_ledger(3000, seed=1, coins=12, sources=3, wash_density=0.0))
+    assert len(rows) == 3000
+    assert [r['date'] for r in rows] == sorted(r['date'] for r in rows)
+    assert {r['coin'] for r in rows} <= set(ledger.names(ledger.COINS, 12, 'TKN%03d'))
+    assert len({r['coin'] for r in rows}) == 12
+    assert {r['source'] for r in rows} == {'COINBASE', 'KRAKEN', 'GEMINI'}
+
+    balances = {}
+    for r in rows:  # sells never spend more than the source holds
+        key = (r['coin'], r['source'])
+        balances[key] = balances.get(key, 0.0) + float(r['amount']) * (-1 if r['action'] == 'SELL' else 1)
+        assert balances[key] > -1e-6
+
+
+def test_wash_density_adds_repurchases():
+    def repurchased_sells(density):
+        rows = list(ledger.iter_ledger(4000, seed=3, wash_density=density))
+        count = 0
+        for i, r in enumerate(rows):
+            if r['action'] != 'SELL':
+                continue
+            sold = datetime.fromisoformat(r['date'])
+            window = sold + timedelta(days=30)
+            count += any(o['action'] == 'BUY' and o['coin'] == r['coin'] and o['source'] == r['source']
+                         and o['amount'] == r['amount'] and datetime.fromisoformat(o['date']) <= window
+                         for o in rows[i + 1:i + 400])
+        return count
+
+    assert repurchased_sells(0.0) == 0
+    assert repurchased_sells(0.5) > 100
+
+
+def test_ingest_csvs_per_source(tmp_path):
+    rows = list(ledger.iter_ledger(200, seed=2, sources=2))
+    paths = ledger.write_ingest_csvs(rows, tmp_path)
+    assert [p.name for p in paths] == ['bench_coinbase.csv', 'bench_kraken.csv']
+    with open(paths[0], newline='') as f:
+        written = list(csv.DictReader(f))
+    assert len(written) == sum(r['source'] == 'COINBASE' for r in rows)
+    sell = next(w for w in written if w['type'] == 'sell')
+    assert sell['received_amount'] == '0' and float(sell['sent_amount']) > 0
+
+
+def test_compare_flags_slow_stages_and_memory():
+    baseline = {'stages': {'engine.FIFO': {'seconds': 1.0}, 'web.stats': {'seconds': 0.001}},
+                'peak_rss_mb': 100.0}
+    results = {'stages': {'engine.FIFO': {'seconds': 1.2}, 'web.stats': {'seconds': 0.01},
+                          'review': {'seconds': 5.0}},
+               'peak_rss_mb': 110.0}
+    assert benchmark.compare(results, baseline, threshold=0.25) == []
+
+    results['stages']['engine.FIFO']['seconds'] = 1.5
+    results['peak_rss_mb'] = 130.0
+    regressions = benchmark.compare(results, baseline, threshold=0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('engine.FIFO: 1.500s vs baseline 1.000s')
+    assert regressions[1].startswith('peak RSS')
+
+
+def test_small_run_restores_engine_paths(tmp_path):
+    db_file = engine.DB_FILE
+    bench = benchmark.Benchmark(300, stages=('engine', 'review', 'detectors'), methods=('FIFO',),
+                                workdir=tmp_path)
+    results = bench.run()
+    assert engine.DB_FILE == db_file
+    assert list(results['stages']) == ['setup.load_db', 'engine.FIFO', 'export.FIFO', 'review',
+                                       'detectors.anomaly', 'detectors.fraud', 'detectors.patterns']
+    assert results['stages']['engine.FIFO']['rows'] == 300
+    assert (tmp_path / 'outputs' / 'Year_2024').is_dir()
+
+
+def test_main_fails_on_regression(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    args = ['--size', '200', '--stages', 'detectors', '--output', str(tmp_path / 'run.json'),
+            '--baseline', str(baseline)]
+    assert benchmark.main(args + ['--save-baseline']) == 0
+
+    recorded = json.loads(baseline.read_text())
+    recorded['peak_rss_mb'] = 1.0
+    baseline.write_text(json.dumps(recorded))
+    assert benchmark.main(args) == 1
+
+    recorded['meta']['seed'] = 0  # different ledger: reported, not compared
+    baseline.write_text(json.dumps(recorded))
+    assert benchmark.main(args) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
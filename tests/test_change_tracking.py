@@ -0,0 +1,166 @@
+"""
+Tests for ledger fingerprints and change-driven scheduling
+(src/core/change_tracking.py, ScheduleManager on-change runs).
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.change_tracking import (
+    ALL_YEARS,
+    config_fingerprint,
+    ensure_ledger_years,
+    first_changed_year,
+    ledger_digests,
+    ledger_fingerprints,
+)
+from src.web.scheduler import ON_CHANGE_JOB_ID, ScheduleManager
+
+
+@pytest.fixture()
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, coin TEXT, amount TEXT)")
+    conn.executemany("INSERT INTO trades VALUES (?, ?, ?, ?)", [
+        ('a', '2023-05-01', 'BTC', '1'),
+        ('b', '2024-01-01 10:00:00', 'BTC', '0.5'),
+        ('c', '2024-07-01', 'ETH', '2'),
+    ])
+    yield conn
+    conn.close()
+
+
+def test_fingerprints_are_per_year(conn):
+    before = ledger_fingerprints(conn)
+    assert sorted(before) == ['2023', '2024']
+    assert ledger_fingerprints(conn) == before
+
+    conn.execute("UPDATE trades SET amount='3' WHERE id='c'")
+    after = ledger_fingerprints(conn)
+    assert after['2023'] == before['2023']
+    assert after['2024'] != before['2024']
+    assert first_changed_year(before, after) == 2024
+
+
+def test_added_and_removed_years(conn):
+    before = ledger_fingerprints(conn)
+    conn.execute("INSERT INTO trades VALUES ('d', '2025-02-01', 'SOL', '5')")
+    assert first_changed_year(before, ledger_fingerprints(conn)) == 2025
+    conn.execute("DELETE FROM trades WHERE id='a'")
+    assert first_changed_year(before, ledger_fingerprints(conn)) == 2023
+
+
+def test_unparseable_dates_invalidate_everything(conn):
+    before = ledger_fingerprints(conn)
+    conn.execute("INSERT INTO trades VALUES ('x', 'n/a', 'BTC', '1')")
+    assert first_changed_year(before, ledger_fingerprints(conn)) == ALL_YEARS
+
+
+def test_fingerprints_follow_writes_from_other_connections(tmp_path):
+    path = tmp_path / 'ledger.db'
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, coin TEXT, amount TEXT)")
+    conn.execute("INSERT INTO trades VALUES ('a', '2024-01-01', 'BTC', '1')")
+    before = ledger_fingerprints(conn)  # installs the triggers
+    digests = ledger_digests(conn)
+
+    other = sqlite3.connect(path)
+    other.execute("UPDATE trades SET amount='2' WHERE id='a'")
+    other.commit()
+    other.close()
+    assert first_changed_year(before, ledger_fingerprints(conn)) == 2024
+    assert ledger_digests(conn) != digests
+
+    # A rebuild (--force) renews every year's stamp
+    current = ledger_fingerprints(conn)
+    assert ensure_ledger_years(conn, rebuild=True)
+    assert first_changed_year(current, ledger_fingerprints(conn)) == 2024
+    conn.close()
+
+
+def test_config_fingerprint(tmp_path):
+    config = tmp_path / 'config.json'
+    config.write_text('{"accounting": {"method": "FIFO"}}')
+    before = config_fingerprint(config)
+    assert config_fingerprint(config) == before
+    config.write_text('{"accounting": {"method": "HIFO"}}')
+    assert config_fingerprint(config) != before
+    assert config_fingerprint(tmp_path / 'missing.json') is None
+
+
+class FakeRunner:
+    def __init__(self, pending):
+        self.running = False
+        self.pending = pending
+        self.calls = []
+
+    def has_pending_changes(self):
+        return self.pending
+
+    def run(self, cascade=False):
+        self.calls.append(cascade)
+
+
+@pytest.fixture()
+def manager(tmp_path):
+    runner = FakeRunner(pending=False)
+    mgr = ScheduleManager(tmp_path, tmp_path / 'auto_runner.py', runner=lambda: runner)
+    yield mgr, runner
+    mgr.shutdown()
+
+
+def test_only_if_changed_skips_when_nothing_changed(manager):
+    mgr, runner = manager
+    mgr.run_transaction_calculation(only_if_changed=True)
+    assert runner.calls == []
+    runner.pending = True
+    mgr.run_transaction_calculation(cascade=True, only_if_changed=True)
+    assert runner.calls == [True]
+    # Unconditional schedules still always run
+    runner.pending = False
+    mgr.run_transaction_calculation()
+    assert runner.calls[-1] is False
+
+
+def test_edits_are_debounced_into_one_recompute(manager):
+    mgr, _ = manager
+    mgr.notify_data_changed()
+    assert mgr.scheduler.get_job(ON_CHANGE_JOB_ID) is None  # on_change disabled
+
+    mgr.save_schedule_config({'enabled': True, 'schedules': [],
+                              'on_change': {'enabled': True, 'debounce_seconds': 30}})
+    mgr.notify_data_changed()
+    first = mgr.scheduler.get_job(ON_CHANGE_JOB_ID).next_run_time
+    mgr.notify_data_changed()
+    jobs = [job for job in mgr.scheduler.get_jobs() if job.id == ON_CHANGE_JOB_ID]
+    assert len(jobs) == 1
+    assert jobs[0].next_run_time >= first
+    assert jobs[0].kwargs == {'cascade': False}
+
+    # Reloading the schedules keeps the pending recompute
+    mgr.reload_schedules()
+    assert mgr.scheduler.get_job(ON_CHANGE_JOB_ID) is not None
+
+
+def test_debounce_is_capped_after_first_edit(manager):
+    mgr, _ = manager
+    mgr.save_schedule_config({'enabled': True, 'schedules': [],
+                              'on_change': {'enabled': True, 'debounce_seconds': 3600}})
+    mgr.notify_data_changed()
+    run_at = mgr.scheduler.get_job(ON_CHANGE_JOB_ID).next_run_time.replace(tzinfo=None)
+    assert run_at <= datetime.now() + timedelta(seconds=601)
+
+
+def test_debounced_run_checks_for_changes(manager):
+    mgr, runner = manager
+    runner.pending = True
+    mgr._burst_started = datetime.now()
+    mgr._run_debounced(cascade=True)
+    assert runner.calls == [True]
+    assert mgr._burst_started is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
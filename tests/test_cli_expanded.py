@@ -74,6 +74,7 @@ def cli_env(monkeypatch, tmp_path):
         "txn_app",
         SimpleNamespace(mark_data_changed=lambda: None, get_status=lambda: {"ok": True}),
     )
+    monkeypatch.setattr(cli, "txn_app", SimpleNamespace(mark_data_changed=lambda: None))
     monkeypatch.setattr(cli.web_server, "_compute_diagnostics", lambda: {"ok": True, "issues": []})
     monkeypatch.setattr(cli.web_server, "generate_self_signed_cert", lambda: ("cert", "key"))
 
@@ -150,11 +151,11 @@ def cli_env(monkeypatch, tmp_path):
             else:
                 return {'suggested_label': 'unknown', 'confidence': 0.5, 'explanation': 'No keywords matched'}
 
-    sys.modules["src.ml_service"] = types.SimpleNamespace(MLService=FakeMLService)
-    sys.modules["src.rules_model_bridge"] = types.SimpleNamespace(
+    monkeypatch.setitem(sys.modules, "src.ml_service", types.SimpleNamespace(MLService=FakeMLService))
+    monkeypatch.setitem(sys.modules, "src.rules_model_bridge", types.SimpleNamespace(
         classify_rules_ml=lambda row, svc: {"source": "ml", "label": "SELL", "confidence": 0.9, "explanation": ""},
         classify=lambda row, ml=None, svc=None: {"source": "ml", "label": "SELL", "confidence": 0.9, "explanation": ""}
-    )
+    ))
 
     # ccxt stub
     class FakeExchange:
@@ -218,6 +219,22 @@ def test_transactions_crud(cli_env, monkeypatch):
     conn.close()
 
 
+def test_transactions_add_creates_schema_on_fresh_install(cli_env, capsys):
+    from cli import cmd_tx_add, cmd_tx_list
+
+    cli_env.db_path.unlink()
+    for suffix in ("-wal", "-shm"):
+        Path(str(cli_env.db_path) + suffix).unlink(missing_ok=True)
+
+    ok = cmd_tx_add(SimpleNamespace(date="2024-01-01", action="BUY", coin="BTC", amount="1", source=None, destination=None, price_usd=None, fee=None, fee_coin=None))
+    assert ok
+
+    capsys.readouterr()
+    assert cmd_tx_list(SimpleNamespace(page=1, per_page=10, search=None, coin=None, action=None, source=None))
+    listed = json.loads(capsys.readouterr().out)
+    assert listed["total"] == 1 and listed["transactions"][0]["coin"] == "BTC"
+
+
 def test_transactions_upload_template_reprocess(cli_env):
     from cli import cmd_tx_upload, cmd_tx_template, cmd_tx_reprocess
 
@@ -323,6 +340,25 @@ def test_backups_and_restore(cli_env):
     assert cmd_restore_backup(SimpleNamespace(file=str(zip_dest), mode="merge", password=None))
 
 
+def test_snapshot_backup_and_point_in_time_restore(cli_env):
+    from cli import cmd_backup_snapshot, cmd_backup_snapshots, cmd_backup_restore_snapshot
+
+    assert cmd_backup_snapshot(SimpleNamespace(label="manual"))
+
+    conn = sqlite3.connect(cli_env.db_path)
+    conn.execute("INSERT INTO trades (id, date, source, action, coin, amount, price_usd) VALUES ('late', '2024-04-01', 'SRC', 'BUY', 'BTC', '1', '1')")
+    conn.commit()
+    conn.close()
+
+    assert cmd_backup_snapshots(SimpleNamespace(label=None))
+    assert cmd_backup_restore_snapshot(SimpleNamespace(id=None, at=None))
+
+    conn = sqlite3.connect(cli_env.db_path)
+    assert conn.execute("SELECT COUNT(*) FROM trades WHERE id='late'").fetchone()[0] == 0
+    conn.close()
+    assert not cmd_backup_restore_snapshot(SimpleNamespace(id=None, at="2000-01-01T00:00:00"))
+
+
 def test_logs(cli_env):
     from cli import cmd_logs_list, cmd_logs_download, cmd_logs_download_all, cmd_logs_download_redacted
 
@@ -0,0 +1,84 @@
+"""
+Tests for the optional Parquet export/import (src/core/columnar.py).
+Parquet round trips are skipped when pyarrow is not installed.
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.core import columnar
+
+
+def make_trades(rows=()):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, source TEXT, destination TEXT,
+                    action TEXT, coin TEXT, amount TEXT, price_usd TEXT, fee TEXT, fee_coin TEXT, batch_id TEXT)""")
+    conn.executemany("INSERT INTO trades (id, date, action, coin, amount, price_usd) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+LOSS_REPORT = pd.DataFrame([
+    {'Item': 'Short-Term Carryover to Next Year', 'Value': 1500.25},
+    {'Item': 'Long-Term Carryover to Next Year', 'Value': 0.0},
+])
+
+
+def test_report_format_falls_back_to_csv(monkeypatch):
+    assert columnar.report_format({}) == 'csv'
+    assert columnar.report_format({'performance': {'report_format': 'xlsx'}}) == 'csv'
+    monkeypatch.setattr(columnar, 'pyarrow_available', lambda: False)
+    assert columnar.report_format({'performance': {'report_format': 'parquet'}}) == 'csv'
+
+
+def test_csv_reports_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, 'pyarrow_available', lambda: False)
+    path = tmp_path / 'US_transaction_LOSS_ANALYSIS.csv'
+    assert columnar.write_report(LOSS_REPORT, path) == [path]
+    assert columnar.read_report(path)['Value'].tolist() == [1500.25, 0.0]
+
+
+def test_parquet_writers_need_pyarrow(tmp_path, monkeypatch):
+    import builtins
+    real_import = builtins.__import__
+
+    def no_pyarrow(name, *args, **kwargs):
+        if name.startswith('pyarrow'):
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, '__import__', no_pyarrow)
+    with pytest.raises(columnar.ColumnarUnavailable, match='pip install pyarrow'):
+        columnar.write_trades_parquet(make_trades(), tmp_path / 'trades.parquet')
+
+
+def test_report_round_trip_prefers_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'US_transaction_LOSS_ANALYSIS.csv'
+    written = columnar.write_report(LOSS_REPORT, path, 'parquet')
+    assert written == [path, tmp_path / 'US_transaction_LOSS_ANALYSIS.parquet']
+    path.unlink()
+    df = columnar.read_report(path)
+    assert df['Item'].tolist() == LOSS_REPORT['Item'].tolist()
+    assert df['Value'].tolist() == [1500.25, 0.0]
+    assert columnar.parquet_rows(written[1]) == 2
+
+
+def test_trades_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    source = make_trades([(f"t{i}", '2024-01-01', 'BUY', 'BTC', '0.100000000000000001', None) for i in range(7)])
+    dump = tmp_path / 'trades.parquet'
+    assert columnar.write_trades_parquet(source, dump, batch_rows=3) == 7
+
+    target = make_trades([('t0', '2023-01-01', 'SELL', 'ETH', '1', '2')])
+    assert columnar.import_trades_parquet(target, dump, batch_rows=3) == 6
+    rows = target.execute("SELECT id, action, amount, price_usd FROM trades ORDER BY id").fetchall()
+    assert rows[0] == ('t0', 'SELL', '1', '2')  # existing trade kept
+    assert rows[1] == ('t1', 'BUY', '0.100000000000000001', None)
+    assert len(rows) == 7
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
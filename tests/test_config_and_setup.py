@@ -80,12 +80,16 @@ class TestConfigHandling(unittest.TestCase):
     def test_throttling_respects_config(self):
         app.GLOBAL_CONFIG['general']['run_audit'] = True
         app.GLOBAL_CONFIG['performance']['respect_free_tier_limits'] = True
-        with open(app.WALLETS_FILE, 'w') as f: json.dump({"BTC": ["addr1", "addr2"]}, f)
+        # More Ethereum addresses (one per Blockchair request) than the free-tier burst
+        wallets = {"ETH": [f"0x{i:040x}" for i in range(8)]}
         auditor = app.WalletAuditor(self.db)
-        with patch('time.sleep') as mock_sleep:
-            with patch.object(auditor, 'check_blockchair', return_value=0):
-                auditor.run_audit()
-            mock_sleep.assert_called()
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"data": {}}
+        with patch('time.sleep') as mock_sleep, patch('requests.get', return_value=mock_response) as mock_get, \
+                patch.object(app, 'load_wallets_file', return_value=wallets):
+            auditor.check_blockchair("PASTE_KEY_OPTIONAL")
+        self.assertEqual(mock_get.call_count, 8)
+        mock_sleep.assert_called()
     @patch('requests.get')
     def test_blockchair_optionality(self, mock_get):
         app.GLOBAL_CONFIG['general']['run_audit'] = True
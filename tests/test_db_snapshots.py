@@ -0,0 +1,154 @@
+"""
+================================================================================
+TEST: Incremental Database Snapshots
+================================================================================
+
+Validates the content-addressed snapshot store behind safety backups.
+
+Test Coverage:
+    - Unchanged chunks are deduplicated between snapshots
+    - Point-in-time restore by id and timestamp
+    - Retention policy and chunk garbage collection
+    - WAL databases snapshot consistently
+    - DatabaseManager safety backup / restore round trip
+
+Author: robertbiv
+================================================================================
+"""
+
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timezone
+
+import pytest
+
+from src.core.snapshots import SnapshotStore, snapshot_store_for
+
+
+def _make_db(path, rows=2000, wal=False):
+    conn = sqlite3.connect(str(path))
+    if wal:
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY, coin TEXT, amount TEXT)")
+    conn.executemany("INSERT INTO trades VALUES (?, ?, ?)", [(f"tx{i}", "BTC", "1" * 50) for i in range(rows)])
+    conn.commit()
+    return conn
+
+
+def _count(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return SnapshotStore(tmp_path / "store", chunk_size=4096, keep_last=50, keep_daily=0)
+
+
+def test_second_snapshot_only_writes_changed_chunks(tmp_path, store):
+    db = tmp_path / "trades.db"
+    _make_db(db).close()
+
+    first = store.create_snapshot(db)
+    assert first['new_chunks'] == len(set(first['chunks']))
+
+    conn = sqlite3.connect(str(db))
+    conn.execute("UPDATE trades SET amount='2' WHERE id='tx5'")
+    conn.commit()
+    conn.close()
+
+    second = store.create_snapshot(db)
+    assert 0 < second['new_chunks'] <= 3
+    assert len(second['chunks']) == len(first['chunks'])
+
+
+def test_point_in_time_restore(tmp_path, store):
+    db = tmp_path / "trades.db"
+    conn = _make_db(db, rows=10)
+    conn.close()
+    first = store.create_snapshot(db)
+    between = datetime.now(timezone.utc)
+    time.sleep(0.01)
+
+    conn = sqlite3.connect(str(db))
+    conn.execute("DELETE FROM trades")
+    conn.commit()
+    conn.close()
+    store.create_snapshot(db)
+
+    assert store.find_snapshot(between)['id'] == first['id']
+    store.restore(store.find_snapshot(between), db)
+    assert _count(db) == 10
+
+    store.restore(store.latest(), db)
+    assert _count(db) == 0
+
+
+def test_restore_detects_corrupted_chunk(tmp_path, store):
+    db = tmp_path / "trades.db"
+    _make_db(db, rows=10).close()
+    manifest = store.create_snapshot(db)
+    chunk = manifest['chunks'][0]
+    (store.objects_dir / chunk[:2] / chunk).write_bytes(zlib.compress(b"tampered"))
+    with pytest.raises(ValueError):
+        store.restore(manifest['id'], tmp_path / "restored.db")
+    assert not (tmp_path / "restored.db").exists()
+
+
+def test_retention_prunes_snapshots_and_orphaned_chunks(tmp_path):
+    store = SnapshotStore(tmp_path / "store", chunk_size=4096, keep_last=2, keep_daily=0)
+    db = tmp_path / "trades.db"
+    conn = _make_db(db, rows=10)
+    for i in range(4):
+        conn.execute("INSERT INTO trades VALUES (?, 'ETH', ?)", (f"extra{i}", str(i) * 3000))
+        conn.commit()
+        store.create_snapshot(db)
+    conn.close()
+
+    kept = store.list_snapshots()
+    assert len(kept) == 2
+    referenced = {c for m in kept for c in m['chunks']}
+    on_disk = {p.name for p in store.objects_dir.glob('*/*')}
+    assert on_disk == referenced
+
+
+def test_wal_database_snapshot_is_consistent(tmp_path, store):
+    db = tmp_path / "trades.db"
+    conn = _make_db(db, rows=300, wal=True)
+    # A concurrent reader can block the checkpoint; the snapshot must still see every row
+    reader = sqlite3.connect(str(db))
+    reader.execute("BEGIN")
+    reader.execute("SELECT COUNT(*) FROM trades").fetchone()
+    conn.execute("INSERT INTO trades VALUES ('late', 'BTC', '1')")
+    conn.commit()
+
+    manifest = store.create_snapshot(db)
+    reader.rollback()
+    reader.close()
+    conn.close()
+
+    restored = store.restore(manifest, tmp_path / "restored.db")
+    assert _count(restored) == 301
+
+
+def test_safety_backup_round_trip(tmp_path, monkeypatch):
+    import src.core.database as database
+
+    monkeypatch.setitem(database.GLOBAL_CONFIG['general'], 'create_db_backups', True)
+    db = database.DatabaseManager(db_file=tmp_path / "crypto_master.db")
+    db.save_trade({'id': 'keep', 'date': '2024-01-01', 'source': 'M', 'action': 'BUY', 'coin': 'BTC',
+                   'amount': 1, 'price_usd': 100, 'fee': 0, 'batch_id': '1'})
+    db.commit()
+    db.create_safety_backup()
+
+    db.save_trade({'id': 'partial', 'date': '2024-01-02', 'source': 'M', 'action': 'BUY', 'coin': 'BTC',
+                   'amount': 1, 'price_usd': 100, 'fee': 0, 'batch_id': '2'})
+    db.restore_safety_backup()
+
+    assert list(db.get_all()['id']) == ['keep']
+    assert snapshot_store_for(tmp_path / "crypto_master.db").latest('safety') is not None
+    db.close()
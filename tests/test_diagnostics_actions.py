@@ -76,6 +76,8 @@ class TestDiagnosticsActions(unittest.TestCase):
                 class Row:
                     def fetchone(self_inner):
                         return ('ok',)
+                    def fetchall(self_inner):
+                        return [('ok',)]
                 return Row()
             def close(self):
                 pass
@@ -93,6 +95,8 @@ class TestDiagnosticsActions(unittest.TestCase):
                 class Row:
                     def fetchone(self_inner):
                         return ('database disk image is malformed',)
+                    def fetchall(self_inner):
+                        return [('database disk image is malformed',)]
                 return Row()
             def close(self):
                 pass
@@ -0,0 +1,171 @@
+"""
+Tests for the tiered database integrity checks (src/core/integrity.py) and
+their use by DatabaseManager and the scheduler.
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import src.core.engine as app
+from src.core import integrity
+from src.core.database import DatabaseManager
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture()
+def db_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'STATUS_FILE', tmp_path / 'status.json')
+    path = tmp_path / 'crypto_master.db'
+    DatabaseManager(path).close()
+    DatabaseManager(path).close()  # a new database is verified on its first re-open
+    return path
+
+
+@pytest.fixture()
+def checks(monkeypatch):
+    calls = []
+    original = integrity.run_check
+
+    def counting(db_file, kind='quick', conn=None):
+        calls.append(kind)
+        return original(db_file, kind, conn=conn)
+
+    monkeypatch.setattr(integrity, 'run_check', counting)
+    return calls
+
+
+def external_write(path):
+    conn = sqlite3.connect(str(path))
+    conn.execute("INSERT INTO trades (id, date, action, coin) VALUES ('ext', '2024-01-01', 'BUY', 'BTC')")
+    conn.commit()
+    conn.close()
+    stamp = path.stat()
+    os.utime(path, ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 1_000_000))
+
+
+def test_unchanged_file_skips_quick_check(db_file, checks):
+    assert not integrity.quick_check_needed(db_file)
+    DatabaseManager(db_file).close()
+    assert checks == []
+
+
+def test_own_writes_keep_file_verified(db_file, checks):
+    db = DatabaseManager(db_file)
+    db.cursor.execute("INSERT INTO trades (id, date, action, coin) VALUES ('own', '2024-01-01', 'BUY', 'BTC')")
+    db.commit()
+    db.close()
+    assert not integrity.quick_check_needed(db_file)
+    DatabaseManager(db_file).close()
+    assert checks == []
+
+
+def test_external_write_triggers_quick_check(db_file, checks):
+    external_write(db_file)
+    assert integrity.quick_check_needed(db_file)
+    DatabaseManager(db_file).close()
+    assert checks == ['quick']
+    assert integrity.summary(db_file)['quick']['result'] == 'ok'
+
+
+def test_full_check_is_recorded(db_file):
+    info = integrity.summary(db_file, max_full_age_hours=24)
+    assert info['full'] is None and info['full_overdue']
+    db = DatabaseManager(db_file)
+    assert db.check_integrity(full=True) == 'ok'
+    db.close()
+
+    info = integrity.summary(db_file, max_full_age_hours=24)
+    assert info['full']['result'] == 'ok'
+    assert not info['full_overdue'] and not info['changed_since_verified']
+    assert integrity.health(db_file, 24)['message'].startswith('Database integrity verified (integrity_check')
+
+
+def test_problems_are_reported_and_unverify(db_file):
+    state = integrity.integrity_state(db_file)
+    state['quick'] = {'result': 'row 3 missing from index', 'checked_at': datetime.now().isoformat(), 'seconds': 0}
+    integrity._save_state(db_file, state)
+    info = integrity.health(db_file)
+    assert not info['ok']
+    assert info['message'] == 'Database integrity check reported: quick_check: row 3 missing from index'
+
+
+def test_state_is_per_database(db_file, tmp_path, checks):
+    other = tmp_path / 'other.db'
+    sqlite3.connect(str(other)).close()
+    assert integrity.quick_check_needed(other)
+    assert integrity.health(other)['ok']
+    assert checks == ['quick']
+    assert integrity.quick_check_needed(db_file)  # the other database's results replaced ours
+
+
+def test_paths_with_uri_characters_are_checked_in_place(tmp_path, monkeypatch, checks):
+    monkeypatch.setattr(app, 'STATUS_FILE', tmp_path / 'status.json')
+    folder = tmp_path / 'odd?dir#1%20'
+    folder.mkdir()
+    path = folder / 'crypto_master.db'
+    db = DatabaseManager(path)
+    db.cursor.execute("INSERT INTO trades (id, date, action, coin) VALUES ('keep', '2024-01-01', 'BUY', 'BTC')")
+    db.commit()
+    db.close()
+    external_write(path)
+
+    db = DatabaseManager(path)
+    try:
+        assert sorted(r[0] for r in db.cursor.execute("SELECT id FROM trades")) == ['ext', 'keep']
+    finally:
+        db.close()
+    assert checks == ['quick']
+    assert integrity.summary(path)['quick']['result'] == 'ok'
+    assert not integrity.quick_check_needed(path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['odd?dir#1%20', 'status.json']  # checked the right file
+
+
+def test_results_are_cached_without_importing_the_engine_first(tmp_path):
+    script = (
+        "import sqlite3, sys\n"
+        "from src.core import integrity\n"
+        "assert 'src.core.engine' not in sys.modules\n"
+        "sqlite3.connect('ledger.db').execute('CREATE TABLE t (x)').connection.close()\n"
+        "assert integrity.run_check('ledger.db') == 'ok'\n"
+        "assert not integrity.quick_check_needed('ledger.db')\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONPATH=PROJECT_ROOT), stdin=subprocess.DEVNULL, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+
+def test_scheduler_registers_full_check(db_file, monkeypatch):
+    pytest.importorskip('apscheduler')
+    from src.web.scheduler import INTEGRITY_JOB_ID, ScheduleManager
+
+    ran = []
+    monkeypatch.setattr(integrity, 'run_check', lambda path, kind='quick', conn=None: ran.append(kind) or 'ok')
+    manager = ScheduleManager(db_file.parent, db_file.parent / 'auto_runner.py',
+                              runner=lambda: SimpleNamespace(running=False))
+    try:
+        state = integrity.integrity_state(db_file)
+        state['full'] = {'result': 'ok', 'checked_at': (datetime.now() - timedelta(hours=1)).isoformat(), 'seconds': 0}
+        integrity._save_state(db_file, state)
+
+        manager.schedule_integrity_check(lambda: db_file, hours=24)
+        job = manager.scheduler.get_job(INTEGRITY_JOB_ID)
+        next_run = job.next_run_time.replace(tzinfo=None)
+        assert timedelta(hours=22) < next_run - datetime.now() < timedelta(hours=24)
+
+        manager.reload_schedules()
+        assert manager.scheduler.get_job(INTEGRITY_JOB_ID) is not None
+        manager.run_integrity_check()
+        assert ran == ['full']
+    finally:
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,311 @@
+"""
+================================================================================
+TEST: Background Job Queue
+================================================================================
+
+Validates the SQLite-backed job subsystem used by the web UI.
+
+Test Coverage:
+    - submit() returns immediately; results and progress land in the job table
+    - Per-type concurrency limits and the bounded worker pool
+    - Cancelling queued and running jobs
+    - Failed handlers record the error
+    - Jobs left running by an exited process are recovered as errors
+    - Progress written from another process (Auto_Runner) via the environment
+    - Upload and progress endpoints return job ids
+
+Author: robertbiv
+================================================================================
+"""
+
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.core.jobs import (
+    JobCancelled,
+    JobManager,
+    JobReporter,
+    JobStore,
+    child_env,
+    job_store_for,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture()
+def manager(tmp_path):
+    mgr = JobManager(JobStore(tmp_path / 'jobs.db'), max_workers=3, limits={}, poll_interval=0.05)
+    yield mgr
+    mgr.shutdown(wait=False)
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_job_store_lives_next_to_database(tmp_path):
+    assert job_store_for(tmp_path / 'crypto_master.db').path == tmp_path / 'crypto_master_jobs.db'
+
+
+def test_submit_returns_before_job_runs_and_records_result(manager):
+    release = threading.Event()
+
+    def handler(reporter, rows):
+        release.wait(5)
+        for i in range(rows):
+            reporter(i + 1, rows)
+        return {'message': f'Processed {rows} rows', 'rows': rows}
+
+    manager.register('import', handler)
+    job_id = manager.submit('import', rows=3)
+    assert manager.get(job_id)['status'] in ('queued', 'running')
+
+    release.set()
+    job = manager.wait(job_id, timeout=5)
+    assert job['status'] == 'completed'
+    assert job['progress'] == 100
+    assert job['result'] == {'message': 'Processed 3 rows', 'rows': 3}
+    assert job['message'] == 'Processed 3 rows'
+    assert job['params'] == {'rows': 3}
+    assert (job['current'], job['total']) == (3, 3)
+
+
+def test_progress_is_visible_while_running(manager):
+    step = threading.Event()
+
+    def handler(reporter):
+        reporter.span(0, 50, 'Rows')(5, 10)
+        step.wait(5)
+
+    manager.register('slow', handler)
+    job_id = manager.submit('slow')
+    assert _wait_for(lambda: manager.get(job_id)['message'] == 'Rows: 5 of 10')
+    job = manager.get(job_id)
+    assert job['status'] == 'running'
+    assert job['progress'] == 25
+    step.set()
+    assert manager.wait(job_id, timeout=5)['status'] == 'completed'
+
+
+def test_per_type_limit_serializes_jobs(manager):
+    active, peak = [], []
+    lock = threading.Lock()
+
+    def handler(reporter):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.pop()
+
+    manager.register('calc', handler, limit=1)
+    ids = [manager.submit('calc') for _ in range(3)]
+    for job_id in ids:
+        assert manager.wait(job_id, timeout=10)['status'] == 'completed'
+    assert max(peak) == 1
+
+
+def test_pool_bounds_concurrency_across_types(tmp_path):
+    mgr = JobManager(JobStore(tmp_path / 'jobs.db'), max_workers=2, limits={}, poll_interval=0.05)
+    active, peak = [], []
+    lock = threading.Lock()
+
+    def handler(reporter):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.pop()
+
+    try:
+        mgr.register('a', handler)
+        mgr.register('b', handler)
+        ids = [mgr.submit(t) for t in ('a', 'b', 'a', 'b')]
+        for job_id in ids:
+            assert mgr.wait(job_id, timeout=10)['status'] == 'completed'
+        assert max(peak) == 2
+    finally:
+        mgr.shutdown()
+
+
+def test_cancel_queued_job(manager):
+    release = threading.Event()
+    manager.register('calc', lambda reporter: release.wait(5), limit=1)
+    first = manager.submit('calc')
+    second = manager.submit('calc')
+    assert _wait_for(lambda: manager.get(first)['status'] == 'running')
+
+    assert manager.cancel(second)['status'] == 'cancelled'
+    release.set()
+    assert manager.wait(first, timeout=5)['status'] == 'completed'
+    assert manager.get(second)['status'] == 'cancelled'
+    assert manager.get(second)['started_at'] is None
+
+
+def test_cancel_running_job_raises_at_next_report(manager):
+    started = threading.Event()
+    reached = []
+
+    def handler(reporter):
+        started.set()
+        for i in range(1000):
+            reporter(i, 1000)
+            reached.append(i)
+            time.sleep(0.01)
+
+    manager.register('long', handler)
+    job_id = manager.submit('long')
+    assert started.wait(5)
+    manager.cancel(job_id)
+    job = manager.wait(job_id, timeout=5)
+    assert job['status'] == 'cancelled'
+    assert len(reached) < 1000
+
+
+def test_cancel_from_another_process_is_seen_by_reporter(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+    job_id = store.create('calc')
+    reporter = JobReporter(store, job_id, min_interval=0)
+    reporter(1, 10)
+
+    store.claim('other:1', ['calc'], {}, 1)
+    JobStore(tmp_path / 'jobs.db').request_cancel(job_id)
+    with pytest.raises(JobCancelled):
+        reporter(2, 10)
+    assert reporter.cancelled
+
+
+def test_failed_job_records_error(manager):
+    def handler(reporter):
+        raise RuntimeError('API rate limit reached')
+
+    manager.register('calc', handler)
+    job = manager.wait(manager.submit('calc'), timeout=5)
+    assert job['status'] == 'error'
+    assert job['message'] == 'API rate limit reached'
+    assert job['error'] == 'RuntimeError: API rate limit reached'
+
+
+def test_unknown_job_type_rejected(manager):
+    with pytest.raises(ValueError):
+        manager.submit('nope')
+
+
+def test_recover_fails_jobs_of_exited_processes(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+    store.create('calc')
+    store.create('calc')
+    [dead] = [job['id'] for job in store.claim('dead-owner', ['calc'], {}, 1)]
+    [alive] = [job['id'] for job in store.claim('live-owner', ['calc'], {}, 1)]
+
+    assert store.recover(owner_alive=lambda owner: owner == 'live-owner') == 1
+    assert store.get(dead)['status'] == 'error'
+    assert store.get(dead)['error'] == 'interrupted'
+    assert store.get(alive)['status'] == 'running'
+
+
+def test_limits_count_jobs_running_in_other_processes(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+    store.create('calc')
+    second = store.create('calc')
+    assert len(store.claim('worker-1', ['calc'], {'calc': 1}, 5)) == 1
+    assert store.claim('worker-2', ['calc'], {'calc': 1}, 5) == []
+    assert store.get(second)['status'] == 'queued'
+
+
+def test_child_process_reports_into_job(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+    job_id = store.create('calc')
+    reporter = JobReporter(store, job_id)
+    script = (
+        "from src.core.jobs import reporter_from_env\n"
+        "r = reporter_from_env()\n"
+        "r.stage(10, 'Step 1')\n"
+        "r.span(10, 90, 'Year 2024 trades')(50, 100)\n"  # throttled: too soon after the stage
+        "r.span(10, 90, 'Year 2024 trades')(100, 100)\n"
+    )
+    env = child_env(reporter)
+    env['PYTHONPATH'] = str(PROJECT_ROOT)
+    subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env, check=True, timeout=60)
+    job = store.get(job_id)
+    assert job['progress'] == 90
+    assert (job['current'], job['total']) == (100, 100)
+    assert job['message'] == 'Year 2024 trades: 100 of 100'
+
+
+# ----------------------------------------------------------------------
+# Web endpoints
+# ----------------------------------------------------------------------
+
+@pytest.fixture()
+def web_client(tmp_path, monkeypatch):
+    import src.core.engine as cte
+    import web_server as ws
+
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    db_file = tmp_path / 'crypto_master.db'
+    monkeypatch.setattr(ws, 'UPLOAD_FOLDER', inputs, raising=False)
+    monkeypatch.setattr(ws, 'DB_FILE', db_file, raising=False)
+    monkeypatch.setattr(cte, 'STATUS_FILE', tmp_path / 'status.json', raising=False)
+    ingested = []
+
+    def fake_ingest(path, progress=None):
+        progress.update('csv_rows', 1, 2)
+        ingested.append(path)
+        return {'total_rows': 2, 'new_trades': 2, 'invalid_trades': 0}
+
+    monkeypatch.setattr(ws, '_ingest_csv_with_engine', fake_ingest)
+
+    client = ws.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = 'test_user'
+    csrf = client.get('/api/csrf-token').get_json()['csrf_token']
+    headers = {'X-CSRF-Token': csrf, 'Origin': 'http://localhost', 'Host': 'localhost'}
+    yield client, headers, ws, ingested
+    manager = ws._job_managers.pop(db_file, None)
+    if manager is not None:
+        manager.shutdown(wait=False)
+
+
+def test_upload_returns_job_id_and_progress_reports_result(web_client):
+    client, headers, ws, ingested = web_client
+    data = {'file': (io.BytesIO(b'date,coin,amount\n2024-01-01,BTC,1\n'), 'tx.csv')}
+    resp = client.post('/api/transactions/upload', data=data, headers=headers, content_type='multipart/form-data')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['success'] is True
+    job_id = body['job_id']
+
+    job = ws.get_job_manager().wait(job_id, timeout=10)
+    assert job['status'] == 'completed'
+    assert ingested and ingested[0].name == 'tx.csv'
+
+    progress = client.get(f'/api/progress/{job_id}').get_json()
+    assert progress['status'] == 'completed'
+    assert progress['result']['new_trades'] == 2
+    assert progress['message'] == 'Imported 2 trades from tx.csv (rows: 2)'
+
+    listed = client.get('/api/jobs?type=csv_upload').get_json()
+    assert [j['id'] for j in json.loads(listed['data'])['jobs']] == [job_id]
+
+
+def test_cancel_endpoint_unknown_job(web_client):
+    client, headers, _, _ = web_client
+    resp = client.post('/api/jobs/missing/cancel', headers=headers, json={})
+    assert resp.status_code == 404
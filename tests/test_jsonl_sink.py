@@ -0,0 +1,199 @@
+"""
+================================================================================
+TEST: Buffered JSONL Sink
+================================================================================
+
+Validates the shared buffered JSON-lines writer used for anomaly and ML
+suggestion logs.
+
+Test Coverage:
+    - Records are buffered until a size or time threshold
+    - Explicit flush / close write everything in order
+    - Background writer thread drains the buffer
+    - gzip segments (and zstd fallback) read back with iter_jsonl
+    - logging.Handler adapter keeps `extra=` fields
+    - Ingestor writes anomaly logs in one batch per file
+
+Author: robertbiv
+================================================================================
+"""
+
+import gzip
+import json
+import logging
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import src.core.engine as engine
+from src.utils.jsonl_sink import JsonlSink, JsonlSinkHandler, iter_jsonl
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_buffers_until_record_threshold(tmp_path):
+    path = tmp_path / 'logs' / 'events.log'
+    sink = JsonlSink(path, max_records=3, flush_interval=3600)
+    sink.write({'n': 1})
+    sink.write({'n': 2})
+    assert not path.exists()
+    assert sink.pending() == 2
+
+    sink.write({'n': 3})
+    assert [r['n'] for r in _lines(path)] == [1, 2, 3]
+    assert sink.flushes == 1
+    assert sink.pending() == 0
+
+
+def test_byte_threshold_and_time_threshold(tmp_path):
+    path = tmp_path / 'events.log'
+    sink = JsonlSink(path, max_records=1000, max_bytes=50, flush_interval=3600)
+    sink.write({'payload': 'x' * 60})
+    assert len(_lines(path)) == 1
+
+    timed = JsonlSink(tmp_path / 'timed.log', max_records=1000, flush_interval=0)
+    timed.write({'n': 1})
+    assert len(_lines(tmp_path / 'timed.log')) == 1
+
+
+def test_close_flushes_and_rejects_writes(tmp_path):
+    path = tmp_path / 'events.log'
+    with JsonlSink(path, flush_interval=3600) as sink:
+        sink.write_many({'n': i} for i in range(5))
+        assert not path.exists()
+    assert [r['n'] for r in _lines(path)] == list(range(5))
+    with pytest.raises(ValueError):
+        sink.write({'n': 6})
+
+
+def test_non_json_values_are_stringified(tmp_path):
+    from decimal import Decimal
+    path = tmp_path / 'events.log'
+    with JsonlSink(path) as sink:
+        sink.write({'amount': Decimal('0.10000000')})
+    assert _lines(path) == [{'amount': '0.10000000'}]
+
+
+def test_concurrent_writers_keep_every_record(tmp_path):
+    path = tmp_path / 'events.log'
+    sink = JsonlSink(path, max_records=7, flush_interval=3600)
+
+    def worker(tag):
+        for i in range(200):
+            sink.write({'tag': tag, 'i': i})
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    sink.close()
+
+    records = _lines(path)
+    assert len(records) == 800
+    for tag in range(4):
+        assert [r['i'] for r in records if r['tag'] == tag] == list(range(200))
+
+
+def test_background_thread_writes(tmp_path):
+    path = tmp_path / 'events.log'
+    sink = JsonlSink(path, max_records=2, flush_interval=0.05, background=True)
+    sink.write({'n': 1})
+    deadline = time.time() + 5
+    while not path.exists() and time.time() < deadline:
+        time.sleep(0.01)
+    assert _lines(path) == [{'n': 1}]
+    sink.write({'n': 2})
+    sink.close()
+    assert [r['n'] for r in _lines(path)] == [1, 2]
+
+
+def test_gzip_segments_concatenate(tmp_path):
+    path = tmp_path / 'events.log.gz'
+    sink = JsonlSink(path, compression='gzip')
+    sink.write({'n': 1})
+    sink.flush()
+    sink.write({'n': 2})
+    sink.close()
+    assert sink.flushes == 2
+    assert gzip.decompress(path.read_bytes()).decode().splitlines() == ['{"n": 1}', '{"n": 2}']
+    assert list(iter_jsonl(path)) == [{'n': 1}, {'n': 2}]
+
+
+def test_zstd_falls_back_to_gzip_without_zstandard(tmp_path, monkeypatch):
+    import src.utils.jsonl_sink as jsonl_sink
+    monkeypatch.setattr(jsonl_sink, '_zstd_compressor', lambda: None)
+    sink = JsonlSink(tmp_path / 'events.log.zst', compression='zstd')
+    assert sink.compression == 'gzip'
+    sink.write({'n': 1})
+    sink.close()
+    assert list(iter_jsonl(tmp_path / 'events.log.zst')) == [{'n': 1}]
+
+
+def test_rejects_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        JsonlSink(tmp_path / 'x.log', compression='lz4')
+
+
+def test_logging_handler_keeps_extra_fields(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    handler = JsonlSinkHandler(JsonlSink(path, flush_interval=3600))
+    log = logging.getLogger('test_jsonl_sink_handler')
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.addHandler(handler)
+    try:
+        log.info('Login for %s', 'alice', extra={'action': 'LOGIN_SUCCESS', 'ip': '127.0.0.1'})
+    finally:
+        log.removeHandler(handler)
+        handler.close()
+
+    [record] = _lines(path)
+    assert record['message'] == 'Login for alice'
+    assert record['action'] == 'LOGIN_SUCCESS'
+    assert record['ip'] == '127.0.0.1'
+    assert record['level'] == 'INFO'
+
+
+def test_ingestor_buffers_anomaly_log_until_file_done(tmp_path, monkeypatch):
+    class DummyDB:
+        def save_trade(self, trade):
+            pass
+
+        def commit(self):
+            pass
+
+    log_path = tmp_path / 'anomalies.log'
+    monkeypatch.setattr(engine, 'ANOMALY_LOG_FILE', log_path)
+    ingest = engine.Ingestor(db=DummyDB())
+    ingest.ml_enabled = False
+
+    csv_path = tmp_path / 'trades.csv'
+    pd.DataFrame({
+        'date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+        'coin': ['BTC', 'BTC', 'BTC'],
+        'amount': [1000, 0.01, 1],
+        'price_usd': [5000, 50, 40000],
+        'type': ['buy', 'buy', 'buy'],
+    }).to_csv(csv_path, index=False)
+
+    opened = []
+    real_open = open
+
+    def counting_open(file, *args, **kwargs):
+        if str(file) == str(log_path):
+            opened.append(args[0] if args else kwargs.get('mode'))
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr('builtins.open', counting_open)
+    ingest._proc_csv_smart(csv_path, 'BATCH')
+    monkeypatch.undo()
+
+    records = _lines(log_path)
+    assert [r['anomaly_type'] for r in records] == ['EXTREME_VALUE', 'PRICE_ERROR']
+    assert [r['row_index'] for r in records] == [0, 1]
+    assert len(opened) == 1
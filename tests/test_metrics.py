@@ -0,0 +1,132 @@
+"""
+Tests for per-request metrics (src/web/metrics.py) and the /api/metrics
+Prometheus endpoint.
+"""
+
+import base64
+import sqlite3
+import time
+from unittest.mock import patch
+
+import bcrypt
+import pytest
+from flask import Flask
+
+import web_server as ws
+from src.web import metrics
+
+
+def test_histogram_is_cumulative():
+    hist = metrics.Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value)
+    assert list(hist.cumulative()) == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+    assert hist.count == 4 and hist.total == pytest.approx(3.65)
+
+
+def test_connection_counts_statements_per_request():
+    app = Flask(__name__)
+    collector = metrics.RequestMetrics()
+    conn = sqlite3.connect(':memory:', factory=metrics.MetricsConnection)
+    conn.execute("CREATE TABLE t (a INTEGER)")  # outside a request: not counted
+
+    with app.test_request_context('/x'):
+        collector.start_request()
+        conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone() == (2,)
+        conn.cursor().execute("SELECT a FROM t").fetchall()
+        stats = metrics._current_stats()
+        assert stats.queries == 3 and stats.query_seconds > 0
+
+
+def test_slowest_keeps_fixed_number_of_samples():
+    collector = metrics.RequestMetrics(slowest=3)
+    for i, seconds in enumerate((0.2, 0.9, 0.1, 0.5, 0.7, 0.3)):
+        collector.observe('GET', '/api/x', 200, seconds, path=f'/api/x?{i}')
+    assert [s['seconds'] for s in collector.slowest()] == [0.9, 0.7, 0.5]
+    assert collector.slowest()[0]['path'] == '/api/x?1'
+
+
+def test_render_prometheus():
+    collector = metrics.RequestMetrics(latency_buckets=(0.1, 1.0), size_buckets=(100,), slowest=2)
+    collector.observe('GET', '/api/reports/<year>', 200, 0.05, size=50, queries=3, query_seconds=0.01)
+    collector.observe('GET', '/api/reports/<year>', 500, 2.0, size=None, queries=1, query_seconds=0.5)
+    collector.observe('POST', '/weird"path', 200, 0.2, size=500)
+    text = collector.render_prometheus()
+    lines = text.splitlines()
+
+    reports = 'method="GET",endpoint="/api/reports/<year>"'
+    assert f'crypto_tracker_http_request_duration_seconds_bucket{{{reports},le="0.1"}} 1' in lines
+    assert f'crypto_tracker_http_request_duration_seconds_bucket{{{reports},le="+Inf"}} 2' in lines
+    assert f'crypto_tracker_http_request_duration_seconds_count{{{reports}}} 2' in lines
+    assert f'crypto_tracker_http_response_size_bytes_count{{{reports}}} 1' in lines
+    assert f'crypto_tracker_http_requests_total{{{reports},status="500"}} 1' in lines
+    assert f'crypto_tracker_db_queries_total{{{reports}}} 4' in lines
+    assert f'crypto_tracker_db_query_seconds_total{{{reports}}} 0.51' in lines
+    assert 'endpoint="/weird\\"path"' in text
+    slowest = [line for line in lines if line.startswith('crypto_tracker_slowest_request_seconds{')]
+    assert len(slowest) == 2 and slowest[0].startswith('crypto_tracker_slowest_request_seconds{rank="1"')
+    assert '# TYPE crypto_tracker_http_request_duration_seconds histogram' in lines
+
+
+@pytest.fixture
+def client(tmp_path):
+    db = tmp_path / 'crypto_master.db'
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, action TEXT, coin TEXT, amount TEXT, "
+                 "price_usd TEXT)")
+    conn.execute("INSERT INTO trades VALUES ('1', '2024-01-05', 'BUY', 'BTC', '1', '40000')")
+    conn.commit()
+    conn.close()
+
+    ws.app.config['TESTING'] = True
+    test_client = ws.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess['username'] = 'admin'
+        sess['csrf_token'] = 'test_csrf_token'
+        sess['csrf_created_at'] = time.time()
+    with patch.object(ws, 'DB_FILE', db):
+        yield test_client
+
+
+def test_requests_are_recorded_with_queries(client):
+    # Empty slowest-request buffer, so slower requests from earlier tests cannot crowd this one out
+    with patch.object(ws.request_metrics, '_slowest', []):
+        resp = client.post('/api/advanced/search', json={'query': 'BTC'},
+                           headers={'X-CSRF-Token': 'test_csrf_token'})
+        samples = ws.request_metrics.slowest()
+    assert resp.status_code == 200
+
+    text = client.get('/api/metrics').get_data(as_text=True)
+    search = 'method="POST",endpoint="/api/advanced/search"'
+    count_line = next(line for line in text.splitlines()
+                      if line.startswith(f'crypto_tracker_db_queries_total{{{search}}}'))
+    assert int(count_line.rsplit(' ', 1)[1]) >= 1
+    assert f'crypto_tracker_http_requests_total{{{search},status="200"}}' in text
+    assert any(s['endpoint'] == '/api/advanced/search' and s['queries'] >= 1 for s in samples)
+
+    client.get('/no/such/page')
+    assert 'endpoint="<unmatched>"' in client.get('/api/metrics').get_data(as_text=True)
+
+
+def test_metrics_requires_authentication(tmp_path):
+    users = tmp_path / 'web_users.json'
+    users.write_text('{"admin": {"password_hash": "%s"}}'
+                     % bcrypt.hashpw(b'secret', bcrypt.gensalt(4)).decode())
+    client = ws.app.test_client()
+    with patch.object(ws, 'USERS_FILE', users), patch.dict(ws.app.config, {'TESTING': False}):
+        resp = client.get('/api/metrics')
+        assert resp.status_code == 401 and resp.headers['WWW-Authenticate'].startswith('Basic')
+
+        bad = base64.b64encode(b'admin:wrong').decode()
+        assert client.get('/api/metrics', headers={'Authorization': f'Basic {bad}'}).status_code == 401
+
+        good = base64.b64encode(b'admin:secret').decode()
+        resp = client.get('/api/metrics', headers={'Authorization': f'Basic {good}'})
+        assert resp.status_code == 200
+        assert resp.content_type == metrics.PROMETHEUS_MIMETYPE
+        assert '# TYPE crypto_tracker_http_requests_total counter' in resp.get_data(as_text=True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -57,6 +57,7 @@ def test_ingestor_ml_fallback_logs(tmp_path, monkeypatch):
 
     row = pd.Series({"description": "Withdrawal to wallet", "amount": "1.0"})
     ingest._ml_fallback(row, batch="TEST", idx=0)
+    ingest.flush_logs()  # suggestion logs are buffered until the scan finishes
 
     assert log_path.exists()
     content = log_path.read_text().strip().splitlines()
@@ -9,7 +9,7 @@ import os
 import sys
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
-from src.ml_service import MLService
+from src.ml_service import MLService, transaction_signature
 
 
 class TestMLServiceEdgeCases:
@@ -431,5 +431,88 @@ class TestConfigJSONValidation:
         assert config3['accuracy_mode']['enabled']
 
 
+
+class TestSuggestBatchAndCache:
+    """suggest_batch, the signature cache and throughput stats"""
+
+    class FakeTokenizer:
+        padding_side = 'right'
+        pad_token_id = None
+        eos_token_id = 2
+
+        def encode(self, text, add_special_tokens=False):
+            return text.split()
+
+    class FakePipe:
+        def __init__(self):
+            self.tokenizer = TestSuggestBatchAndCache.FakeTokenizer()
+            self.calls = []
+
+        def __call__(self, prompts, **kwargs):
+            self.calls.append((list(prompts), kwargs))
+            return [[{'generated_text': ' SELL now'}] if 'sold' in p.lower() else [{'generated_text': ' BUY'}]
+                    for p in prompts]
+
+    def _model_service(self, tmp_path):
+        svc = MLService(mode='tinyllama', batch_size=4, cache_file=tmp_path / 'cache.db')
+        svc.pipe = self.FakePipe()
+        return svc
+
+    def test_shim_batch_matches_single(self):
+        svc = MLService(mode='shim')
+        txs = [{'description': 'Bought BTC', 'amount': 1}, {'description': 'network fee', 'amount': 0.1},
+               {'description': '', 'amount': 0.00001}]
+        assert svc.suggest_batch(txs) == [svc.suggest(tx) for tx in txs]
+
+    def test_signature_normalizes_description_and_amount(self):
+        a = transaction_signature({'description': 'Bought  BTC on Kraken', 'coin': 'btc', 'amount': '0.51'})
+        b = transaction_signature({'description': 'bought btc via app', 'coin': 'BTC', 'amount': 0.87})
+        c = transaction_signature({'description': 'bought btc via app', 'coin': 'BTC', 'amount': 5})
+        assert a == b
+        assert a != c
+
+    def test_model_batch_is_padded_and_deduplicated(self, tmp_path):
+        svc = self._model_service(tmp_path)
+        txs = [{'description': 'Bought BTC', 'coin': 'BTC', 'amount': 1},
+               {'description': 'Sold ETH', 'coin': 'ETH', 'amount': 2},
+               {'description': 'Bought BTC again', 'coin': 'BTC', 'amount': 3}]
+        results = svc.suggest_batch(txs)
+
+        assert [r['suggested_label'] for r in results] == ['BUY', 'SELL', 'BUY']
+        assert len(svc.pipe.calls) == 1
+        prompts, kwargs = svc.pipe.calls[0]
+        assert len(prompts) == 2  # identical signatures share one inference
+        assert kwargs['batch_size'] == 4
+        assert svc.pipe.tokenizer.padding_side == 'left'
+        assert svc.pipe.tokenizer.pad_token_id == 2
+
+        stats = svc.get_stats()
+        assert stats['cache_misses'] == 3
+        assert stats['generated_tokens'] == 3
+        assert stats['tokens_per_sec'] > 0
+
+    def test_cache_persists_across_instances(self, tmp_path):
+        tx = {'description': 'Sold SOL', 'coin': 'SOL', 'amount': 10}
+        self._model_service(tmp_path).suggest_batch([tx])
+
+        svc = self._model_service(tmp_path)
+        assert svc.suggest(tx)['suggested_label'] == 'SELL'
+        assert svc.pipe.calls == []
+        assert svc.get_stats()['cache_hit_rate'] == 1.0
+
+    def test_shim_fallback_is_not_cached(self, tmp_path):
+        svc = self._model_service(tmp_path)
+
+        def broken(prompts, **kwargs):
+            raise RuntimeError('boom')
+        broken.tokenizer = self.FakeTokenizer()
+        svc.pipe = broken
+        svc.suggest_batch([{'description': 'Sold SOL', 'coin': 'SOL', 'amount': 10}])
+
+        svc2 = self._model_service(tmp_path)
+        svc2.suggest_batch([{'description': 'Sold SOL', 'coin': 'SOL', 'amount': 10}])
+        assert len(svc2.pipe.calls) == 1
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
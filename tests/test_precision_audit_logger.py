@@ -0,0 +1,107 @@
+"""
+Tests for the queue-based precision audit logger (src/precision_audit_logger.py).
+"""
+
+import threading
+from decimal import Decimal
+
+import pytest
+
+import src.precision_audit_logger as pal
+from src.advanced_ml_features import FraudDetector
+from src.utils.jsonl_sink import iter_jsonl
+from src.web.audit_endpoints import AuditLogManager
+
+
+@pytest.fixture()
+def audit_log(tmp_path):
+    path = tmp_path / 'precision_audit.log'
+    original = pal._pipeline
+    pal.configure_precision_audit(path=path, rate_limit=0)
+    yield path
+    pal.configure_precision_audit(path=original.path, queue_size=original.queue.maxsize,
+                                  rate_limit=original.rate_limit)
+
+
+def test_events_are_structured_jsonl(audit_log):
+    assert pal.log_wash_sale_detection(tx_id='b1|s1', coin='BTC', loss_amount=Decimal('120.123456789'))
+    pal.log_fraud_detection(tx_id='t2', coin='ETH', alert_type='PUMP_DUMP', transaction_impact='12.50')
+    pal.precision_logger.info('manual note')
+    pal.flush_precision_audit()
+
+    wash, pump, note = iter_jsonl(audit_log)
+    assert (wash['alert_type'], wash['severity'], wash['level']) == ('WASH_SALE', 'high', 'WARNING')
+    assert wash['loss_amount'] == '120.123456789'
+    assert wash['message'] == 'WASH_SALE | tx_id=b1|s1 | coin=BTC | loss_amount=120.123456789'
+    assert (pump['alert_type'], pump['severity']) == ('PUMP_DUMP', 'medium')
+    assert note['message'] == 'manual note'
+
+    # The audit log endpoints read the same records
+    logs = AuditLogManager(audit_log).read_audit_logs(alert_type='PUMP_DUMP')
+    assert [entry['tx_id'] for entry in logs] == ['t2']
+    assert AuditLogManager(audit_log).get_summary_statistics()['fraud_alerts'] == 2
+
+
+def test_formatting_happens_on_writer_thread(audit_log):
+    seen = []
+
+    class Probe:
+        def __str__(self):
+            seen.append(threading.current_thread().name)
+            return 'probe'
+
+    pal.log_anomaly_detection(tx_id='t1', actual=Probe())
+    assert seen == []
+    pal.flush_precision_audit()
+    assert seen and threading.main_thread().name not in seen
+
+
+def test_reserved_field_names_are_kept(audit_log):
+    pal.log_fee_calculation(tx_id='t1', name='gas', args='x')
+    pal.flush_precision_audit()
+    record = next(iter_jsonl(audit_log))
+    assert (record['name_'], record['args_'], record['logger']) == ('gas', 'x', 'precision_audit')
+
+
+def test_rate_cap_drops_and_reports(audit_log, monkeypatch):
+    pipeline = pal.configure_precision_audit(rate_limit=2)
+    monkeypatch.setattr(pal.time, 'time', lambda: 1000.5)
+    results = [pal.log_structuring_alert(tx_id=str(i)) for i in range(5)]
+    pal.log_fee_calculation(tx_id='other type')
+    assert results == [True, True, False, False, False]
+    assert pal.get_audit_stats()['dropped'] == {'STRUCTURING': 3}
+    assert pipeline.logged == {'STRUCTURING': 2, 'FEE_CALCULATION': 1}
+    pal.flush_precision_audit()
+
+    records = list(iter_jsonl(audit_log))
+    assert [r['alert_type'] for r in records] == ['STRUCTURING', 'STRUCTURING', 'FEE_CALCULATION', 'AUDIT_DROPPED']
+    assert records[-1]['dropped'] == {'STRUCTURING': 3}
+
+    # Drops are reported once
+    pal.flush_precision_audit()
+    pal.log_fee_calculation(tx_id='later')
+    pal.flush_precision_audit()
+    assert [r['alert_type'] for r in iter_jsonl(audit_log)][-1] == 'FEE_CALCULATION'
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    pipeline = pal.PrecisionAuditPipeline(tmp_path / 'audit.log', queue_size=2, rate_limit=0)
+    monkeypatch.setattr(pipeline, 'start', lambda: None)
+    pipeline._listener = object()  # writer "running" but not draining
+    assert [pipeline.submit('ANOMALY', {}) for _ in range(3)] == [True, True, False]
+    assert pipeline.stats() == {'logged': {'ANOMALY': 2}, 'dropped': {'ANOMALY': 1}, 'pending': 2}
+
+
+def test_detectors_write_audit_records(audit_log):
+    transactions = [
+        {'id': 'b1', 'coin': 'BTC', 'action': 'BUY', 'date': '2024-01-01', 'amount': 1, 'price_usd': 40000},
+        {'id': 's1', 'coin': 'BTC', 'action': 'SELL', 'date': '2024-01-10', 'amount': 1, 'price_usd': 35000},
+    ]
+    assert FraudDetector().detect_wash_sale(transactions)
+    pal.flush_precision_audit()
+    record = next(iter_jsonl(audit_log))
+    assert (record['alert_type'], record['tx_id'], record['loss_amount']) == ('WASH_SALE', 'b1|s1', '5000')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
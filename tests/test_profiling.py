@@ -0,0 +1,174 @@
+"""
+Tests for --profile runs: per-stage profiles (src/utils/profiling.py), the
+Auto_Runner/CLI wiring and the diagnostics listing.
+"""
+
+import json
+import os
+import pstats
+import subprocess
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+import Auto_Runner as auto_runner
+import cli
+import src.core.engine as engine
+import web_server as ws
+from scripts import benchmark_ledger as ledger
+from src.utils import profiling
+from src.utils.progress import ProgressHook
+
+
+def busy(n=20000):
+    return sum(i * i for i in range(n))
+
+
+def test_stage_writes_pstats_folded_and_summary(tmp_path):
+    profiler = profiling.RunProfiler('unit', tmp_path, sample_interval=0.001)
+    hook = ProgressHook(profiler)
+    with profiler.stage('csv_scan', rows_from='csv_rows'):
+        for name in ('a.csv', 'b.csv'):
+            for done in (0, 50, 100):
+                hook.update('csv_rows', done, 100, message=name)
+        hook.update('csv_scan', 2, 2)
+        junk = [bytearray(1024) for _ in range(2048)]
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            busy(2000)
+    del junk
+    with profiler.stage('export') as record:
+        busy()
+        record.rows = 7
+    hook.update('csv_rows', 500, 500)  # outside any stage: ignored
+    summary_path = profiler.finish()
+
+    summary = json.loads(summary_path.read_text())
+    assert summary['command'] == 'unit'
+    assert [s['name'] for s in summary['stages']] == ['csv_scan', 'export']
+    scan, export = summary['stages']
+    assert scan['rows'] == 200
+    assert scan['rows_per_second'] > 0
+    assert scan['peak_memory_mb'] >= 2.0
+    assert scan['wall_seconds'] >= 0.05 and scan['cpu_seconds'] > 0
+    assert export['rows'] == 7
+
+    run_dir = summary_path.parent
+    stats = pstats.Stats(str(run_dir / scan['pstats']))
+    assert any(func[2] == 'busy' for func in stats.stats)
+    lines = (run_dir / scan['folded']).read_text().splitlines()
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('busy (test_profiling.py' in line for line in lines)
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    profiler = profiling.RunProfiler('off', tmp_path / 'profiles', enabled=False)
+    with profiler.stage('engine_2024') as record:
+        record.rows = 10
+    assert profiler.finish() is None
+    assert not (tmp_path / 'profiles').exists()
+
+
+def test_nested_stages_and_errors(tmp_path):
+    profiler = profiling.RunProfiler('nested', tmp_path)
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            busy()
+    with pytest.raises(ZeroDivisionError):
+        with profiler.stage('broken'):
+            1 / 0
+    summary = json.loads(profiler.finish().read_text())
+    assert [s['name'] for s in summary['stages']] == ['outer', 'broken']
+    assert summary['stages'][1]['error'] == 'ZeroDivisionError'
+
+
+def test_list_and_prune_profiles(tmp_path):
+    for i in range(4):
+        profiler = profiling.RunProfiler('run', tmp_path, keep_runs=3)
+        with profiler.stage('engine_2024'):
+            busy(100)
+        path = profiler.finish()
+        os.utime(path, (1_000_000 + i, 1_000_000 + i))
+    (tmp_path / 'partial').mkdir()  # no summary.json: ignored
+
+    run_dirs = [d for d in tmp_path.iterdir() if (d / 'summary.json').exists()]
+    assert len(run_dirs) == 3
+    profiles = profiling.list_profiles(tmp_path, limit=2)
+    assert len(profiles) == 2
+    assert profiles[0]['path'] == str(profiler.run_dir)
+    assert 'top_allocations' not in profiles[0]['stages'][0]
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    paths = {
+        'BASE_DIR': tmp_path, 'INPUT_DIR': tmp_path / 'inputs',
+        'ARCHIVE_DIR': tmp_path / 'processed_archive', 'OUTPUT_DIR': tmp_path / 'outputs',
+        'LOG_DIR': tmp_path / 'outputs' / 'logs', 'DB_FILE': tmp_path / 'crypto_master.db',
+        'KEYS_FILE': tmp_path / 'api_keys.json', 'WALLETS_FILE': tmp_path / 'wallets.json',
+        'CONFIG_FILE': tmp_path / 'config.json', 'STATUS_FILE': tmp_path / 'status.json',
+    }
+    with ExitStack() as stack:
+        for name, path in paths.items():
+            stack.enter_context(mock.patch.object(engine, name, path))
+        engine.initialize_folders()
+        yield tmp_path
+
+
+def test_run_automation_profiles_each_stage(workspace):
+    db = engine.DatabaseManager()
+    ledger.load_trades(db.conn, ledger.iter_ledger(300, seed=5, coins=3, sources=2, wash_density=0.0))
+    db.close()
+    (workspace / 'config.json').write_text(json.dumps({'transaction_year': 2024}))
+
+    with mock.patch('sys.argv', ['Auto_Runner.py', '--profile']):
+        auto_runner.run_automation(force=True)
+
+    profiles = profiling.list_profiles(workspace / 'outputs' / 'logs' / 'profiles')
+    assert len(profiles) == 1
+    stages = {s['name']: s for s in profiles[0]['stages']}
+    assert list(stages) == ['csv_scan', 'api_sync', 'staking', 'price_check', 'engine_2023', 'export_2023',
+                            'engine_2024', 'export_2024', 'manual_review']
+    assert stages['engine_2024']['rows'] > 0
+    assert all(s['pstats'] and s['folded'] for s in stages.values())
+
+
+def test_run_automation_without_profile_writes_nothing(workspace):
+    (workspace / 'config.json').write_text(json.dumps({'transaction_year': 2024}))
+    with mock.patch('sys.argv', ['Auto_Runner.py']):
+        auto_runner.run_automation(force=True)
+    assert not (workspace / 'outputs' / 'logs' / 'profiles').exists()
+
+
+def test_cli_passes_profile_flag(monkeypatch):
+    calls = []
+    monkeypatch.setattr(subprocess, 'run', lambda args, check=True: calls.append(args) or SimpleNamespace(returncode=0))
+    assert cli.cmd_run(SimpleNamespace(cascade=False, force=False, profile=True))
+    assert cli.cmd_review(SimpleNamespace(year='2024', profile=True))
+    assert calls[0][-1] == '--profile' and Path(calls[0][1]).name == 'Auto_Runner.py'
+    assert calls[1][-2:] == ['2024', '--profile'] and Path(calls[1][1]).name == 'review_fixer.py'
+
+
+def test_diagnostics_lists_recent_profiles(tmp_path):
+    profiler = profiling.RunProfiler('autorunner', tmp_path / 'outputs' / 'logs' / 'profiles')
+    with profiler.stage('engine_2024'):
+        busy(100)
+    profiler.finish()
+
+    ws.app.config['TESTING'] = True
+    client = ws.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = 'admin'
+    with mock.patch.multiple(ws, BASE_DIR=tmp_path, OUTPUT_DIR=tmp_path / 'outputs'):
+        profiles = client.get('/api/diagnostics/profiles').get_json()['profiles']
+    assert [p['command'] for p in profiles] == ['autorunner']
+    assert profiles[0]['path'] == str(Path('outputs', 'logs', 'profiles', profiler.run_id))
+    assert profiles[0]['stages'][0]['name'] == 'engine_2024'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,158 @@
+"""
+Tests for the pipeline progress hooks (src/utils/progress.py) and the stages
+that report to them.
+"""
+
+import pandas as pd
+import pytest
+
+import src.core.engine as engine
+from src.core.jobs import JobCancelled, JobReporter, JobStore, hook_for_job
+from src.utils.jsonl_sink import iter_jsonl
+from src.utils.progress import (
+    NULL_PROGRESS,
+    JsonlProgressLog,
+    ProgressHook,
+    ProgressRingBuffer,
+    describe,
+)
+
+
+class DummyDB:
+    def __init__(self, zeros=None):
+        self.trades = []
+        self.prices = {}
+        self.zeros = zeros if zeros is not None else pd.DataFrame()
+
+    def save_trade(self, trade):
+        self.trades.append(trade)
+
+    def get_zeros(self):
+        return self.zeros
+
+    def update_price(self, trade_id, price):
+        self.prices[trade_id] = price
+
+    def commit(self):
+        pass
+
+
+def test_hook_without_subscribers_is_noop():
+    assert not NULL_PROGRESS.active
+    NULL_PROGRESS.update('csv_rows', 1, 2)
+    assert NULL_PROGRESS._stage_start == {}
+
+
+def test_events_carry_rate_and_eta(monkeypatch):
+    clock = iter([100.0, 110.0])
+    monkeypatch.setattr('src.utils.progress.time.monotonic', lambda: next(clock))
+    events = []
+    hook = ProgressHook(events.append, task_id='t1')
+    hook.update('engine', 0, 1000, year=2024)
+    hook.update('engine', 500, 1000, year=2024)
+
+    first, second = events
+    assert first['rate'] is None and first['eta_seconds'] is None
+    assert second['task_id'] == 't1' and second['year'] == 2024
+    assert second['elapsed'] == 10.0
+    assert second['rate'] == 50.0
+    assert second['eta_seconds'] == 10.0
+    assert describe(second) == 'Calculating trades (2024) - 500 of 1,000, ~0m 10s left'
+
+
+def test_failing_subscriber_does_not_stop_others():
+    events = []
+
+    def broken(event):
+        raise RuntimeError('disk full')
+
+    hook = ProgressHook(broken, events.append)
+    hook.update('export', 0, 1, year=2024)
+    assert len(events) == 1
+
+
+def test_ring_buffer_bounds_history_and_tasks():
+    buffer = ProgressRingBuffer(per_task=3, max_tasks=2)
+    for task in ('a', 'b'):
+        hook = ProgressHook(buffer, task_id=task)
+        for i in range(5):
+            hook.update('csv_rows', i, 5)
+    assert [e['done'] for e in buffer.history('a')] == [2, 3, 4]
+    assert buffer.latest('b')['done'] == 4
+
+    ProgressHook(buffer, task_id='c').update('csv_scan', 0, 1)
+    assert buffer.latest('a') is None
+    assert buffer.latest('c')['stage'] == 'csv_scan'
+
+
+def test_jsonl_progress_log(tmp_path):
+    log = JsonlProgressLog(tmp_path / 'logs' / 'progress.jsonl')
+    hook = ProgressHook(log, task_id='run')
+    hook.update('api_sync', 0, 2, message='binance')
+    hook.update('api_sync', 2, 2)
+    log.close()
+    records = list(iter_jsonl(tmp_path / 'logs' / 'progress.jsonl'))
+    assert [(r['stage'], r['done'], r['message']) for r in records] == [
+        ('api_sync', 0, 'binance'), ('api_sync', 2, None)]
+
+
+def test_ingestor_reports_csv_rows(tmp_path):
+    csv_path = tmp_path / 'trades.csv'
+    pd.DataFrame({
+        'date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+        'coin': ['BTC', 'BTC', 'ETH'],
+        'amount': [0.5, 0.25, 1],
+        'price_usd': [40000, 41000, 2000],
+        'type': ['buy', 'buy', 'buy'],
+    }).to_csv(csv_path, index=False)
+
+    events = []
+    ingest = engine.Ingestor(db=DummyDB())
+    ingest.ml_enabled = False
+    ingest.progress = ProgressHook(events.append)
+    ingest._proc_csv_smart(csv_path, 'BATCH')
+
+    rows = [e for e in events if e['stage'] == 'csv_rows']
+    assert rows[0]['done'] == 0
+    assert (rows[-1]['done'], rows[-1]['total']) == (3, 3)
+    assert rows[-1]['message'] == 'trades.csv'
+
+
+def test_backfill_missing_prices_reports_progress():
+    class Fetcher:
+        def get_price(self, coin, date):
+            return 100.0 if coin == 'BTC' else None
+
+    zeros = pd.DataFrame({'id': ['a', 'b'], 'coin': ['BTC', 'XYZ'],
+                          'date': ['2024-01-01', '2024-01-02']})
+    db = DummyDB(zeros)
+    events = []
+    filled = engine.backfill_missing_prices(db, Fetcher(), ProgressHook(events.append))
+    assert filled == 1
+    assert db.prices == {'a': 100.0}
+    assert (events[-1]['stage'], events[-1]['done'], events[-1]['total']) == ('price_backfill', 2, 2)
+
+
+def test_job_progress_maps_spans_and_propagates_cancel(tmp_path):
+    store = JobStore(tmp_path / 'jobs.db')
+    job_id = store.create('calc')
+    store.claim('worker', ['calc'], {}, 1)
+    reporter = JobReporter(store, job_id, min_interval=0)
+    buffer = ProgressRingBuffer()
+    hook = hook_for_job(reporter, {'csv_rows': (0, 40), ('engine', 2024): (40, 100)}, buffer)
+
+    hook.update('csv_rows', 5, 10)
+    assert store.get(job_id)['progress'] == 20
+    hook.update('engine', 10, 10, year=2024)
+    job = store.get(job_id)
+    assert job['progress'] == 100
+    assert job['message'].startswith('Calculating trades (2024) - 10 of 10')
+    assert buffer.latest(job_id)['stage'] == 'engine'
+
+    store.request_cancel(job_id)
+    with pytest.raises(JobCancelled):
+        hook.update('engine', 10, 10, year=2024)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
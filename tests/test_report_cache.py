@@ -0,0 +1,103 @@
+"""
+Tests for the per-year report cache (src/core/report_cache.py).
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from src.core.report_cache import CACHE_FILE_NAME, CACHE_VERSION, ReportCache, engine_state_digest
+
+
+class FakeEngine:
+    def __init__(self, lots=None, carry=(0.0, 0.0)):
+        self.holdings_by_source = lots if lots is not None else {
+            'BTC': {'Manual': [{'a': Decimal('0.5'), 'p': Decimal('10000'), 'd': '2024-01-01'}]}}
+        self.short, self.long = carry
+
+    def carryover(self):
+        return {'short': self.short, 'long': self.long}
+
+
+def export(tmp_path, year):
+    year_dir = tmp_path / f"Year_{year}"
+    year_dir.mkdir(exist_ok=True)
+    (year_dir / 'transaction_REPORT.csv').write_text('Summary,Year\nGenerated,%d\n' % year)
+    (year_dir / 'US_transaction_LOSS_ANALYSIS.csv').write_text('Item,Value\n')
+
+
+FINGERPRINTS = {'2023': 'a', '2024': 'b', '2025': 'c'}
+
+
+def record_all(tmp_path, fingerprints=FINGERPRINTS, engines=None, **kwargs):
+    cache = ReportCache.load(tmp_path, dict(fingerprints), 'cfg', **kwargs)
+    for year in (2023, 2024, 2025):
+        export(tmp_path, year)
+        cache.record(year, (engines or {}).get(year, FakeEngine()))
+    return ReportCache.load(tmp_path, dict(fingerprints), 'cfg', **kwargs)
+
+
+def test_recorded_years_are_fresh_until_inputs_change(tmp_path):
+    cache = record_all(tmp_path)
+    assert [cache.check(y) for y in (2023, 2024, 2025)] == [True, True, True]
+    assert cache.stats() == {'hits': 3, 'misses': 0, 'hit_rate': 1.0}
+
+    changed = ReportCache.load(tmp_path, dict(FINGERPRINTS, **{'2025': 'z'}), 'cfg')
+    assert [changed.is_fresh(y) for y in (2023, 2024, 2025)] == [True, True, False]
+    assert not ReportCache.load(tmp_path, FINGERPRINTS, 'other-cfg').is_fresh(2023)
+
+
+def test_upstream_change_propagates_through_state(tmp_path):
+    record_all(tmp_path)
+    fingerprints = dict(FINGERPRINTS, **{'2024': 'edited'})
+    cache = ReportCache.load(tmp_path, fingerprints, 'cfg')
+    assert not cache.is_fresh(2024)
+    assert not cache.is_fresh(2025)  # 2024 not re-recorded yet: falls back to history
+
+    cache.record(2024, FakeEngine())  # same lots and carryover as before
+    assert cache.is_fresh(2025)
+
+    cache.record(2024, FakeEngine(carry=(500.0, 0.0)))
+    assert not cache.is_fresh(2025)
+
+
+def test_state_digest_covers_lots_and_carryover():
+    base = engine_state_digest(FakeEngine())
+    assert engine_state_digest(FakeEngine()) == base
+    assert engine_state_digest(FakeEngine(carry=(0.0, 1.0))) != base
+    assert engine_state_digest(FakeEngine({'BTC': {'Manual': [
+        {'a': Decimal('0.5'), 'p': Decimal('9000'), 'd': '2024-01-01'}]}})) != base
+
+
+def test_wash_sale_years_depend_on_next_year(tmp_path):
+    record_all(tmp_path, wash_sale=True)
+    cache = ReportCache.load(tmp_path, dict(FINGERPRINTS, **{'2025': 'z'}), 'cfg', wash_sale=True)
+    assert cache.is_fresh(2023)
+    assert not cache.is_fresh(2024)
+
+
+def test_undated_trades_affect_every_year(tmp_path):
+    record_all(tmp_path)
+    cache = ReportCache.load(tmp_path, dict(FINGERPRINTS, **{'n/a': 'x'}), 'cfg')
+    assert not cache.is_fresh(2023)
+
+
+def test_missing_reports_are_stale(tmp_path):
+    record_all(tmp_path)
+    (tmp_path / 'Year_2024' / 'transaction_REPORT.csv').unlink()
+    assert not ReportCache.load(tmp_path, FINGERPRINTS, 'cfg').is_fresh(2024)
+
+
+@pytest.mark.parametrize('content', ['{not json', json.dumps({'version': CACHE_VERSION + 1, 'years': {}})])
+def test_unreadable_or_old_cache_is_ignored(tmp_path, content):
+    record_all(tmp_path)
+    (tmp_path / CACHE_FILE_NAME).write_text(content)
+    cache = ReportCache.load(tmp_path, FINGERPRINTS, 'cfg')
+    assert cache.entries == {}
+    assert not cache.check(2023)
+    assert cache.misses == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
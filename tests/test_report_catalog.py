@@ -0,0 +1,98 @@
+"""
+Tests for the per-year report catalog (src/core/report_catalog.py).
+"""
+
+import hashlib
+import json
+
+import pytest
+
+from src.core import report_catalog
+from src.core.report_catalog import CATALOG_FILE_NAME
+from src.core.reviewer import TransactionReviewer
+from src.utils.file_cache import FileStampCache
+
+
+def write_csv(path, text):
+    path.write_text(text)
+    return path
+
+
+def test_record_describes_artifacts(tmp_path):
+    report = write_csv(tmp_path / 'CAP_GAINS.csv', 'Coin,Gain\nBTC,1\n"ETH","multi\nline"\n')
+    report_catalog.record(tmp_path, [report, tmp_path / 'MISSING.csv'], source='engine')
+
+    entry = report_catalog.load_catalog(tmp_path)['artifacts']['CAP_GAINS.csv']
+    assert entry['rows'] == 2
+    assert entry['size'] == report.stat().st_size
+    assert entry['sha256'] == hashlib.sha256(report.read_bytes()).hexdigest()
+    assert entry['source'] == 'engine'
+    assert 'MISSING.csv' not in report_catalog.load_catalog(tmp_path)['artifacts']
+
+
+def test_listing_includes_unknown_csvs_and_drops_removed(tmp_path):
+    kept = write_csv(tmp_path / 'INCOME_REPORT.csv', 'a\n1\n')
+    removed = write_csv(tmp_path / 'WASH_SALE_REPORT.csv', 'a\n1\n')
+    report_catalog.record(tmp_path, [kept, removed], source='engine')
+    removed.unlink()
+    write_csv(tmp_path / 'FORM_8949.csv', 'a\n')  # written by another tool
+
+    reports = {r['name']: r for r in report_catalog.list_reports(tmp_path)}
+    assert set(reports) == {'INCOME_REPORT.csv', 'FORM_8949.csv'}
+    assert reports['INCOME_REPORT.csv']['rows'] == 1
+    assert 'rows' not in reports['FORM_8949.csv'] and reports['FORM_8949.csv']['size'] == 2
+
+    report_catalog.record(tmp_path, [], source='engine')
+    assert set(report_catalog.load_catalog(tmp_path)['artifacts']) == {'INCOME_REPORT.csv'}
+
+
+def test_catalog_write_invalidates_folder_cache(tmp_path):
+    cache = FileStampCache()
+    report = write_csv(tmp_path / 'CAP_GAINS.csv', 'a\n1\n')
+    report_catalog.record(tmp_path, [report], source='engine')
+    assert cache.get(tmp_path, report_catalog.list_reports)[0]['rows'] == 1
+    assert cache.get(tmp_path, report_catalog.list_reports)[0]['rows'] == 1
+
+    write_csv(report, 'a\n1\n2\n')  # rewritten in place, then re-catalogued
+    report_catalog.record(tmp_path, [report], source='engine')
+    assert cache.get(tmp_path, report_catalog.list_reports)[0]['rows'] == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_reviewer_export_is_read_from_json(tmp_path):
+    reviewer = TransactionReviewer.__new__(TransactionReviewer)
+    reviewer.year = 2024
+    reviewer.warnings = [{'category': 'WASH_SALE', 'severity': 'HIGH', 'title': 'Wash sales', 'count': 3,
+                          'description': 'd', 'action': 'a'}]
+    reviewer.suggestions = []
+    json_path = reviewer.export_report(tmp_path)
+
+    catalog = report_catalog.load_catalog(tmp_path)
+    assert catalog['review_json'] == json_path.name
+    assert catalog['artifacts']['REVIEW_WARNINGS.csv']['rows'] == 1
+    assert catalog['artifacts'][json_path.name]['rows'] is None
+
+    review = report_catalog.load_review(tmp_path)
+    assert review['warnings'] == [{'Category': 'WASH_SALE', 'Severity': 'HIGH', 'Title': 'Wash sales',
+                                   'Count': 3, 'Description': 'd', 'Action': 'a'}]
+    assert review['suggestions'] == []
+
+
+def test_review_falls_back_to_csv(tmp_path):
+    write_csv(tmp_path / 'REVIEW_SUGGESTIONS.csv',
+              'Category,Severity,Title,Count,Description,Action\nFEES,LOW,Fees,2,"x, y",z\n')
+    review = report_catalog.load_review(tmp_path)
+    assert review['warnings'] == []
+    assert review['suggestions'][0]['Count'] == 2
+    assert review['suggestions'][0]['Description'] == 'x, y'
+
+
+def test_unreadable_catalog_is_ignored(tmp_path):
+    (tmp_path / CATALOG_FILE_NAME).write_text('{not json')
+    assert report_catalog.load_catalog(tmp_path)['artifacts'] == {}
+    (tmp_path / CATALOG_FILE_NAME).write_text(json.dumps({'version': 0, 'artifacts': {'x': {}}}))
+    assert report_catalog.load_catalog(tmp_path)['artifacts'] == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -406,5 +406,114 @@ class TestReprocessAllEndpoint:
         assert transactions[2]['id'] == 'tx3'
 
 
+
+class TestBatchedReprocessPipeline:
+    """Tests for src.ml_reprocess.reprocess_transactions"""
+
+    class RecordingML:
+        """Keyword service that records how rows were batched"""
+
+        def __init__(self, batch_api=True):
+            self.batches = []
+            if not batch_api:
+                self.suggest_batch = None
+
+        @staticmethod
+        def _label(row):
+            word = row['description'].split()[0]
+            label = 'TRANSFER' if word == 'UNKNOWN' else word
+            return {'suggested_label': label, 'confidence': 0.9, 'explanation': 'keyword'}
+
+        def suggest(self, row):
+            self.batches.append([row])
+            return self._label(row)
+
+        def suggest_batch(self, rows):
+            self.batches.append(list(rows))
+            return [self._label(r) for r in rows]
+
+    @pytest.fixture
+    def db(self):
+        conn = sqlite3.connect(':memory:')
+        conn.row_factory = sqlite3.Row
+        conn.execute('''
+            CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, source TEXT, destination TEXT,
+                                 action TEXT, coin TEXT, amount TEXT, price_usd TEXT, fee TEXT, fee_coin TEXT)
+        ''')
+        rows = [(f'tx{i}', f'2024-01-{(i % 28) + 1:02d}', 'exchange', '', action, 'BTC', '1', '100', '0', '')
+                for i, action in enumerate(['BUY', 'UNKNOWN', 'SELL', 'DEPOSIT', 'UNKNOWN'] * 5)]
+        conn.executemany("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        return conn
+
+    def test_batches_inference_writes_and_logs(self, db, tmp_path):
+        from src.ml_reprocess import reprocess_transactions
+
+        ml = self.RecordingML()
+        progress = []
+        log_file = tmp_path / 'logs' / 'model_suggestions.log'
+        stats = reprocess_transactions(db, ml, batch_size=10, log_file=log_file,
+                                       progress_callback=lambda done, total: progress.append((done, total)))
+
+        # Only the UNKNOWN rows (4 of every 10) are rule misses sent to the model
+        assert [len(b) for b in ml.batches] == [4, 4, 2]
+        assert progress == [(10, 25), (20, 25), (25, 25)]
+        assert stats['processed'] == 25
+        assert stats['rule_hits'] == 15
+        assert stats['updated'] == 10
+        actions = {r['action'] for r in db.execute("SELECT action FROM trades WHERE id IN ('tx1', 'tx4')")}
+        assert actions == {'TRANSFER'}
+        assert db.execute("SELECT action FROM trades WHERE id = 'tx0'").fetchone()[0] == 'BUY'
+
+        lines = log_file.read_text().splitlines()
+        assert len(lines) == 10
+        assert json.loads(lines[0])['suggested_action'] == 'TRANSFER'
+        assert json.loads(lines[0])['applied'] is True
+
+    def test_rule_hits_skip_ml(self, db):
+        from src.ml_reprocess import reprocess_transactions
+
+        db.execute("UPDATE trades SET action = 'income' WHERE id IN ('tx1', 'tx4')")
+        db.commit()
+
+        ml = self.RecordingML()
+        stats = reprocess_transactions(db, ml, batch_size=100)
+        assert stats['rule_hits'] == 17
+        assert sum(len(b) for b in ml.batches) == 8
+        assert stats['updated'] == 8
+        assert db.execute("SELECT action FROM trades WHERE id = 'tx1'").fetchone()[0] == 'income'
+
+    def test_low_confidence_suggestions_are_only_logged(self, db, tmp_path):
+        from src.ml_reprocess import reprocess_transactions
+
+        class FallbackML:
+            """Answers like the shim does when no keyword matches"""
+            def suggest_batch(self, rows):
+                return [{'suggested_label': 'TRANSFER', 'confidence': 0.58, 'explanation': 'fallback'}
+                        for _ in rows]
+
+        db.executemany("UPDATE trades SET action = ? WHERE id = ?",
+                       [('INCOME', 'tx0'), ('STAKING', 'tx2'), ('GIFT', 'tx3'), ('AIRDROP', 'tx5')])
+        db.commit()
+        before = dict(db.execute("SELECT id, action FROM trades").fetchall())
+
+        log_file = tmp_path / 'model_suggestions.log'
+        stats = reprocess_transactions(db, FallbackML(), batch_size=10, log_file=log_file,
+                                       confidence_threshold=0.85)
+        assert stats['updated'] == 0
+        assert dict(db.execute("SELECT id, action FROM trades").fetchall()) == before
+        lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert len(lines) == 10 and not any(line['applied'] for line in lines)
+        assert {line['original_action'] for line in lines} == {'UNKNOWN'}
+
+    def test_falls_back_to_single_suggest(self, db):
+        from src.ml_reprocess import reprocess_transactions
+
+        ml = self.RecordingML(batch_api=False)
+        stats = reprocess_transactions(db, ml, batch_size=7)
+        assert len(ml.batches) == 10
+        assert stats['ml_calls'] == 4
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
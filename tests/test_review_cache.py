@@ -0,0 +1,134 @@
+"""
+Tests for the review fixer's on-disk cache and wallet history prefetch
+(src/tools/review_cache.py and InteractiveReviewFixer).
+"""
+
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.core.engine as app
+from src.tools import review_cache as rc
+from src.tools.review_fixer import InteractiveReviewFixer
+
+ETH_WALLETS = [f"0x{i:040x}" for i in range(6)]
+
+
+class FakeExplorer:
+    """Stands in for requests.get: Etherscan-style pages, tracking concurrency."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.calls = []
+        self.in_flight = self.max_in_flight = 0
+
+    def __call__(self, url, params=None, timeout=None):
+        with self.lock:
+            self.calls.append((url, dict(params or {})))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            response = MagicMock(status_code=200)
+            tx = {'timeStamp': '1704067200', 'hash': '0xabc', 'value': str(10 ** 18), 'tokenSymbol': 'USDC'}
+            response.json.return_value = {'status': '1', 'result': [tx]}
+            return response
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def fixer(tmp_path):
+    wallets = tmp_path / 'wallets.json'
+    wallets.write_text(json.dumps({'ethereum': ETH_WALLETS, 'bitcoin': ['bc1qxyz'], 'solana': ['So1']}))
+    keys = tmp_path / 'api_keys.json'
+    keys.write_text(json.dumps({'etherscan': {'apiKey': 'eth-key'}}))
+    with patch.object(app, 'OUTPUT_DIR', tmp_path / 'outputs'), \
+            patch.object(app, 'LOG_DIR', tmp_path / 'outputs' / 'logs', create=True), \
+            patch.object(app, 'WALLETS_FILE', wallets), patch.object(app, 'KEYS_FILE', keys):
+        yield InteractiveReviewFixer(MagicMock(), 2024)
+
+
+def test_cache_ttl_per_namespace_and_persistence(tmp_path):
+    now = [1000.0]
+    path = tmp_path / 'review.json'
+    cache = rc.ReviewCache(path, ttls={'explorer': 60, 'price': 3600}, clock=lambda: now[0])
+    cache.put('explorer', 'page', {'result': []})
+    cache.put('price', 'ETH|2024-01-01', '2300.5')
+    cache.save()
+
+    now[0] += 61
+    reloaded = rc.ReviewCache(path, ttls={'explorer': 60, 'price': 3600}, clock=lambda: now[0])
+    assert reloaded.get('explorer', 'page') is None
+    assert reloaded.get('price', 'ETH|2024-01-01') == '2300.5'
+    assert reloaded.age('price', 'ETH|2024-01-01') == pytest.approx(61)
+
+
+def test_explorer_key_ignores_api_keys():
+    url = 'https://api.etherscan.io/api'
+    assert rc.explorer_key(url, {'address': '0x1', 'apikey': 'a'}) == rc.explorer_key(url, {'apikey': 'b',
+                                                                                          'address': '0x1'})
+    assert 'apikey' not in rc.explorer_key(url, {'address': '0x1', 'apikey': 'a'})
+    assert rc.explorer_key(url, {'address': '0x1'}) != rc.explorer_key(url, {'address': '0x2'})
+
+
+def test_prefetch_runs_in_parallel_then_checks_use_cache(fixer):
+    fake = FakeExplorer()
+    with patch('requests.get', side_effect=fake):
+        stats = fixer.prefetch_wallet_histories()
+    # txlist + tokentxlist for each ETH wallet; no Blockchair key, no Solana explorer
+    assert stats == {'pages': 12, 'cached': 0, 'fetched': 12, 'failed': 0}
+    assert fake.max_in_flight > 1
+    assert all(params['apikey'] == 'eth-key' for _, params in fake.calls)
+    assert fixer.cache.path.exists()
+
+    with patch('requests.get', side_effect=AssertionError('network')) as get, \
+            patch('src.tools.review_fixer.time.sleep') as sleep:
+        found, _, details = fixer._check_evm_transaction(ETH_WALLETS[-1:], 'ETH', '2024-01-01', 1.0)
+        assert found and '0xabc' in details
+        # Token transfers were fetched with the real key and are reused for the placeholder key
+        found, _, _ = fixer._check_evm_transaction(ETH_WALLETS, 'USDC', '2024-01-01', 100.0)
+        assert found
+    assert get.call_count == 0 and sleep.call_count == 0
+
+    fixer2 = InteractiveReviewFixer(MagicMock(), 2024)
+    with patch('requests.get', side_effect=fake):
+        assert fixer2.prefetch_wallet_histories()['cached'] == 12
+    assert len(fake.calls) == 12
+
+
+def test_failed_pages_are_not_cached(fixer):
+    response = MagicMock(status_code=429)
+    response.raise_for_status.side_effect = Exception('429 Too Many Requests')
+    with patch('requests.get', return_value=response):
+        stats = fixer.prefetch_wallet_histories()
+    assert stats['failed'] == 12 and stats['fetched'] == 0
+    assert not fixer.cache._entries.get('explorer')
+
+
+def test_token_map_and_prices_are_reused_across_sessions(fixer):
+    token_map = {'ethereum': {'USDC': '0x' + 'a' * 40}}
+    with patch.object(InteractiveReviewFixer, '_fetch_token_addresses_from_api', return_value=token_map) as fetch:
+        assert fixer._get_cached_token_addresses() == token_map
+        assert InteractiveReviewFixer(MagicMock(), 2024)._get_cached_token_addresses() == token_map
+    assert fetch.call_count == 1
+
+    with patch.object(InteractiveReviewFixer, '_lookup_blockchain_price', return_value=(1.0001, 'on-chain')) as lookup:
+        assert fixer._try_blockchain_price('usdc', '2024-01-01 10:00:00') == (1.0001, 'on-chain')
+        price, message = fixer._try_blockchain_price('USDC', '2024-01-01')
+    assert price == 1.0001 and 'cached' in message
+    assert lookup.call_count == 1
+
+    with patch.object(InteractiveReviewFixer, '_lookup_blockchain_price', return_value=(None, 'no contract')) as lookup:
+        fixer._try_blockchain_price('PEPE', '2024-01-01')
+        fixer._try_blockchain_price('PEPE', '2024-01-01')
+    assert lookup.call_count == 2  # unresolved lookups are not cached
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
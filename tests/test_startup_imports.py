@@ -0,0 +1,112 @@
+"""
+================================================================================
+TEST: Startup Import Budget
+================================================================================
+
+Validates that the engine and CLI start without the heavy optional stacks.
+
+Test Coverage:
+    - Importing src.core.engine does not import ccxt, yfinance, pandas,
+      requests or Flask
+    - Nor cryptography, filelock or the ML/anomaly/validation helpers
+    - Light CLI commands never import the exchange, price or web stacks
+    - Cumulative `-X importtime` startup cost stays under budget
+    - Lazy module proxies resolve on first use and forward patches
+
+Author: robertbiv
+================================================================================
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.utils.lazy import lazy_module
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Cumulative import time (ms) allowed for a cold import. Before the lazy
+# imports src.core.engine alone took ~1.6s; it is now ~0.2s.
+STARTUP_BUDGET_MS = int(os.environ.get('STARTUP_IMPORT_BUDGET_MS', '1000'))
+
+HEAVY_STACKS = ('ccxt', 'yfinance', 'pandas', 'requests', 'flask', 'apscheduler')
+
+# Needed only to encrypt, save settings or ingest; deferred off the engine import
+ENGINE_DEFERRED = ('cryptography', 'filelock', 'src.ml_service', 'src.anomaly_detector',
+                   'src.transaction_validator', 'src.rules_model_bridge')
+
+
+def _importtime(args, cwd):
+    """Run python -X importtime with args; return {module: cumulative_us} and stdout."""
+    # Run from a scratch cwd: BASE_DIR is the working directory, so config and
+    # database files created at startup stay out of the repository.
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + args,
+        cwd=cwd, env=env, stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split(':', 1)[1].split('|')
+        modules[name.strip()] = max(modules.get(name.strip(), 0), int(cumulative))
+    return modules, result.stdout
+
+
+def _heavy_loaded(modules):
+    return sorted(m for m in modules if m.split('.')[0] in HEAVY_STACKS)
+
+
+def test_engine_import_skips_heavy_stacks(tmp_path):
+    modules, _ = _importtime(['-c', 'import src.core.engine'], tmp_path)
+    assert 'src.core.engine' in modules
+    assert _heavy_loaded(modules) == []
+
+
+def test_engine_import_defers_crypto_locks_and_ml(tmp_path):
+    modules, _ = _importtime(['-c', 'import src.core.engine'], tmp_path)
+    assert [name for name in ENGINE_DEFERRED if name in modules] == []
+
+
+def test_engine_import_within_budget(tmp_path):
+    modules, _ = _importtime(['-c', 'import src.core.engine'], tmp_path)
+    assert modules['src.core.engine'] / 1000 < STARTUP_BUDGET_MS
+
+
+def test_cli_import_within_budget(tmp_path):
+    modules, _ = _importtime(['-c', 'import cli'], tmp_path)
+    assert _heavy_loaded(modules) == []
+    assert 'src.web.server' not in modules
+    assert modules['cli'] / 1000 < STARTUP_BUDGET_MS
+
+
+@pytest.mark.parametrize('argv', [['--help'], ['backup', 'snapshots'], ['transactions', 'list']])
+def test_light_cli_commands_skip_heavy_stacks(argv, tmp_path):
+    modules, _ = _importtime([str(PROJECT_ROOT / 'cli.py')] + argv, tmp_path)
+    assert _heavy_loaded(modules) == []
+    assert 'src.web.server' not in modules
+
+
+def test_lazy_module_resolves_and_forwards_patches():
+    proxy = lazy_module('json')
+    assert proxy.dumps({'a': 1}) == '{"a": 1}'
+
+    import json
+    with patch.object(proxy, 'dumps', return_value='patched'):
+        assert json.dumps({}) == 'patched'
+        assert proxy.dumps({}) == 'patched'
+    assert json.dumps({}) == '{}'
+
+
+def test_engine_attributes_patch_real_modules():
+    import src.core.engine as engine
+    with patch('src.core.engine.yf.download', return_value='stub') as mocked:
+        import yfinance
+        assert yfinance.download is mocked
+        assert engine.yf.download('BTC-USD') == 'stub'
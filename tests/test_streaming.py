@@ -0,0 +1,189 @@
+"""
+Tests for streamed NDJSON/CSV/zip API responses (src/web/streaming.py) and
+the endpoints that use them.
+"""
+
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import time
+import zipfile
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+import web_server as ws
+from src.advanced_ml_features import NaturalLanguageSearch
+from src.web import streaming
+from src.web.audit_endpoints import AuditLogManager, create_audit_endpoints
+
+TRADES = [
+    ('1', '2023-03-01', 'BUY', 'BTC', '0.5', '20000'),
+    ('2', '2024-01-05', 'BUY', 'BTC', '2', '40000'),
+    ('3', '2024-02-10', 'SELL', 'BTC', '1', '45000'),
+    ('4', '2024-06-01', 'BUY', 'ETH', '10', '3000'),
+]
+
+
+@pytest.fixture
+def client(tmp_path):
+    db = tmp_path / 'crypto_master.db'
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, action TEXT, coin TEXT, "
+                 "amount TEXT, price_usd TEXT, source TEXT, destination TEXT, fee TEXT, fee_coin TEXT)")
+    conn.executemany("INSERT INTO trades (id, date, action, coin, amount, price_usd) VALUES (?, ?, ?, ?, ?, ?)",
+                     TRADES)
+    conn.commit()
+    conn.close()
+    (tmp_path / 'outputs' / 'logs').mkdir(parents=True)
+
+    ws.app.config['TESTING'] = True
+    test_client = ws.app.test_client()
+    with test_client.session_transaction() as sess:
+        sess['username'] = 'admin'
+        sess['csrf_token'] = 'test_csrf_token'
+        sess['csrf_created_at'] = time.time()
+    with patch.object(ws, 'DB_FILE', db), patch.object(ws, 'OUTPUT_DIR', tmp_path / 'outputs'):
+        yield test_client
+
+
+def search(client, body, **headers):
+    return client.post('/api/advanced/search', json=body,
+                       headers={'X-CSRF-Token': 'test_csrf_token', **headers})
+
+
+@pytest.mark.parametrize('header,expected', [
+    ('gzip, deflate', True),
+    ('deflate;q=1.0, GZIP;q=0.5', True),
+    ('*', True),
+    ('gzip;q=0', False),
+    ('identity', False),
+    (None, False),
+])
+def test_accepts_gzip(header, expected):
+    assert streaming.accepts_gzip(header) is expected
+
+
+def test_iter_cursor_closes_connection():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (a INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(5)])
+    rows = list(streaming.iter_cursor(lambda: conn, "SELECT a FROM t WHERE a >= ?", (2,), fetch_rows=2))
+    assert rows == [{'a': 2}, {'a': 3}, {'a': 4}]
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_csv_lines_header_without_rows():
+    assert ''.join(streaming.csv_lines([], ['a', 'b'])) == 'a,b\r\n'
+    assert ''.join(streaming.csv_lines([{'a': 1, 'b': 2, 'c': 3}], ['a', 'b'])) == 'a,b\r\n1,2\r\n'
+
+
+def test_gzip_chunks_decode_as_one_stream():
+    chunks = list(streaming.gzip_chunks(streaming.batched((f"line {i}\n" for i in range(5000)), chunk_bytes=1024)))
+    assert len(chunks) > 2
+    assert gzip.decompress(b''.join(chunks)) == ''.join(f"line {i}\n" for i in range(5000)).encode()
+
+
+def test_zip_chunks_is_a_valid_zip(tmp_path):
+    big = tmp_path / 'big.log'
+    big.write_bytes(bytes(range(256)) * 2000)
+    small = tmp_path / 'small.log'
+    small.write_text('hello')
+    data = b''.join(streaming.zip_chunks([(big, 'big.log'), (small, 'small.log')], chunk_bytes=4096))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert zf.read('big.log') == big.read_bytes()
+        assert zf.read('small.log') == b'hello'
+
+
+def test_iter_search_matches_search():
+    searcher = NaturalLanguageSearch()
+    rows = [dict(zip(('id', 'date', 'action', 'coin', 'amount', 'price_usd'), t)) for t in TRADES]
+    for query in ('btc buys in 2024', 'largest sells', 'all transactions', 'eth over 5'):
+        assert list(searcher.iter_search(iter(rows), query)) == searcher.search(rows, query)
+
+
+def test_search_json_is_default(client):
+    resp = search(client, {'query': 'BTC buys in 2024'})
+    data = resp.get_json()
+    assert resp.mimetype == 'application/json'
+    assert [r['id'] for r in data['results']] == ['2']
+    assert data['result_count'] == 1
+
+
+def test_search_streams_ndjson_gzip(client):
+    resp = search(client, {'query': 'BTC', 'format': 'ndjson'}, **{'Accept-Encoding': 'gzip'})
+    assert resp.mimetype == 'application/x-ndjson'
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(resp.data).decode().splitlines()
+    assert [json.loads(line)['id'] for line in lines] == ['1', '2', '3']
+
+
+def test_search_streams_csv(client):
+    resp = client.post('/api/advanced/search?format=csv', json={'query': 'ETH'},
+                       headers={'X-CSRF-Token': 'test_csrf_token'})
+    assert resp.mimetype == 'text/csv'
+    assert 'Content-Encoding' not in resp.headers
+    assert 'search_results.csv' in resp.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [(r['id'], r['coin']) for r in rows] == [('4', 'ETH')]
+
+
+def test_bulk_anomaly_ndjson_ends_with_summary(client):
+    json_resp = client.get('/api/advanced/bulk-anomaly-report').get_json()
+    resp = client.get('/api/advanced/bulk-anomaly-report?format=ndjson')
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert lines[:-1] == json_resp['anomalies']
+    assert lines[-1]['summary']['transactions_analyzed'] == len(TRADES)
+    assert lines[-1]['summary']['total_anomalies'] == json_resp['total_anomalies']
+
+
+@pytest.fixture
+def audit_client(tmp_path):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    create_audit_endpoints(app, tmp_path)
+    (tmp_path / 'outputs' / 'logs').mkdir(parents=True, exist_ok=True)
+    audit_client = app.test_client()
+    with audit_client.session_transaction() as sess:
+        sess['username'] = 'admin'
+    return audit_client
+
+
+def test_audit_download_streams_csv_and_ndjson(audit_client, tmp_path):
+    log = tmp_path / 'outputs' / 'logs' / 'precision_audit.log'
+    now = datetime.now().isoformat()
+    log.write_text(json.dumps({'timestamp': now, 'alert_type': 'ROUNDING', 'details': {'a': 1}}) + '\n'
+                   + json.dumps({'timestamp': now, 'alert_type': 'OVERFLOW', 'value': '1.5'}) + '\n')
+
+    resp = audit_client.get('/api/audit-logs/download')
+    assert resp.mimetype == 'text/csv'
+    body = resp.get_data(as_text=True)
+    assert body == AuditLogManager(log).export_to_csv()
+    assert body.splitlines()[0] == 'alert_type,details,timestamp,value'
+
+    resp = audit_client.get('/api/audit-logs/download?format=ndjson&type=OVERFLOW')
+    assert resp.mimetype == 'application/x-ndjson'
+    assert [json.loads(line)['value'] for line in resp.get_data(as_text=True).splitlines()] == ['1.5']
+
+
+def test_audit_download_without_logs(audit_client, tmp_path):
+    expected = AuditLogManager(tmp_path / 'missing.log').export_to_csv()
+    assert audit_client.get('/api/audit-logs/download').get_data(as_text=True) == expected
+
+
+def test_download_all_logs_is_streamed(client, tmp_path):
+    (tmp_path / 'outputs' / 'logs' / 'app.log').write_text('x' * 100000)
+    resp = client.get('/api/logs/download-all')
+    assert resp.is_streamed
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as zf:
+        assert zf.read('app.log') == b'x' * 100000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,194 @@
+"""
+================================================================================
+TEST: Streaming Backup Pipeline
+================================================================================
+
+Validates the constant-memory backup export and restore pipeline.
+
+Test Coverage:
+    - Online-backup snapshot of a live (WAL) database
+    - Streamed CSV export of the trades table
+    - Chunked encryption round trip across many chunks
+    - Tamper, reorder and truncation detection
+    - Legacy single-token backups still decrypt
+    - Temp directory cleanup after streaming
+
+Author: robertbiv
+================================================================================
+"""
+
+import io
+import sqlite3
+import zipfile
+from pathlib import Path
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from src.core import backup
+
+
+@pytest.fixture()
+def live_db(tmp_path):
+    db_path = tmp_path / "crypto_master.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, source TEXT, destination TEXT, action TEXT, "
+        "coin TEXT, amount TEXT, price_usd TEXT, fee TEXT, fee_coin TEXT, batch_id TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(f"tx{i}", "2024-01-01", "SRC", None, "BUY", "BTC", "1", "100", "0", None, None) for i in range(250)]
+    )
+    conn.commit()
+    # Keep the connection open so committed pages may still live in the WAL
+    yield db_path, conn
+    conn.close()
+
+
+def test_snapshot_includes_wal_contents(live_db, tmp_path):
+    db_path, _ = live_db
+    snapshot = backup.snapshot_database(db_path, tmp_path / "snap.db")
+
+    conn = sqlite3.connect(str(snapshot))
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 250
+    finally:
+        conn.close()
+
+
+def test_snapshot_handles_uri_characters_in_path(tmp_path):
+    folder = tmp_path / "odd?dir#1%20"
+    folder.mkdir()
+    db_path = folder / "crypto_master.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE trades (id TEXT PRIMARY KEY)")
+    conn.execute("INSERT INTO trades VALUES ('tx1')")
+    conn.commit()
+    conn.close()
+
+    snapshot = backup.snapshot_database(db_path, tmp_path / "snap.db")
+    conn = sqlite3.connect(str(snapshot))
+    try:
+        assert conn.execute("SELECT id FROM trades").fetchall() == [("tx1",)]
+    finally:
+        conn.close()
+
+
+def test_snapshot_copies_non_sqlite_files(tmp_path):
+    src = tmp_path / "raw.db"
+    src.write_bytes(b"not a database")
+    dest = backup.snapshot_database(src, tmp_path / "copy.db")
+    assert dest.read_bytes() == b"not a database"
+
+
+def test_trades_export_zip_streams_rows(live_db, tmp_path):
+    db_path, conn = live_db
+    zip_path = backup.build_trades_export_zip(conn, tmp_path / "export.zip")
+
+    with zipfile.ZipFile(zip_path) as zf:
+        lines = zf.read("trades_export.csv").decode("utf-8").splitlines()
+    assert lines[0].startswith("id,date,source")
+    assert len(lines) == 251
+
+
+def test_backup_zip_prefers_first_existing_file(live_db, tmp_path):
+    db_path, _ = live_db
+    plain = tmp_path / "api_keys.json"
+    plain.write_text("{}")
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+
+    zip_path = backup.build_backup_zip(
+        out_dir / "backup.zip",
+        db_path,
+        [[(tmp_path / "missing_encrypted.json", "api_keys_encrypted.json"), (plain, "api_keys.json")]]
+    )
+
+    with zipfile.ZipFile(zip_path) as zf:
+        names = zf.namelist()
+    assert "crypto_master.db" in names
+    assert "api_keys.json" in names
+    assert "api_keys_encrypted.json" not in names
+    assert sorted(p.name for p in out_dir.iterdir()) == ["backup.zip"]
+
+
+def test_encrypted_stream_round_trip_multiple_chunks():
+    cipher = Fernet(Fernet.generate_key())
+    payload = bytes(range(256)) * 1000
+
+    encrypted = b"".join(backup.iter_encrypted_chunks(io.BytesIO(payload), cipher, chunk_size=4096))
+    assert encrypted.startswith(backup.STREAM_MAGIC)
+
+    out = io.BytesIO()
+    backup.decrypt_stream(io.BytesIO(encrypted), out, cipher)
+    assert out.getvalue() == payload
+
+
+def test_encrypted_stream_empty_payload():
+    cipher = Fernet(Fernet.generate_key())
+    encrypted = b"".join(backup.iter_encrypted_chunks(io.BytesIO(b""), cipher))
+    out = io.BytesIO()
+    backup.decrypt_stream(io.BytesIO(encrypted), out, cipher)
+    assert out.getvalue() == b""
+
+
+def _split_records(encrypted):
+    records, pos = [], len(backup.STREAM_MAGIC)
+    while pos < len(encrypted):
+        length = int.from_bytes(encrypted[pos:pos + 4], "big")
+        records.append(encrypted[pos:pos + 4 + length])
+        pos += 4 + length
+    return records
+
+
+def test_encrypted_stream_detects_truncation_and_reordering():
+    cipher = Fernet(Fernet.generate_key())
+    encrypted = b"".join(backup.iter_encrypted_chunks(io.BytesIO(b"x" * 10000), cipher, chunk_size=1000))
+    records = _split_records(encrypted)
+    assert len(records) == 10
+
+    truncated = backup.STREAM_MAGIC + b"".join(records[:-1])
+    with pytest.raises(InvalidToken):
+        backup.decrypt_stream(io.BytesIO(truncated), io.BytesIO(), cipher)
+
+    swapped = backup.STREAM_MAGIC + records[1] + records[0] + b"".join(records[2:])
+    with pytest.raises(InvalidToken):
+        backup.decrypt_stream(io.BytesIO(swapped), io.BytesIO(), cipher)
+
+
+def test_encrypted_stream_rejects_wrong_key():
+    encrypted = b"".join(backup.iter_encrypted_chunks(io.BytesIO(b"secret"), Fernet(Fernet.generate_key())))
+    with pytest.raises(InvalidToken):
+        backup.decrypt_stream(io.BytesIO(encrypted), io.BytesIO(), Fernet(Fernet.generate_key()))
+
+
+def test_legacy_single_token_backup_decrypts():
+    cipher = Fernet(Fernet.generate_key())
+    out = io.BytesIO()
+    backup.decrypt_stream(io.BytesIO(cipher.encrypt(b"legacy zip bytes")), out, cipher)
+    assert out.getvalue() == b"legacy zip bytes"
+
+
+def test_iter_backup_file_cleans_up_workdir(tmp_path):
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    path = workdir / "backup.zip"
+    path.write_bytes(b"z" * 5000)
+
+    chunks = list(backup.iter_backup_file(path, cleanup_dir=workdir, chunk_size=1024))
+    assert b"".join(chunks) == b"z" * 5000
+    assert not workdir.exists()
+
+
+def test_iter_backup_file_encrypts_when_cipher_given(tmp_path):
+    cipher = Fernet(Fernet.generate_key())
+    path = tmp_path / "backup.zip"
+    path.write_bytes(b"payload" * 100)
+
+    encrypted = b"".join(backup.iter_backup_file(path, cipher=cipher))
+    dest = tmp_path / "restored.zip"
+    (tmp_path / "backup.zip.enc").write_bytes(encrypted)
+    backup.decrypt_file(tmp_path / "backup.zip.enc", dest, cipher)
+    assert dest.read_bytes() == b"payload" * 100
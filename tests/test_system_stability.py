@@ -88,7 +88,8 @@ class TestSystemInterruptions(unittest.TestCase):
         auditor = app.WalletAuditor(self.db)
         with patch('time.sleep') as mock_sleep:
             auditor.run_audit()
-            self.assertGreaterEqual(mock_get.call_count, 5)
+            # The balance request is retried with backoff, then given up on
+            self.assertEqual(mock_get.call_count, app.API_RETRY_MAX_ATTEMPTS)
             mock_sleep.assert_called()
 
 
@@ -112,9 +113,8 @@ class TestDatabaseIntegrity(unittest.TestCase):
         db.commit()
         
         db.create_safety_backup()
-        # Check that backup file exists
-        backup_exists = (app.BASE_DIR / f"{app.DB_FILE.stem}.bak").exists()
-        self.assertTrue(backup_exists)
+        # Check that a safety snapshot was recorded
+        self.assertIsNotNone(db.snapshot_store().latest('safety'))
         db.close()
     
     def test_database_backup_restoration(self):
@@ -0,0 +1,109 @@
+"""
+Tests for the materialized dashboard aggregates (src/core/trade_stats.py)
+and the stat-validated file cache behind /api/stats (src/utils/file_cache.py).
+"""
+
+import os
+import sqlite3
+
+import pytest
+
+from src.core.trade_stats import ensure_trade_stats, read_trade_stats
+from src.utils.file_cache import FileStampCache
+
+
+def create_trades(conn):
+    conn.execute("""CREATE TABLE trades (id TEXT PRIMARY KEY, date TEXT, source TEXT, destination TEXT,
+                    action TEXT, coin TEXT, amount TEXT, price_usd TEXT, fee TEXT, fee_coin TEXT, batch_id TEXT)""")
+
+
+@pytest.fixture()
+def conn():
+    conn = sqlite3.connect(':memory:')
+    create_trades(conn)
+    conn.executemany("INSERT INTO trades (id, date, action, coin) VALUES (?, ?, ?, ?)", [
+        ('1', '2024-01-01', 'BUY', 'BTC'),
+        ('2', '2024-02-01', 'BUY', 'ETH'),
+        ('3', '2024-03-01', 'SELL', 'BTC'),
+    ])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def brute_force(conn):
+    actions = dict(conn.execute("SELECT action, COUNT(*) FROM trades GROUP BY action").fetchall())
+    coins = dict(conn.execute("SELECT coin, COUNT(*) FROM trades GROUP BY coin").fetchall())
+    return actions, coins
+
+
+def test_counts_follow_every_write(conn):
+    assert ensure_trade_stats(conn)
+    assert not ensure_trade_stats(conn)
+    stats = read_trade_stats(conn)
+    assert stats['total'] == 3
+    assert stats['actions'] == {'BUY': 2, 'SELL': 1}
+    assert list(stats['top_coins']) == ['BTC', 'ETH']
+    assert stats['date_range'] == {'min': '2024-01-01', 'max': '2024-03-01'}
+
+    conn.execute("INSERT INTO trades (id, date, action, coin) VALUES ('4', '2023-12-31', 'INCOME', NULL)")
+    conn.execute("INSERT OR IGNORE INTO trades (id, date, action, coin) VALUES ('1', '2024-01-01', 'BUY', 'BTC')")
+    conn.execute("UPDATE trades SET action='SELL', coin='SOL' WHERE id='2'")
+    conn.execute("UPDATE trades SET price_usd='5' WHERE id='3'")
+    conn.execute("DELETE FROM trades WHERE id='1'")
+    conn.commit()
+
+    stats = read_trade_stats(conn)
+    actions, coins = brute_force(conn)
+    assert stats['actions'] == actions == {'INCOME': 1, 'SELL': 2}
+    assert stats['top_coins'] == coins
+    assert stats['total'] == 3
+    assert stats['date_range']['min'] == '2023-12-31'
+
+
+def test_top_coins_are_limited_and_ordered(conn):
+    conn.executemany("INSERT INTO trades (id, action, coin) VALUES (?, 'BUY', 'DOGE')",
+                     [(f"d{i}",) for i in range(3)])
+    stats = read_trade_stats(conn, top_coins=1)
+    assert stats['top_coins'] == {'DOGE': 3}
+
+
+def test_recreated_trades_table_is_rebuilt(conn):
+    read_trade_stats(conn)
+    # A schema migration copies trades into a new table, dropping the triggers with the old one
+    conn.execute("ALTER TABLE trades RENAME TO trades_old")
+    create_trades(conn)
+    conn.execute("INSERT INTO trades SELECT * FROM trades_old")
+    conn.execute("DROP TABLE trades_old")
+    conn.execute("INSERT INTO trades (id, action, coin) VALUES ('9', 'BUY', 'ADA')")
+    conn.commit()
+    stats = read_trade_stats(conn)
+    assert stats['total'] == 4
+    assert stats['top_coins'] == brute_force(conn)[1]
+
+
+def test_file_cache_reloads_when_file_changes(tmp_path):
+    cache = FileStampCache()
+    path = tmp_path / 'US_transaction_LOSS_ANALYSIS.csv'
+    loads = []
+
+    def loader(p):
+        loads.append(p)
+        return p.read_text() if p.exists() else None
+
+    assert cache.get(path, loader) is None
+    assert cache.get(path, loader) is None
+    path.write_text('Item,Value\nA,1\n')
+    assert cache.get(path, loader) == 'Item,Value\nA,1\n'
+    assert cache.get(path, loader) == 'Item,Value\nA,1\n'
+    assert len(loads) == 2
+
+    path.write_text('Item,Value\nA,2\n')
+    stamp = path.stat()
+    os.utime(path, ns=(stamp.st_atime_ns, stamp.st_mtime_ns + 1_000_000))
+    assert cache.get(path, loader) == 'Item,Value\nA,2\n'
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,151 @@
+"""
+Tests for TransactionValidator's columnar batch validation.
+validate_frame must report exactly what validate_transaction reports per row.
+"""
+
+import pandas as pd
+import pytest
+from decimal import Decimal
+
+import src.core.engine as engine
+from src.transaction_validator import TransactionValidator, validate_and_log
+
+
+ROWS = [
+    {'action': 'BUY', 'coin': 'BTC', 'amount': '0.5', 'price_usd': '42000', 'date': '2024-01-01'},
+    {'action': 'buy', 'coin': 'eth', 'amount': 2, 'price_usd': 0, 'date': '2024-01-02T10:00:00+00:00'},
+    {'action': 'HODL', 'coin': 'BTC', 'amount': '1', 'price_usd': '100', 'date': '2024-01-03'},
+    {'action': 5, 'coin': None, 'amount': '1', 'price_usd': '100', 'date': '2024-01-03'},
+    {'action': 'SELL', 'coin': 'NOT A COIN!', 'amount': 'abc', 'price_usd': '1e8', 'date': '01/15/2024'},
+    {'action': 'SELL', 'coin': 'BTC', 'amount': '0.000000001', 'price_usd': '0.00000001', 'date': ''},
+    {'action': 'SELL', 'coin': 'BTC', 'amount': '0.00000001', 'price_usd': '0.0000001', 'date': None},
+    {'action': 'SELL', 'coin': 'BTC', 'amount': '1000000', 'price_usd': '10000000', 'date': '2024-02-01'},
+    {'action': 'SELL', 'coin': 'BTC', 'amount': '1000000.01', 'price_usd': True, 'date': 20240201},
+    {'action': 'TRANSFER', 'coin': 'USDC', 'amount': Decimal('3'), 'price_usd': Decimal('1'), 'date': '2024-02-02'},
+    {'coin': 'BTC', 'amount': '1'},
+]
+
+
+def _row_by_row(rows, valid_actions=None):
+    errors = {}
+    for pos, tx in enumerate(rows):
+        if valid_actions is not None:
+            saved, TransactionValidator.VALID_ACTIONS = TransactionValidator.VALID_ACTIONS, valid_actions
+        try:
+            ok, messages = TransactionValidator.validate_transaction(tx)
+        finally:
+            if valid_actions is not None:
+                TransactionValidator.VALID_ACTIONS = saved
+        if not ok:
+            errors[pos] = messages
+    return errors
+
+
+class TestValidateFrame:
+    def test_matches_validate_transaction_for_dicts(self):
+        expected = _row_by_row(ROWS)
+        valid, errors = TransactionValidator.validate_frame(ROWS)
+        assert errors == expected
+        assert valid.tolist() == [pos not in expected for pos in range(len(ROWS))]
+        assert valid.tolist()[:2] == [True, True]
+
+    def test_matches_validate_transaction_for_frames_and_columns(self):
+        rows = [r for r in ROWS if TransactionValidator.REQUIRED_FIELDS <= r.keys()]
+        expected = _row_by_row(rows)
+        frame = pd.DataFrame(rows, index=range(100, 100 + len(rows)))
+        assert TransactionValidator.validate_frame(frame)[1] == expected
+        columns = {field: [r[field] for r in rows] for field in rows[0]}
+        assert TransactionValidator.validate_frame(columns)[1] == expected
+
+    def test_numeric_columns_use_exact_bounds(self):
+        frame = pd.DataFrame({
+            'action': ['BUY'] * 4,
+            'coin': ['BTC'] * 4,
+            'amount': [1e-8, 9.99e-9, 1e6, 1e6 + 1e-6],
+            'price_usd': [1e-7, 9.9e-8, 1e7, 0.0],
+            'date': ['2024-01-01'] * 4,
+        })
+        expected = _row_by_row(frame.to_dict('records'))
+        valid, errors = TransactionValidator.validate_frame(frame)
+        assert errors == expected
+        assert valid.tolist() == [True, False, True, False]
+
+    def test_missing_column_reported_on_every_row(self):
+        frame = pd.DataFrame({'action': ['BUY', 'SELL'], 'coin': ['BTC', 'ETH'],
+                              'amount': [1, 2], 'price_usd': [1, 2]})
+        valid, errors = TransactionValidator.validate_frame(frame)
+        assert not valid.any()
+        assert errors == _row_by_row(frame.to_dict('records'))
+        assert errors[0][-1] == 'date is empty'
+
+    def test_valid_actions_override(self):
+        rows = [dict(ROWS[0], action='DEPOSIT'), dict(ROWS[0], action='SPEND')]
+        assert TransactionValidator.validate_frame(rows)[0].tolist() == [False, False]
+        valid, errors = TransactionValidator.validate_frame(rows, {'DEPOSIT'})
+        assert valid.tolist() == [True, False]
+        assert errors == _row_by_row(rows, {'DEPOSIT'})
+
+    def test_empty_input(self):
+        valid, errors = TransactionValidator.validate_frame([])
+        assert len(valid) == 0 and errors == {}
+
+    def test_validate_batch_keeps_contract(self):
+        valid_count, invalid = TransactionValidator.validate_batch(ROWS)
+        expected = _row_by_row(ROWS)
+        assert valid_count == len(ROWS) - len(expected)
+        assert [i['index'] for i in invalid] == list(expected)
+        assert invalid[0]['transaction'] is ROWS[invalid[0]['index']]
+        assert [i['errors'] for i in invalid] == list(expected.values())
+
+    def test_validate_and_log_filters_invalid(self):
+        expected = _row_by_row(ROWS)
+        kept = validate_and_log(ROWS)
+        assert kept == [tx for pos, tx in enumerate(ROWS) if pos not in expected]
+
+
+@pytest.mark.parametrize('chunk_rows', [None, 2])
+def test_ingestor_reports_invalid_trades(tmp_path, monkeypatch, chunk_rows):
+    if chunk_rows:
+        monkeypatch.setattr(engine, 'VALIDATION_CHUNK_ROWS', chunk_rows)
+    chunks = []
+    original = TransactionValidator.validate_frame
+    monkeypatch.setattr(TransactionValidator, 'validate_frame',
+                        staticmethod(lambda rows, *a, **k: chunks.append(len(rows)) or original(rows, *a, **k)))
+
+    class DummyDB:
+        def __init__(self):
+            self.trades = []
+
+        def save_trade(self, trade):
+            self.trades.append(trade)
+
+        def commit(self):
+            pass
+
+    csv_path = tmp_path / 'trades.csv'
+    pd.DataFrame({
+        'date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+        'coin': ['BTC', 'BTC', 'BTC'],
+        'amount': [0.5, 0.000000001, 1],
+        'price_usd': [40000, 40000, 40000],
+        'type': ['buy', 'buy', 'deposit'],
+    }).to_csv(csv_path, index=False)
+
+    db = DummyDB()
+    ingest = engine.Ingestor(db=db)
+    ingest.ml_enabled = False
+    ingest._proc_csv_smart(csv_path, 'BATCH')
+
+    # Validation is report-only: every parsed trade is still saved
+    assert len(db.trades) == 3
+    assert ingest.last_validation['valid'] == 2
+    assert ingest.last_validation['invalid'] == 1
+    [sample] = ingest.last_validation['samples']
+    assert sample['id'] == 'BATCH_1_OUT'
+    assert 'below minimum' in sample['errors'][0]
+    # Saved trades are validated in bounded chunks, not held for the whole file
+    assert chunks == ([2, 1] if chunk_rows else [3])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
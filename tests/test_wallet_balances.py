@@ -0,0 +1,209 @@
+"""
+Tests for concurrent, rate-limited wallet balance checks
+(src/core/wallet_balances.py) and WalletAuditor, against a local fake
+Blockchair/Moralis HTTP server.
+"""
+
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import src.core.engine as engine
+from src.core import wallet_balances as wb
+
+BTC_SATS = {f"bc1q{i:04d}": (i + 1) * 100_000_000 for i in range(150)}
+ETH_WEI = {f"0x{i:040x}": str((i + 1) * 10 ** 18) for i in range(30)}
+
+
+class FakeChainAPI(BaseHTTPRequestHandler):
+    """Blockchair and Moralis endpoints (paths under /blockchair and /moralis)."""
+    server_version = 'FakeChainAPI'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        with server.lock:
+            server.requests.append(url.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = server.fail_next > 0
+            server.fail_next -= fail
+        try:
+            time.sleep(server.delay)
+            if fail:
+                return self.reply(429, {'error': 'slow down'})
+            parts = url.path.strip('/').split('/')
+            if parts[0] == 'blockchair' and parts[2] == 'dashboards':
+                context = {'state': 850000}
+                if parts[3] == 'address':
+                    addr = parts[4]
+                    table = BTC_SATS if parts[1] == 'bitcoin' else ETH_WEI
+                    return self.reply(200, {'data': {addr: {'address': {'balance': table.get(addr, 0)}}},
+                                            'context': context})
+                addrs = parts[4].split(',')
+                return self.reply(200, {'data': {'set': {}, 'addresses': {a: {'balance': BTC_SATS.get(a, 0)}
+                                                                            for a in addrs}},
+                                        'context': context})
+            if parts[0] == 'moralis':
+                if self.headers.get('X-API-Key') != 'moralis-key':
+                    return self.reply(401, {'message': 'bad key'})
+                if parts[1:] == ['wallets', 'balances']:
+                    addrs = query.get('wallet_addresses', [])
+                    return self.reply(200, [{'chain': '0x1', 'block_number': '19000000', 'wallet_balances': [
+                        {'address': a.lower(), 'balance': ETH_WEI.get(a.lower(), '0')} for a in addrs]}])
+                return self.reply(200, {'balance': ETH_WEI.get(parts[1].lower(), '0')})
+            self.reply(404, {'error': 'not found'})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeChainAPI)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.in_flight = server.max_in_flight = server.fail_next = 0
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def unlimited():
+    return {'blockchair': wb.TokenBucket(1000, 1000), 'moralis': wb.TokenBucket(1000, 1000)}
+
+
+def providers(api):
+    return [wb.MoralisProvider('moralis-key', base_url=f"{api.url}/moralis", retry_delay=0),
+            wb.BlockchairProvider(base_url=f"{api.url}/blockchair", retry_delay=0)]
+
+
+def test_wallet_addresses_normalizes_chains():
+    wallets = {'BTC': ['a', 'a', 'b'], 'bitcoin': {'addresses': ['c']}, 'ETH': '0x1', 'SOL': []}
+    assert wb.wallet_addresses(wallets) == {'bitcoin': ['a', 'b', 'c'], 'ethereum': ['0x1']}
+
+
+def test_token_bucket_waits_for_tokens():
+    now = [0.0]
+    bucket = wb.TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+    with patch('time.sleep') as sleep:
+        assert bucket.acquire() == 0 and bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert bucket.acquire() == pytest.approx(1.0)  # queued behind the previous waiter
+        now[0] = 10.0
+        assert bucket.acquire() == 0
+    assert [c.args[0] for c in sleep.call_args_list] == [pytest.approx(0.5), pytest.approx(1.0)]
+
+
+def test_cache_expires_and_persists(tmp_path):
+    now = [1000.0]
+    path = tmp_path / 'balances.json'
+    cache = wb.BalanceCache(path, ttl=60, clock=lambda: now[0])
+    day = wb.BalanceCache.period(day='2024-05-01')
+    cache.put('bitcoin', 'a', day, Decimal('1.5'), block=1)
+    cache.put('bitcoin', 'a', wb.BalanceCache.period(block=7), Decimal('2'))
+    cache.save()
+
+    reloaded = wb.BalanceCache(path, ttl=60, clock=lambda: now[0])
+    assert reloaded.get('bitcoin', 'a', day) == Decimal('1.5')
+    assert reloaded.get('bitcoin', 'a', 'block:7') == Decimal('2')
+    assert reloaded.get('bitcoin', 'a', '2024-05-02') is None
+    now[0] += 61
+    assert reloaded.get('bitcoin', 'a', day) is None
+    assert wb.BalanceCache(path, ttl=60, clock=lambda: now[0])._entries == {}
+
+
+def test_batches_concurrency_and_cache(api, tmp_path):
+    api.delay = 0.05
+    wallets = {'bitcoin': list(BTC_SATS), 'ethereum': list(ETH_WEI)}
+    cache = wb.BalanceCache(tmp_path / 'balances.json')
+    checker = wb.BalanceChecker(providers(api), cache=cache, limiters=unlimited(), max_workers=4)
+    balances = checker.check(wallets)
+
+    assert len(balances) == 180
+    assert balances[('bitcoin', 'bc1q0002')] == Decimal(3)
+    assert balances[('ethereum', f"0x{29:040x}")] == Decimal(30)
+    # 150 BTC addresses in 2 Blockchair batches, 30 ETH addresses in 2 Moralis batches
+    assert sorted(p.split('/')[1] for p in api.requests) == ['blockchair'] * 2 + ['moralis'] * 2
+    assert api.max_in_flight > 1
+    assert checker.stats['requests'] == 4
+
+    again = wb.BalanceChecker(providers(api), cache=wb.BalanceCache(tmp_path / 'balances.json'),
+                              limiters=unlimited())
+    assert again.check(wallets) == balances
+    assert len(api.requests) == 4 and again.stats['cached'] == 180
+
+
+def test_blockchair_ethereum_is_one_address_per_request(api):
+    checker = wb.BalanceChecker([wb.BlockchairProvider(base_url=f"{api.url}/blockchair")],
+                                limiters=unlimited(), max_workers=8)
+    balances = checker.check({'ethereum': list(ETH_WEI)[:5], 'solana': ['So1']})
+    assert len(api.requests) == 5
+    assert all('/dashboards/address/' in p for p in api.requests)
+    assert balances[('ethereum', f"0x{0:040x}")] == Decimal(1)
+    assert checker.stats['unsupported'] == 1
+
+
+def test_rate_limit_spaces_requests(api):
+    limiters = {'blockchair': wb.TokenBucket(rate=20, burst=1)}
+    checker = wb.BalanceChecker([wb.BlockchairProvider(base_url=f"{api.url}/blockchair")],
+                                limiters=limiters, max_workers=8)
+    start = time.monotonic()
+    checker.check({'ethereum': list(ETH_WEI)[:5]})
+    assert time.monotonic() - start >= 0.19  # 4 waits of 1/20 s after the first token
+
+
+def test_retries_429_and_reports_failures(api, caplog):
+    api.fail_next = 1
+    checker = wb.BalanceChecker(providers(api), limiters=unlimited())
+    assert checker.check({'bitcoin': ['bc1q0000']}) == {('bitcoin', 'bc1q0000'): Decimal(1)}
+    assert len(api.requests) == 2
+
+    bad_key = wb.MoralisProvider('wrong-key', base_url=f"{api.url}/moralis", retry_delay=0)
+    checker = wb.BalanceChecker([bad_key], limiters=unlimited())
+    with caplog.at_level('WARNING', logger='Crypto_Transaction_Engine'):
+        assert checker.check({'ethereum': [f"0x{1:040x}"]}) == {}
+    assert checker.stats['failed'] == 1
+    assert 'HTTP 401' in caplog.text
+    assert len(api.requests) == 3  # 4xx other than 429 is not retried
+
+
+def test_wallet_auditor_sums_balances_per_coin(api, tmp_path):
+    wallets = {'BTC': ['bc1q0000', 'bc1q0001'], 'ETH': [f"0x{0:040x}"], 'polygon': []}
+    with patch.object(engine, 'load_wallets_file', return_value=wallets), \
+            patch.dict(engine.GLOBAL_CONFIG['general'], {'run_audit': True}), \
+            patch.dict(engine.GLOBAL_CONFIG.setdefault('performance', {}), {'respect_free_tier_limits': False}):
+        auditor = engine.WalletAuditor(None, providers=providers(api),
+                                       cache=wb.BalanceCache(tmp_path / 'balances.json'))
+        auditor.run_audit()
+    assert auditor.real == {'BTC': 3.0, 'ETH': 1.0}
+    assert auditor.balances[('bitcoin', 'bc1q0001')] == Decimal(2)
+    assert auditor.stats['requests'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
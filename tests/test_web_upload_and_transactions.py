@@ -147,3 +147,90 @@ def test_transactions_crud_create_update_delete(app_client):
     assert del_resp.status_code == 200
 
 
+
+
+def test_transaction_update_records_history(app_client):
+    from src.advanced_ml_features import TransactionHistory
+
+    client = app_client['client']
+    csrf = app_client['csrf']
+
+    tx = {
+        'date': '2024-01-04 10:00:00',
+        'action': 'BUY',
+        'coin': 'ETH',
+        'amount': '1',
+        'price_usd': '2200',
+        'fee': '0',
+        'fee_coin': '',
+        'source': 'Manual'
+    }
+    created = client.post('/api/transactions', json={'data': json.dumps(tx)}, headers=_headers(csrf)).get_json()
+    tx_id = created.get('id')
+
+    upd = {'price_usd': '2300'}
+    resp = client.put(f'/api/transactions/{tx_id}', json={'data': json.dumps(upd)}, headers=_headers(csrf))
+    assert resp.status_code == 200
+
+    history = TransactionHistory().get_history(str(tx_id))
+    assert history[-1]['old_value'] == {'price_usd': '2200'}
+    assert history[-1]['new_value'] == {'price_usd': '2300'}
+
+
+def test_history_store_is_set_up_once_per_process(app_client, monkeypatch):
+    import web_server as ws
+    from src.advanced_ml_features import TransactionHistory
+
+    client = app_client['client']
+    csrf = app_client['csrf']
+    monkeypatch.setattr(ws, '_history_stores', {})
+    setups = []
+    original = TransactionHistory._init_store
+    monkeypatch.setattr(TransactionHistory, '_init_store', lambda self: setups.append(1) or original(self))
+
+    tx = {'date': '2024-01-05 10:00:00', 'action': 'BUY', 'coin': 'ETH', 'amount': '1', 'price_usd': '2200',
+          'fee': '0', 'fee_coin': '', 'source': 'Manual'}
+    tx_id = client.post('/api/transactions', json={'data': json.dumps(tx)}, headers=_headers(csrf)).get_json()['id']
+    for price in ('2300', '2400', '2500'):
+        resp = client.put(f'/api/transactions/{tx_id}', json={'data': json.dumps({'price_usd': price})},
+                          headers=_headers(csrf))
+        assert resp.status_code == 200
+
+    assert len(setups) == 1
+    assert [h['new_value'] for h in ws.get_transaction_history().get_history(str(tx_id))][-3:] == [
+        {'price_usd': '2300'}, {'price_usd': '2400'}, {'price_usd': '2500'}]
+
+
+def test_reprocess_all_runs_as_background_task(app_client, tmp_path, monkeypatch):
+    import time
+    import web_server as ws
+
+    config_file = tmp_path / 'config.json'
+    config_file.write_text(json.dumps({'ml_fallback': {'enabled': True, 'model_name': 'shim', 'batch_size': 2,
+                                                       'confidence_threshold': 0.5}}))
+    monkeypatch.setattr(ws, 'CONFIG_FILE', config_file, raising=False)
+
+    client = app_client['client']
+    csrf = app_client['csrf']
+    conn = ws.get_db_connection()
+    conn.executemany(
+        "INSERT INTO trades (id, date, source, action, coin, amount, price_usd, fee) VALUES (?, '2024-01-05', 'Manual', 'UNKNOWN', ?, '1', '10', '0')",
+        [(f'rp-{coin}', coin) for coin in ('BTC', 'ETH', 'SOL')]
+    )
+    conn.commit()
+    conn.close()
+
+    resp = client.post('/api/transactions/reprocess-all', json={}, headers=_headers(csrf))
+    assert resp.status_code == 200
+    started = json.loads(resp.get_json()['data'])
+    assert started['success'] is True
+
+    progress = {}
+    for _ in range(100):
+        progress = client.get(f"/api/progress/{started['task_id']}").get_json()
+        if progress['status'] not in ('queued', 'running'):
+            break
+        time.sleep(0.05)
+    assert progress['status'] == 'completed'
+    assert progress['processed'] == 3
+    assert progress['updated'] == 3
@@ -131,6 +131,31 @@ def test_wizard_restore_encrypted_zip(client_and_tmp):
     assert ws.USERS_FILE.exists()
 
 
+def test_wizard_restore_chunked_encrypted_zip(client_and_tmp):
+    from src.core.backup import iter_encrypted_chunks
+
+    client, tmpdir = client_and_tmp
+
+    password = 'StrongPass!123'
+    db_key = DatabaseEncryption.generate_random_key()
+    enc_key, salt = DatabaseEncryption.encrypt_key(db_key, password)
+    (tmpdir / '.db_key').write_bytes(enc_key)
+    (tmpdir / '.db_salt').write_bytes(salt)
+
+    # Streamed backups seal the zip in small chunks
+    raw_zip = make_plain_backup_zip(tmpdir)
+    enc_payload = b''.join(iter_encrypted_chunks(io.BytesIO(raw_zip), Fernet(db_key), chunk_size=64))
+
+    data = {
+        'file': (io.BytesIO(enc_payload), 'backup_123.zip.enc'),
+        'password': password
+    }
+    resp = client.post('/api/wizard/restore-backup', data=data, content_type='multipart/form-data')
+    assert resp.status_code == 200
+    assert resp.get_json().get('success') is True
+    assert json.loads(ws.CONFIG_FILE.read_text()) == {'accounting_method': 'HIFO'}
+
+
 def test_wizard_restore_requires_file(client_and_tmp):
     client, _ = client_and_tmp
     resp = client.post('/api/wizard/restore-backup', data={}, content_type='multipart/form-data')